@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for trace decorator overhead with large arguments.
+
+Times a bare call, a traced call that isn't evaluated (the common case:
+capture is deferred and never runs), the eager ``str(args)`` capture the
+decorator used to do on every call, and the bounded capture that now runs
+only for evaluated calls -- with document arguments of 1 KB to 500 KB.
+
+Usage:
+    python scripts/bench_capture.py
+    python scripts/bench_capture.py --iterations 500
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detra.config.loader import set_config
+from detra.config.schema import DetraConfig, NodeConfig, SamplingConfig
+from detra.decorators.capture import capture_arguments
+from detra.decorators.trace import set_backend, set_evaluation_engine, set_sampling_config, trace
+
+SIZES = [1_024, 102_400, 512_000]
+FILLER = "The parties agree to the terms set out in section 4 of the agreement. "
+
+
+def legacy_capture(args: tuple, kwargs: dict) -> str:
+    """The eager capture the deferred one replaced."""
+    parts = []
+    if args:
+        parts.append(str(args))
+    if kwargs:
+        parts.append(str(kwargs))
+    return " | ".join(parts) if parts else "no input"
+
+
+class NullEngine:
+    async def evaluate(self, *args, **kwargs):
+        return None
+
+
+def bench(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trace input capture")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    set_config(DetraConfig(app_name="bench", nodes={"n": NodeConfig()}))
+    set_backend(None)
+    set_evaluation_engine(NullEngine())
+    set_sampling_config(SamplingConfig(
+        rate=0.0, always_sample_errors=False, always_sample_flagged=False,
+    ))
+
+    def summarize(document, metadata):
+        return "summary"
+
+    traced = trace("n")(summarize)
+    metadata = {"source": "upload", "pages": list(range(50))}
+
+    print(f"{'size':>8} {'bare':>10} {'traced':>10} {'overhead':>10} "
+          f"{'eager str()':>12} {'bounded':>10}")
+    for size in SIZES:
+        document = (FILLER * (size // len(FILLER) + 1))[:size]
+        call_args = (document, metadata)
+        bare = bench(lambda: summarize(*call_args), args.iterations)
+        wrapped = bench(lambda: traced(*call_args), args.iterations)
+        eager = bench(lambda: legacy_capture(call_args, {}), args.iterations)
+        bounded = bench(lambda: capture_arguments(call_args, {}), args.iterations)
+        print(
+            f"{size // 1024:>6}KB {bare * 1e6:>8.1f}us {wrapped * 1e6:>8.1f}us "
+            f"{(wrapped - bare) * 1e6:>8.1f}us {eager * 1e6:>10.1f}us {bounded * 1e6:>8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
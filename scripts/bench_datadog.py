@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DatadogClient metric submission against a local stand-in.
+
+Starts a keep-alive HTTP/1.1 server on localhost (in a separate process)
+that answers every request with 202 after a short simulated latency, then
+submits metric batches from many concurrent tasks through:
+
+* legacy  -- a new ApiClient per submission on a 4-worker thread pool, as
+  DatadogClient used to do
+* pooled  -- the shared, pooled ApiClient (``transport: api_client``)
+* httpx   -- the async httpx transport (``transport: httpx``)
+
+and reports throughput and submission latency percentiles.  With --tls the
+stand-in serves HTTPS with a throwaway self-signed certificate (made with the
+openssl CLI), so the TLS handshakes the legacy path repeats per submission
+are part of the comparison, as they are against the real API.
+
+Usage:
+    python scripts/bench_datadog.py
+    python scripts/bench_datadog.py --tls
+    python scripts/bench_datadog.py --submissions 4000 --concurrency 128 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import structlog
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from datadog_api_client import ApiClient
+from datadog_api_client.v2.api.metrics_api import MetricsApi
+
+from detra.config.schema import DatadogConfig
+from detra.telemetry.datadog_client import DatadogClient
+
+
+def make_certificate(directory: str) -> tuple[str, str]:
+    cert, key = f"{directory}/cert.pem", f"{directory}/key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=127.0.0.1",
+            "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # One write per response, sent at once: no Nagle/delayed-ACK stalls
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        body = b'{"errors": []}'
+        self.send_response(202)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def serve(listener: socket.socket, latency: float, tls: tuple[str, str] | None) -> None:
+    Handler.latency = latency
+    server = Server(listener.getsockname(), Handler, bind_and_activate=False)
+    server.socket = listener
+    if tls:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*tls)
+        # Handshake in the handler thread, not serially in the accept loop
+        server.socket = context.wrap_socket(
+            listener, server_side=True, do_handshake_on_connect=False,
+        )
+    server.serve_forever()
+
+
+def start_server(
+    latency: float, tls: tuple[str, str] | None = None, processes: int = 4,
+) -> tuple[list[multiprocessing.Process], str]:
+    """Serve from a few forked processes sharing one listening socket.
+
+    Separate processes keep the stand-in off this process's GIL, and off a
+    single GIL of its own, which would otherwise dominate the tail.
+    """
+    listener = socket.create_server(("127.0.0.1", 0), backlog=1024)
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=serve, args=(listener, latency, tls), daemon=True)
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    scheme = "https" if tls else "http"
+    return workers, f"{scheme}://127.0.0.1:{listener.getsockname()[1]}"
+
+
+def batch(size: int) -> list[dict]:
+    now = time.time()
+    return [
+        {
+            "metric": f"detra.bench.metric_{i % 12}",
+            "type": "gauge" if i % 2 else "count",
+            "points": [[now, float(i)]],
+            "tags": [f"node:node_{i % 5}", "app:bench"],
+        }
+        for i in range(size)
+    ]
+
+
+def make_client(url: str, transport: str, ca_cert: str | None = None) -> DatadogClient:
+    client = DatadogClient(DatadogConfig(api_key="k", app_key="a", transport=transport))
+    client.configuration.host = url
+    if ca_cert:
+        client.configuration.ssl_ca_cert = ca_cert
+    return client
+
+
+class LegacyClient:
+    """The per-submission ApiClient the pooled client replaced."""
+
+    def __init__(self, client: DatadogClient):
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def _submit(self, metrics: list[dict]) -> bool:
+        with ApiClient(self.client.configuration) as api_client:
+            self.client._metrics_api = MetricsApi(api_client)
+            try:
+                return self.client._submit_metrics_sync(metrics)
+            finally:
+                self.client._metrics_api = None
+
+    async def submit_metrics(self, metrics: list[dict]) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._submit, metrics)
+
+    async def close(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+async def run(client, submissions: int, concurrency: int, metrics: list[dict]) -> dict:
+    latencies: list[float] = []
+    failures = 0
+    queue = iter(range(submissions))
+
+    async def worker():
+        nonlocal failures
+        for _ in queue:
+            start = time.perf_counter()
+            if not await client.submit_metrics(metrics):
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rate": submissions / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "failures": failures,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark Datadog metric submission")
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=50, help="series per submission")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS")
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    with tempfile.TemporaryDirectory() as directory:
+        tls = make_certificate(directory) if args.tls else None
+        await bench_all(args, tls)
+
+
+async def bench_all(args: argparse.Namespace, tls: tuple[str, str] | None) -> None:
+    servers, url = start_server(args.latency_ms / 1000, tls)
+    ca_cert = tls[0] if tls else None
+    metrics = batch(args.batch)
+    print(f"{args.submissions} submissions of {args.batch} series, "
+          f"{args.concurrency} concurrent, {args.latency_ms}ms server latency, "
+          f"{'https' if tls else 'http'}")
+    print(f"{'client':>8} {'submits/s':>10} {'p50':>9} {'p99':>9} {'failed':>7}")
+    for name in ("legacy", "pooled", "httpx"):
+        if name == "legacy":
+            client = LegacyClient(make_client(url, "api_client", ca_cert))
+        else:
+            transport = "api_client" if name == "pooled" else "httpx"
+            client = make_client(url, transport, ca_cert)
+        # Warm up: pooled clients open their connections once
+        await run(client, args.concurrency, args.concurrency, metrics)
+        stats = await run(client, args.submissions, args.concurrency, metrics)
+        await client.close()
+        print(f"{name:>8} {stats['rate']:>10.0f} {stats['p50']:>7.1f}ms "
+              f"{stats['p99']:>7.1f}ms {stats['failures']:>7}")
+    for worker in servers:
+        worker.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
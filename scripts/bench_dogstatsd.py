@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the DogStatsD backend against a local UDP listener.
+
+Emits the metrics a traced, evaluated call produces (node latency and
+call count, eval score, flagged count and eval latency) for many calls
+and reports the cost per call and the datagrams sent, for:
+
+* per-line -- one datagram per metric, as a plain StatsD client sends
+* packed   -- DogStatsDBackend packing lines up to the UDP MTU
+* buffered -- packed, behind BufferedBackend (the default with batching),
+  which sums counts and keeps the last gauge, so only distribution
+  values are sent one line each
+
+A separate thread drains the listener and counts what arrives.
+
+Usage:
+    python scripts/bench_dogstatsd.py
+    python scripts/bench_dogstatsd.py --calls 50000 --nodes 20
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detra.backends.buffered import BufferedBackend
+from detra.backends.dogstatsd import DogStatsDBackend
+
+
+class Listener:
+    """Counts datagrams and lines arriving on a local UDP port."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.2)
+        self.packets = self.lines = 0
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.sock.getsockname()
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except TimeoutError:
+                continue
+            except OSError:
+                return
+            self.packets += 1
+            self.lines += data.count(b"\n") + 1
+
+    def settle(self) -> tuple[int, int]:
+        time.sleep(0.3)
+        counts = (self.packets, self.lines)
+        self.packets = self.lines = 0
+        return counts
+
+
+async def emit_calls(backend, calls: int, nodes: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        tags = {"node": f"node_{i % nodes}", "span_kind": "llm"}
+        await backend.emit_distribution("detra.node.latency_ms", 120.0 + i % 97, tags)
+        await backend.emit_count("detra.node.calls", 1, {**tags, "status": "success"})
+        await backend.emit_gauge("detra.eval.score", 0.9, tags)
+        await backend.emit_count("detra.eval.flagged", 0, tags)
+        await backend.emit_distribution("detra.eval.latency_ms", 800.0 + i % 13, tags)
+        if i % 50 == 0:
+            await asyncio.sleep(0)  # let other requests in, as a server would
+    await backend.flush()
+    return (time.perf_counter() - start) / calls
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DogStatsD backend")
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--nodes", type=int, default=8)
+    args = parser.parse_args()
+
+    listener = Listener()
+    host, port = listener.address
+    print(f"{args.calls} traced calls (5 metrics each) across {args.nodes} nodes")
+    print(f"{'backend':>9} {'per call':>9} {'datagrams':>10} {'lines':>8} {'dropped':>8}")
+    for name in ("per-line", "packed", "buffered"):
+        dogstatsd = backend = DogStatsDBackend(host, port)
+        if name == "per-line":
+            dogstatsd._append = _unpacked(dogstatsd)
+        elif name == "buffered":
+            backend = BufferedBackend(
+                dogstatsd, flush_interval=3600, max_samples_per_series=args.calls,
+            )
+        cost = await emit_calls(backend, args.calls, args.nodes)
+        packets, lines = listener.settle()
+        print(f"{name:>9} {cost * 1e6:>7.2f}us {packets:>10} {lines:>8} "
+              f"{dogstatsd.dropped_packets:>8}")
+        await backend.close()
+    listener.sock.close()
+
+
+def _unpacked(backend: DogStatsDBackend):
+    """Send each line in its own datagram, as a plain StatsD client does."""
+    def append(line: bytes) -> None:
+        with backend._lock:
+            backend._lines.append(line)
+            backend._send_locked()
+    return append
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
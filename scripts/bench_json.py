@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for JSON handling of judge responses.
+
+Compares the previous multi-strategy ``extract_json_from_text`` (direct
+parse, fence stripping, bracket counting, a backtracking regex) on the
+stdlib ``json`` module against the single-pass span locator on the active
+codec, for the shapes judges actually return: raw JSON, fenced JSON,
+JSON after a preamble, and batched responses.  Also times
+``safe_json_dumps`` of a prompt context.
+
+Usage:
+    python scripts/bench_json.py
+    python scripts/bench_json.py --iterations 2000
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detra.utils.codec import get_codec, set_codec
+from detra.utils.serialization import extract_json_from_text, safe_json_dumps
+
+
+def behavior_result(n_expected: int = 4, n_unexpected: int = 3) -> dict:
+    return {
+        "expected_results": [
+            {
+                "behavior": f"Must cite the clause number for requirement {i}",
+                "present": i % 3 != 0,
+                "confidence": 0.87,
+                "reasoning": "The output quotes \"Section 4.2\" and explains the {term} in detail.",
+                "evidence": "per Section 4.2 [a], the parties agree",
+            }
+            for i in range(n_expected)
+        ],
+        "unexpected_results": [
+            {
+                "behavior": f"Hallucinated party name {i}",
+                "detected": False,
+                "confidence": 0.93,
+                "reasoning": "All names appear in the input document.",
+                "evidence": None,
+            }
+            for i in range(n_unexpected)
+        ],
+        "overall_assessment": "Mostly accurate; one requirement unaddressed.",
+    }
+
+
+def responses() -> dict[str, str]:
+    single = json.dumps(behavior_result(), indent=2)
+    batch = json.dumps({"items": [dict(behavior_result(), index=i) for i in range(8)]}, indent=2)
+    return {
+        "raw": single,
+        "fenced": f"```json\n{single}\n```",
+        "preamble": f"Here is my evaluation [see below]:\n\n```json\n{single}\n```\nLet me know.",
+        "batch-8": f"Sure! Results for all items:\n{batch}",
+    }
+
+
+def legacy_loads(text):
+    try:
+        return json.loads(text) if text and text.strip() else None
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def legacy_extract(text: str):
+    """The extractor the span locator replaced."""
+    text = text.strip()
+    result = legacy_loads(text)
+    if result is not None:
+        return result
+    if text.startswith("```json"):
+        text = text[7:]
+    elif text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    text = text.strip()
+    result = legacy_loads(text)
+    if result is not None:
+        return result
+    bracket_start = text.find("[")
+    if bracket_start != -1:
+        count = 0
+        for i, char in enumerate(text[bracket_start:], bracket_start):
+            if char == "[":
+                count += 1
+            elif char == "]":
+                count -= 1
+                if count == 0:
+                    result = legacy_loads(text[bracket_start:i + 1])
+                    if result is not None:
+                        return result
+                    break
+    for match in re.findall(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", text, re.DOTALL):
+        result = legacy_loads(match)
+        if result is not None:
+            return result
+    brace_start = text.find("{")
+    if brace_start != -1:
+        count = 0
+        for i, char in enumerate(text[brace_start:], brace_start):
+            if char == "{":
+                count += 1
+            elif char == "}":
+                count -= 1
+                if count == 0:
+                    result = legacy_loads(text[brace_start:i + 1])
+                    if result is not None:
+                        return result
+                    break
+    return None
+
+
+def bench(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark judge-response JSON handling")
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    codecs = ["json"]
+    for name in ("orjson", "msgspec"):
+        try:
+            set_codec(name)
+            codecs.append(name)
+        except ImportError:
+            pass
+
+    print(f"{'response':>10} {'size':>7} {'legacy':>10} "
+          + " ".join(f"{name:>10}" for name in codecs) + "  same result")
+    for label, text in responses().items():
+        legacy = bench(lambda: legacy_extract(text), args.iterations)
+        timings = []
+        for name in codecs:
+            set_codec(name)
+            assert extract_json_from_text(text) is not None
+            timings.append(bench(lambda: extract_json_from_text(text), args.iterations))
+        same = legacy_extract(text) == extract_json_from_text(text)
+        print(f"{label:>10} {len(text):>6}B {legacy * 1e6:>8.1f}us "
+              + " ".join(f"{t * 1e6:>8.1f}us" for t in timings) + f"  {same}")
+
+    context = {"node": "extract", "behaviors": behavior_result()["expected_results"] * 4}
+    for name in codecs:
+        set_codec(name)
+        dumps = bench(lambda: safe_json_dumps(context), args.iterations)
+        print(f"safe_json_dumps ({get_codec().name}): {dumps * 1e6:.1f}us")
+    set_codec(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for ContentScanner keyword matching.
+
+Compares the trie-backed KeywordIndex against the previous approach (an
+``in`` check plus a ``find`` per keyword) as the number of sensitive
+terms grows.
+
+Usage:
+    python scripts/bench_keywords.py
+    python scripts/bench_keywords.py --size 10240
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detra.security.scanners import ContentScanner
+
+TERM_COUNTS = [0, 100, 1_000, 5_000]
+FILLER = "Retrieved passage: the customer asked about their order status and refund window. "
+
+
+def legacy_scan(scanner: ContentScanner, text: str) -> list[dict]:
+    """The per-keyword loop the keyword index replaced."""
+    findings = []
+    text_lower = text.lower()
+    for category, config in scanner.CONTENT_PATTERNS.items():
+        for keyword in config["keywords"]:
+            if keyword in text_lower:
+                idx = text_lower.find(keyword)
+                findings.append({
+                    "type": category,
+                    "keyword": keyword,
+                    "context": text[max(0, idx - 20):idx + len(keyword) + 20],
+                })
+    return findings
+
+
+def bench(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content keyword scanning")
+    parser.add_argument("--size", type=int, default=102_400, help="Text size in bytes")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    text = (FILLER * (args.size // len(FILLER) + 1))[:args.size]
+
+    print(f"{'terms':>7} {'legacy':>12} {'index':>12} {'speedup':>8}")
+    for count in TERM_COUNTS:
+        terms = [
+            "".join(random.choices(string.ascii_lowercase, k=random.randint(5, 12)))
+            for _ in range(count)
+        ]
+        scanner = ContentScanner(sensitive_topics=["medical_records", *terms])
+        legacy = bench(lambda: legacy_scan(scanner, text), max(1, args.iterations // 5))
+        indexed = bench(lambda: scanner.scan(text), args.iterations)
+        print(
+            f"{count:>7} {legacy * 1e3:>10.2f}ms {indexed * 1e3:>10.2f}ms "
+            f"{legacy / indexed:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
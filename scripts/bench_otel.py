@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the OpenTelemetry backend on an in-memory SDK reader.
+
+Emits gauges, counts and histogram points with a fixed set of node tags
+and then with a per-user tag, and compares the previous backend (gauges
+as delta UpDownCounters, a sorted tag key per gauge call, no cardinality
+limit) with the current one: cost per emit, series exported, and the
+size of the gauge state each keeps.
+
+Usage:
+    python scripts/bench_otel.py
+    python scripts/bench_otel.py --emits 50000 --users 20000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from detra.backends.otel import OTelBackend
+
+
+class LegacyBackend:
+    """The gauge/counter/histogram paths OTelBackend used before."""
+
+    def __init__(self, provider: MeterProvider):
+        self._meter = provider.get_meter("detra", "0.2.0")
+        self._counters, self._histograms, self._udcs = {}, {}, {}
+        self._gauge_last: dict = {}
+
+    async def emit_gauge(self, name, value, tags=None):
+        key = (name, tuple(sorted((tags or {}).items())))
+        delta = value - self._gauge_last.get(key, 0.0)
+        self._gauge_last[key] = value
+        if name not in self._udcs:
+            self._udcs[name] = self._meter.create_up_down_counter(name)
+        self._udcs[name].add(delta, attributes=tags or {})
+
+    async def emit_count(self, name, value, tags=None):
+        if name not in self._counters:
+            self._counters[name] = self._meter.create_counter(name)
+        self._counters[name].add(value, attributes=tags or {})
+
+    async def emit_distribution(self, name, value, tags=None):
+        if name not in self._histograms:
+            self._histograms[name] = self._meter.create_histogram(name)
+        self._histograms[name].record(value, attributes=tags or {})
+
+
+def gauge_state(backend) -> int:
+    if isinstance(backend, LegacyBackend):
+        return len(backend._gauge_last)
+    return sum(len(values) for values in backend._gauges.values() if values)
+
+
+async def run(backend, emits: int, users: int) -> float:
+    start = time.perf_counter()
+    for i in range(emits):
+        tags = {"node": f"node_{i % 8}", "span_kind": "llm"}
+        if users:
+            tags["user"] = f"user_{i % users}"
+        await backend.emit_gauge("detra.eval.score", 0.9, tags)
+        await backend.emit_count("detra.node.calls", 1, tags)
+        await backend.emit_distribution("detra.node.latency_ms", 120.0 + i % 97, tags)
+    return (time.perf_counter() - start) / (emits * 3)
+
+
+def exported_series(reader: InMemoryMetricReader) -> int:
+    data = reader.get_metrics_data()
+    return sum(
+        len(metric.data.data_points)
+        for resource in data.resource_metrics
+        for scope in resource.scope_metrics
+        for metric in scope.metrics
+        if not metric.name.startswith("detra.telemetry.")
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OpenTelemetry backend")
+    parser.add_argument("--emits", type=int, default=20_000, help="emits per metric")
+    parser.add_argument("--users", type=int, default=10_000, help="distinct user tags")
+    args = parser.parse_args()
+
+    print(f"{args.emits} emits each of a gauge, a count and a histogram")
+    print(f"{'backend':>8} {'tags':>10} {'per emit':>9} {'series':>7} {'gauge state':>12}")
+    for users in (0, args.users):
+        label = f"{users} users" if users else "node only"
+        for name in ("legacy", "current"):
+            reader = InMemoryMetricReader()
+            provider = MeterProvider(metric_readers=[reader])
+            backend = (
+                LegacyBackend(provider) if name == "legacy"
+                else OTelBackend("bench", meter_provider=provider)
+            )
+            cost = await run(backend, args.emits, users)
+            print(f"{name:>8} {label:>10} {cost * 1e6:>7.2f}us "
+                  f"{exported_series(reader):>7} {gauge_state(backend):>12}")
+            provider.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for RuleBasedChecker.
+
+Compares the compiled single-pass rule engine against the previous
+approach (one uncompiled re.search per error pattern, a result object per
+passing pattern) on clean and failing outputs of 1 KB to 100 KB.
+
+Usage:
+    python scripts/bench_rules.py
+    python scripts/bench_rules.py --iterations 500
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detra.config.schema import NodeConfig
+from detra.evaluation.rules import RuleBasedChecker, RuleCheckResult
+
+SIZES = [1_024, 10_240, 102_400]
+FILLER = "The parties agree to the terms set out in section 4 of the agreement. "
+
+
+def legacy_error_scan(output_str: str) -> list[RuleCheckResult]:
+    """The per-pattern loop the compiled engine replaced."""
+    results = []
+    for pattern, severity in RuleBasedChecker.ERROR_PATTERNS:
+        match = re.search(pattern, output_str)
+        results.append(RuleCheckResult(
+            check_name=f"error_pattern_{pattern[:20]}",
+            passed=match is None,
+            severity=severity,
+            details={"matched_text": match.group()} if match else {},
+        ))
+    return results
+
+
+def make_output(size: int, failing: bool) -> str:
+    body = (FILLER * (size // len(FILLER) + 1))[:size]
+    if failing:
+        mid = len(body) // 2
+        body = body[:mid] + " I apologize, error: " + body[mid:]
+    return body
+
+
+def bench(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rule-based checks")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    checker = RuleBasedChecker()
+    node = NodeConfig(format_rules={
+        "must_contain": ["parties", "agreement"],
+        "must_not_contain": ["confidential", "internal only", "do not distribute"],
+    })
+
+    print(f"{'size':>8} {'case':>8} {'legacy scan':>12} {'compiled scan':>14} "
+          f"{'speedup':>8} {'check()':>10} {'MB/s':>8}")
+    for size in SIZES:
+        for failing in (False, True):
+            output = make_output(size, failing)
+            legacy = bench(lambda: legacy_error_scan(output), args.iterations)
+            compiled = bench(lambda: checker._error_rules.scan(output), args.iterations)
+            full = bench(lambda: checker.check(None, output, node), args.iterations)
+            print(
+                f"{size // 1024:>6}KB {'fail' if failing else 'clean':>8} "
+                f"{legacy * 1e6:>10.1f}us {compiled * 1e6:>12.1f}us "
+                f"{legacy / compiled:>7.1f}x {full * 1e6:>8.1f}us "
+                f"{size / full / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
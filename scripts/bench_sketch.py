@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark for buffered latency distributions.
+
+Simulates one flush interval of node latencies (log-normal, with a slow
+tail) across a handful of nodes, and compares what BufferedBackend used
+to do -- keep every sample and ship one gauge point per sample -- with
+the sketch it keeps now: cost per recorded value, series points and
+encoded bytes per flush, and the quantile error of the shipped p50/p95/p99
+against the exact values.
+
+Usage:
+    python scripts/bench_sketch.py
+    python scripts/bench_sketch.py --calls 100000 --nodes 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detra.backends.buffered import BufferedBackend
+from detra.decorators.trace import _DatadogClientBackend
+
+
+class CaptureClient:
+    """Stands in for DatadogClient, keeping what each flush would send."""
+
+    def __init__(self):
+        self.series: list[dict] = []
+
+    async def submit_metrics(self, metrics: list[dict]) -> bool:
+        self.series.extend(metrics)
+        return True
+
+
+class LegacyBackend(_DatadogClientBackend):
+    """The adapter's previous batch shape: one gauge point per sample."""
+
+    async def emit_batch(self, metrics) -> None:
+        await self._client.submit_metrics([
+            {
+                "metric": m.name,
+                "type": "gauge",
+                "points": [[m.timestamp, v] for v in m.samples],
+                "tags": self._tags(m.tags),
+            }
+            for m in metrics
+        ])
+
+
+def latencies(calls: int, nodes: int, seed: int = 1) -> list[tuple[str, float]]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(calls):
+        node = f"node_{rng.randrange(nodes)}"
+        value = rng.lognormvariate(5, 0.6)
+        if rng.random() < 0.02:
+            value *= 20  # slow tail: retries, cold caches
+        out.append((node, value))
+    return out
+
+
+async def run(inner, values: list[tuple[str, float]], max_samples: int) -> tuple[float, BufferedBackend]:
+    backend = BufferedBackend(inner, flush_interval=3600, max_samples_per_series=max_samples)
+    start = time.perf_counter()
+    for node, value in values:
+        await backend.emit_distribution("detra.node.latency_ms", value, {"node": node})
+    elapsed = time.perf_counter() - start
+    await backend.flush()
+    return elapsed / len(values), backend
+
+
+def exact_quantile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark latency sketches")
+    parser.add_argument("--calls", type=int, default=50_000, help="latencies in the interval")
+    parser.add_argument("--nodes", type=int, default=8)
+    args = parser.parse_args()
+
+    values = latencies(args.calls, args.nodes)
+    legacy_client, sketch_client = CaptureClient(), CaptureClient()
+    # The legacy path kept every sample to ship them all
+    legacy_cost, _ = await run(LegacyBackend(legacy_client), values, args.calls)
+    sketch_cost, backend = await run(_DatadogClientBackend(sketch_client), values, 1_000)
+
+    print(f"{args.calls} latencies across {args.nodes} nodes in one interval")
+    print(f"{'':>8} {'record':>9} {'series':>7} {'points':>8} {'bytes':>10}")
+    for name, cost, client in (
+        ("legacy", legacy_cost, legacy_client),
+        ("sketch", sketch_cost, sketch_client),
+    ):
+        points = sum(len(s["points"]) for s in client.series)
+        size = len(json.dumps(client.series))
+        print(f"{name:>8} {cost * 1e6:>7.2f}us {len(client.series):>7} {points:>8} {size:>10}")
+
+    node_values = [v for node, v in values if node == "node_0"]
+    shipped = {
+        s["metric"].rsplit(".", 1)[-1]: s["points"][0][1]
+        for s in sketch_client.series if s["tags"] == ["node:node_0"]
+    }
+    local = backend.percentiles("detra.node.latency_ms", {"node": "node_0"})
+    print("\nnode_0 quantiles: exact / shipped / local query")
+    for label, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        exact = exact_quantile(node_values, q)
+        error = abs(shipped[label] - exact) / exact
+        print(f"  {label}: {exact:9.2f} {shipped[label]:9.2f} {local[label]:9.2f}"
+              f"  ({error:.2%} off)")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        backend.percentiles("detra.node.latency_ms")
+    print(f"\npercentiles() over all {args.nodes} nodes: "
+          f"{(time.perf_counter() - start) * 1e4:.0f}us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the shared tag pipeline behind BufferedBackend.
+
+Records the metrics a traced call produces (latency, call count, eval
+score) for many calls and compares:
+
+* dicts    -- the caller builds fresh tag dicts per call, as the trace
+  decorator did before; the pipeline sorts and looks them up each time
+* interned -- the caller reuses ``node_tags`` TagSets, as it does now
+
+Then adds a per-request tag and reports the series each interval ships
+with no value limit and with the default ``max_tag_values``.
+
+Usage:
+    python scripts/bench_tags.py
+    python scripts/bench_tags.py --calls 50000 --nodes 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from detra.backends.buffered import BufferedBackend
+from detra.backends.tags import TagPipeline, set_tag_pipeline
+
+
+class CountingBackend:
+    """Counts the series in each batch it is sent."""
+
+    def __init__(self):
+        self.series = 0
+
+    async def emit_batch(self, metrics) -> None:
+        self.series += len(metrics)
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+async def run(mode: str, calls: int, nodes: int, requests: bool) -> tuple[float, int]:
+    pipeline = set_tag_pipeline(TagPipeline(max_tag_values=10**9 if mode == "unlimited" else 500))
+    inner = CountingBackend()
+    backend = BufferedBackend(
+        inner, flush_interval=3600, max_series=10**6, max_samples_per_series=calls,
+    )
+    start = time.perf_counter()
+    for i in range(calls):
+        node = f"node_{i % nodes}"
+        if mode == "dicts":
+            tags = {"node": node, "span_kind": "llm"}
+            status_tags = {**tags, "status": "success"}
+        else:
+            tags = pipeline.node_tags(node, "llm")
+            status_tags = pipeline.node_tags(node, "llm", "success")
+        if requests:
+            tags = pipeline.with_tags(tags, request_id=f"req_{i}")
+        await backend.emit_distribution("detra.node.latency_ms", 120.0 + i % 97, tags)
+        await backend.emit_count("detra.node.calls", 1, status_tags)
+        await backend.emit_gauge("detra.eval.score", 0.9, tags)
+    cost = (time.perf_counter() - start) / calls
+    await backend.flush()
+    await backend.close()
+    return cost, inner.series
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared tag pipeline")
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--nodes", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.calls} traced calls (3 metrics each) across {args.nodes} nodes")
+    print(f"{'tags':>10} {'per-request':>12} {'per call':>9} {'series':>8}")
+    for mode, requests in (
+        ("dicts", False), ("interned", False), ("unlimited", True), ("interned", True),
+    ):
+        cost, series = await run(mode, args.calls, args.nodes, requests)
+        print(f"{mode:>10} {str(requests):>12} {cost * 1e6:>7.2f}us {series:>8}")
+    set_tag_pipeline(None)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
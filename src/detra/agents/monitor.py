@@ -10,13 +10,14 @@ Monitors:
 """
 
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
 
 import structlog
 
 from detra.telemetry.datadog_client import DatadogClient
+from detra.utils.sketch import DEFAULT_QUANTILES, SketchSet
 
 logger = structlog.get_logger()
 
@@ -140,6 +141,8 @@ class AgentMonitor:
         self.max_tool_calls_warning = max_tool_calls_warning
 
         self._workflows: Dict[str, AgentWorkflow] = {}
+        # Workflow durations per (agent, status), for local percentiles
+        self._durations = SketchSet()
 
     def start_workflow(
         self,
@@ -332,6 +335,7 @@ class AgentMonitor:
             return
 
         workflow.complete(final_output)
+        self._record_duration(workflow)
 
         # Log completion
         logger.info(
@@ -370,6 +374,7 @@ class AgentMonitor:
             return
 
         workflow.fail(error)
+        self._record_duration(workflow)
 
         logger.error(
             "Agent workflow failed",
@@ -392,6 +397,33 @@ class AgentMonitor:
         """Get a workflow by ID."""
         return self._workflows.get(workflow_id)
 
+    def get_duration_percentiles(
+        self,
+        agent_name: Optional[str] = None,
+        status: Optional[str] = None,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> Dict[str, Any]:
+        """
+        Get workflow duration percentiles from this process's finished workflows.
+
+        Args:
+            agent_name: Only this agent's workflows (default: all agents).
+            status: Only workflows that ended with this status.
+            quantiles: Quantiles to report.
+
+        Returns:
+            ``{"p50": ..., "p95": ..., "p99": ..., "count": ...}`` in
+            milliseconds, accurate to within 1%.
+        """
+        tags = {}
+        if agent_name:
+            tags["agent"] = agent_name
+        if status:
+            tags["status"] = status
+        return self._durations.percentiles(
+            "detra.agent.workflow.duration_ms", tags, quantiles,
+        )
+
     def get_active_workflows(self) -> List[AgentWorkflow]:
         """Get all currently running workflows."""
         return [
@@ -399,6 +431,14 @@ class AgentMonitor:
             if w.status == "running"
         ]
 
+    def _record_duration(self, workflow: AgentWorkflow):
+        """Add a finished workflow's duration to the local sketches."""
+        self._durations.add(
+            "detra.agent.workflow.duration_ms",
+            workflow.get_duration_ms(),
+            {"agent": workflow.agent_name, "status": workflow.status},
+        )
+
     def _add_step(self, workflow_id: str, step: AgentStep):
         """Add a step to a workflow."""
         workflow = self._workflows.get(workflow_id)
@@ -1,6 +1,8 @@
 """Pluggable telemetry backends."""
 
 from detra.backends.base import TelemetryBackend
+from detra.backends.buffered import BufferedBackend
 from detra.backends.console import ConsoleBackend
+from detra.backends.dogstatsd import DogStatsDBackend
 
-__all__ = ["ConsoleBackend", "TelemetryBackend"]
+__all__ = ["BufferedBackend", "ConsoleBackend", "DogStatsDBackend", "TelemetryBackend"]
@@ -0,0 +1,374 @@
+"""Buffered backend -- aggregates telemetry in memory and ships it in batches.
+
+Wraps any ``TelemetryBackend``.  Within a flush interval, counts for the
+same (name, tag-set) are summed, gauges keep their last value and
+distributions go into a mergeable quantile sketch per series.  A
+background task then ships one payload per interval, so the request path
+only touches an in-memory dict.
+
+Backends that implement the optional ``emit_batch(metrics)`` method get
+the whole interval in a single call, with each distribution's sketch to
+summarize; others receive the aggregated values replayed through the
+regular protocol methods.  Interval sketches are also merged into
+per-process totals, which ``percentiles`` queries locally.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import structlog
+
+from detra.backends.base import TelemetryBackend
+from detra.backends.tags import TagSet, tag_pipeline
+from detra.config.schema import OverflowPolicy, TelemetryConfig
+from detra.utils.sketch import DEFAULT_QUANTILES, DDSketch, SketchSet, percentiles
+
+logger = structlog.get_logger()
+
+_SeriesKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+
+@dataclass
+class BufferedMetric:
+    """One aggregated series within a flush interval."""
+
+    kind: str  # gauge, count, distribution
+    name: str
+    tags: TagSet | None
+    value: float = 0.0
+    # Distributions: the first ``max_samples_per_series`` raw values, and a
+    # sketch of every value
+    samples: list[float] = field(default_factory=list)
+    sketch: DDSketch | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class BufferedEvent:
+    """An event waiting for the next flush."""
+
+    title: str
+    text: str
+    level: str
+    tags: TagSet | None
+
+
+class BufferedBackend:
+    """Batching layer in front of another ``TelemetryBackend``.
+
+    Memory is bounded by ``max_series`` distinct series,
+    ``max_samples_per_series`` distribution samples per series and
+    ``max_events`` queued events.  Sketches are bounded on their own, so
+    when the inner backend takes batches a full sample list no longer
+    drops distribution points; for backends that replay samples it does.
+    When a bound is hit the
+    ``overflow_policy`` decides what happens: ``drop`` discards the new
+    point, ``flush`` ships the buffer inline (applying backpressure to the
+    caller) and only drops if the buffer is still full afterwards.  Dropped
+    points are reported as ``detra.telemetry.dropped`` on the next flush.
+    Points recorded after ``close`` are dropped with a warning.
+    """
+
+    def __init__(
+        self,
+        inner: TelemetryBackend,
+        *,
+        flush_interval: float = 10.0,
+        max_series: int = 10_000,
+        max_samples_per_series: int = 1_000,
+        max_events: int = 1_000,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP,
+        sketch_relative_accuracy: float = 0.01,
+    ):
+        self._inner = inner
+        self.flush_interval = flush_interval
+        self.max_series = max_series
+        self.max_samples_per_series = max_samples_per_series
+        self.max_events = max_events
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+
+        self._lock = threading.Lock()
+        self._metrics: dict[_SeriesKey, BufferedMetric] = {}
+        self._events: list[BufferedEvent] = []
+        self._totals = SketchSet(sketch_relative_accuracy, max_series=max_series)
+        self._batches = callable(getattr(inner, "emit_batch", None))
+        self._dropped = 0
+        self._flusher: asyncio.Task | None = None
+        self._closed = False
+
+        self.flush_count = 0
+        self.dropped_total = 0
+
+    @classmethod
+    def from_config(cls, inner: TelemetryBackend, config: TelemetryConfig) -> BufferedBackend:
+        return cls(
+            inner,
+            flush_interval=config.flush_interval_seconds,
+            max_series=config.max_series,
+            max_samples_per_series=config.max_samples_per_series,
+            max_events=config.max_events,
+            overflow_policy=config.overflow_policy,
+            sketch_relative_accuracy=config.sketch_relative_accuracy,
+        )
+
+    @property
+    def inner(self) -> TelemetryBackend:
+        """The wrapped backend that receives flushed batches."""
+        return self._inner
+
+    def __getattr__(self, name: str) -> Any:
+        # Keep backend-specific accessors (e.g. ``DatadogBackend.client``) reachable.
+        if name.startswith("_") or name == "emit_batch":
+            raise AttributeError(name)
+        return getattr(self._inner, name)
+
+    # -- TelemetryBackend protocol -----------------------------------------
+
+    async def emit_gauge(
+        self, name: str, value: float, tags: dict[str, str] | None = None,
+    ) -> None:
+        await self._record("gauge", name, value, tags)
+
+    async def emit_count(
+        self, name: str, value: int, tags: dict[str, str] | None = None,
+    ) -> None:
+        await self._record("count", name, value, tags)
+
+    async def emit_distribution(
+        self, name: str, value: float, tags: dict[str, str] | None = None,
+    ) -> None:
+        await self._record("distribution", name, value, tags)
+
+    async def emit_event(
+        self,
+        title: str,
+        text: str,
+        level: str = "info",
+        tags: dict[str, str] | None = None,
+    ) -> None:
+        if self._closed:
+            self._drop_closed("event", title)
+            return
+        event = BufferedEvent(
+            title=title, text=text, level=level, tags=tag_pipeline().intern(tags),
+        )
+        if self._try_add_event(event):
+            self._ensure_flusher()
+            return
+        if self.overflow_policy == OverflowPolicy.FLUSH:
+            await self._flush_buffer()
+            if self._try_add_event(event):
+                return
+        self._drop()
+
+    async def flush(self) -> None:
+        await self._flush_buffer()
+        await self._inner.flush()
+
+    async def close(self) -> None:
+        self._closed = True
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None and not flusher.done():
+            try:
+                if flusher.get_loop() is asyncio.get_running_loop():
+                    flusher.cancel()
+                else:
+                    flusher.get_loop().call_soon_threadsafe(flusher.cancel)
+            except RuntimeError:
+                pass
+        await self.flush()
+        await self._inner.close()
+
+    # -- introspection -----------------------------------------------------
+
+    @property
+    def buffered_series(self) -> int:
+        return len(self._metrics)
+
+    @property
+    def buffered_events(self) -> int:
+        return len(self._events)
+
+    def percentiles(
+        self,
+        name: str,
+        tags: dict[str, str] | None = None,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> dict[str, Any]:
+        """Local quantiles of a distribution since start (or ``reset_percentiles``).
+
+        Merges every series of ``name`` whose tags include ``tags``, e.g.
+        ``percentiles("detra.node.latency_ms", {"node": "extract"})``
+        returns ``{"p50": ..., "p95": ..., "p99": ..., "count": ...}``.
+        """
+        with self._lock:
+            merged = self._totals.query(name, tags)
+            wanted = set((tags or {}).items())
+            for (kind, metric_name, key_tags), metric in self._metrics.items():
+                if (kind != "distribution" or metric_name != name
+                        or not wanted.issubset(key_tags)):
+                    continue
+                if merged is None:
+                    merged = metric.sketch.copy()
+                else:
+                    merged.merge(metric.sketch)
+        return percentiles(merged, quantiles)
+
+    def reset_percentiles(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    # -- buffering ---------------------------------------------------------
+
+    async def _record(
+        self, kind: str, name: str, value: float, tags: dict[str, str] | None,
+    ) -> None:
+        if self._closed:
+            self._drop_closed(kind, name)
+            return
+        tags = tag_pipeline().guard(name, tags)
+        key = (kind, name, tags.key if tags else ())
+        if self._try_add(key, kind, name, value, tags):
+            self._ensure_flusher()
+            return
+        if self.overflow_policy == OverflowPolicy.FLUSH:
+            await self._flush_buffer()
+            if self._try_add(key, kind, name, value, tags):
+                return
+        self._drop()
+
+    def _try_add(
+        self,
+        key: _SeriesKey,
+        kind: str,
+        name: str,
+        value: float,
+        tags: TagSet | None,
+    ) -> bool:
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                if len(self._metrics) >= self.max_series:
+                    return False
+                metric = BufferedMetric(kind=kind, name=name, tags=tags)
+                if kind == "distribution":
+                    metric.sketch = self._totals.new_sketch()
+                self._metrics[key] = metric
+
+            if kind == "count":
+                metric.value += value
+            elif kind == "gauge":
+                metric.value = value
+                metric.timestamp = time.time()
+            else:
+                if len(metric.samples) < self.max_samples_per_series:
+                    metric.samples.append(value)
+                elif not self._batches:
+                    return False
+                metric.sketch.add(value)
+            return True
+
+    def _try_add_event(self, event: BufferedEvent) -> bool:
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                return False
+            self._events.append(event)
+            return True
+
+    def _drop(self) -> None:
+        with self._lock:
+            self._dropped += 1
+            self.dropped_total += 1
+
+    def _drop_closed(self, kind: str, name: str) -> None:
+        # The inner backend is closed too, so nothing would ever ship it.
+        logger.warning("Telemetry recorded after close was dropped", kind=kind, name=name)
+        with self._lock:
+            self.dropped_total += 1
+
+    def _drain(self) -> tuple[list[BufferedMetric], list[BufferedEvent], int]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            events = self._events
+            dropped = self._dropped
+            self._metrics = {}
+            self._events = []
+            self._dropped = 0
+            for metric in metrics:
+                if metric.sketch is not None:
+                    self._totals.merge(metric.name, metric.sketch, metric.tags)
+        return metrics, events, dropped
+
+    # -- flushing ----------------------------------------------------------
+
+    async def _flush_buffer(self) -> None:
+        metrics, events, dropped = self._drain()
+        if dropped:
+            metrics.append(
+                BufferedMetric(kind="count", name="detra.telemetry.dropped", tags=None, value=dropped)
+            )
+        pipeline = tag_pipeline()
+        for name, folded in pipeline.take_folded().items():
+            metrics.append(BufferedMetric(
+                kind="count", name="detra.telemetry.tags.folded",
+                tags=pipeline.intern({"metric": name}), value=folded,
+            ))
+        if not metrics and not events:
+            return
+
+        self.flush_count += 1
+        try:
+            await self._ship_metrics(metrics)
+        except Exception as e:
+            logger.warning("Buffered metric flush failed", series=len(metrics), error=str(e))
+
+        for event in events:
+            try:
+                await self._inner.emit_event(
+                    title=event.title, text=event.text, level=event.level, tags=event.tags,
+                )
+            except Exception as e:
+                logger.warning("Buffered event flush failed", title=event.title, error=str(e))
+
+    async def _ship_metrics(self, metrics: list[BufferedMetric]) -> None:
+        if not metrics:
+            return
+        emit_batch = getattr(self._inner, "emit_batch", None)
+        if callable(emit_batch):
+            await emit_batch(metrics)
+            return
+
+        for m in metrics:
+            if m.kind == "count":
+                await self._inner.emit_count(m.name, int(m.value), m.tags)
+            elif m.kind == "gauge":
+                await self._inner.emit_gauge(m.name, m.value, m.tags)
+            else:
+                for sample in m.samples:
+                    await self._inner.emit_distribution(m.name, sample, m.tags)
+
+    def _ensure_flusher(self) -> None:
+        task = self._flusher
+        if task is not None and not task.done() and not task.get_loop().is_closed():
+            return
+        if self._closed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flusher = loop.create_task(self._run_flusher())
+
+    async def _run_flusher(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self._flush_buffer()
+            except Exception as e:
+                logger.warning("Background telemetry flush failed", error=str(e))
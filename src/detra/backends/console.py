@@ -5,6 +5,8 @@ from __future__ import annotations
 import sys
 from typing import Any
 
+from detra.backends.tags import tag_pipeline
+
 
 class ConsoleBackend:
     """Writes human-readable metric lines to a stream (default stderr).
@@ -56,6 +58,7 @@ class ConsoleBackend:
     # -- internals ---------------------------------------------------------
 
     def _write(self, kind: str, name: str, value: Any, tags: dict[str, str] | None) -> None:
+        tags = tag_pipeline().guard(name, tags)
         self._stream.write(f"[detra|{kind}] {name}={value} {_fmt_tags(tags)}\n")
 
 
@@ -7,6 +7,9 @@ from __future__ import annotations
 
 import time
 
+from detra.backends.tags import TagSet, tag_pipeline
+from detra.utils.sketch import summarize
+
 try:
     from detra.telemetry.datadog_client import DatadogClient
 
@@ -16,6 +19,34 @@ except ImportError:
     DatadogClient = None  # type: ignore[assignment,misc]
 
 
+def datadog_series(metric, tags: list[str]) -> list[dict]:
+    """Datadog API series for one ``BufferedMetric`` of a batch.
+
+    Distributions become their sketch's summary series; ones without a
+    sketch ship their raw samples as gauge points.
+    """
+    if metric.kind != "distribution":
+        series = [(metric.name, metric.kind, metric.value)]
+    elif metric.sketch is not None:
+        series = summarize(metric.name, metric.sketch)
+    else:
+        return [{
+            "metric": metric.name,
+            "type": "gauge",
+            "points": [[metric.timestamp, v] for v in metric.samples],
+            "tags": tags,
+        }]
+    return [
+        {
+            "metric": name,
+            "type": metric_type,
+            "points": [[metric.timestamp, value]],
+            "tags": tags,
+        }
+        for name, metric_type, value in series
+    ]
+
+
 class DatadogBackend:
     """Ships telemetry to Datadog via the API client.
 
@@ -64,6 +95,14 @@ class DatadogBackend:
             tags=self._dd_tags(tags),
         )
 
+    async def emit_batch(self, metrics) -> None:
+        """Ship a whole buffered interval (see ``BufferedBackend``) in one request.
+
+        Distributions are shipped as their sketch's summary (average,
+        count, max and p50/p95/p99 series) rather than a point per sample.
+        """
+        await self._client.submit_metrics([s for m in metrics for s in self._series(m)])
+
     async def flush(self) -> None:
         pass
 
@@ -87,15 +126,20 @@ class DatadogBackend:
                 "metric": name,
                 "type": metric_type,
                 "points": [[time.time(), value]],
-                "tags": self._dd_tags(tags),
+                "tags": self._dd_tags(tag_pipeline().guard(name, tags)),
             }
         ])
 
+    def _series(self, metric) -> list[dict]:
+        # BufferedBackend guarded the tags when the metric was recorded.
+        return datadog_series(metric, self._dd_tags(metric.tags))
+
     def _dd_tags(self, tags: dict[str, str] | None) -> list[str]:
-        out = list(self._base_tags)
-        if tags:
-            out.extend(f"{k}:{v}" for k, v in tags.items())
-        return out
+        if not tags:
+            return list(self._base_tags)
+        if type(tags) is not TagSet:
+            tags = tag_pipeline().intern(tags)
+        return [*self._base_tags, *tags.pairs]
 
     @staticmethod
     def _build_tags(config) -> list[str]:
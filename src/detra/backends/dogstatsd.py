@@ -0,0 +1,238 @@
+"""DogStatsD backend -- ships telemetry to a local Datadog Agent over UDP or a Unix socket.
+
+Speaks the DogStatsD line protocol, so pods need an agent address rather
+than API keys, and emitting a metric only appends a line to a buffer.
+Lines are packed into datagrams of up to ``max_packet_bytes`` and sent on
+a non-blocking socket: at the end of the current event-loop iteration,
+whenever a datagram fills up, and on ``flush``.  A full socket buffer
+drops the datagram (counted in ``dropped_packets``) instead of blocking
+the caller.  Zero extra deps.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+import socket
+import threading
+from typing import Any
+
+import structlog
+
+from detra.backends.tags import tag_pipeline
+
+logger = structlog.get_logger()
+
+# Fits one Ethernet frame with IP/UDP headers; the agent's own default
+UDP_MAX_PACKET_BYTES = 1432
+UDS_MAX_PACKET_BYTES = 8192
+# The agent reads at most this much per datagram
+EVENT_MAX_BYTES = 8192
+
+_TYPES = {"gauge": "g", "count": "c", "distribution": "d"}
+_ALERT_TYPES = {"error": "error", "critical": "error", "warning": "warning", "success": "success"}
+_NAME_UNSAFE = re.compile(r"[:|@#\s]")
+_TAG_UNSAFE = re.compile(r"[,|#\s]")
+
+
+class DogStatsDBackend:
+    """Writes gauges, counts, distributions (``d``) and events (``_e``) to DogStatsD.
+
+    Set ``socket_path`` for a Unix datagram socket (``DD_DOGSTATSD_SOCKET``),
+    else ``host``/``port`` over UDP.  ``constant_tags`` go on every line.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8125,
+        *,
+        socket_path: str | None = None,
+        max_packet_bytes: int | None = None,
+        namespace: str | None = None,
+        constant_tags: list[str] | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.max_packet_bytes = max_packet_bytes or (
+            UDS_MAX_PACKET_BYTES if socket_path else UDP_MAX_PACKET_BYTES
+        )
+        self._prefix = f"{namespace.rstrip('.')}." if namespace else ""
+        self._constant_tags = [_tag(t) for t in constant_tags or []]
+        # Interned tag set key -> rendered "|#..." suffix
+        self._tag_suffixes: dict[tuple, str] = {}
+
+        self._lock = threading.Lock()
+        self._socket: socket.socket | None = None
+        self._lines: list[bytes] = []
+        self._size = 0
+        self._scheduled: asyncio.AbstractEventLoop | None = None
+
+        self.packets_sent = 0
+        self.dropped_packets = 0
+
+    @classmethod
+    def from_config(cls, config, datadog_config=None) -> DogStatsDBackend:
+        """Build from ``DogStatsDConfig``; service/env/version come from ``datadog``."""
+        tags = list(config.tags)
+        for key in ("service", "env", "version"):
+            value = getattr(datadog_config, key, None)
+            if value:
+                tags.append(f"{key}:{value}")
+        return cls(
+            config.host,
+            config.port,
+            socket_path=config.socket_path,
+            max_packet_bytes=config.max_packet_bytes,
+            namespace=config.namespace,
+            constant_tags=tags,
+        )
+
+    # -- TelemetryBackend protocol -----------------------------------------
+
+    async def emit_gauge(
+        self, name: str, value: float, tags: dict[str, str] | None = None,
+    ) -> None:
+        self._metric(name, value, "gauge", tags)
+
+    async def emit_count(
+        self, name: str, value: int, tags: dict[str, str] | None = None,
+    ) -> None:
+        self._metric(name, value, "count", tags)
+
+    async def emit_distribution(
+        self, name: str, value: float, tags: dict[str, str] | None = None,
+    ) -> None:
+        self._metric(name, value, "distribution", tags)
+
+    async def emit_event(
+        self,
+        title: str,
+        text: str,
+        level: str = "info",
+        tags: dict[str, str] | None = None,
+    ) -> None:
+        title_bytes = _escape(title).encode()
+        text_bytes = _escape(text).encode()
+        suffix = f"|t:{_ALERT_TYPES.get(level, 'info')}{self._tags(tags)}".encode()
+        # Trim the text (on a character boundary) so the event fits one read.
+        room = EVENT_MAX_BYTES - len(title_bytes) - len(suffix) - 32
+        if len(text_bytes) > room:
+            text_bytes = text_bytes[:max(0, room)].decode("utf-8", "ignore").encode()
+        header = f"_e{{{len(title_bytes)},{len(text_bytes)}}}:".encode()
+        self._append(header + title_bytes + b"|" + text_bytes + suffix)
+
+    async def flush(self) -> None:
+        self._send_pending()
+
+    async def close(self) -> None:
+        self._send_pending()
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+    # -- internals ---------------------------------------------------------
+
+    def _metric(
+        self, name: str, value: float, kind: str, tags: dict[str, str] | None,
+    ) -> None:
+        if isinstance(value, bool) or not math.isfinite(value):
+            return
+        number = repr(value) if isinstance(value, float) else str(int(value))
+        line = f"{self._prefix}{_NAME_UNSAFE.sub('_', name)}:{number}|{_TYPES[kind]}"
+        self._append((line + self._tags(tag_pipeline().guard(name, tags))).encode())
+
+    def _tags(self, tags: dict[str, str] | None) -> str:
+        tags = tag_pipeline().intern(tags)
+        key = tags.key if tags else ()
+        suffix = self._tag_suffixes.get(key)
+        if suffix is None:
+            parts = self._constant_tags + [_tag(p) for p in (tags.pairs if tags else ())]
+            suffix = "|#" + ",".join(parts) if parts else ""
+            if len(self._tag_suffixes) >= 10_000:
+                self._tag_suffixes.clear()
+            self._tag_suffixes[key] = suffix
+        return suffix
+
+    def _append(self, line: bytes) -> None:
+        with self._lock:
+            if self._lines and self._size + 1 + len(line) > self.max_packet_bytes:
+                self._send_locked()
+            self._lines.append(line)
+            self._size += len(line) + (1 if len(self._lines) > 1 else 0)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Send what's buffered once the current loop iteration's emits are in."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._send_pending()
+            return
+        with self._lock:
+            pending = self._scheduled
+            if pending is not None and not pending.is_closed():
+                return
+            self._scheduled = loop
+        loop.call_soon(self._send_pending)
+
+    def _send_pending(self) -> None:
+        with self._lock:
+            self._scheduled = None
+            if self._lines:
+                self._send_locked()
+
+    def _send_locked(self) -> None:
+        payload = b"\n".join(self._lines)
+        self._lines = []
+        self._size = 0
+        try:
+            sock = self._socket or self._connect()
+            sock.send(payload)
+            self.packets_sent += 1
+        except (BlockingIOError, InterruptedError):
+            # Socket buffer full: drop rather than stall the caller.
+            self.dropped_packets += 1
+        except ConnectionRefusedError:
+            # Nothing listening yet (UDP reports this for an earlier send).
+            self.dropped_packets += 1
+        except OSError as e:
+            self.dropped_packets += 1
+            logger.warning("DogStatsD send failed", error=str(e), target=self._target)
+            # Reconnect on the next send, e.g. after the agent restarts.
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+    def _connect(self) -> socket.socket:
+        if self.socket_path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            address: Any = self.socket_path
+        else:
+            family, _, _, _, address = socket.getaddrinfo(
+                self.host, self.port, type=socket.SOCK_DGRAM,
+            )[0]
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+        try:
+            sock.setblocking(False)
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        self._socket = sock
+        return sock
+
+    @property
+    def _target(self) -> str:
+        return self.socket_path or f"{self.host}:{self.port}"
+
+
+def _tag(tag: str) -> str:
+    return _TAG_UNSAFE.sub("_", tag)
+
+
+def _escape(text: str) -> str:
+    return text.replace("\n", "\\n")
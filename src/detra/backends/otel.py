@@ -3,17 +3,28 @@
 Follows the GenAI semantic conventions (gen_ai.*) where applicable and
 falls back to detra.* for domain-specific metrics.
 
+Each metric keeps at most ``max_series_per_metric`` attribute sets; later
+ones are folded into a series whose tag values are all ``__other__`` and
+counted in ``detra.telemetry.cardinality_overflow``.  Measurements that
+can't be recorded (e.g. an invalid instrument name) are counted in
+``detra.telemetry.dropped``.  Gauges are observable gauges reporting the
+last value of each series at collection time.
+
 Requires: pip install detra[otel]
 """
 
 from __future__ import annotations
 
+import math
 from typing import Any
 
 import structlog
 
+from detra.backends.tags import TagSet, tag_pipeline
+
 try:
     from opentelemetry import metrics, trace
+    from opentelemetry.metrics import Observation
 
     _OTEL_AVAILABLE = True
 except ImportError:
@@ -21,6 +32,52 @@ except ImportError:
 
 logger = structlog.get_logger()
 
+OVERFLOW_VALUE = "__other__"
+DEFAULT_MAX_SERIES_PER_METRIC = 1_000
+
+_Key = tuple[tuple[str, str], ...]
+
+
+class _SeriesLimit:
+    """Attribute sets of one metric, at most ``limit`` distinct ones.
+
+    Resolving tags costs a dict lookup on their insertion-ordered items;
+    sorting into the canonical key happens once per new ordering.
+    """
+
+    __slots__ = ("limit", "_series", "_cache")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._series: dict[_Key, dict[str, str]] = {}
+        self._cache: dict[_Key, tuple[_Key, dict[str, str], bool]] = {}
+
+    def resolve(self, tags: dict[str, str] | None) -> tuple[_Key, dict[str, str], bool]:
+        """(series key, attributes, whether the tags were folded into ``__other__``)."""
+        if not tags:
+            raw = ()
+        elif type(tags) is TagSet:
+            raw = tags.key
+        else:
+            raw = tuple(tags.items())
+        hit = self._cache.get(raw)
+        if hit is not None:
+            return hit
+        key = tuple(sorted(raw))
+        attrs = self._series.get(key)
+        overflowed = False
+        if attrs is None:
+            if len(self._series) < self.limit:
+                attrs = self._series[key] = dict(key)
+            else:
+                key = tuple((k, OVERFLOW_VALUE) for k, _ in key)
+                attrs = dict(key)
+                overflowed = True
+        if len(self._cache) >= 4 * self.limit:
+            self._cache.clear()
+        hit = self._cache[raw] = (key, attrs, overflowed)
+        return hit
+
 
 class OTelBackend:
     """Ships telemetry through the OpenTelemetry API.
@@ -28,10 +85,19 @@ class OTelBackend:
     Users are expected to configure their own exporters (OTLP, Prometheus,
     Jaeger, etc.) before initializing this backend.  OTelBackend creates a
     Meter and Tracer under the ``detra`` instrumentation scope and lazily
-    builds instruments on first use.
+    builds instruments on first use.  Pass ``meter_provider`` /
+    ``tracer_provider`` to use providers other than the global ones.
     """
 
-    def __init__(self, app_name: str, *, service_name: str | None = None):
+    def __init__(
+        self,
+        app_name: str,
+        *,
+        service_name: str | None = None,
+        max_series_per_metric: int = DEFAULT_MAX_SERIES_PER_METRIC,
+        meter_provider: Any = None,
+        tracer_provider: Any = None,
+    ):
         if not _OTEL_AVAILABLE:
             raise ImportError(
                 "opentelemetry packages required.  Install with: pip install detra[otel]"
@@ -39,37 +105,60 @@ class OTelBackend:
 
         self.app_name = app_name
         self._service = service_name or app_name
-        self._meter = metrics.get_meter("detra", "0.2.0")
-        self._tracer = trace.get_tracer("detra", "0.2.0")
+        self.max_series_per_metric = max_series_per_metric
+        self._meter_provider = meter_provider
+        self._tracer_provider = tracer_provider
+        self._meter = (meter_provider or metrics.get_meter_provider()).get_meter(
+            "detra", "0.2.0",
+        )
+        self._tracer = (tracer_provider or trace.get_tracer_provider()).get_tracer(
+            "detra", "0.2.0",
+        )
 
+        # name -> instrument, or None if the SDK rejected it
         self._counters: dict[str, Any] = {}
         self._histograms: dict[str, Any] = {}
-        self._up_down_counters: dict[str, Any] = {}
-        self._gauge_last: dict[str, float] = {}
+        # name -> series key -> (attributes, last value), read by the gauge callback
+        self._gauges: dict[str, dict[_Key, tuple[dict[str, str], float]] | None] = {}
+        self._limits: dict[str, _SeriesLimit] = {}
+
+        self._overflow = self._meter.create_counter(
+            "detra.telemetry.cardinality_overflow",
+            description="Measurements folded into a metric's __other__ series",
+        )
+        self._dropped = self._meter.create_counter(
+            "detra.telemetry.dropped",
+            description="Measurements the OpenTelemetry backend could not record",
+        )
+        self.overflow_total = 0
+        self.dropped_total = 0
 
     # -- TelemetryBackend protocol -----------------------------------------
 
     async def emit_gauge(
         self, name: str, value: float, tags: dict[str, str] | None = None,
     ) -> None:
-        attrs = self._attrs(tags)
-        # UpDownCounter needs a delta, not an absolute value.
-        # Track last emitted value per (name, sorted-tags) and add the diff.
-        key = (name, tuple(sorted((tags or {}).items())))
-        prev = self._gauge_last.get(key, 0.0)
-        delta = value - prev
-        self._gauge_last[key] = value
-        self._udc(name).add(delta, attributes=attrs)
+        if name not in self._gauges:
+            self._gauges[name] = self._observable_gauge(name)
+        values = self._gauges[name]
+        if values is None:
+            self._drop(name, "instrument")
+            return
+        if not math.isfinite(value):
+            self._drop(name, "value")
+            return
+        key, attrs = self._resolve(name, tags)
+        values[key] = (attrs, value)
 
     async def emit_count(
         self, name: str, value: int, tags: dict[str, str] | None = None,
     ) -> None:
-        self._counter(name).add(value, attributes=self._attrs(tags))
+        self._record(self._counter(name), "add", name, value, tags)
 
     async def emit_distribution(
         self, name: str, value: float, tags: dict[str, str] | None = None,
     ) -> None:
-        self._histogram(name).record(value, attributes=self._attrs(tags))
+        self._record(self._histogram(name), "record", name, value, tags)
 
     async def emit_event(
         self,
@@ -86,7 +175,7 @@ class OTelBackend:
                 span.set_attribute(f"detra.{k}", v)
 
     async def flush(self) -> None:
-        for provider in (metrics.get_meter_provider(), trace.get_tracer_provider()):
+        for provider in self._providers():
             force_flush = getattr(provider, "force_flush", None)
             if callable(force_flush):
                 try:
@@ -96,7 +185,7 @@ class OTelBackend:
 
     async def close(self) -> None:
         await self.flush()
-        for provider in (metrics.get_meter_provider(), trace.get_tracer_provider()):
+        for provider in self._providers():
             shutdown = getattr(provider, "shutdown", None)
             if callable(shutdown):
                 try:
@@ -104,23 +193,76 @@ class OTelBackend:
                 except Exception as e:
                     logger.warning("OpenTelemetry shutdown failed", error=str(e))
 
+    # -- introspection -----------------------------------------------------
+
+    def series_count(self, name: str) -> int:
+        """Distinct attribute sets recorded for ``name`` (excluding ``__other__``)."""
+        limit = self._limits.get(name)
+        return len(limit._series) if limit else 0
+
+    # -- recording ---------------------------------------------------------
+
+    def _record(
+        self, instrument: Any, method: str, name: str, value: float,
+        tags: dict[str, str] | None,
+    ) -> None:
+        if instrument is None:
+            self._drop(name, "instrument")
+            return
+        _, attrs = self._resolve(name, tags)
+        try:
+            getattr(instrument, method)(value, attributes=attrs)
+        except Exception as e:
+            logger.debug("OpenTelemetry measurement rejected", metric=name, error=str(e))
+            self._drop(name, "value")
+
+    def _resolve(self, name: str, tags: dict[str, str] | None) -> tuple[_Key, dict[str, str]]:
+        limit = self._limits.get(name)
+        if limit is None:
+            limit = self._limits[name] = _SeriesLimit(self.max_series_per_metric)
+        key, attrs, overflowed = limit.resolve(tag_pipeline().guard(name, tags))
+        if overflowed:
+            self.overflow_total += 1
+            self._overflow.add(1, attributes={"metric": name})
+        return key, attrs
+
+    def _drop(self, name: str, reason: str) -> None:
+        self.dropped_total += 1
+        self._dropped.add(1, attributes={"metric": name, "reason": reason})
+
+    def _providers(self) -> tuple[Any, Any]:
+        return (
+            self._meter_provider or metrics.get_meter_provider(),
+            self._tracer_provider or trace.get_tracer_provider(),
+        )
+
     # -- instrument factories (lazy) ---------------------------------------
 
     def _counter(self, name: str):
         if name not in self._counters:
-            self._counters[name] = self._meter.create_counter(name)
+            self._counters[name] = self._create(self._meter.create_counter, name)
         return self._counters[name]
 
     def _histogram(self, name: str):
         if name not in self._histograms:
-            self._histograms[name] = self._meter.create_histogram(name)
+            self._histograms[name] = self._create(self._meter.create_histogram, name)
         return self._histograms[name]
 
-    def _udc(self, name: str):
-        if name not in self._up_down_counters:
-            self._up_down_counters[name] = self._meter.create_up_down_counter(name)
-        return self._up_down_counters[name]
+    def _observable_gauge(self, name: str) -> dict[_Key, tuple[dict[str, str], float]] | None:
+        values: dict[_Key, tuple[dict[str, str], float]] = {}
+
+        def observe(options):
+            # list() snapshots the dict atomically; emits may run meanwhile.
+            return [Observation(value, attrs) for attrs, value in list(values.values())]
+
+        if self._create(self._meter.create_observable_gauge, name, callbacks=[observe]) is None:
+            return None
+        return values
 
     @staticmethod
-    def _attrs(tags: dict[str, str] | None) -> dict[str, str]:
-        return tags or {}
+    def _create(factory, name: str, **kwargs: Any):
+        try:
+            return factory(name, **kwargs)
+        except Exception as e:
+            logger.warning("OpenTelemetry instrument not created", metric=name, error=str(e))
+            return None
@@ -0,0 +1,238 @@
+"""Shared tag pipeline -- interning, pre-rendering and cardinality limits for metric tags.
+
+Every backend passes the tags it is given through ``tag_pipeline().guard``
+before they become series.  Guarding a metric's tags:
+
+* drops tag keys outside the metric's allow-list, if it has one;
+* keeps at most ``max_tag_values`` distinct values per (metric, tag key),
+  folding later values into ``__other__``, so one request-ID tag can't
+  multiply a metric's series (or a metrics bill) without bound;
+* returns an interned, immutable ``TagSet`` with its canonical key and its
+  ``key:value`` strings rendered once.
+
+Values are admitted first come, first served, which keeps the steady
+values (nodes, models, statuses) that show up early; a value admitted
+once stays admitted.  Guarding is idempotent -- ``__other__`` is never
+folded again -- so tags a ``BufferedBackend`` guarded on the way in pass
+unchanged through the backend it flushes to.  The pipeline is shared by
+every thread that emits metrics; its limits and counters are updated
+under a lock.  ``node_tags`` hands the trace decorator a cached
+``TagSet`` per (node, span_kind, status), including the node's configured
+tags, so the request path doesn't build tag dicts per call.
+``stats()`` reports cardinality per metric and ``take_folded()`` the
+folded measurements since the last call, which ``BufferedBackend`` ships
+as ``detra.telemetry.tags.folded``.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable, Mapping
+from typing import Any, Optional
+
+OVERFLOW_VALUE = "__other__"
+DEFAULT_MAX_TAG_VALUES = 500
+# Allow-list entry that applies to metrics without their own
+DEFAULT_ALLOWLIST = "*"
+
+# Caches are cleared past this size; entries are rebuilt on demand.
+_MAX_CACHED = 10_000
+
+_Key = tuple[tuple[str, str], ...]
+
+
+class TagSet(dict):
+    """An immutable tag dict with its canonical key and rendered ``key:value`` pairs."""
+
+    __slots__ = ("key", "pairs")
+
+    def __init__(self, key: _Key):
+        super().__init__(key)
+        self.key = key
+        self.pairs: tuple[str, ...] = tuple(f"{k}:{v}" if v != "" else k for k, v in key)
+
+    def _immutable(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("TagSet is immutable; build a new one with TagPipeline.with_tags")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _immutable  # type: ignore[assignment]
+
+    def __reduce__(self):
+        return (TagSet, (self.key,))
+
+
+class TagPipeline:
+    """Interns tag sets and applies per-metric allow-lists and value limits."""
+
+    def __init__(
+        self,
+        *,
+        max_tag_values: int = DEFAULT_MAX_TAG_VALUES,
+        allowlist: Optional[Mapping[str, Iterable[str]]] = None,
+        node_tags: Optional[Mapping[str, Iterable[str]]] = None,
+    ):
+        self.max_tag_values = max_tag_values
+        self._allowlist = {metric: frozenset(keys) for metric, keys in (allowlist or {}).items()}
+        self._default_allow = self._allowlist.pop(DEFAULT_ALLOWLIST, None)
+        # node -> tags from its NodeConfig, as (key, value) items
+        self._configured = {
+            node: tuple(parse_tag(t) for t in tags) for node, tags in (node_tags or {}).items()
+        }
+
+        self._lock = threading.RLock()
+        self._interned: dict[_Key, TagSet] = {}
+        self._node_sets: dict[tuple[str, str, Optional[str]], TagSet] = {}
+        self._extended: dict[tuple[_Key, _Key], TagSet] = {}
+        # (metric, input key) -> guarded tags, for inputs that weren't folded
+        self._guarded: dict[tuple[str, _Key], Optional[TagSet]] = {}
+        self._values: dict[tuple[str, str], set[str]] = {}
+        self._folded: dict[str, int] = {}
+        self._folded_total: dict[str, int] = {}
+        self._dropped_keys: dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, telemetry, nodes: Optional[Mapping[str, Any]] = None) -> TagPipeline:
+        """Build from ``TelemetryConfig`` and the configured ``NodeConfig``s."""
+        return cls(
+            max_tag_values=telemetry.max_tag_values,
+            allowlist=telemetry.tag_allowlist,
+            node_tags={name: node.tags for name, node in (nodes or {}).items() if node.tags},
+        )
+
+    # -- interning ---------------------------------------------------------
+
+    def intern(self, tags: Optional[Mapping[str, str]]) -> Optional[TagSet]:
+        """The shared ``TagSet`` equal to ``tags`` (None for no tags)."""
+        if not tags:
+            return None
+        if type(tags) is TagSet:
+            return tags
+        return self._intern_key(tuple(sorted((k, str(v)) for k, v in tags.items())))
+
+    def node_tags(self, node: str, span_kind: str, status: Optional[str] = None) -> TagSet:
+        """Tags for a traced node's metrics, built once per (node, span_kind, status)."""
+        cache_key = (node, span_kind, status)
+        tags = self._node_sets.get(cache_key)
+        if tags is None:
+            items = dict(self._configured.get(node, ()))
+            items.update(node=node, span_kind=span_kind)
+            if status is not None:
+                items["status"] = status
+            tags = self._node_sets[cache_key] = self.intern(items)
+        return tags
+
+    def with_tags(self, base: Optional[Mapping[str, str]], **extra: str) -> TagSet:
+        """``base`` plus ``extra``, interned; cached per (base, extra)."""
+        base_set = self.intern(base)
+        base_key = base_set.key if base_set is not None else ()
+        extra_key = tuple(sorted(extra.items()))
+        tags = self._extended.get((base_key, extra_key))
+        if tags is None:
+            if len(self._extended) >= _MAX_CACHED:
+                self._extended.clear()
+            tags = self._extended[(base_key, extra_key)] = self.intern(
+                {**(base_set or {}), **extra}
+            )
+        return tags
+
+    def _intern_key(self, key: _Key) -> TagSet:
+        tags = self._interned.get(key)
+        if tags is None:
+            with self._lock:
+                tags = self._interned.get(key)
+                if tags is None:
+                    if len(self._interned) >= _MAX_CACHED:
+                        self._interned.clear()
+                    tags = self._interned[key] = TagSet(key)
+        return tags
+
+    # -- guarding ----------------------------------------------------------
+
+    def guard(self, metric: str, tags: Optional[Mapping[str, str]]) -> Optional[TagSet]:
+        """``tags`` as ``metric`` may record them: allow-listed, value-limited, interned."""
+        if not tags:
+            return None
+        key = tags.key if type(tags) is TagSet else tuple(
+            sorted((k, str(v)) for k, v in tags.items())
+        )
+        cached = self._guarded.get((metric, key), False)
+        if cached is not False:
+            return cached
+        with self._lock:
+            return self._guard_key(metric, key)
+
+    def _guard_key(self, metric: str, key: _Key) -> Optional[TagSet]:
+        allowed = self._allowlist.get(metric, self._default_allow)
+        items = []
+        folded = False
+        for k, v in key:
+            if allowed is not None and k not in allowed:
+                self._dropped_keys[metric] = self._dropped_keys.get(metric, 0) + 1
+                continue
+            values = self._values.get((metric, k))
+            if values is None:
+                values = self._values[(metric, k)] = set()
+            if v != OVERFLOW_VALUE and v not in values:
+                if len(values) >= self.max_tag_values:
+                    v = OVERFLOW_VALUE
+                    folded = True
+                else:
+                    values.add(v)
+            items.append((k, v))
+        result = self._intern_key(tuple(items)) if items else None
+
+        if folded:
+            # Not cached: folded inputs are the high-cardinality ones.
+            self._folded[metric] = self._folded.get(metric, 0) + 1
+            self._folded_total[metric] = self._folded_total.get(metric, 0) + 1
+        else:
+            if len(self._guarded) >= _MAX_CACHED:
+                self._guarded.clear()
+            self._guarded[(metric, key)] = result
+        return result
+
+    # -- reporting ---------------------------------------------------------
+
+    def take_folded(self) -> dict[str, int]:
+        """Folded measurements per metric since the last call."""
+        with self._lock:
+            folded, self._folded = self._folded, {}
+        return folded
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per metric: distinct values per tag key, folded measurements, and
+        tag sets that lost keys to the allow-list."""
+        out: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            for (metric, key), values in self._values.items():
+                entry = out.setdefault(metric, {"tags": {}, "folded": 0, "dropped_tags": 0})
+                entry["tags"][key] = len(values)
+            for metric, count in self._folded_total.items():
+                out.setdefault(metric, {"tags": {}, "folded": 0, "dropped_tags": 0})[
+                    "folded"
+                ] = count
+            for metric, count in self._dropped_keys.items():
+                out.setdefault(metric, {"tags": {}, "folded": 0, "dropped_tags": 0})[
+                    "dropped_tags"
+                ] = count
+        return out
+
+
+def parse_tag(tag: str) -> tuple[str, str]:
+    """``"team:search"`` -> ``("team", "search")``; a bare ``"beta"`` -> ``("beta", "")``."""
+    key, _, value = tag.partition(":")
+    return key, value
+
+
+_pipeline = TagPipeline()
+
+
+def tag_pipeline() -> TagPipeline:
+    return _pipeline
+
+
+def set_tag_pipeline(pipeline: Optional[TagPipeline]) -> TagPipeline:
+    """Use ``pipeline`` for all backends; None restores the default."""
+    global _pipeline
+    _pipeline = pipeline or TagPipeline()
+    return _pipeline
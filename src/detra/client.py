@@ -9,7 +9,10 @@ from typing import Any, Optional
 import structlog
 
 from detra.backends.base import TelemetryBackend
+from detra.backends.buffered import BufferedBackend
 from detra.backends.console import ConsoleBackend
+from detra.backends.dogstatsd import DogStatsDBackend
+from detra.backends.tags import TagPipeline, set_tag_pipeline
 from detra.config.loader import load_config, set_config
 from detra.config.schema import (
     BackendType,
@@ -17,9 +20,16 @@ from detra.config.schema import (
     GeminiConfig,
     JudgeProvider,
 )
+from detra.decorators.loop import (
+    get_background_loop,
+    has_background_loop,
+    shutdown_background_loop,
+)
+from detra.decorators.postprocess import PostProcessor
 from detra.decorators.trace import (
     set_backend,
     set_evaluation_engine,
+    set_post_processor,
     set_sampling_config,
     trace as _trace,
     workflow as _workflow,
@@ -27,8 +37,12 @@ from detra.decorators.trace import (
     task as _task,
     agent as _agent,
 )
+from detra.evaluation.budget import JudgeBudgets
+from detra.evaluation.cache import build_evaluation_cache
 from detra.evaluation.engine import EvaluationEngine
 from detra.judges.base import EvaluationResult, Judge
+from detra.judges.control import ProviderController
+from detra.judges.hedging import Hedger
 
 logger = structlog.get_logger()
 
@@ -65,17 +79,40 @@ class Detra:
     ):
         self.config = config
         set_config(config)
+        self.tag_pipeline = set_tag_pipeline(
+            TagPipeline.from_config(config.telemetry, config.nodes)
+        )
 
-        self.backend: TelemetryBackend = backend or _resolve_backend(config)
-        self.judge: Judge | None = judge or _resolve_judge(config)
+        backend = backend or _resolve_backend(config)
+        if config.telemetry.batching and not isinstance(backend, BufferedBackend):
+            backend = BufferedBackend.from_config(backend, config.telemetry)
+        self.backend: TelemetryBackend = backend
+        self.judge: Judge | None = judge or _resolve_judge(config, self.backend)
+        if self.judge and config.judge_config.batch_window_ms > 0:
+            self.judge = _make_micro_batch(self.judge, config)
         self.evaluation_engine: EvaluationEngine | None = (
-            EvaluationEngine(self.judge, config.security) if self.judge else None
+            EvaluationEngine(
+                self.judge,
+                config.security,
+                cache=build_evaluation_cache(config.evaluation_cache),
+                backend=self.backend,
+                security_timeout=config.judge_config.security_timeout_seconds,
+                behavior_timeout=config.judge_config.behavior_timeout_seconds,
+                budgets=JudgeBudgets(config.judge_config.budget),
+            )
+            if self.judge else None
+        )
+        pp = config.post_processing
+        self.post_processor: PostProcessor | None = (
+            PostProcessor(workers=pp.workers, max_queue_depth=pp.max_queue_depth)
+            if pp.async_mode else None
         )
 
         # Wire module-level state for decorators
         set_backend(self.backend)
         set_evaluation_engine(self.evaluation_engine)
         set_sampling_config(config.sampling)
+        set_post_processor(self.post_processor)
 
         atexit.register(self._cleanup)
         self._cleanup_task: asyncio.Task | None = None
@@ -83,9 +120,11 @@ class Detra:
         logger.info(
             "detra initialized",
             app=config.app_name,
-            backend=type(self.backend).__name__,
+            backend=type(getattr(self.backend, "inner", self.backend)).__name__,
+            batching=config.telemetry.batching,
             judge=type(self.judge).__name__ if self.judge else "none",
             sampling_rate=config.sampling.rate,
+            async_post_processing=config.post_processing.async_mode,
             nodes=list(config.nodes.keys()),
         )
 
@@ -125,16 +164,46 @@ class Detra:
             input_data=input_data,
             output_data=output_data,
             context=context,
+            node_name=node_name,
         )
 
+    # -- local metrics -----------------------------------------------------
+
+    def latency_percentiles(
+        self, node_name: str | None = None, metric: str = "detra.node.latency_ms",
+    ) -> dict[str, Any]:
+        """p50/p95/p99 of a latency distribution in this process.
+
+        e.g. ``vg.latency_percentiles("extract")`` or
+        ``vg.latency_percentiles(metric="detra.eval.latency_ms")``.
+        Needs ``telemetry.batching``, which keeps the sketches.
+        """
+        if not isinstance(self.backend, BufferedBackend):
+            raise RuntimeError("Local percentiles need telemetry.batching enabled")
+        return self.backend.percentiles(metric, {"node": node_name} if node_name else None)
+
+    def cardinality_stats(self) -> dict[str, dict[str, Any]]:
+        """Distinct values per tag key and folded measurements, per metric."""
+        return self.tag_pipeline.stats()
+
     # -- lifecycle ---------------------------------------------------------
 
     async def flush(self) -> None:
+        """Wait for queued post-processing, then flush the backend."""
+        if has_background_loop():
+            await get_background_loop().drain()
+        if self.post_processor:
+            await self.post_processor.drain()
         await self.backend.flush()
 
     async def close(self) -> None:
+        if has_background_loop():
+            await get_background_loop().drain()
+        if self.post_processor:
+            await self.post_processor.close()
         await self.backend.flush()
         await self.backend.close()
+        shutdown_background_loop()
 
     def _cleanup(self) -> None:
         async def shutdown() -> None:
@@ -163,6 +232,8 @@ def _resolve_backend(config: DetraConfig) -> TelemetryBackend:
         return _make_datadog(config)
     if config.backend == BackendType.OTEL:
         return _make_otel(config)
+    if config.backend == BackendType.DOGSTATSD:
+        return DogStatsDBackend.from_config(config.dogstatsd, config.datadog)
     if config.backend == BackendType.CONSOLE:
         return ConsoleBackend(config.app_name)
 
@@ -197,10 +268,14 @@ def _make_datadog(config: DetraConfig) -> TelemetryBackend:
 def _make_otel(config: DetraConfig) -> TelemetryBackend:
     from detra.backends.otel import OTelBackend
 
-    return OTelBackend(config.app_name)
+    return OTelBackend(
+        config.app_name, max_series_per_metric=config.telemetry.max_series_per_metric,
+    )
 
 
-def _resolve_judge(config: DetraConfig) -> Judge | None:
+def _resolve_judge(
+    config: DetraConfig, backend: TelemetryBackend | None = None,
+) -> Judge | None:
     """Pick a judge: explicit config > legacy Gemini creds > None."""
 
     jc = config.judge_config
@@ -213,6 +288,10 @@ def _resolve_judge(config: DetraConfig) -> Judge | None:
                 api_key=jc.api_key,
                 temperature=jc.temperature,
                 max_tokens=jc.max_tokens,
+                controller=ProviderController(jc.control, name="litellm", backend=backend),
+                hedger=_make_hedger(config, "litellm", backend),
+                structured_output=jc.structured_output,
+                fallback_concurrency=jc.fallback_concurrency,
             )
         except ImportError as e:
             raise ImportError("judge_config.provider=litellm requires detra[litellm]") from e
@@ -223,7 +302,7 @@ def _resolve_judge(config: DetraConfig) -> Judge | None:
         if jc.model:
             config.gemini.model = jc.model
         try:
-            return _make_gemini(config)
+            return _make_gemini(config, backend)
         except ImportError as e:
             raise ImportError("judge_config.provider=gemini requires detra[gemini]") from e
 
@@ -234,19 +313,47 @@ def _resolve_judge(config: DetraConfig) -> Judge | None:
         and not config.gemini.api_key.startswith("${")
     ):
         try:
-            return _make_gemini(config)
+            return _make_gemini(config, backend)
         except ImportError:
             logger.warning("Gemini key present but google-genai not installed")
 
     return None
 
 
-def _make_gemini(config: DetraConfig) -> Judge:
+def _make_micro_batch(judge: Judge, config: DetraConfig) -> Judge:
+    from detra.judges.batching import MicroBatchJudge
+
+    jc = config.judge_config
+    try:
+        return MicroBatchJudge(
+            judge, window_ms=jc.batch_window_ms, max_batch_size=jc.batch_max_size,
+        )
+    except TypeError as e:
+        logger.warning("Judge micro-batching disabled", error=str(e))
+        return judge
+
+
+def _make_gemini(config: DetraConfig, backend: TelemetryBackend | None = None) -> Judge:
     from detra.evaluation.gemini_judge import GeminiJudge
 
     if not config.gemini:
         raise ValueError("gemini config section required for Gemini judge")
-    return GeminiJudge(config.gemini)
+    controller = ProviderController(
+        config.judge_config.control, name="gemini", backend=backend,
+    )
+    return GeminiJudge(
+        config.gemini, controller=controller,
+        hedger=_make_hedger(config, "gemini", backend),
+        structured_output=config.judge_config.structured_output,
+        fallback_concurrency=config.judge_config.fallback_concurrency,
+    )
+
+
+def _make_hedger(
+    config: DetraConfig, name: str, backend: TelemetryBackend | None,
+) -> Hedger | None:
+    hedge = config.judge_config.hedge
+    return Hedger(hedge, name=name, backend=backend) if hedge.enabled else None
 
 
 # ---------------------------------------------------------------------------
@@ -6,8 +6,11 @@ from detra.config.schema import (
     detraConfig,
     detraSettings,
     DatadogConfig,
+    DatadogTransport,
+    DogStatsDConfig,
     GeminiConfig,
     NodeConfig,
+    FormatRules,
     ThresholdsConfig,
     SecurityConfig,
     IntegrationsConfig,
@@ -17,6 +20,13 @@ from detra.config.schema import (
     JudgeProvider,
     SamplingConfig,
     JudgeConfig,
+    JudgeBudgetConfig,
+    ProviderControlConfig,
+    HedgeConfig,
+    EvaluationCacheConfig,
+    OverflowPolicy,
+    PostProcessingConfig,
+    TelemetryConfig,
 )
 from detra.config.loader import (
     load_config,
@@ -32,8 +42,11 @@ __all__ = [
     "detraConfig",
     "detraSettings",
     "DatadogConfig",
+    "DatadogTransport",
+    "DogStatsDConfig",
     "GeminiConfig",
     "NodeConfig",
+    "FormatRules",
     "ThresholdsConfig",
     "SecurityConfig",
     "IntegrationsConfig",
@@ -43,6 +56,13 @@ __all__ = [
     "JudgeProvider",
     "SamplingConfig",
     "JudgeConfig",
+    "JudgeBudgetConfig",
+    "ProviderControlConfig",
+    "HedgeConfig",
+    "EvaluationCacheConfig",
+    "OverflowPolicy",
+    "PostProcessingConfig",
+    "TelemetryConfig",
     "load_config",
     "get_config",
     "set_config",
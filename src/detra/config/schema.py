@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import re
 from enum import Enum
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from detra.utils.patterns import PatternSet
+
 
 # ---------------------------------------------------------------------------
 # Enums
@@ -24,6 +27,7 @@ class BackendType(str, Enum):
     CONSOLE = "console"
     OTEL = "otel"
     DATADOG = "datadog"
+    DOGSTATSD = "dogstatsd"
 
 
 class JudgeProvider(str, Enum):
@@ -32,6 +36,19 @@ class JudgeProvider(str, Enum):
     LITELLM = "litellm"
 
 
+class OverflowPolicy(str, Enum):
+    DROP = "drop"
+    FLUSH = "flush"
+
+
+class DatadogTransport(str, Enum):
+    # datadog-api-client on a shared, pooled connection, called from threads
+    API_CLIENT = "api_client"
+    # httpx on the event loop (HTTP/2 when h2 is installed) for metrics,
+    # events and incidents; other calls still use the API client
+    HTTPX = "httpx"
+
+
 # ---------------------------------------------------------------------------
 # Component configs
 # ---------------------------------------------------------------------------
@@ -41,6 +58,101 @@ class SamplingConfig(BaseModel):
     rate: float = Field(default=1.0, ge=0.0, le=1.0)
     always_sample_errors: bool = True
     always_sample_flagged: bool = True
+    # Rule pre-check on unsampled outputs; captures every unsampled output.
+    # Without it only empty outputs are forced into evaluation.
+    precheck_rules: bool = False
+    # Derive the draw from the trace/request ID when there is one, so all
+    # nodes and services agree on which requests are evaluated
+    trace_id_sampling: bool = True
+    # Per-node evaluations/sec to aim for; replaces ``rate`` when set
+    target_evals_per_second: Optional[float] = Field(default=None, gt=0.0)
+    # Rate for latency outliers and for nodes that recently errored or flagged
+    boost_rate: float = Field(default=1.0, ge=0.0, le=1.0)
+    boost_seconds: float = Field(default=60.0, ge=0.0)
+    # Standard deviations above a node's mean latency that count as an outlier
+    outlier_z: Optional[float] = Field(default=3.0, gt=0.0)
+
+
+class TelemetryConfig(BaseModel):
+    """Client-side buffering of metrics before they reach the backend."""
+    batching: bool = False
+    flush_interval_seconds: float = Field(default=10.0, gt=0.0)
+    max_series: int = Field(default=10_000, ge=1)
+    max_samples_per_series: int = Field(default=1_000, ge=1)
+    max_events: int = Field(default=1_000, ge=0)
+    overflow_policy: OverflowPolicy = OverflowPolicy.DROP
+    # Relative error of the quantiles distribution sketches report
+    sketch_relative_accuracy: float = Field(default=0.01, gt=0.0, lt=1.0)
+    # Attribute sets kept per metric by the OpenTelemetry backend; the rest
+    # are folded into an ``__other__`` series
+    max_series_per_metric: int = Field(default=1_000, ge=1)
+    # Distinct values kept per (metric, tag key) by every backend; later
+    # values become ``__other__``
+    max_tag_values: int = Field(default=500, ge=1)
+    # metric name (or "*" for the rest) -> tag keys it may carry
+    tag_allowlist: dict[str, list[str]] = Field(default_factory=dict)
+
+
+class PostProcessingConfig(BaseModel):
+    """Run evaluation + emission on a background pool instead of before returning."""
+    async_mode: bool = False
+    workers: int = Field(default=4, ge=1)
+    max_queue_depth: int = Field(default=1_000, ge=1)
+
+
+class EvaluationCacheConfig(BaseModel):
+    """Reuse judge results for identical (behaviors, input, output) tuples."""
+    enabled: bool = True
+    max_entries: int = Field(default=10_000, ge=1)
+    ttl_seconds: float = Field(default=600.0, gt=0.0)
+    sqlite_path: Optional[str] = None
+    sqlite_max_entries: int = Field(default=100_000, ge=1)
+    sqlite_ttl_seconds: float = Field(default=86_400.0, gt=0.0)
+
+
+class JudgeBudgetConfig(BaseModel):
+    """Limits on judge usage, applied per node (None = unlimited)."""
+    evals_per_minute: Optional[float] = Field(default=None, gt=0.0)
+    tokens_per_day: Optional[int] = Field(default=None, ge=1)
+    max_concurrent: Optional[int] = Field(default=None, ge=1)
+
+    @property
+    def is_limited(self) -> bool:
+        return any(v is not None for v in self.model_dump().values())
+
+
+class ProviderControlConfig(BaseModel):
+    """Adaptive concurrency, circuit breaking and timeouts for judge calls."""
+    enabled: bool = True
+    initial_concurrency: int = Field(default=16, ge=1)
+    min_concurrency: int = Field(default=1, ge=1)
+    max_concurrency: int = Field(default=64, ge=1)
+    # Consecutive 429/5xx/timeouts that open the circuit
+    failure_threshold: int = Field(default=5, ge=1)
+    open_seconds: float = Field(default=30.0, gt=0.0)
+    # Per-call timeout = recent p99 latency x multiplier, within these bounds
+    timeout_multiplier: float = Field(default=2.0, ge=1.0)
+    min_timeout_seconds: float = Field(default=5.0, gt=0.0)
+    max_timeout_seconds: float = Field(default=60.0, gt=0.0)
+
+    @model_validator(mode="after")
+    def validate_bounds(self) -> "ProviderControlConfig":
+        if not self.min_concurrency <= self.initial_concurrency <= self.max_concurrency:
+            raise ValueError("need min_concurrency <= initial_concurrency <= max_concurrency")
+        if self.min_timeout_seconds > self.max_timeout_seconds:
+            raise ValueError("min_timeout_seconds must be <= max_timeout_seconds")
+        return self
+
+
+class HedgeConfig(BaseModel):
+    """Hedged judge requests: re-send calls slower than the recent tail."""
+    enabled: bool = False
+    # Send the hedge once a call is slower than this quantile of recent calls
+    quantile: float = Field(default=0.95, gt=0.0, lt=1.0)
+    # Hedges allowed per primary call (0.05 = at most 5% extra requests)
+    max_extra_ratio: float = Field(default=0.05, ge=0.0, le=1.0)
+    # Model for the hedge request; None re-sends to the same model
+    fallback_model: Optional[str] = None
 
 
 class JudgeConfig(BaseModel):
@@ -50,6 +162,20 @@ class JudgeConfig(BaseModel):
     api_key: Optional[str] = None
     temperature: float = Field(default=0.1, ge=0.0, le=2.0)
     max_tokens: int = Field(default=1024, ge=1, le=16384)
+    # Ask for provider-native JSON matching the response schema
+    structured_output: bool = True
+    # Behaviors checked at once when a batch response leaves some unanswered
+    fallback_concurrency: int = Field(default=4, ge=1)
+    # Micro-batching: coalesce same-node evaluations into one judge request
+    batch_window_ms: float = Field(default=0.0, ge=0.0)
+    batch_max_size: int = Field(default=8, ge=1)
+    # Per-phase judge timeouts in seconds (None = wait for the judge)
+    security_timeout_seconds: Optional[float] = Field(default=None, gt=0)
+    behavior_timeout_seconds: Optional[float] = Field(default=None, gt=0)
+    # Default per-node budget; NodeConfig.judge_budget overrides it field by field
+    budget: JudgeBudgetConfig = Field(default_factory=JudgeBudgetConfig)
+    control: ProviderControlConfig = Field(default_factory=ProviderControlConfig)
+    hedge: HedgeConfig = Field(default_factory=HedgeConfig)
 
     @model_validator(mode="after")
     def set_provider_default_model(self) -> "JudgeConfig":
@@ -70,6 +196,41 @@ class DatadogConfig(BaseModel):
     version: Optional[str] = None
     verify_ssl: bool = True
     ssl_cert_path: Optional[str] = None
+    transport: DatadogTransport = DatadogTransport.API_CLIENT
+    # Keep-alive connections kept open to the API (and API-client worker threads)
+    max_connections: int = Field(default=16, ge=1)
+    # gzip metric series payloads
+    compress_metrics: bool = True
+    http2: bool = True
+    timeout_seconds: float = Field(default=10.0, gt=0)
+
+
+class DogStatsDConfig(BaseModel):
+    """DogStatsD agent address for the ``dogstatsd`` backend (no API keys needed)."""
+    host: str = Field(default="localhost", validate_default=True)
+    port: int = Field(default=8125, ge=1, le=65535)
+    # Unix datagram socket; replaces host/port when set
+    socket_path: Optional[str] = Field(default=None, validate_default=True)
+    # Datagram size to pack metrics up to; defaults to 1432 (UDP) / 8192 (socket)
+    max_packet_bytes: Optional[int] = Field(default=None, ge=512, le=65_000)
+    namespace: Optional[str] = None
+    tags: list[str] = Field(default_factory=list)
+
+    @field_validator("host", mode="before")
+    @classmethod
+    def _resolve_host(cls, v: Optional[str]) -> str:
+        if v and v != "localhost":
+            return v
+        import os
+        return os.environ.get("DD_AGENT_HOST") or v or "localhost"
+
+    @field_validator("socket_path", mode="before")
+    @classmethod
+    def _resolve_socket(cls, v: Optional[str]) -> Optional[str]:
+        if v:
+            return v
+        import os
+        return os.environ.get("DD_DOGSTATSD_SOCKET") or None
 
 
 def _is_resolved_secret(value: Optional[str]) -> bool:
@@ -94,6 +255,58 @@ class GeminiConfig(BaseModel):
         return os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
 
 
+class FormatRules(BaseModel):
+    """Deterministic output-format rules declared per node.
+
+    Phrase and pattern lists are compiled once, when the config is loaded,
+    into a ``PatternSet`` each so the rule checker scans an output once per
+    rule kind rather than once per phrase.
+    """
+    max_length: Optional[int] = Field(default=None, ge=0)
+    required_keys: list[str] = Field(default_factory=list)
+    must_contain: list[str] = Field(default_factory=list)
+    must_not_contain: list[str] = Field(default_factory=list)
+    forbidden_patterns: list[str] = Field(default_factory=list)
+
+    _must_contain: Optional[PatternSet] = PrivateAttr(default=None)
+    _must_not_contain: Optional[PatternSet] = PrivateAttr(default=None)
+    _forbidden: Optional[PatternSet] = PrivateAttr(default=None)
+
+    @field_validator("forbidden_patterns")
+    @classmethod
+    def _validate_patterns(cls, v: list[str]) -> list[str]:
+        for pattern in v:
+            try:
+                PatternSet([pattern], ignore_case=True)
+            except re.error as e:
+                raise ValueError(f"Invalid forbidden pattern {pattern!r}: {e}") from e
+        return v
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.must_contain:
+            self._must_contain = PatternSet(
+                [re.escape(p) for p in self.must_contain], ignore_case=True
+            )
+        if self.must_not_contain:
+            self._must_not_contain = PatternSet(
+                [re.escape(p) for p in self.must_not_contain], ignore_case=True
+            )
+        if self.forbidden_patterns:
+            self._forbidden = PatternSet(self.forbidden_patterns, ignore_case=True)
+
+    @property
+    def must_contain_set(self) -> Optional[PatternSet]:
+        return self._must_contain
+
+    @property
+    def must_not_contain_set(self) -> Optional[PatternSet]:
+        return self._must_not_contain
+
+    @property
+    def forbidden_set(self) -> Optional[PatternSet]:
+        return self._forbidden
+
+
 class NodeConfig(BaseModel):
     """Configuration for a traced node (function / workflow)."""
     description: str = ""
@@ -105,6 +318,11 @@ class NodeConfig(BaseModel):
     evaluation_prompts: dict[str, str] = Field(default_factory=dict)
     security_checks: list[str] = Field(default_factory=list)
     tags: list[str] = Field(default_factory=list)
+    format_rules: Optional[FormatRules] = None
+    # Per-node overrides of SamplingConfig.rate / target_evals_per_second
+    sample_rate: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    target_evals_per_second: Optional[float] = Field(default=None, gt=0.0)
+    judge_budget: Optional[JudgeBudgetConfig] = None
 
     @model_validator(mode="after")
     def validate_latency_thresholds(self) -> "NodeConfig":
@@ -170,9 +388,19 @@ class SecurityConfig(BaseModel):
     pii_patterns: list[str] = Field(
         default_factory=lambda: ["email", "phone", "ssn", "credit_card", "ip_address"]
     )
+    max_pii_findings: Optional[int] = Field(default=100, ge=1)
     prompt_injection_detection: bool = True
     sensitive_topics: list[str] = Field(default_factory=list)
     block_on_detection: bool = False
+    # Decide security checks with the local scanners first; only checks
+    # they can't settle are sent to the judge.
+    local_scanning: bool = True
+    # Checks whose local hits are confirmed by the judge before reporting.
+    confirm_with_judge: list[str] = Field(default_factory=lambda: ["harmful_content"])
+    # Checks a clean local scan settles without the judge.  The scanners
+    # only know their patterns and keywords, so by default the judge still
+    # decides every check the scanners found nothing for.
+    final_when_clean: list[str] = Field(default_factory=list)
 
 
 class ThresholdsConfig(BaseModel):
@@ -200,10 +428,14 @@ class DetraConfig(BaseModel):
     # v0.2 pluggable architecture
     backend: BackendType = BackendType.AUTO
     judge_config: JudgeConfig = Field(default_factory=JudgeConfig)
+    evaluation_cache: EvaluationCacheConfig = Field(default_factory=EvaluationCacheConfig)
     sampling: SamplingConfig = Field(default_factory=SamplingConfig)
+    telemetry: TelemetryConfig = Field(default_factory=TelemetryConfig)
+    post_processing: PostProcessingConfig = Field(default_factory=PostProcessingConfig)
 
     # Legacy / optional provider configs
     datadog: Optional[DatadogConfig] = Field(default_factory=DatadogConfig)
+    dogstatsd: DogStatsDConfig = Field(default_factory=DogStatsDConfig)
     gemini: Optional[GeminiConfig] = Field(default_factory=GeminiConfig)
 
     nodes: dict[str, NodeConfig] = Field(default_factory=dict)
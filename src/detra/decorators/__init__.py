@@ -11,19 +11,36 @@ from detra.decorators.trace import (
     set_evaluation_engine,
     set_backend,
     set_datadog_client,
+    set_post_processor,
     set_sampling_config,
 )
+from detra.decorators.context import (
+    get_trace_id,
+    set_trace_id,
+    trace_context,
+    trace_id_from_headers,
+)
+from detra.decorators.postprocess import PostProcessor
+from detra.decorators.sampling import AdaptiveSampler, SampleDecision
 
 __all__ = [
+    "AdaptiveSampler",
     "DetraTrace",
+    "PostProcessor",
+    "SampleDecision",
     "agent",
+    "get_trace_id",
     "llm",
     "set_backend",
     "set_datadog_client",
     "set_evaluation_engine",
+    "set_post_processor",
     "set_sampling_config",
+    "set_trace_id",
     "task",
     "trace",
+    "trace_context",
+    "trace_id_from_headers",
     "workflow",
     "detraTrace",
 ]
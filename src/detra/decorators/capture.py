@@ -0,0 +1,264 @@
+"""Lazy, size-bounded capture of traced inputs and outputs.
+
+The trace decorator doesn't stringify a call's arguments or result when
+the call is made.  It keeps references to them in a ``Deferred`` that is
+resolved only once post-processing knows the value is needed (the call
+is evaluated, pre-checked or flagged); unsampled calls never pay for it.
+Because arguments are held by reference, mutating them after the call
+returns can change what is captured.
+
+``bounded_repr`` renders a value the way ``str`` renders a tuple of
+arguments, but stops once ``limit`` characters have been written: long
+strings are sliced before they are repr'd and containers are walked
+only as far as the budget reaches, so a 500 KB document costs about as
+much as the limit.  ``ParamPlan`` captures chosen named parameters using
+positions worked out once, when the function is decorated.
+"""
+
+from __future__ import annotations
+
+import inspect
+from collections.abc import Callable, Sequence
+from typing import Any, Optional
+
+# Default cap on captured input text (judges see at most a few KB of it)
+DEFAULT_MAX_INPUT_CHARS = 8192
+TRUNCATED = "...[truncated]"
+# Nesting rendered before values are elided
+MAX_DEPTH = 16
+
+# Estimated rendered size of a number, and of an arbitrary object's repr
+SCALAR_CHARS = 8
+OBJECT_CHARS = 64
+
+_MISSING = object()
+_SCALARS = frozenset({int, float, bool, type(None), complex})
+_CONTAINERS = frozenset({list, tuple, dict, set})
+_STR = {str}
+
+
+class Deferred:
+    """A captured value, computed on first ``get``.
+
+    ``source`` is the value before capture, when known, for checks that
+    must not pay for capture (``is_empty``).
+    """
+
+    __slots__ = ("_compute", "_value", "source")
+
+    def __init__(self, compute: Callable[[], Any], source: Any = _MISSING):
+        self._compute: Optional[Callable[[], Any]] = compute
+        self._value: Any = None
+        self.source = source
+
+    def get(self) -> Any:
+        compute = self._compute
+        if compute is not None:
+            self._compute = None
+            self._value = compute()
+        return self._value
+
+
+def resolve(value: Any) -> Any:
+    """The value of a ``Deferred``; anything else is returned as is."""
+    return value.get() if isinstance(value, Deferred) else value
+
+
+def is_empty(value: Any) -> bool:
+    """Whether ``value`` is empty or whitespace-only text.
+
+    This is the rule checker's ``empty_output`` criterion for text that is
+    passed through unchanged; None and empty containers render as
+    non-empty text and don't count.  A ``Deferred`` is judged by its
+    source without being resolved; one with no known source counts as
+    not empty.
+    """
+    while isinstance(value, Deferred):
+        value = value.source
+    return isinstance(value, str) and (not value or value.isspace())
+
+
+class _Writer:
+    __slots__ = ("parts", "remaining", "full")
+
+    def __init__(self, limit: int):
+        self.parts: list[str] = []
+        self.remaining = limit
+        self.full = False
+
+    def write(self, text: str) -> bool:
+        """Append text; False once the budget is used up."""
+        if self.full:
+            return False
+        if len(text) > self.remaining:
+            self.parts.append(text[:self.remaining])
+            self.remaining = 0
+            self.full = True
+            return False
+        self.parts.append(text)
+        self.remaining -= len(text)
+        return True
+
+
+def bounded_repr(value: Any, limit: Optional[int] = DEFAULT_MAX_INPUT_CHARS) -> str:
+    """``str(value)`` for containers (``repr`` of their items), cut at ``limit``."""
+    if limit is None:
+        return str(value)
+    if _estimate(value, limit, 0) <= limit:
+        # Small enough that the C implementation is cheaper than walking it.
+        try:
+            text = str(value)
+        except Exception:
+            text = None
+        if text is not None:
+            return text if len(text) <= limit else text[:limit] + TRUNCATED
+    writer = _Writer(limit)
+    _render(value, writer, 0, set(), top=True)
+    text = "".join(writer.parts)
+    return text + TRUNCATED if writer.full else text
+
+
+def _estimate(value: Any, budget: int, depth: int) -> int:
+    """Rough rendered length of ``value``; stops counting once past ``budget``."""
+    kind = type(value)
+    if kind is str or kind is bytes or kind is bytearray:
+        return len(value) + 3
+    if kind in _SCALARS:
+        return SCALAR_CHARS
+    if kind not in _CONTAINERS:
+        return OBJECT_CHARS
+    if depth >= MAX_DEPTH or len(value) > budget:
+        return budget + 1
+    items = value.values() if kind is dict else value
+    total = 2 + (SCALAR_CHARS * len(value) if kind is dict else 0)
+    # Flat containers of numbers or of strings are sized without a Python loop.
+    kinds = set(map(type, items))
+    if kinds <= _SCALARS:
+        return total + (SCALAR_CHARS + 2) * len(value)
+    if kinds == _STR:
+        return total + sum(map(len, items)) + 6 * len(value)
+    for item in items:
+        item_kind = type(item)
+        if item_kind is str:
+            total += len(item) + 4
+        elif item_kind in _SCALARS:
+            total += SCALAR_CHARS
+        else:
+            total += _estimate(item, budget - total, depth + 1) + 2
+        if total > budget:
+            return total
+    return total
+
+
+def _render(value: Any, writer: _Writer, depth: int, active: set[int], top: bool = False) -> None:
+    kind = type(value)
+    if kind is str:
+        if top:
+            writer.write(value[:writer.remaining + 1])
+        else:
+            # Slice first: repr of the whole string is what we're avoiding.
+            writer.write(repr(value[:writer.remaining + 1]))
+        return
+    if kind in (bytes, bytearray):
+        writer.write(repr(value[:writer.remaining + 1]))
+        return
+    if kind in _CONTAINERS:
+        if depth >= MAX_DEPTH or id(value) in active:
+            writer.write("...")
+            return
+        active.add(id(value))
+        try:
+            _render_container(value, kind, writer, depth, active)
+        finally:
+            active.discard(id(value))
+        return
+    try:
+        text = str(value) if top else repr(value)
+    except Exception:
+        text = object.__repr__(value)
+    writer.write(text)
+
+
+def _render_container(
+    value: Any, kind: type, writer: _Writer, depth: int, active: set[int],
+) -> None:
+    if kind is set and not value:
+        writer.write("set()")
+        return
+    if kind is list or kind is tuple:
+        # Each item takes at least 3 characters, so this many fill the budget.
+        head = value[:writer.remaining // 3 + 1]
+        if set(map(type, head)) <= _SCALARS:
+            try:
+                writer.write(repr(head))
+                return
+            except ValueError:  # an int too long to convert
+                pass
+    open_, close = {list: "[]", tuple: "()", dict: "{}", set: "{}"}[kind]
+    if not writer.write(open_):
+        return
+    items = value.items() if kind is dict else value
+    for i, item in enumerate(items):
+        if i and not writer.write(", "):
+            return
+        if kind is dict:
+            _render(item[0], writer, depth + 1, active)
+            if not writer.write(": "):
+                return
+            _render(item[1], writer, depth + 1, active)
+        else:
+            _render(item, writer, depth + 1, active)
+        if writer.full:
+            return
+    if kind is tuple and len(value) == 1:
+        writer.write(",")
+    writer.write(close)
+
+
+def capture_arguments(
+    args: tuple, kwargs: dict, limit: Optional[int] = DEFAULT_MAX_INPUT_CHARS,
+) -> str:
+    """Default input capture: ``"<args> | <kwargs>"``, at most ``limit`` characters."""
+    parts = []
+    if args:
+        parts.append(bounded_repr(args, limit))
+        if parts[0].endswith(TRUNCATED):
+            return parts[0]
+    if kwargs:
+        rest = None if limit is None else max(0, limit - sum(map(len, parts)))
+        parts.append(bounded_repr(kwargs, rest))
+    return " | ".join(parts) if parts else "no input"
+
+
+class ParamPlan:
+    """Where each of a function's named parameters is found in a call.
+
+    Built once per decorated function, so a call is captured with tuple
+    indexing and dict lookups instead of ``inspect.Signature.bind``.
+    """
+
+    def __init__(self, func: Callable[..., Any], names: Sequence[str]):
+        signature = inspect.signature(func)
+        self._params: list[tuple[str, Optional[int], Any]] = []
+        positional = [
+            p.name for p in signature.parameters.values()
+            if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+        ]
+        for name in names:
+            param = signature.parameters.get(name)
+            if param is None:
+                raise ValueError(f"{func.__qualname__} has no parameter {name!r}")
+            index = positional.index(name) if name in positional else None
+            default = _MISSING if param.default is param.empty else param.default
+            self._params.append((name, index, default))
+
+    def extract(self, args: tuple, kwargs: dict) -> dict[str, Any]:
+        captured = {}
+        for name, index, default in self._params:
+            if index is not None and index < len(args):
+                value = args[index]
+            else:
+                value = kwargs.get(name, default)
+            if value is not _MISSING:
+                captured[name] = value
+        return captured
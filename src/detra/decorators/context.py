@@ -0,0 +1,94 @@
+"""Request-scoped trace IDs for consistent sampling across services.
+
+The sampler turns a trace ID into a fixed number in ``[0, 1)`` and
+evaluates a call when that number is below the node's rate, so every
+node and every service that sees the same ID makes the same choice (a
+node with a lower rate evaluates a subset of what higher-rate nodes
+evaluate).
+
+The ID is read from a contextvar, set either directly or from incoming
+W3C Trace Context headers::
+
+    with trace_context(headers=request.headers):
+        await handle(request)
+
+A ``detra=<key>`` member of ``tracestate`` takes precedence over the
+``traceparent`` trace-id, for pipelines that hop across separate traces
+but should still be sampled as one request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Optional
+
+_trace_id: ContextVar[Optional[str]] = ContextVar("detra_trace_id", default=None)
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+_TRACESTATE_KEY = "detra"
+
+
+def get_trace_id() -> Optional[str]:
+    """The trace ID of the current request, if one has been set."""
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: Optional[str]) -> Token:
+    """Set the current trace ID; pass the token to ``reset_trace_id`` to undo."""
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token: Token) -> None:
+    _trace_id.reset(token)
+
+
+@contextmanager
+def trace_context(
+    trace_id: Optional[str] = None,
+    *,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Iterator[Optional[str]]:
+    """Scope a trace ID, given directly or read from W3C headers."""
+    if trace_id is None and headers is not None:
+        trace_id = trace_id_from_headers(headers)
+    token = _trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _trace_id.reset(token)
+
+
+def trace_id_from_headers(headers: Mapping[str, str]) -> Optional[str]:
+    """Sampling key from ``tracestate`` (``detra=``) or the ``traceparent`` trace-id."""
+    lowered = {k.lower(): v for k, v in headers.items()}
+    state = lowered.get("tracestate")
+    if state:
+        for member in state.split(","):
+            key, sep, value = member.strip().partition("=")
+            if sep and key == _TRACESTATE_KEY and value:
+                return value
+    parent = lowered.get("traceparent")
+    if parent:
+        return parse_traceparent(parent)
+    return None
+
+
+def parse_traceparent(value: str) -> Optional[str]:
+    """The trace-id of a ``traceparent`` header, or None if it is invalid."""
+    match = _TRACEPARENT.match(value.strip().lower())
+    if not match:
+        return None
+    version, trace_id, parent_id, _ = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id
+
+
+def sampling_value(key: str) -> float:
+    """Map a key to a stable number in ``[0, 1)`` (the same in every process)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
@@ -0,0 +1,138 @@
+"""Long-lived detra event loop running on a daemon thread.
+
+Sync-wrapped functions cannot await their own post-processing.  Rather
+than building (and tearing down) an event loop with ``asyncio.run`` on
+every call, they submit the work to this shared loop with
+``run_coroutine_threadsafe``.  The loop is created lazily, survives for
+the life of the process and is recreated in forked children (Celery
+prefork, gunicorn) where the parent's thread no longer exists.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class BackgroundLoop:
+    """An asyncio event loop owned by a dedicated daemon thread."""
+
+    def __init__(self, name: str = "detra-loop"):
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._pending: set[concurrent.futures.Future] = set()
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive() and not self._loop.is_closed()
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        """Schedule ``coro`` on the background loop from any thread."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    async def drain(self) -> None:
+        """Wait for everything submitted so far (call from another loop)."""
+        with self._pending_lock:
+            futures = list(self._pending)
+        if futures:
+            await asyncio.gather(
+                *(asyncio.wrap_future(f) for f in futures), return_exceptions=True,
+            )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if not self.in_loop_thread():
+            self._thread.join(timeout)
+
+    # -- internals ---------------------------------------------------------
+
+    def _discard(self, future: concurrent.futures.Future) -> None:
+        with self._pending_lock:
+            self._pending.discard(future)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            try:
+                pending = asyncio.all_tasks(self._loop)
+                for task in pending:
+                    task.cancel()
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            except Exception as e:
+                logger.warning("detra background loop shutdown failed", error=str(e))
+            finally:
+                self._loop.close()
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_instance: BackgroundLoop | None = None
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Return the shared loop, starting it on first use."""
+    global _instance
+    instance = _instance
+    if instance is not None and instance.is_alive():
+        return instance
+    with _lock:
+        if _instance is None or not _instance.is_alive():
+            _instance = BackgroundLoop()
+        return _instance
+
+
+def has_background_loop() -> bool:
+    return _instance is not None and _instance.is_alive()
+
+
+def shutdown_background_loop(timeout: float = 5.0) -> None:
+    global _instance
+    with _lock:
+        instance, _instance = _instance, None
+    if instance is not None:
+        instance.stop(timeout)
+
+
+def _reset_after_fork() -> None:
+    global _lock, _instance
+    _lock = threading.Lock()
+    _instance = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
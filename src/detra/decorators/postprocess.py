@@ -0,0 +1,129 @@
+"""Bounded background worker pool for post-call work (evaluation + telemetry).
+
+When async post-processing is enabled, traced functions hand their
+evaluation and emission off to this pool and return immediately.  The
+pool holds at most ``max_queue_depth`` pending jobs; anything beyond that
+is shed instead of growing memory or stalling the caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Coroutine
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class PostProcessor:
+    """Fixed-size pool of asyncio workers fed by a bounded queue.
+
+    The pool lives on the event loop that first submits work.  Submissions
+    from other threads' loops are handed over thread-safely; if the owning
+    loop stops, the pool restarts on the next submitter's loop.  Queue
+    slots are reserved under a lock in ``submit``, so whether a job is
+    shed is known before ``submit`` returns, whichever loop it came from.
+    """
+
+    def __init__(self, workers: int = 4, max_queue_depth: int = 1000):
+        self.workers = workers
+        self.max_queue_depth = max_queue_depth
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._lock = threading.Lock()
+        # Jobs submitted to the current queue that no worker has picked up
+        self._waiting = 0
+
+        self.submitted = 0
+        self.shed = 0
+        self.failed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> bool:
+        """Queue ``coro`` for background execution.
+
+        Must be called from a running event loop.  Returns False (and closes
+        the coroutine) when the queue is full and the job was shed.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._loop is None or not self._loop.is_running():
+                self._start(loop)
+            if self._waiting >= self.max_queue_depth:
+                self.shed += 1
+                owner = None
+            else:
+                self._waiting += 1
+                self.submitted += 1
+                owner, queue = self._loop, self._queue
+        if owner is None:
+            coro.close()
+            return False
+        if owner is loop:
+            queue.put_nowait(coro)
+            return True
+        try:
+            owner.call_soon_threadsafe(queue.put_nowait, coro)
+        except RuntimeError:
+            # The owning loop closed since the check; take the pool over.
+            with self._lock:
+                self.submitted -= 1
+                if queue is self._queue:
+                    self._waiting -= 1
+            return self.submit(coro)
+        return True
+
+    async def drain(self) -> None:
+        """Wait until every queued job has finished."""
+        loop, queue = self._loop, self._queue
+        if queue is None or loop is None or not loop.is_running():
+            return
+        if loop is asyncio.get_running_loop():
+            await queue.join()
+        else:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(queue.join(), loop))
+
+    async def close(self) -> None:
+        """Drain outstanding work, then stop the workers."""
+        await self.drain()
+        loop, tasks = self._loop, self._tasks
+        self._loop, self._queue, self._tasks = None, None, []
+        if loop is None or loop.is_closed():
+            return
+        for task in tasks:
+            loop.call_soon_threadsafe(task.cancel)
+
+    # -- internals ---------------------------------------------------------
+
+    def _start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Move the pool to ``loop`` (called with the lock held)."""
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait().close()
+        self._loop = loop
+        # Unbounded: submit enforces max_queue_depth through _waiting.
+        self._queue = asyncio.Queue()
+        self._waiting = 0
+        self._tasks = [loop.create_task(self._worker(self._queue)) for _ in range(self.workers)]
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            coro = await queue.get()
+            with self._lock:
+                if queue is self._queue:
+                    self._waiting -= 1
+            try:
+                await coro
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Background post-processing failed", error=str(e))
+            finally:
+                queue.task_done()
@@ -0,0 +1,172 @@
+"""Per-node, signal-aware sampling of evaluations.
+
+``AdaptiveSampler`` decides, per traced call, whether the output goes to
+the evaluation engine.  Each node's rate starts from its own
+``NodeConfig.sample_rate`` (or the global ``SamplingConfig.rate``).  With
+a ``target_evals_per_second``, the rate instead follows the node's
+observed call rate so quiet nodes are evaluated every time and busy ones
+are thinned to the target.  Latency outliers and nodes that recently
+errored or were flagged are sampled at ``boost_rate``.  Calls with a
+trace ID are sampled deterministically from it (see ``context``).
+
+Every decision carries the probability it was taken with, so evaluation
+metrics can be re-weighted by ``1 / rate``.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Optional
+
+from detra.config.schema import NodeConfig, SamplingConfig
+from detra.decorators.context import sampling_value
+
+# Time constant (seconds) of the decaying call-rate estimate
+RATE_WINDOW_SECONDS = 10.0
+# Weight of each new latency in the running mean/variance
+LATENCY_ALPHA = 0.05
+# Latencies seen before outlier detection kicks in
+LATENCY_WARMUP = 20
+
+
+@dataclass(frozen=True)
+class SampleDecision:
+    """Whether to evaluate a call, and the probability that was used."""
+
+    sampled: bool
+    rate: float
+    reason: str  # "rate", "target", "outlier", "boost" or "forced"
+
+
+@dataclass
+class _NodeState:
+    calls: float = 0.0  # exponentially decayed call count
+    last_call: Optional[float] = None
+    latency_mean: float = 0.0
+    latency_var: float = 0.0
+    latency_count: int = 0
+    boost_until: float = 0.0
+
+
+class AdaptiveSampler:
+    """Thread-safe per-node sampler (sync wrappers call it from any thread)."""
+
+    def __init__(
+        self,
+        config: SamplingConfig,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.config = config
+        self._clock = clock
+        self._rng = rng
+        self._nodes: dict[str, _NodeState] = {}
+        self._lock = threading.Lock()
+
+    def decide(
+        self,
+        node: str,
+        node_config: Optional[NodeConfig],
+        latency_ms: float,
+        *,
+        key: Optional[str] = None,
+    ) -> SampleDecision:
+        """Record a call and decide whether to evaluate it.
+
+        With a ``key`` (a trace/request ID) the draw is derived from the
+        key instead of the RNG, so every node and service seeing the same
+        key decides alike.
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._nodes.setdefault(node, _NodeState())
+            calls_per_second = self._observe_call(state, now)
+            outlier = self._observe_latency(state, latency_ms)
+            boosted = now < state.boost_until
+
+        rate, reason = self._base_rate(node_config, calls_per_second)
+        boost = self.config.boost_rate
+        if (outlier or boosted) and boost > rate:
+            rate, reason = boost, "outlier" if outlier else "boost"
+        if key is not None and self.config.trace_id_sampling:
+            draw = sampling_value(key)
+        else:
+            draw = self._rng()
+        return SampleDecision(sampled=draw < rate, rate=rate, reason=reason)
+
+    def forced(self) -> SampleDecision:
+        """Decision for a call that must be evaluated regardless of rate."""
+        return SampleDecision(sampled=True, rate=1.0, reason="forced")
+
+    def record_signal(self, node: str) -> None:
+        """Boost a node after an error or a flagged evaluation."""
+        seconds = self.config.boost_seconds
+        if seconds <= 0:
+            return
+        until = self._clock() + seconds
+        with self._lock:
+            state = self._nodes.setdefault(node, _NodeState())
+            state.boost_until = max(state.boost_until, until)
+
+    def rate_for(self, node: str, node_config: Optional[NodeConfig] = None) -> float:
+        """Current base rate for a node, without recording a call."""
+        with self._lock:
+            state = self._nodes.get(node)
+            calls_per_second = self._decayed_rate(state, self._clock()) if state else 0.0
+        return self._base_rate(node_config, calls_per_second)[0]
+
+    # -- internals -----------------------------------------------------------
+
+    def _base_rate(
+        self, node_config: Optional[NodeConfig], calls_per_second: float,
+    ) -> tuple[float, str]:
+        target = None
+        if node_config is not None:
+            target = node_config.target_evals_per_second
+        if target is None:
+            target = self.config.target_evals_per_second
+        if target is not None:
+            if calls_per_second <= target:
+                return 1.0, "target"
+            return target / calls_per_second, "target"
+        if node_config is not None and node_config.sample_rate is not None:
+            return node_config.sample_rate, "rate"
+        return self.config.rate, "rate"
+
+    def _observe_call(self, state: _NodeState, now: float) -> float:
+        state.calls = self._decayed_count(state, now) + 1.0
+        state.last_call = now
+        return state.calls / RATE_WINDOW_SECONDS
+
+    def _decayed_rate(self, state: _NodeState, now: float) -> float:
+        return self._decayed_count(state, now) / RATE_WINDOW_SECONDS
+
+    @staticmethod
+    def _decayed_count(state: _NodeState, now: float) -> float:
+        if state.last_call is None:
+            return 0.0
+        return state.calls * math.exp(-(now - state.last_call) / RATE_WINDOW_SECONDS)
+
+    def _observe_latency(self, state: _NodeState, latency_ms: float) -> bool:
+        """Update the node's latency mean/variance; True if this call is an outlier."""
+        z = self.config.outlier_z
+        outlier = (
+            z is not None
+            and state.latency_count >= LATENCY_WARMUP
+            and latency_ms > state.latency_mean + z * math.sqrt(state.latency_var)
+        )
+        if state.latency_count == 0:
+            state.latency_mean = latency_ms
+        else:
+            diff = latency_ms - state.latency_mean
+            incr = LATENCY_ALPHA * diff
+            state.latency_mean += incr
+            state.latency_var = (1 - LATENCY_ALPHA) * (state.latency_var + diff * incr)
+        state.latency_count += 1
+        return outlier
@@ -0,0 +1,398 @@
+"""Stream-aware tracing.
+
+A traced call that produces a stream (an async or sync generator, or a
+function returning a generator or a provider's streamed response) is
+handed back wrapped in a proxy.  Other returned iterators -- files, DB
+cursors, ``csv.reader`` -- are only treated as streams with
+``stream=True``.  The proxy passes every chunk through unchanged
+while a ``StreamRecorder`` notes chunk timings and collects the chunk
+text; when the stream ends the trace decorator emits the stream metrics
+and evaluates the assembled output.
+
+With a ``StreamGuard`` the proxy also screens each chunk as it passes:
+a guard abort closes the stream and raises ``StreamAbortedError`` to the
+consumer, and for streams of ``str`` chunks the guard's redacted text is
+handed out instead of the raw chunks.  Other chunk types can't be
+rewritten, so only aborts apply to them.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from types import AsyncGeneratorType, GeneratorType
+from typing import Any, Optional
+
+from detra.security.incremental import StreamAbortedError, StreamGuard
+
+# Rough characters-per-token ratio for streams that don't report usage
+CHARS_PER_TOKEN = 4
+
+
+# Packages whose returned iterators are streamed model responses
+PROVIDER_STREAM_PACKAGES = (
+    "openai.", "anthropic.", "litellm.", "cohere.", "google.genai.", "google.generativeai.",
+)
+
+
+def is_stream(value: Any, *, any_iterator: bool = False) -> bool:
+    """True for generators and providers' streamed responses.
+
+    With ``any_iterator`` every iterator and async iterator counts (still
+    not lists, strings, etc.).
+    """
+    if isinstance(value, (GeneratorType, AsyncGeneratorType)):
+        return True
+    if isinstance(value, (str, bytes, bytearray, dict)):
+        return False
+    if not isinstance(value, (Iterator, AsyncIterator)):
+        return False
+    return any_iterator or f"{type(value).__module__}.".startswith(PROVIDER_STREAM_PACKAGES)
+
+
+def default_chunk_text(chunk: Any) -> str:
+    """Text of a chunk from common providers (OpenAI/litellm deltas, Gemini)."""
+    if isinstance(chunk, str):
+        return chunk
+    if isinstance(chunk, (bytes, bytearray)):
+        return bytes(chunk).decode("utf-8", errors="replace")
+    if isinstance(chunk, dict):
+        choices = chunk.get("choices")
+        if choices:
+            return (choices[0].get("delta") or {}).get("content") or ""
+        if "text" in chunk:
+            return chunk["text"] or ""
+        return str(chunk)
+    choices = getattr(chunk, "choices", None)
+    if choices:
+        delta = getattr(choices[0], "delta", None)
+        return getattr(delta, "content", None) or ""
+    text = getattr(chunk, "text", None)
+    if isinstance(text, str):
+        return text
+    return str(chunk)
+
+
+def _usage_tokens(chunk: Any) -> Optional[int]:
+    usage = chunk.get("usage") if isinstance(chunk, dict) else getattr(chunk, "usage", None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        tokens = usage.get("completion_tokens")
+    else:
+        tokens = getattr(usage, "completion_tokens", None)
+    return tokens if isinstance(tokens, int) else None
+
+
+class StreamRecorder:
+    """Timings and text of one stream.
+
+    Chunk texts are kept as a list and joined once, in ``output``.
+    """
+
+    def __init__(
+        self,
+        *,
+        capture: bool = True,
+        chunk_text: Optional[Callable[[Any], str]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        start: Optional[float] = None,
+    ):
+        self.capture = capture
+        self.chunk_text = chunk_text or default_chunk_text
+        self._clock = clock
+        self.start = clock() if start is None else start
+        self.first_chunk: Optional[float] = None
+        self.last_chunk: Optional[float] = None
+        self.end: Optional[float] = None
+        self.chunks = 0
+        self.chars = 0
+        self.usage_tokens: Optional[int] = None
+        self.guard: Optional[StreamGuard] = None
+        self._parts: list[str] = []
+
+    def observe(self, chunk: Any) -> None:
+        now = self._clock()
+        if self.first_chunk is None:
+            self.first_chunk = now
+        self.last_chunk = now
+        self.chunks += 1
+        usage = _usage_tokens(chunk)
+        if usage is not None:
+            self.usage_tokens = usage
+        try:
+            text = self.chunk_text(chunk)
+        except Exception:
+            return
+        self.chars += len(text)
+        if self.capture and text:
+            self._parts.append(text)
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = self._clock()
+
+    def output(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else self._clock()
+        return (end - self.start) * 1000
+
+    @property
+    def time_to_first_chunk_ms(self) -> Optional[float]:
+        if self.first_chunk is None:
+            return None
+        return (self.first_chunk - self.start) * 1000
+
+    @property
+    def inter_chunk_ms(self) -> Optional[float]:
+        """Mean gap between consecutive chunks."""
+        if self.chunks < 2:
+            return None
+        return (self.last_chunk - self.first_chunk) * 1000 / (self.chunks - 1)
+
+    @property
+    def tokens(self) -> int:
+        if self.usage_tokens is not None:
+            return self.usage_tokens
+        return -(-self.chars // CHARS_PER_TOKEN)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation rate after the first chunk (whole duration for one chunk)."""
+        if self.first_chunk is None or not self.tokens:
+            return None
+        end = self.end if self.end is not None else self.last_chunk
+        span = end - self.first_chunk if self.chunks > 1 else end - self.start
+        return self.tokens / span if span > 0 else None
+
+
+# on_done(error, completed): error is the exception that ended the stream;
+# completed is False when the consumer closed it early.
+AsyncDone = Callable[[Optional[BaseException], bool], Awaitable[None]]
+SyncDone = Callable[[Optional[BaseException], bool], None]
+
+
+class _Screen:
+    """Per-stream guard state shared by both proxies."""
+
+    def __init__(self, recorder: StreamRecorder, guard: Optional[StreamGuard]):
+        self.recorder = recorder
+        self.guard = guard
+        self.text_stream = True
+        self.exhausted = False
+        recorder.guard = guard
+
+    def chunk(self, chunk: Any) -> Any:
+        """The chunk to hand out; raises ``StreamAbortedError``."""
+        if self.guard is None:
+            return chunk
+        if isinstance(chunk, str):
+            text = chunk
+        else:
+            self.text_stream = False
+            try:
+                text = self.recorder.chunk_text(chunk)
+            except Exception:
+                return chunk
+        decision = self.guard.feed(text)
+        if decision.abort:
+            raise StreamAbortedError(decision.findings)
+        return decision.text if self.text_stream else chunk
+
+    def tail(self) -> Optional[str]:
+        """Held-back text to hand out at the end; raises ``StreamAbortedError``."""
+        if self.guard is None:
+            return None
+        decision = self.guard.finish()
+        if decision.abort:
+            raise StreamAbortedError(decision.findings)
+        return decision.text if self.text_stream and decision.text else None
+
+
+class AsyncStreamProxy:
+    """Async iterator passing chunks through a recorder (and guard)."""
+
+    def __init__(
+        self,
+        source: Any,
+        recorder: StreamRecorder,
+        on_done: AsyncDone,
+        guard: Optional[StreamGuard] = None,
+    ):
+        self._source = source
+        self._iterator = source.__aiter__()
+        self._recorder = recorder
+        self._on_done = on_done
+        self._screen = _Screen(recorder, guard)
+        self._done = False
+
+    def __aiter__(self) -> AsyncStreamProxy:
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._done or self._screen.exhausted:
+            await self._finish(None, True)
+            raise StopAsyncIteration
+        try:
+            chunk = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            try:
+                tail = self._screen.tail()
+            except StreamAbortedError as e:
+                await self._finish(e, False)
+                raise
+            if tail is None:
+                await self._finish(None, True)
+                raise
+            self._screen.exhausted = True
+            return tail
+        except Exception as e:
+            await self._finish(e, False)
+            raise
+        self._recorder.observe(chunk)
+        try:
+            return self._screen.chunk(chunk)
+        except StreamAbortedError as e:
+            await self._abort(e)
+            raise
+
+    async def _abort(self, error: StreamAbortedError) -> None:
+        close = getattr(self._iterator, "aclose", None)
+        try:
+            if close is not None:
+                await close()
+        except Exception:
+            pass
+        await self._finish(error, False)
+
+    async def aclose(self) -> None:
+        close = getattr(self._iterator, "aclose", None)
+        try:
+            if close is not None:
+                await close()
+        finally:
+            await self._finish(None, False)
+
+    async def __aenter__(self) -> Any:
+        entered = await _context(self._source, "__aenter__")()
+        return self if entered is self._source else entered
+
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        try:
+            return await _context(self._source, "__aexit__")(*exc_info)
+        finally:
+            await self._finish(None, False)
+
+    async def _finish(self, error: Optional[BaseException], completed: bool) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._recorder.finish()
+        await self._on_done(error, completed)
+
+    def __getattr__(self, name: str) -> Any:
+        return _delegate(self, name)
+
+
+class SyncStreamProxy:
+    """Iterator passing chunks through a recorder (and guard)."""
+
+    def __init__(
+        self,
+        source: Any,
+        recorder: StreamRecorder,
+        on_done: SyncDone,
+        guard: Optional[StreamGuard] = None,
+    ):
+        self._source = source
+        self._iterator = iter(source)
+        self._recorder = recorder
+        self._on_done = on_done
+        self._screen = _Screen(recorder, guard)
+        self._done = False
+
+    def __iter__(self) -> SyncStreamProxy:
+        return self
+
+    def __next__(self) -> Any:
+        if self._done or self._screen.exhausted:
+            self._finish(None, True)
+            raise StopIteration
+        try:
+            chunk = next(self._iterator)
+        except StopIteration:
+            try:
+                tail = self._screen.tail()
+            except StreamAbortedError as e:
+                self._finish(e, False)
+                raise
+            if tail is None:
+                self._finish(None, True)
+                raise
+            self._screen.exhausted = True
+            return tail
+        except Exception as e:
+            self._finish(e, False)
+            raise
+        self._recorder.observe(chunk)
+        try:
+            return self._screen.chunk(chunk)
+        except StreamAbortedError as e:
+            close = getattr(self._iterator, "close", None)
+            try:
+                if close is not None:
+                    close()
+            except Exception:
+                pass
+            self._finish(e, False)
+            raise
+
+    def close(self) -> None:
+        close = getattr(self._iterator, "close", None)
+        try:
+            if close is not None:
+                close()
+        finally:
+            self._finish(None, False)
+
+    def __enter__(self) -> Any:
+        entered = _context(self._source, "__enter__")()
+        return self if entered is self._source else entered
+
+    def __exit__(self, *exc_info: Any) -> Any:
+        try:
+            return _context(self._source, "__exit__")(*exc_info)
+        finally:
+            self._finish(None, False)
+
+    def _finish(self, error: Optional[BaseException], completed: bool) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._recorder.finish()
+        self._on_done(error, completed)
+
+    def __getattr__(self, name: str) -> Any:
+        return _delegate(self, name)
+
+
+def _context(source: Any, method: str) -> Callable[..., Any]:
+    """The wrapped stream's context-manager method (``__getattr__`` can't forward dunders)."""
+    bound = getattr(source, method, None)
+    if bound is None:
+        raise TypeError(
+            f"{type(source).__name__!r} object does not support the "
+            f"{'asynchronous ' if method.startswith('__a') else ''}context manager protocol"
+        )
+    return bound
+
+
+def _delegate(proxy: Any, name: str) -> Any:
+    """Expose the wrapped stream's attributes (e.g. a provider's response headers)."""
+    source = proxy.__dict__.get("_source")
+    if source is None:
+        raise AttributeError(name)
+    return getattr(source, name)
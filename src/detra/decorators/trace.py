@@ -10,15 +10,36 @@ from __future__ import annotations
 import asyncio
 import functools
 import inspect
-import random
 import time
-from typing import Any, Callable, Optional, TypeVar
+from contextvars import Token
+from typing import Any, Callable, Optional, Sequence, TypeVar
 
 import structlog
 
 from detra.backends.base import TelemetryBackend
-from detra.config.schema import SamplingConfig
+from detra.backends.tags import tag_pipeline
+from detra.config.schema import NodeConfig, SamplingConfig
+from detra.decorators.capture import (
+    DEFAULT_MAX_INPUT_CHARS,
+    Deferred,
+    ParamPlan,
+    bounded_repr,
+    capture_arguments,
+    is_empty,
+    resolve,
+)
+from detra.decorators.context import get_trace_id, reset_trace_id, set_trace_id
+from detra.decorators.loop import get_background_loop
+from detra.decorators.postprocess import PostProcessor
+from detra.decorators.sampling import AdaptiveSampler, SampleDecision
+from detra.decorators.streaming import (
+    AsyncStreamProxy,
+    StreamRecorder,
+    SyncStreamProxy,
+    is_stream,
+)
 from detra.judges.base import EvaluationResult
+from detra.security.incremental import StreamGuard
 
 logger = structlog.get_logger()
 
@@ -30,7 +51,10 @@ T = TypeVar("T")
 
 _backend: Optional[TelemetryBackend] = None
 _engine: Optional[Any] = None  # EvaluationEngine -- avoid circular import
+_engine_takes_node_name = False
 _sampling: SamplingConfig = SamplingConfig()
+_sampler: AdaptiveSampler = AdaptiveSampler(_sampling)
+_post_processor: Optional[PostProcessor] = None
 _background_tasks: set[asyncio.Task] = set()
 
 
@@ -65,6 +89,14 @@ class _DatadogClientBackend:
             tags=self._tags(tags),
         )
 
+    async def emit_batch(self, metrics) -> None:
+        from detra.backends.datadog import datadog_series
+
+        # BufferedBackend guarded the tags when each metric was recorded.
+        await self._client.submit_metrics([
+            series for m in metrics for series in datadog_series(m, self._tags(m.tags))
+        ])
+
     async def flush(self) -> None:
         return None
 
@@ -83,13 +115,14 @@ class _DatadogClientBackend:
                 "metric": name,
                 "type": metric_type,
                 "points": [[time.time(), value]],
-                "tags": self._tags(tags),
+                "tags": self._tags(tag_pipeline().guard(name, tags)),
             }
         ])
 
     @staticmethod
     def _tags(tags: dict[str, str] | None) -> list[str]:
-        return [f"{k}:{v}" for k, v in (tags or {}).items()]
+        tags = tag_pipeline().intern(tags)
+        return list(tags.pairs) if tags else []
 
 
 def set_backend(backend: TelemetryBackend) -> None:
@@ -106,17 +139,32 @@ def set_datadog_client(client) -> None:
 
 
 def set_evaluation_engine(engine) -> None:
-    global _engine
+    global _engine, _engine_takes_node_name
     _engine = engine
+    _engine_takes_node_name = engine is not None and _accepts_node_name(engine.evaluate)
+
+
+def _accepts_node_name(evaluate: Callable) -> bool:
+    """Whether ``evaluate`` takes ``node_name`` -- duck-typed engines may not."""
+    try:
+        params = inspect.signature(evaluate).parameters
+    except (TypeError, ValueError):
+        return False
+    return "node_name" in params or any(
+        p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()
+    )
 
 
 def set_sampling_config(config: SamplingConfig) -> None:
-    global _sampling
+    global _sampling, _sampler
     _sampling = config
+    _sampler = AdaptiveSampler(config)
 
 
-def _should_evaluate() -> bool:
-    return random.random() < _sampling.rate
+def set_post_processor(processor: Optional[PostProcessor]) -> None:
+    """Enable async post-processing (``None`` evaluates inline, before returning)."""
+    global _post_processor
+    _post_processor = processor
 
 
 # ---------------------------------------------------------------------------
@@ -136,62 +184,224 @@ class DetraTrace:
         evaluate: bool = True,
         input_extractor: Optional[Callable[..., Any]] = None,
         output_extractor: Optional[Callable[[Any], str]] = None,
+        trace_key_extractor: Optional[Callable[[tuple, dict], Optional[str]]] = None,
+        stream: Optional[bool] = None,
+        chunk_extractor: Optional[Callable[[Any], str]] = None,
+        stream_guard: Optional[Callable[[], StreamGuard]] = None,
+        capture_params: Optional[Sequence[str]] = None,
+        max_input_chars: Optional[int] = DEFAULT_MAX_INPUT_CHARS,
     ):
+        if input_extractor is not None and capture_params is not None:
+            raise ValueError("Pass either input_extractor or capture_params, not both")
         self.node_name = node_name
         self.span_kind = span_kind
         self.capture_input = capture_input
         self.capture_output = capture_output
         self.evaluate = evaluate
-        self.input_extractor = input_extractor or _default_input_extractor
+        # Captured input is cut at this many characters (None: no limit)
+        self.max_input_chars = max_input_chars
+        # Capture only these named parameters instead of every argument
+        self.capture_params = tuple(capture_params) if capture_params is not None else None
+        self.input_extractor = input_extractor or self._capture_arguments
         self.output_extractor = output_extractor or _default_output_extractor
+        # (args, kwargs) -> request ID, used when no trace ID is in context
+        self.trace_key_extractor = trace_key_extractor
+        # None: trace generators and returned generators/provider streams as
+        # streams; True: any returned iterator too; False: never
+        self.stream = stream
+        # chunk -> text, for assembling a stream's output
+        self.chunk_extractor = chunk_extractor
+        # () -> StreamGuard, called once per stream to screen it chunk by chunk
+        self.stream_guard = stream_guard
 
     def __call__(self, func: Callable[..., T]) -> Callable[..., T]:
+        extract = self._input_extractor_for(func)
+        if self.stream is not False:
+            if inspect.isasyncgenfunction(func):
+                return self._wrap_async_gen(func, extract)
+            if inspect.isgeneratorfunction(func):
+                return self._wrap_sync_gen(func, extract)
         if inspect.iscoroutinefunction(func):
-            return self._wrap_async(func)
-        return self._wrap_sync(func)
+            return self._wrap_async(func, extract)
+        return self._wrap_sync(func, extract)
+
+    def _input_extractor_for(self, func: Callable[..., Any]) -> Callable[[tuple, dict], Any]:
+        """The input extractor for ``func``; parameter positions are resolved here, once."""
+        if self.capture_params is None:
+            return self.input_extractor
+        plan = ParamPlan(func, self.capture_params)
+        limit = self.max_input_chars
+        return lambda args, kwargs: bounded_repr(plan.extract(args, kwargs), limit)
+
+    def _capture_arguments(self, args: tuple, kwargs: dict) -> str:
+        return capture_arguments(args, kwargs, self.max_input_chars)
 
     # -- async path --------------------------------------------------------
 
-    def _wrap_async(self, func: Callable[..., T]) -> Callable[..., T]:
+    def _wrap_async(self, func: Callable[..., T], extract: Callable) -> Callable[..., T]:
         @functools.wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> T:
-            return await self._execute(func, args, kwargs, is_async=True)
+            sample_key, token = self._bind_trace_key(args, kwargs)
+            try:
+                return await self._execute(func, args, kwargs, sample_key, extract)
+            finally:
+                if token is not None:
+                    reset_trace_id(token)
 
         return wrapper  # type: ignore[return-value]
 
-    # -- sync path (the old one crashed inside a running loop) -------------
+    # -- sync path ---------------------------------------------------------
 
-    def _wrap_sync(self, func: Callable[..., T]) -> Callable[..., T]:
+    def _wrap_sync(self, func: Callable[..., T], extract: Callable) -> Callable[..., T]:
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
+            sample_key, token = self._bind_trace_key(args, kwargs)
             try:
-                asyncio.get_running_loop()
-                # A loop is already running (e.g. FastAPI) -- fall back to
-                # a lightweight sync-only path that doesn't nest asyncio.run.
-                return self._execute_sync(func, args, kwargs)
-            except RuntimeError:
-                # No running loop -- safe to use asyncio.run.
-                return asyncio.run(self._execute(func, args, kwargs, is_async=False))
+                return self._execute_sync(func, args, kwargs, sample_key, extract)
+            finally:
+                if token is not None:
+                    reset_trace_id(token)
 
         return wrapper  # type: ignore[return-value]
 
+    # -- streaming path ----------------------------------------------------
+
+    def _wrap_async_gen(self, func: Callable[..., T], extract: Callable) -> Callable[..., T]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any):
+            stream = self._wrap_stream(
+                func(*args, **kwargs),
+                self._extract_input(args, kwargs, extract),
+                time.time(),
+                self._stream_trace_key(args, kwargs),
+            )
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+
+        return wrapper  # type: ignore[return-value]
+
+    def _wrap_sync_gen(self, func: Callable[..., T], extract: Callable) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any):
+            stream = self._wrap_stream(
+                func(*args, **kwargs),
+                self._extract_input(args, kwargs, extract),
+                time.time(),
+                self._stream_trace_key(args, kwargs),
+            )
+            try:
+                yield from stream
+            finally:
+                stream.close()
+
+        return wrapper  # type: ignore[return-value]
+
+    def _wrap_stream(
+        self, source: Any, input_data: Any, start: float, sample_key: Optional[str],
+    ) -> Any:
+        """Proxy a stream so its metrics and evaluation run when it ends.
+
+        Async streams post-process on the consumer's loop, like the async
+        wrapper; sync streams go through the background loop, like the
+        sync wrapper.
+        """
+        tags = tag_pipeline().node_tags(self.node_name, self.span_kind)
+        recorder = StreamRecorder(
+            capture=self.capture_output,
+            chunk_text=self.chunk_extractor,
+            clock=time.time,
+            start=start,
+        )
+
+        def work(error: Optional[BaseException], completed: bool):
+            if error is not None:
+                self._record_error()
+            return self._post_stream(recorder, input_data, tags, sample_key, error, completed)
+
+        if hasattr(source, "__aiter__"):
+            async def on_done(error: Optional[BaseException], completed: bool) -> None:
+                coro = work(error, completed)
+                if _post_processor is not None:
+                    await self._defer(coro, recorder.duration_ms, tags, error=error)
+                else:
+                    await coro
+
+            return AsyncStreamProxy(source, recorder, on_done, self._new_guard())
+
+        def on_done_sync(error: Optional[BaseException], completed: bool) -> None:
+            self._submit_sync(work(error, completed), recorder.duration_ms, tags, error=error)
+
+        return SyncStreamProxy(source, recorder, on_done_sync, self._new_guard())
+
+    def _new_guard(self) -> Optional[StreamGuard]:
+        if self.stream_guard is None:
+            return None
+        try:
+            return self.stream_guard()
+        except Exception as e:
+            logger.warning("Stream guard creation failed", node=self.node_name, error=str(e))
+            return None
+
+    def _is_stream(self, output: Any) -> bool:
+        return self.stream is not False and is_stream(output, any_iterator=self.stream is True)
+
+    async def _post_stream(
+        self,
+        recorder: StreamRecorder,
+        input_data: Any,
+        tags: dict[str, str],
+        sample_key: Optional[str],
+        error: Optional[BaseException],
+        completed: bool,
+    ) -> None:
+        """Emit a finished stream's metrics; evaluate it if it ran to the end."""
+        await self._safe_emit_stream(recorder, tags)
+        latency_ms = recorder.duration_ms
+        if error is not None or not completed:
+            # A stream closed early has only partial output -- don't judge it.
+            await self._safe_emit(latency_ms, None, tags, error=error)
+            return
+        # The streamed character count stands in for the text: 0 is empty.
+        output_data = self._extract_output(Deferred(recorder.output, recorder.chars or ""))
+        await self._post_success(latency_ms, input_data, output_data, tags, sample_key)
+
     # -- execution ---------------------------------------------------------
 
     async def _execute(
-        self, func: Callable, args: tuple, kwargs: dict, *, is_async: bool,
+        self,
+        func: Callable,
+        args: tuple,
+        kwargs: dict,
+        sample_key: Optional[str],
+        extract: Callable,
     ) -> Any:
         start = time.time()
-        tags = {"node": self.node_name, "span_kind": self.span_kind}
+        tags = tag_pipeline().node_tags(self.node_name, self.span_kind)
 
-        input_data = self._extract_input(args, kwargs)
+        input_data = self._extract_input(args, kwargs, extract)
         eval_result: Optional[EvaluationResult] = None
+        defer = _post_processor is not None
 
         try:
-            raw_output = (await func(*args, **kwargs)) if is_async else func(*args, **kwargs)
+            raw_output = await func(*args, **kwargs)
+            if self._is_stream(raw_output):
+                return self._wrap_stream(raw_output, input_data, start, sample_key)
             output_data = self._extract_output(raw_output)
             latency_ms = (time.time() - start) * 1000
 
-            eval_result = await self._maybe_eval(input_data, output_data)
+            if defer:
+                await self._defer(
+                    self._post_success(latency_ms, input_data, output_data, tags, sample_key),
+                    latency_ms, tags, error=None,
+                )
+                return raw_output
+
+            eval_result = await self._maybe_eval(
+                input_data, output_data, latency_ms, tags, sample_key,
+            )
             await self._safe_emit(latency_ms, eval_result, tags, error=None)
 
             if eval_result and eval_result.flagged:
@@ -201,78 +411,270 @@ class DetraTrace:
 
         except Exception as e:
             latency_ms = (time.time() - start) * 1000
-            await self._safe_emit(latency_ms, None, tags, error=e)
+            self._record_error()
+            if defer:
+                await self._defer(
+                    self._safe_emit(latency_ms, None, tags, error=e), latency_ms, tags, error=e,
+                )
+            else:
+                await self._safe_emit(latency_ms, None, tags, error=e)
             raise
 
-    def _execute_sync(self, func: Callable, args: tuple, kwargs: dict) -> Any:
-        """Sync fallback when called from inside an already-running loop."""
+    async def _defer(
+        self,
+        coro,
+        latency_ms: float,
+        tags: dict[str, str],
+        *,
+        error: Optional[Exception],
+    ) -> None:
+        """Hand post-call work to the background pool, shedding under pressure.
+
+        A shed job loses its evaluation, but the basic latency/call metrics
+        are still emitted inline so traffic counts stay accurate.
+        """
+        if _post_processor.submit(coro):
+            return
+        await self._safe_emit(latency_ms, None, tags, error=error)
+        if _backend:
+            try:
+                await _backend.emit_count("detra.postprocess.shed", 1, tags)
+                await _backend.emit_gauge(
+                    "detra.postprocess.queue_depth", _post_processor.queue_depth,
+                )
+            except Exception as emit_error:
+                logger.warning("Telemetry emission failed", error=str(emit_error))
+
+    def _execute_sync(
+        self,
+        func: Callable,
+        args: tuple,
+        kwargs: dict,
+        sample_key: Optional[str],
+        extract: Callable,
+    ) -> Any:
+        """Run ``func`` in the caller's thread; post-process on detra's loop.
+
+        Works the same whether or not the caller has a running event loop:
+        no loop is created per call and evaluation never depends on the
+        caller's loop being free.
+        """
         start = time.time()
-        tags = {"node": self.node_name, "span_kind": self.span_kind}
-        input_data = self._extract_input(args, kwargs)
+        tags = tag_pipeline().node_tags(self.node_name, self.span_kind)
+        input_data = self._extract_input(args, kwargs, extract)
         try:
             raw_output = func(*args, **kwargs)
+            if self._is_stream(raw_output):
+                return self._wrap_stream(raw_output, input_data, start, sample_key)
             output_data = self._extract_output(raw_output)
             latency_ms = (time.time() - start) * 1000
-            self._fire_and_forget(self._post_success(latency_ms, input_data, output_data, tags))
+            self._submit_sync(
+                self._post_success(latency_ms, input_data, output_data, tags, sample_key),
+                latency_ms, tags, error=None,
+            )
             return raw_output
         except Exception as e:
             latency_ms = (time.time() - start) * 1000
-            self._fire_and_forget(self._safe_emit(latency_ms, None, tags, error=e))
+            self._record_error()
+            self._submit_sync(
+                self._safe_emit(latency_ms, None, tags, error=e), latency_ms, tags, error=e,
+            )
             raise
 
+    def _submit_sync(
+        self,
+        coro,
+        latency_ms: float,
+        tags: dict[str, str],
+        *,
+        error: Optional[Exception],
+    ) -> None:
+        """Schedule post-call work on the background loop from a sync caller.
+
+        With async post-processing the work is only enqueued.  Otherwise a
+        caller without a running loop waits for it, matching the async
+        wrapper's evaluate-before-return behavior; a caller inside a running
+        loop never blocks that loop on the judge.
+        """
+        if _post_processor is not None:
+            coro = self._defer(coro, latency_ms, tags, error=error)
+
+        background = get_background_loop()
+        if background.in_loop_thread():
+            # Traced sync code called from detra's own loop (e.g. a judge hook).
+            self._fire_and_forget(coro)
+            return
+
+        future = background.submit(coro)
+        if _post_processor is not None or _has_running_loop():
+            return
+        try:
+            future.result()
+        except Exception as e:
+            logger.warning("Post-processing failed", node=self.node_name, error=str(e))
+
     # -- evaluation --------------------------------------------------------
 
-    def _extract_input(self, args: tuple, kwargs: dict) -> Any:
-        if not self.capture_input:
+    def _bind_trace_key(
+        self, args: tuple, kwargs: dict,
+    ) -> tuple[Optional[str], Optional[Token]]:
+        """Resolve the call's sampling key.
+
+        The current trace ID wins, so every node of a request samples
+        alike.  Without one, a key from ``trace_key_extractor`` becomes the
+        trace ID for the duration of the call (nested traced calls see it
+        too).  Returns the key and the token to reset the contextvar with.
+        """
+        current = get_trace_id()
+        if current is not None:
+            return current, None
+        key = self._extract_trace_key(args, kwargs)
+        if key is None:
+            return None, None
+        return key, set_trace_id(key)
+
+    def _stream_trace_key(self, args: tuple, kwargs: dict) -> Optional[str]:
+        """Sampling key for a generator call.
+
+        Not bound to the contextvar: a generator's body runs in whichever
+        context iterates it, so the binding could not be reset reliably.
+        """
+        current = get_trace_id()
+        if current is not None:
+            return current
+        return self._extract_trace_key(args, kwargs)
+
+    def _extract_trace_key(self, args: tuple, kwargs: dict) -> Optional[str]:
+        if self.trace_key_extractor is None:
             return None
         try:
-            return self.input_extractor(args, kwargs)
+            key = self.trace_key_extractor(args, kwargs)
         except Exception as e:
-            logger.warning("Input extraction failed", node=self.node_name, error=str(e))
+            logger.warning("Trace key extraction failed", node=self.node_name, error=str(e))
             return None
+        return None if key is None else str(key)
 
-    def _extract_output(self, raw_output: Any) -> Any:
-        if not self.capture_output:
+    def _extract_input(self, args: tuple, kwargs: dict, extract: Callable) -> Optional[Deferred]:
+        """Input capture, run only if post-processing asks for it."""
+        if not self.capture_input:
             return None
-        try:
-            return self.output_extractor(raw_output)
-        except Exception as e:
-            logger.warning("Output extraction failed", node=self.node_name, error=str(e))
+
+        def compute() -> Any:
+            try:
+                return extract(args, kwargs)
+            except Exception as e:
+                logger.warning("Input extraction failed", node=self.node_name, error=str(e))
+                return None
+
+        return Deferred(compute)
+
+    def _extract_output(self, raw_output: Any) -> Optional[Deferred]:
+        """Output capture, run only if post-processing asks for it."""
+        if not self.capture_output:
             return None
 
+        def compute() -> Any:
+            try:
+                return self.output_extractor(resolve(raw_output))
+            except Exception as e:
+                logger.warning("Output extraction failed", node=self.node_name, error=str(e))
+                return None
+
+        return Deferred(compute, raw_output)
+
     async def _post_success(
         self,
         latency_ms: float,
         input_data: Any,
         output_data: Any,
         tags: dict[str, str],
+        sample_key: Optional[str] = None,
     ) -> None:
-        eval_result = await self._maybe_eval(input_data, output_data)
+        eval_result = await self._maybe_eval(
+            input_data, output_data, latency_ms, tags, sample_key,
+        )
         await self._safe_emit(latency_ms, eval_result, tags, error=None)
         if eval_result and eval_result.flagged:
             await self._safe_emit_flag(eval_result, input_data, output_data, tags)
 
-    async def _maybe_eval(self, input_data: Any, output_data: Any) -> Optional[EvaluationResult]:
-        if self.evaluate and _engine and _should_evaluate():
-            return await self._run_eval(input_data, output_data)
-        return None
-
-    async def _run_eval(self, input_data: Any, output_data: Any) -> Optional[EvaluationResult]:
+    async def _maybe_eval(
+        self,
+        input_data: Any,
+        output_data: Any,
+        latency_ms: float,
+        tags: dict[str, str],
+        sample_key: Optional[str] = None,
+    ) -> Optional[EvaluationResult]:
+        if not (self.evaluate and _engine):
+            return None
         from detra.config.loader import get_node_config
 
         node_config = get_node_config(self.node_name)
         if not node_config:
             return None
+
+        decision = _sampler.decide(self.node_name, node_config, latency_ms, key=sample_key)
+        if not decision.sampled:
+            if not await self._must_evaluate(output_data, node_config):
+                return None
+            decision = _sampler.forced()
+
+        eval_result = await self._run_eval(node_config, input_data, output_data)
+        if eval_result is not None:
+            if eval_result.flagged and _sampling.always_sample_flagged:
+                _sampler.record_signal(self.node_name)
+            await self._safe_emit_sample_rate(decision, tags)
+        return eval_result
+
+    async def _must_evaluate(self, output_data: Any, node_config: NodeConfig) -> bool:
+        """Pre-check that overrides an unsampled decision.
+
+        By default only an empty text output (an error) forces evaluation,
+        which is decided without capturing the output; with a custom
+        ``output_extractor`` the captured text can't be predicted, so
+        nothing is forced.  With ``precheck_rules``
+        the rule pre-check runs on the captured output: outputs that trip a
+        critical rule (empty, error text) count as errors; any other rule
+        failure means the call would be flagged.
+        """
+        if not self.capture_output:
+            return False
+        if not _sampling.precheck_rules:
+            return (
+                _sampling.always_sample_errors
+                and self.output_extractor is _default_output_extractor
+                and is_empty(output_data)
+            )
+        if not (_sampling.always_sample_errors or _sampling.always_sample_flagged):
+            return False
+        try:
+            check = await _engine.quick_check(resolve(output_data), node_config)
+        except Exception as e:
+            logger.warning("Sampling pre-check failed", node=self.node_name, error=str(e))
+            return False
+        if check["critical_failure"]:
+            return _sampling.always_sample_errors
+        return not check["passed"] and _sampling.always_sample_flagged
+
+    async def _run_eval(
+        self, node_config: NodeConfig, input_data: Any, output_data: Any,
+    ) -> Optional[EvaluationResult]:
+        extra = {"node_name": self.node_name} if _engine_takes_node_name else {}
         try:
             return await _engine.evaluate(
                 node_config=node_config,
-                input_data=input_data,
-                output_data=output_data,
+                input_data=resolve(input_data),
+                output_data=resolve(output_data),
+                **extra,
             )
         except Exception as e:
             logger.error("Evaluation failed", error=str(e), node=self.node_name)
             return None
 
+    def _record_error(self) -> None:
+        if _sampling.always_sample_errors:
+            _sampler.record_signal(self.node_name)
+
     # -- telemetry ---------------------------------------------------------
 
     async def _safe_emit(
@@ -292,6 +694,57 @@ class DetraTrace:
                 error=str(emit_error),
             )
 
+    async def _safe_emit_stream(self, recorder: StreamRecorder, tags: dict[str, str]) -> None:
+        if not _backend:
+            return
+        try:
+            await _backend.emit_count("detra.stream.chunks", recorder.chunks, tags)
+            guard = recorder.guard
+            if guard is not None:
+                if guard.aborted:
+                    await _backend.emit_count("detra.stream.aborted", 1, tags)
+                if guard.redactions:
+                    await _backend.emit_count("detra.stream.redactions", guard.redactions, tags)
+                if guard.over_budget_chunks:
+                    await _backend.emit_count(
+                        "detra.stream.guard_over_budget", guard.over_budget_chunks, tags,
+                    )
+            for name, value in (
+                ("detra.stream.ttfc_ms", recorder.time_to_first_chunk_ms),
+                ("detra.stream.inter_chunk_ms", recorder.inter_chunk_ms),
+                ("detra.stream.tokens_per_second", recorder.tokens_per_second),
+            ):
+                if value is not None:
+                    await _backend.emit_distribution(name, value, tags)
+        except Exception as emit_error:
+            logger.warning(
+                "Telemetry emission failed",
+                node=self.node_name,
+                error=str(emit_error),
+            )
+
+    async def _safe_emit_sample_rate(
+        self, decision: SampleDecision, tags: dict[str, str],
+    ) -> None:
+        """Report the probability an evaluated call was sampled with.
+
+        Weight evaluation metrics by ``1 / detra.eval.sample_rate`` to
+        estimate totals over all calls.
+        """
+        if not _backend:
+            return
+        try:
+            await _backend.emit_gauge(
+                "detra.eval.sample_rate", decision.rate,
+                tag_pipeline().with_tags(tags, reason=decision.reason),
+            )
+        except Exception as emit_error:
+            logger.warning(
+                "Telemetry emission failed",
+                node=self.node_name,
+                error=str(emit_error),
+            )
+
     async def _safe_emit_flag(
         self,
         eval_result: EvaluationResult,
@@ -322,7 +775,9 @@ class DetraTrace:
         await _backend.emit_distribution("detra.node.latency_ms", latency_ms, tags)
         await _backend.emit_count(
             "detra.node.calls", 1,
-            {**tags, "status": "error" if error else "success"},
+            tag_pipeline().node_tags(
+                self.node_name, self.span_kind, "error" if error else "success",
+            ),
         )
 
         if eval_result:
@@ -359,9 +814,9 @@ class DetraTrace:
             f"Failed checks:\n{failed}"
         )
         level = "error" if eval_result.score < 0.5 else "warning"
-        flag_tags = dict(tags)
+        flag_tags = tags
         if eval_result.flag_category:
-            flag_tags["category"] = eval_result.flag_category
+            flag_tags = tag_pipeline().with_tags(tags, category=eval_result.flag_category)
 
         await _backend.emit_event(
             title=f"detra flag: {self.node_name}",
@@ -383,19 +838,18 @@ class DetraTrace:
             coro.close()
 
 
+def _has_running_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
 # ---------------------------------------------------------------------------
 # Default extractors
 # ---------------------------------------------------------------------------
 
-def _default_input_extractor(args: tuple, kwargs: dict) -> str:
-    parts = []
-    if args:
-        parts.append(str(args))
-    if kwargs:
-        parts.append(str(kwargs))
-    return " | ".join(parts) if parts else "no input"
-
-
 def _default_output_extractor(output: Any) -> str:
     return str(output) if output is not None else "no output"
 
@@ -2,7 +2,7 @@
 
 from detra.evaluation.engine import EvaluationEngine
 from detra.evaluation.gemini_judge import GeminiJudge, EvaluationResult, BehaviorCheckResult
-from detra.evaluation.rules import RuleBasedChecker, RuleCheckResult
+from detra.evaluation.rules import IncrementalRuleChecker, RuleBasedChecker, RuleCheckResult
 from detra.evaluation.classifiers import FailureClassifier, FailureCategory
 
 __all__ = [
@@ -11,6 +11,7 @@ __all__ = [
     "EvaluationResult",
     "BehaviorCheckResult",
     "RuleBasedChecker",
+    "IncrementalRuleChecker",
     "RuleCheckResult",
     "FailureClassifier",
     "FailureCategory",
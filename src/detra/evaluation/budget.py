@@ -0,0 +1,170 @@
+"""Per-node judge budgets.
+
+Each node gets a ``JudgeBudget`` built from its ``JudgeBudgetConfig``: a
+token bucket of evaluations (refilled continuously at
+``evals_per_minute``), a token bucket of judge tokens (refilled at
+``tokens_per_day``), and a cap on in-flight evaluations.  Acquiring never
+waits -- when any budget is exhausted the engine skips the judge for that
+evaluation and falls back to rules and local scanners.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Optional
+
+from detra.config.schema import JudgeBudgetConfig
+
+SECONDS_PER_DAY = 86_400.0
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding at most ``capacity`` tokens.
+
+    ``consume`` may drive the level negative, for costs that are only known
+    after the fact (judge tokens); ``try_acquire`` fails until the debt has
+    been refilled.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self._level = capacity
+        self._updated = clock()
+
+    @property
+    def level(self) -> float:
+        self._refill()
+        return self._level
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        self._refill()
+        if self._level < amount:
+            return False
+        self._level -= amount
+        return True
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._level -= amount
+
+    def refund(self, amount: float = 1.0) -> None:
+        self._refill()
+        self._level = min(self.capacity, self._level + amount)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._level = min(self.capacity, self._level + elapsed * self.refill_per_second)
+            self._updated = now
+
+
+class JudgeBudget:
+    """The evaluation, token and concurrency limits of one node."""
+
+    def __init__(
+        self,
+        config: JudgeBudgetConfig,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._evals = (
+            TokenBucket(config.evals_per_minute, config.evals_per_minute / 60.0, clock=clock)
+            if config.evals_per_minute else None
+        )
+        self._tokens = (
+            TokenBucket(
+                config.tokens_per_day, config.tokens_per_day / SECONDS_PER_DAY, clock=clock,
+            )
+            if config.tokens_per_day else None
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> Optional[str]:
+        """Reserve one judge evaluation.
+
+        Returns None on success (pair it with ``release``), or the name of
+        the exhausted budget: ``concurrency``, ``tokens`` or ``evals``.
+        """
+        with self._lock:
+            limit = self.config.max_concurrent
+            if limit is not None and self._in_flight >= limit:
+                return "concurrency"
+            if self._tokens is not None and self._tokens.level <= 0:
+                return "tokens"
+            if self._evals is not None and not self._evals.try_acquire():
+                return "evals"
+            self._in_flight += 1
+            return None
+
+    def refund(self) -> None:
+        """Give back the evaluation taken by ``try_acquire``: the judge was never called.
+
+        The reservation is still held until ``release``.
+        """
+        with self._lock:
+            if self._evals is not None:
+                self._evals.refund()
+
+    def release(self, tokens_used: int = 0) -> None:
+        """Finish a reserved evaluation, charging the judge tokens it used."""
+        with self._lock:
+            self._in_flight -= 1
+            if self._tokens is not None and tokens_used:
+                self._tokens.consume(tokens_used)
+
+
+class JudgeBudgets:
+    """Lazily created per-node budgets.
+
+    A node's limits are its own ``judge_budget`` fields, falling back
+    field by field to the judge-wide defaults.  Nodes with no limits at all
+    get no budget.
+    """
+
+    def __init__(
+        self,
+        defaults: Optional[JudgeBudgetConfig] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.defaults = defaults or JudgeBudgetConfig()
+        self._clock = clock
+        self._budgets: dict[str, Optional[JudgeBudget]] = {}
+        self._lock = threading.Lock()
+
+    def for_node(
+        self, key: str, node_budget: Optional[JudgeBudgetConfig],
+    ) -> Optional[JudgeBudget]:
+        with self._lock:
+            if key not in self._budgets:
+                config = self._merge(node_budget)
+                self._budgets[key] = (
+                    JudgeBudget(config, clock=self._clock) if config.is_limited else None
+                )
+            return self._budgets[key]
+
+    def _merge(self, node_budget: Optional[JudgeBudgetConfig]) -> JudgeBudgetConfig:
+        if node_budget is None:
+            return self.defaults
+        merged = {
+            name: value if value is not None else getattr(self.defaults, name)
+            for name, value in node_budget.model_dump().items()
+        }
+        return JudgeBudgetConfig(**merged)
@@ -0,0 +1,267 @@
+"""Content-addressed cache for judge results.
+
+Identical (behaviors, input, output, context) tuples -- common with cached
+LLM responses and retries -- get the same judgement back without another
+judge round-trip.  Keys are a SHA-256 over a canonical rendering of the
+judge's identity, the node's behavior spec and the whitespace-normalized
+input/output.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Optional, Protocol, runtime_checkable
+
+import structlog
+
+from detra.config.schema import EvaluationCacheConfig, NodeConfig
+from detra.judges.base import BehaviorCheckResult, EvaluationResult
+from detra.judges.batching import MicroBatchJudge
+from detra.utils import codec
+from detra.utils.serialization import safe_json_dumps
+
+logger = structlog.get_logger()
+
+
+@runtime_checkable
+class EvaluationCache(Protocol):
+    """Structural interface for judge result caches.
+
+    ``get`` returns the cached result together with the name of the tier
+    that answered, or ``(None, None)`` on a miss.  Caches that do blocking
+    I/O set ``blocking = True`` so async callers run them off the loop.
+    """
+
+    name: str
+
+    def get(self, key: str) -> tuple[Optional[EvaluationResult], Optional[str]]: ...
+
+    def set(self, key: str, result: EvaluationResult) -> None: ...
+
+
+def judge_identity(judge: Any) -> str:
+    """Name the provider and model behind ``judge`` for use in cache keys."""
+    if isinstance(judge, MicroBatchJudge):
+        judge = judge.judge
+    model = getattr(judge, "model", None)
+    if not isinstance(model, str):
+        model = getattr(getattr(judge, "config", None), "model", None)
+    return f"{type(judge).__name__}:{model if isinstance(model, str) else ''}"
+
+
+def make_cache_key(
+    node_config: NodeConfig,
+    input_data: Any,
+    output_data: Any,
+    context: Optional[dict[str, Any]] = None,
+    judge: str = "",
+) -> str:
+    """Stable hash of everything that influences the judge's answer.
+
+    ``judge`` is the ``judge_identity`` of the judge asked, so switching
+    model or provider never serves another judge's verdicts.
+    """
+    material = {
+        "judge": judge,
+        "expected": node_config.expected_behaviors,
+        "unexpected": node_config.unexpected_behaviors,
+        "prompts": node_config.evaluation_prompts,
+        "input": _normalize(input_data),
+        "output": _normalize(output_data),
+        "context": _normalize(context) if context else None,
+    }
+    canonical = codec.dumps(material, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _normalize(value: Any) -> str:
+    text = value if isinstance(value, str) else safe_json_dumps(value, sort_keys=True)
+    return " ".join(text.split())
+
+
+def _result_to_json(result: EvaluationResult) -> str:
+    return safe_json_dumps(asdict(result))
+
+
+def _result_from_json(payload: str) -> EvaluationResult:
+    data = codec.loads(payload)
+    data["checks_passed"] = [BehaviorCheckResult(**c) for c in data.get("checks_passed", [])]
+    data["checks_failed"] = [BehaviorCheckResult(**c) for c in data.get("checks_failed", [])]
+    return EvaluationResult(**data)
+
+
+class LRUEvaluationCache:
+    """In-process LRU with a per-entry TTL.
+
+    Results are copied on the way in and out because the engine mutates
+    the result it gets back from the judge.
+    """
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, EvaluationResult]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> tuple[Optional[EvaluationResult], Optional[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None, None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(result), self.name
+
+    def set(self, key: str, result: EvaluationResult) -> None:
+        entry = (time.monotonic() + self.ttl_seconds, copy.deepcopy(result))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteEvaluationCache:
+    """On-disk cache shared across restarts and worker processes."""
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl_seconds: float = 86_400.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS eval_cache ("
+            " key TEXT PRIMARY KEY, expires_at REAL NOT NULL, result TEXT NOT NULL)"
+        )
+        self._writes = 0
+
+    def get(self, key: str) -> tuple[Optional[EvaluationResult], Optional[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, result FROM eval_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        if row[0] < time.time():
+            with self._lock:
+                self._conn.execute("DELETE FROM eval_cache WHERE key = ?", (key,))
+            return None, None
+        try:
+            return _result_from_json(row[1]), self.name
+        except (TypeError, ValueError) as e:
+            logger.warning("Discarding unreadable cached evaluation", error=str(e))
+            return None, None
+
+    def set(self, key: str, result: EvaluationResult) -> None:
+        payload = _result_to_json(result)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO eval_cache (key, expires_at, result) VALUES (?, ?, ?)",
+                (key, time.time() + self.ttl_seconds, payload),
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _prune(self) -> None:
+        self._conn.execute("DELETE FROM eval_cache WHERE expires_at < ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM eval_cache WHERE key IN ("
+            " SELECT key FROM eval_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+class TieredEvaluationCache:
+    """Memory tier in front of a slower (e.g. SQLite) tier.
+
+    ``get`` reports which tier answered so callers can tag hit metrics.
+    """
+
+    name = "tiered"
+    blocking = False
+
+    def __init__(self, memory: LRUEvaluationCache, disk: EvaluationCache):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> tuple[Optional[EvaluationResult], Optional[str]]:
+        result, tier = self.memory.get(key)
+        if result is not None:
+            return result, tier
+        result, tier = self.disk.get(key)
+        if result is not None:
+            self.memory.set(key, result)
+        return result, tier
+
+    def set(self, key: str, result: EvaluationResult) -> None:
+        self.memory.set(key, result)
+        self.disk.set(key, result)
+
+
+async def cache_get(
+    cache: EvaluationCache, key: str,
+) -> tuple[Optional[EvaluationResult], Optional[str]]:
+    """``cache.get`` for async callers: blocking tiers run in a thread."""
+    if isinstance(cache, TieredEvaluationCache):
+        result, tier = await cache_get(cache.memory, key)
+        if result is not None:
+            return result, tier
+        result, tier = await cache_get(cache.disk, key)
+        if result is not None:
+            cache.memory.set(key, result)
+        return result, tier
+    if getattr(cache, "blocking", False):
+        return await asyncio.to_thread(cache.get, key)
+    return cache.get(key)
+
+
+async def cache_set(cache: EvaluationCache, key: str, result: EvaluationResult) -> None:
+    """``cache.set`` for async callers: blocking tiers run in a thread."""
+    if isinstance(cache, TieredEvaluationCache):
+        await cache_set(cache.memory, key, result)
+        await cache_set(cache.disk, key, result)
+    elif getattr(cache, "blocking", False):
+        await asyncio.to_thread(cache.set, key, result)
+    else:
+        cache.set(key, result)
+
+
+def build_evaluation_cache(config: EvaluationCacheConfig) -> Optional[EvaluationCache]:
+    """Create the cache described by ``config`` (``None`` when disabled)."""
+    if not config.enabled:
+        return None
+    memory = LRUEvaluationCache(max_entries=config.max_entries, ttl_seconds=config.ttl_seconds)
+    if not config.sqlite_path:
+        return memory
+    disk = SQLiteEvaluationCache(
+        config.sqlite_path,
+        max_entries=config.sqlite_max_entries,
+        ttl_seconds=config.sqlite_ttl_seconds,
+    )
+    return TieredEvaluationCache(memory, disk)
@@ -2,8 +2,11 @@
 
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Optional
 
+from detra.utils.keywords import KeywordIndex
+
 
 class FailureCategory(str, Enum):
     """Categories for LLM output failures."""
@@ -87,6 +90,11 @@ class FailureClassifier:
         ],
     }
 
+    def __init__(self) -> None:
+        self._keyword_index, self._keyword_categories = _build_category_index(
+            tuple((category, tuple(kws)) for category, kws in self.CATEGORY_KEYWORDS.items())
+        )
+
     def classify_from_checks(
         self,
         failed_checks: list[dict[str, Any]],
@@ -134,14 +142,14 @@ class FailureClassifier:
                     all_behaviors.append(check.behavior)
 
         # Combine all text for keyword matching
-        combined_text = " ".join(all_reasons + all_behaviors).lower()
+        combined_text = " ".join(all_reasons + all_behaviors)
 
-        # Score each category based on keyword matches
-        category_scores: dict[FailureCategory, int] = {}
-        for category, keywords in self.CATEGORY_KEYWORDS.items():
-            score = sum(1 for kw in keywords if kw.lower() in combined_text)
-            if score > 0:
-                category_scores[category] = score
+        # Score each category by how many of its keywords appear (one pass)
+        hits: dict[FailureCategory, int] = {}
+        for keyword in self._keyword_index.first_hits(combined_text):
+            for category in self._keyword_categories[keyword]:
+                hits[category] = hits.get(category, 0) + 1
+        category_scores = {c: hits[c] for c in self.CATEGORY_KEYWORDS if c in hits}
 
         # Determine best category
         if category_scores:
@@ -310,3 +318,16 @@ class FailureClassifier:
         }
 
         return hints_map.get(category, ["Review prompt and expected behaviors"])
+
+
+@lru_cache(maxsize=8)
+def _build_category_index(
+    table: tuple[tuple[FailureCategory, tuple[str, ...]], ...],
+) -> tuple[KeywordIndex, dict[str, list[FailureCategory]]]:
+    """Build (once per keyword table) the index shared by all classifiers."""
+    categories: dict[str, list[FailureCategory]] = {}
+    for category, keywords in table:
+        for keyword in keywords:
+            categories.setdefault(keyword.lower(), []).append(category)
+    # Inflected forms count too ("missing keys", "inconsistently")
+    return KeywordIndex(categories, prefixes=True), categories
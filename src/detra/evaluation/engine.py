@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+import asyncio
 import time
 from typing import Any, Optional
 
 import structlog
 
+from detra.backends.base import TelemetryBackend
 from detra.config.schema import NodeConfig, SecurityConfig
+from detra.evaluation.budget import JudgeBudget, JudgeBudgets
+from detra.evaluation.cache import (
+    EvaluationCache,
+    cache_get,
+    cache_set,
+    judge_identity,
+    make_cache_key,
+)
 from detra.evaluation.classifiers import FailureClassifier
 from detra.evaluation.rules import RuleBasedChecker
 from detra.judges.base import BehaviorCheckResult, EvaluationResult, Judge
+from detra.security.screening import JUDGE, LocalSecurityScreen
 
 logger = structlog.get_logger()
 
@@ -19,15 +30,44 @@ class EvaluationEngine:
     """Runs evaluations in a three-phase pipeline:
 
     1. Fast deterministic rule checks (can short-circuit)
-    2. LLM-assisted security scans
+    2. Security checks: local scanners first, the judge only for checks
+       they leave undecided
     3. LLM-based semantic evaluation against behavior spec
+
+    Phases 2 and 3 run concurrently, each judge call bounded by its own
+    timeout (``security_timeout`` / ``behavior_timeout``, in seconds).
+    Evaluations that need the judge first take a slot from the node's
+    ``JudgeBudget``; when a budget is exhausted the evaluation runs without
+    the judge (rules and local scanners only).
+    Phase 3 results can be served from an ``EvaluationCache``; cache hits
+    and misses, and per-phase latency, are reported through ``backend``
+    when one is given.
     """
 
-    def __init__(self, judge: Judge, security_config: SecurityConfig):
+    def __init__(
+        self,
+        judge: Judge,
+        security_config: SecurityConfig,
+        *,
+        cache: Optional[EvaluationCache] = None,
+        backend: Optional[TelemetryBackend] = None,
+        security_timeout: Optional[float] = None,
+        behavior_timeout: Optional[float] = None,
+        budgets: Optional[JudgeBudgets] = None,
+    ):
         self.judge = judge
         self.security_config = security_config
+        self.cache = cache
+        self._judge_identity = judge_identity(judge)
+        self.backend = backend
+        self.security_timeout = security_timeout
+        self.behavior_timeout = behavior_timeout
+        self.budgets = budgets if budgets is not None else JudgeBudgets()
         self.rule_checker = RuleBasedChecker()
         self.failure_classifier = FailureClassifier()
+        self.security_screen = (
+            LocalSecurityScreen(security_config) if security_config.local_scanning else None
+        )
 
     async def evaluate(
         self,
@@ -38,41 +78,146 @@ class EvaluationEngine:
         skip_rules: bool = False,
         skip_security: bool = False,
         skip_llm: bool = False,
+        node_name: Optional[str] = None,
+    ) -> EvaluationResult:
+        run_security = not skip_security and bool(node_config.security_checks)
+        run_behaviors = not skip_llm and bool(
+            node_config.expected_behaviors or node_config.unexpected_behaviors
+        )
+        # Cache hits never reach the judge, so look them up before taking
+        # any budget.
+        cache_key = cached = None
+        if run_behaviors and self.cache is not None:
+            cache_key = make_cache_key(
+                node_config, input_data, output_data, context, judge=self._judge_identity,
+            )
+            cached = await self._cached_behaviors(cache_key)
+        behaviors = {"cache_key": cache_key, "cached": cached}
+        needs_judge = (run_behaviors and cached is None) or (
+            run_security and (
+                self.security_screen is None
+                or self.security_screen.may_escalate(node_config.security_checks)
+            )
+        )
+        budget = None
+        if needs_judge:
+            # Unnamed nodes get a bucket of their own config.
+            budget = self.budgets.for_node(
+                node_name if node_name is not None else f"config:{id(node_config)}",
+                node_config.judge_budget,
+            )
+        exhausted = budget.try_acquire() if budget is not None else None
+        if exhausted is not None:
+            logger.info(
+                "Judge budget exhausted -- evaluating without the judge",
+                node=node_name,
+                budget=exhausted,
+            )
+            tags = {"budget": exhausted}
+            if node_name is not None:
+                tags["node"] = node_name
+            await self._emit_count("detra.eval.budget_exhausted", tags)
+            result = await self._evaluate(
+                node_config, input_data, output_data, context,
+                skip_rules=skip_rules, run_security=run_security,
+                run_behaviors=cached is not None, use_judge=False, **behaviors,
+            )
+            result.raw_evaluation = {
+                **(result.raw_evaluation or {}), "budget_exhausted": exhausted,
+            }
+            return result
+        if budget is None:
+            return await self._evaluate(
+                node_config, input_data, output_data, context,
+                skip_rules=skip_rules, run_security=run_security, run_behaviors=run_behaviors,
+                **behaviors,
+            )
+
+        result = None
+        try:
+            result = await self._evaluate(
+                node_config, input_data, output_data, context,
+                skip_rules=skip_rules, run_security=run_security, run_behaviors=run_behaviors,
+                budget=budget, **behaviors,
+            )
+            return result
+        finally:
+            budget.release(result.eval_tokens_used if result is not None else 0)
+
+    async def _evaluate(
+        self,
+        node_config: NodeConfig,
+        input_data: Any,
+        output_data: Any,
+        context: Optional[dict[str, Any]],
+        *,
+        skip_rules: bool,
+        run_security: bool,
+        run_behaviors: bool,
+        use_judge: bool = True,
+        cache_key: Optional[str] = None,
+        cached: Optional[EvaluationResult] = None,
+        budget: Optional[JudgeBudget] = None,
     ) -> EvaluationResult:
         start_time = time.time()
 
-        # Phase 1: rule-based checks
-        rule_results = None
-        if not skip_rules:
-            rule_results = self.rule_checker.check(input_data, output_data, node_config)
-            if rule_results.critical_failure:
-                logger.info(
-                    "Critical rule failure -- skipping LLM evaluation",
-                    node=node_config.description,
-                    reason=rule_results.failure_reason,
-                )
-                return EvaluationResult(
-                    score=rule_results.score,
-                    flagged=True,
-                    flag_reason=rule_results.failure_reason,
-                    flag_category=rule_results.failure_category,
-                    checks_failed=[
-                        self._rule_to_behavior(c) for c in rule_results.failed_checks
-                    ],
-                    latency_ms=(time.time() - start_time) * 1000,
-                )
+        # Phases 2 and 3 depend neither on each other nor on phase 1, so both
+        # are scheduled before the rule checks run.  The rule checks never
+        # yield to the loop, so a critical failure cancels the judge phases
+        # before either has sent a request.
+        try:
+            async with asyncio.TaskGroup() as tg:
+                security_task = tg.create_task(self._timed_phase(
+                    "security", self._check_security,
+                    node_config.security_checks, input_data, output_data, use_judge,
+                )) if run_security else None
+                behavior_task = tg.create_task(self._timed_phase(
+                    "behaviors", self._judge_behaviors,
+                    node_config, input_data, output_data, context, cache_key, cached,
+                )) if run_behaviors else None
+
+                # Phase 1: rule-based checks
+                rule_results = None
+                if not skip_rules:
+                    phase_start = time.perf_counter()
+                    rule_results = self.rule_checker.check(input_data, output_data, node_config)
+                    rules_ms = (time.perf_counter() - phase_start) * 1000
+                    if rule_results.critical_failure:
+                        for task in (security_task, behavior_task):
+                            if task is not None:
+                                task.cancel()
+                    await self._emit_phase_latency("rules", rules_ms)
+        except ExceptionGroup as group:
+            # Surface the failure itself, not the TaskGroup's wrapper.
+            raise group.exceptions[0] from None
+
+        if rule_results is not None and rule_results.critical_failure:
+            logger.info(
+                "Critical rule failure -- skipping LLM evaluation",
+                node=node_config.description,
+                reason=rule_results.failure_reason,
+            )
+            if budget is not None:
+                budget.refund()
+            return EvaluationResult(
+                score=rule_results.score,
+                flagged=True,
+                flag_reason=rule_results.failure_reason,
+                flag_category=rule_results.failure_category,
+                checks_failed=[
+                    self._rule_to_behavior(c) for c in rule_results.failed_checks
+                ],
+                latency_ms=(time.time() - start_time) * 1000,
+            )
 
         # Phase 2: security
         security_issues: list[dict[str, Any]] = []
-        if not skip_security and node_config.security_checks:
-            security_issues = await self.judge.check_security(
-                input_data, output_data, node_config.security_checks
-            )
+        decided_by: dict[str, str] = {}
+        if security_task is not None:
+            security_issues, decided_by = security_task.result()
 
         # Phase 3: LLM evaluation
-        if skip_llm or (
-            not node_config.expected_behaviors and not node_config.unexpected_behaviors
-        ):
+        if behavior_task is None:
             score = rule_results.score if rule_results else 1.0
             flagged = bool(security_issues) or bool(
                 rule_results and rule_results.failed_checks
@@ -83,18 +228,14 @@ class EvaluationEngine:
                 flag_reason="Security issue detected" if security_issues else None,
                 flag_category="security_violation" if security_issues else None,
                 security_issues=security_issues,
+                security_decided_by=decided_by,
                 latency_ms=(time.time() - start_time) * 1000,
             )
 
-        eval_result = await self.judge.evaluate_behaviors(
-            input_data=input_data,
-            output_data=output_data,
-            expected_behaviors=node_config.expected_behaviors,
-            unexpected_behaviors=node_config.unexpected_behaviors,
-            context=context,
-        )
+        eval_result = behavior_task.result()
 
         eval_result.security_issues = security_issues
+        eval_result.security_decided_by = decided_by
 
         if eval_result.score < node_config.adherence_threshold:
             eval_result.flagged = True
@@ -115,6 +256,121 @@ class EvaluationEngine:
         eval_result.latency_ms = (time.time() - start_time) * 1000
         return eval_result
 
+    async def _timed_phase(self, phase: str, fn, *args):
+        # Takes the function rather than a coroutine so a phase cancelled
+        # before it starts leaves no un-awaited coroutine behind.
+        phase_start = time.perf_counter()
+        result = await fn(*args)
+        await self._emit_phase_latency(phase, (time.perf_counter() - phase_start) * 1000)
+        return result
+
+    async def _with_timeout(self, phase: str, awaitable, timeout: Optional[float]):
+        """Await ``awaitable``, returning None if it outlives ``timeout`` seconds."""
+        try:
+            async with asyncio.timeout(timeout):
+                return await awaitable
+        except TimeoutError:
+            logger.warning("Evaluation phase timed out", phase=phase, timeout_s=timeout)
+            await self._emit_count("detra.eval.phase.timeout", {"phase": phase})
+            return None
+
+    async def _check_security(
+        self,
+        checks: list[str],
+        input_data: Any,
+        output_data: Any,
+        use_judge: bool = True,
+    ) -> tuple[list[dict[str, Any]], dict[str, str]]:
+        """Run local scanners, escalating only undecided checks to the judge.
+
+        Without ``use_judge`` the checks the scanners can't settle stay
+        undecided.
+        """
+        issues: list[dict[str, Any]] = []
+        decided_by: dict[str, str] = {}
+        escalate = list(checks)
+        if self.security_screen is not None:
+            outcome = self.security_screen.screen(input_data, output_data, checks)
+            issues.extend(outcome.issues)
+            decided_by.update(outcome.decided)
+            escalate = outcome.escalate
+
+        if escalate and use_judge:
+            judged = await self._with_timeout(
+                "security",
+                self.judge.check_security(input_data, output_data, escalate),
+                self.security_timeout,
+            )
+            # On timeout the escalated checks stay undecided.
+            if judged is not None:
+                issues.extend({**issue, "source": JUDGE} for issue in judged)
+                decided_by.update(dict.fromkeys(escalate, JUDGE))
+
+        for check, path in decided_by.items():
+            await self._emit_count("detra.security.decided", {"check": check, "path": path})
+        return issues, decided_by
+
+    async def _judge_behaviors(
+        self,
+        node_config: NodeConfig,
+        input_data: Any,
+        output_data: Any,
+        context: Optional[dict[str, Any]],
+        key: Optional[str],
+        cached: Optional[EvaluationResult],
+    ) -> EvaluationResult:
+        """Return the cached verdict, or ask the judge and cache its answer."""
+        if cached is not None:
+            return cached
+        result = await self._with_timeout(
+            "behaviors",
+            self.judge.evaluate_behaviors(
+                input_data=input_data,
+                output_data=output_data,
+                expected_behaviors=node_config.expected_behaviors,
+                unexpected_behaviors=node_config.unexpected_behaviors,
+                context=context,
+            ),
+            self.behavior_timeout,
+        )
+        if result is None:
+            return EvaluationResult(
+                score=0.5,
+                flagged=True,
+                flag_reason=f"Judge timed out after {self.behavior_timeout}s",
+                flag_category="error",
+            )
+        # Judge errors are transient -- never pin them in the cache.
+        if key is not None and result.flag_category != "error":
+            await cache_set(self.cache, key, result)
+        return result
+
+    async def _cached_behaviors(self, key: str) -> Optional[EvaluationResult]:
+        cached, tier = await cache_get(self.cache, key)
+        if cached is None:
+            await self._emit_count("detra.eval.cache.miss", None)
+            return None
+        cached.eval_tokens_used = 0
+        await self._emit_count("detra.eval.cache.hit", {"tier": tier})
+        return cached
+
+    async def _emit_count(self, name: str, tags: Optional[dict[str, str]]) -> None:
+        if not self.backend:
+            return
+        try:
+            await self.backend.emit_count(name, 1, tags)
+        except Exception as e:
+            logger.warning("Telemetry emission failed", metric=name, error=str(e))
+
+    async def _emit_phase_latency(self, phase: str, latency_ms: float) -> None:
+        if not self.backend:
+            return
+        name = "detra.eval.phase.latency_ms"
+        try:
+            await self.backend.emit_distribution(name, latency_ms, {"phase": phase})
+        except Exception as e:
+            logger.warning("Telemetry emission failed", metric=name, error=str(e))
+
     @staticmethod
     def _rule_to_behavior(rule_check) -> BehaviorCheckResult:
         return BehaviorCheckResult(
@@ -132,8 +388,6 @@ class EvaluationEngine:
         context: Optional[dict[str, Any]] = None,
         max_retries: int = 2,
     ) -> EvaluationResult:
-        import asyncio
-
         last_error: Optional[Exception] = None
         for attempt in range(max_retries + 1):
             try:
@@ -174,5 +428,5 @@ class EvaluationEngine:
             "critical_failure": rule_results.critical_failure,
             "failure_reason": rule_results.failure_reason,
             "checks_failed": len(rule_results.failed_checks),
-            "checks_passed": len(rule_results.passed_checks),
+            "checks_passed": rule_results.passed_count,
         }
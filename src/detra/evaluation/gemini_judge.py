@@ -9,11 +9,23 @@ import structlog
 from detra.config.schema import GeminiConfig
 from detra.evaluation.prompts import (
     BATCH_BEHAVIOR_CHECK_PROMPT,
+    BATCH_BEHAVIOR_CHECK_SCHEMA,
     BEHAVIOR_CHECK_PROMPT,
+    BEHAVIOR_CHECK_SCHEMA,
     ROOT_CAUSE_CLASSIFICATION_PROMPT,
     SECURITY_CHECK_PROMPT,
 )
 from detra.judges.base import BehaviorCheckResult, EvaluationResult
+from detra.judges.control import CircuitOpenError, ProviderController
+from detra.judges.hedging import Hedger
+from detra.judges.parsing import parse_behavior_results
+from detra.judges.structured import (
+    DEFAULT_FALLBACK_CONCURRENCY,
+    BehaviorAnswers,
+    fill_missing,
+    normalize_entry,
+    validate_behavior_results,
+)
 from detra.utils.retry import RetryConfig, async_retry
 from detra.utils.serialization import extract_json_from_text, safe_json_dumps, truncate_string
 
@@ -42,6 +54,34 @@ def count_tokens(text: str) -> int:
     return len(str(text)) // 4
 
 
+def gemini_schema(schema: dict[str, Any]) -> dict[str, Any]:
+    """A JSON schema in the OpenAPI subset Gemini's ``response_schema`` takes.
+
+    Nullable type lists become ``nullable`` and ``additionalProperties`` is
+    dropped; property order is kept with ``propertyOrdering``.
+    """
+    converted: dict[str, Any] = {}
+    for key, value in schema.items():
+        if key == "additionalProperties":
+            continue
+        if key == "type" and isinstance(value, list):
+            converted["type"] = next(t for t in value if t != "null")
+            if "null" in value:
+                converted["nullable"] = True
+        elif key == "properties":
+            converted["properties"] = {k: gemini_schema(v) for k, v in value.items()}
+            converted["propertyOrdering"] = list(value)
+        elif key == "items":
+            converted["items"] = gemini_schema(value)
+        else:
+            converted[key] = value
+    return converted
+
+
+_BATCH_SCHEMA = gemini_schema(BATCH_BEHAVIOR_CHECK_SCHEMA)
+_BEHAVIOR_SCHEMA = gemini_schema(BEHAVIOR_CHECK_SCHEMA)
+
+
 class GeminiJudge:
     """
     Gemini-powered evaluation judge for LLM outputs.
@@ -50,14 +90,32 @@ class GeminiJudge:
     expected and unexpected behaviors.
     """
 
-    def __init__(self, config: GeminiConfig):
+    def __init__(
+        self,
+        config: GeminiConfig,
+        controller: Optional[ProviderController] = None,
+        hedger: Optional[Hedger] = None,
+        structured_output: bool = True,
+        fallback_concurrency: int = DEFAULT_FALLBACK_CONCURRENCY,
+    ):
         """
         Initialize the Gemini judge.
 
         Args:
             config: Gemini configuration.
+            controller: Concurrency/circuit-breaker control shared by the
+                judge's calls; one with default settings if not given.
+            hedger: Optional hedging policy for slow calls.
+            structured_output: Ask Gemini for JSON matching the response
+                schema instead of relying on the prompt alone.
+            fallback_concurrency: Behaviors checked at once when a batch
+                response leaves some unanswered.
         """
         self.config = config
+        self.controller = controller or ProviderController(name="gemini")
+        self.hedger = hedger
+        self.structured_output = structured_output
+        self.fallback_concurrency = fallback_concurrency
         self._client = None
         self._setup_complete = False
 
@@ -147,21 +205,32 @@ class GeminiJudge:
         )
 
         try:
-            response_text = await self._generate_async(prompt)
-            result_data = extract_json_from_text(response_text)
+            response_text = await self._generate_async(prompt, schema=_BATCH_SCHEMA)
+            answers = validate_behavior_results(
+                extract_json_from_text(response_text), expected_behaviors, unexpected_behaviors,
+            )
 
-            if not result_data:
+            # Count tokens used (prompt + response)
+            tokens_used = count_tokens(prompt) + count_tokens(response_text)
+
+            if not answers.answered:
                 logger.warning("Failed to parse batch evaluation response")
                 # Fall back to individual checks
-                return await self._evaluate_individual(
+                result = await self._evaluate_individual(
                     input_data, output_data, expected_behaviors, unexpected_behaviors, context
                 )
+                result.eval_tokens_used += tokens_used
+                return result
 
-            # Count tokens used (prompt + response)
-            tokens_used = count_tokens(prompt) + count_tokens(response_text)
+            if answers.missing:
+                logger.warning(
+                    "Batch evaluation response incomplete -- checking the rest individually",
+                    missing=answers.missing,
+                )
+                tokens_used += await self._fill_missing(answers, input_data, output_data, context)
 
             return self._parse_batch_result(
-                result_data,
+                answers.to_data(),
                 expected_behaviors,
                 unexpected_behaviors,
                 tokens_used,
@@ -185,80 +254,43 @@ class GeminiJudge:
         context: Optional[dict[str, Any]] = None,
     ) -> EvaluationResult:
         """Evaluate behaviors individually (fallback method)."""
-        checks_passed = []
-        checks_failed = []
-        total_tokens = 0
-
-        # Check expected behaviors
-        for behavior in expected_behaviors:
-            result = await self._check_behavior(
-                input_data, output_data, behavior, should_pass=True, context=context
-            )
-            total_tokens += result.get("tokens_used", 0)
-
-            check_result = BehaviorCheckResult(
-                behavior=behavior,
-                passed=result["passed"],
-                confidence=result["confidence"],
-                reasoning=result["reasoning"],
-                evidence=result.get("evidence"),
-            )
-
-            if result["passed"]:
-                checks_passed.append(check_result)
-            else:
-                checks_failed.append(check_result)
-
-        # Check unexpected behaviors
-        for behavior in unexpected_behaviors:
-            result = await self._check_behavior(
-                input_data, output_data, behavior, should_pass=False, context=context
-            )
-            total_tokens += result.get("tokens_used", 0)
-
-            detected = result["passed"]  # If behavior IS present, it's bad
-
-            if detected:
-                check_result = BehaviorCheckResult(
-                    behavior=f"UNEXPECTED: {behavior}",
-                    passed=False,
-                    confidence=result["confidence"],
-                    reasoning=result["reasoning"],
-                    evidence=result.get("evidence"),
-                )
-                checks_failed.append(check_result)
-
-        # Calculate score
-        total_checks = len(expected_behaviors) + len(unexpected_behaviors)
-        unexpected_failures = len(
-            [c for c in checks_failed if c.behavior.startswith("UNEXPECTED:")]
+        answers = validate_behavior_results(None, expected_behaviors, unexpected_behaviors)
+        total_tokens = await self._fill_missing(answers, input_data, output_data, context)
+        result = parse_behavior_results(
+            answers.to_data(), expected_behaviors, unexpected_behaviors,
         )
-        passed_count = len(checks_passed) + (len(unexpected_behaviors) - unexpected_failures)
-        score = passed_count / total_checks if total_checks > 0 else 1.0
 
         # Classify failures if any
-        flag_reason = None
-        flag_category = None
-        if checks_failed:
+        if result.checks_failed:
             classification = await self._classify_failure(
-                input_data, output_data, checks_failed
+                input_data, output_data, result.checks_failed
             )
-            flag_reason = classification["reason"]
-            flag_category = classification["category"]
+            result.flag_reason = classification["reason"]
+            result.flag_category = classification["category"]
             total_tokens += classification.get("tokens_used", 0)
 
-        # Flag if checks failed or score is below threshold
-        is_flagged = len(checks_failed) > 0 or score < 0.5
-        
-        return EvaluationResult(
-            score=score,
-            flagged=is_flagged,
-            flag_reason=flag_reason if is_flagged else None,
-            flag_category=flag_category if is_flagged else None,
-            checks_passed=checks_passed,
-            checks_failed=checks_failed,
-            eval_tokens_used=total_tokens,
-        )
+        result.eval_tokens_used = total_tokens
+        return result
+
+    async def _fill_missing(
+        self,
+        answers: BehaviorAnswers,
+        input_data: Any,
+        output_data: Any,
+        context: Optional[dict[str, Any]],
+    ) -> int:
+        """Check the behaviors missing from ``answers`` concurrently; returns tokens used."""
+        tokens = 0
+
+        async def check(behavior: str, expected: bool) -> dict[str, Any]:
+            nonlocal tokens
+            result = await self._check_behavior(input_data, output_data, behavior, context)
+            tokens += result["tokens_used"]
+            flag = "present" if expected else "detected"
+            return normalize_entry({**result, flag: result["behavior_present"]}, behavior, flag)
+
+        await fill_missing(answers, check, self.fallback_concurrency)
+        return tokens
 
     def _parse_batch_result(
         self,
@@ -268,73 +300,22 @@ class GeminiJudge:
         tokens_used: int,
     ) -> EvaluationResult:
         """Parse batch evaluation result."""
-        checks_passed = []
-        checks_failed = []
-
-        # Parse expected behavior results
-        expected_results = result_data.get("expected_results", [])
-        for i, result in enumerate(expected_results):
-            behavior = result.get("behavior", expected_behaviors[i] if i < len(expected_behaviors) else "unknown")
-            passed = result.get("present", False)
-
-            check = BehaviorCheckResult(
-                behavior=behavior,
-                passed=passed,
-                confidence=result.get("confidence", 0.5),
-                reasoning=result.get("reasoning", ""),
-                evidence=result.get("evidence"),
-            )
-
-            if passed:
-                checks_passed.append(check)
-            else:
-                checks_failed.append(check)
-
-        # Parse unexpected behavior results
-        unexpected_results = result_data.get("unexpected_results", [])
-        for i, result in enumerate(unexpected_results):
-            behavior = result.get("behavior", unexpected_behaviors[i] if i < len(unexpected_behaviors) else "unknown")
-            detected = result.get("detected", False)
-
-            if detected:
-                check = BehaviorCheckResult(
-                    behavior=f"UNEXPECTED: {behavior}",
-                    passed=False,
-                    confidence=result.get("confidence", 0.5),
-                    reasoning=result.get("reasoning", ""),
-                    evidence=result.get("evidence"),
-                )
-                checks_failed.append(check)
-
-        # Calculate score
-        total_checks = len(expected_behaviors) + len(unexpected_behaviors)
-        unexpected_failures = len([c for c in checks_failed if c.behavior.startswith("UNEXPECTED:")])
-        passed_count = len(checks_passed) + (len(unexpected_behaviors) - unexpected_failures)
-        score = passed_count / total_checks if total_checks > 0 else 1.0
-
-        # Flag if checks failed or score is below threshold
-        is_flagged = len(checks_failed) > 0 or score < 0.5
-        
-        return EvaluationResult(
-            score=score,
-            flagged=is_flagged,
-            flag_reason=result_data.get("overall_assessment") if is_flagged else None,
-            flag_category="low_score" if score < 0.5 and len(checks_failed) == 0 else None,
-            checks_passed=checks_passed,
-            checks_failed=checks_failed,
-            raw_evaluation=result_data,
-            eval_tokens_used=tokens_used,
-        )
+        result = parse_behavior_results(result_data, expected_behaviors, unexpected_behaviors)
+        result.eval_tokens_used = tokens_used
+        return result
 
     async def _check_behavior(
         self,
         input_data: Any,
         output_data: Any,
         behavior: str,
-        should_pass: bool,
         context: Optional[dict[str, Any]] = None,
     ) -> dict[str, Any]:
-        """Check if a specific behavior is exhibited in the output."""
+        """Check if a specific behavior is exhibited in the output.
+
+        Judge errors propagate, so the evaluation reports a judge error
+        rather than a verdict.
+        """
         input_str = truncate_string(str(input_data), 2000)
         output_str = truncate_string(str(output_data), 2000)
         prompt = BEHAVIOR_CHECK_PROMPT.format(
@@ -342,41 +323,30 @@ class GeminiJudge:
             output_data=output_str,
             behavior=behavior,
             context=safe_json_dumps(context) if context else "None",
-            check_type="present" if should_pass else "absent",
+            check_type="present",
         )
 
-        try:
-            response_text = await self._generate_async(prompt)
-            result = extract_json_from_text(response_text)
-
-            if not result:
-                return {
-                    "passed": False,
-                    "confidence": 0.0,
-                    "reasoning": "Failed to parse response",
-                    "tokens_used": 0,
-                }
-
-            behavior_present = result.get("behavior_present", False)
-
-            # Count tokens used
-            tokens_used = count_tokens(prompt) + count_tokens(response_text)
-
-            return {
-                "passed": behavior_present if should_pass else not behavior_present,
-                "confidence": result.get("confidence", 0.5),
-                "reasoning": result.get("reasoning", ""),
-                "evidence": result.get("evidence"),
-                "tokens_used": tokens_used,
-            }
-        except Exception as e:
+        response_text = await self._generate_async(prompt, schema=_BEHAVIOR_SCHEMA)
+        result = extract_json_from_text(response_text)
+        if not isinstance(result, dict) or not isinstance(result.get("behavior_present"), bool):
             return {
-                "passed": False,
+                "behavior_present": False,
                 "confidence": 0.0,
-                "reasoning": f"Evaluation error: {str(e)}",
+                "reasoning": "Failed to parse response",
                 "tokens_used": 0,
             }
 
+        # Count tokens used
+        tokens_used = count_tokens(prompt) + count_tokens(response_text)
+
+        return {
+            "behavior_present": result["behavior_present"],
+            "confidence": result.get("confidence", 0.5),
+            "reasoning": result.get("reasoning", ""),
+            "evidence": result.get("evidence"),
+            "tokens_used": tokens_used,
+        }
+
     async def _classify_failure(
         self,
         input_data: Any,
@@ -473,8 +443,19 @@ class GeminiJudge:
             logger.error("Security check failed", error=str(e))
             return []
 
-    async def _generate_async(self, prompt: str) -> str:
-        """Generate content asynchronously with retry."""
+    async def complete(self, prompt: str) -> str:
+        """Send a raw prompt to Gemini and return its text."""
+        self._setup_client()
+        return await self._generate_async(prompt)
+
+    async def _generate_async(
+        self, prompt: str, schema: Optional[dict[str, Any]] = None,
+    ) -> str:
+        """Generate content asynchronously with retry.
+
+        With ``schema`` (and ``structured_output`` on) Gemini is asked for
+        JSON matching it.
+        """
         if not self._client:
             raise RuntimeError("Gemini client not initialized")
 
@@ -482,17 +463,24 @@ class GeminiJudge:
             max_retries=3,
             initial_delay=1.0,
             retryable_exceptions=(Exception,),
+            # A timed-out call keeps running in its executor thread, so a
+            # retry would only pile more threads onto a slow provider.
+            give_up_on=(CircuitOpenError, TimeoutError),
         )
 
-        async def generate():
+        request: dict[str, Any] = {"contents": prompt}
+        if schema is not None and self.structured_output:
+            request["config"] = {
+                "response_mime_type": "application/json",
+                "response_schema": schema,
+            }
+
+        async def generate(model: str):
             loop = asyncio.get_event_loop()
             # Use run_in_executor for the synchronous API call
             response = await loop.run_in_executor(
                 None,
-                lambda: self._client.models.generate_content(
-                    model=self.config.model,
-                    contents=prompt,
-                )
+                lambda: self._client.models.generate_content(model=model, **request)
             )
             # Extract text from response
             if hasattr(response, "text"):
@@ -508,4 +496,15 @@ class GeminiJudge:
             # Fallback: try to get text from response
             return str(response)
 
-        return await async_retry(generate, config=config)
+        def send(model: str):
+            return lambda: self.controller.call(lambda: generate(model))
+
+        async def attempt():
+            if self.hedger is None:
+                return await send(self.config.model)()
+            # A cancelled hedge loser still finishes in its executor thread;
+            # only its result is discarded.
+            fallback = self.hedger.config.fallback_model or self.config.model
+            return await self.hedger.run(send(self.config.model), send(fallback))
+
+        return await async_retry(attempt, config=config)
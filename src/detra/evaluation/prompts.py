@@ -1,4 +1,4 @@
-"""Evaluation prompt templates for Gemini judge."""
+"""Evaluation prompt templates and response schemas for LLM judges."""
 
 BEHAVIOR_CHECK_PROMPT = """You are an expert evaluator for LLM outputs. Your task is to determine if a specific behavior is {check_type} in the output.
 
@@ -208,3 +208,99 @@ Respond with a JSON object:
     "overall_assessment": "brief summary"
 }}
 ```"""
+
+MULTI_ITEM_BEHAVIOR_CHECK_PROMPT = """You are an expert evaluator for LLM outputs. Evaluate the same set of behaviors for each of several independent items.
+
+## Behaviors to Check
+### Expected (should be present):
+{expected_behaviors}
+
+### Unexpected (should NOT be present):
+{unexpected_behaviors}
+
+## Items
+{items}
+
+## Instructions
+Judge every item on its own, using only that item's input, output and context.
+Return exactly one result per item, identified by its index.
+
+Respond with a JSON object:
+```json
+{{
+    "items": [
+        {{
+            "index": 0,
+            "expected_results": [
+                {{
+                    "behavior": "the behavior text",
+                    "present": true/false,
+                    "confidence": 0.0-1.0,
+                    "reasoning": "brief explanation",
+                    "evidence": "relevant quote if applicable"
+                }}
+            ],
+            "unexpected_results": [
+                {{
+                    "behavior": "the behavior text",
+                    "detected": true/false,
+                    "confidence": 0.0-1.0,
+                    "reasoning": "brief explanation",
+                    "evidence": "relevant quote if detected"
+                }}
+            ],
+            "overall_assessment": "brief summary"
+        }}
+    ]
+}}
+```"""
+
+MULTI_ITEM_ENTRY_TEMPLATE = """### Item {index}
+Input:
+```
+{input_data}
+```
+Output:
+```
+{output_data}
+```
+Context: {context}
+"""
+
+# JSON schemas of the judge responses above, sent to providers with native
+# structured output.  Written to the strict subset OpenAI's json_schema mode
+# accepts: every property required, no additional properties.
+_BEHAVIOR_FIELDS = {
+    "confidence": {"type": "number"},
+    "reasoning": {"type": "string"},
+    "evidence": {"type": ["string", "null"]},
+}
+
+
+def _behavior_result_schema(flag: str) -> dict:
+    properties = {"behavior": {"type": "string"}, flag: {"type": "boolean"}, **_BEHAVIOR_FIELDS}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+BATCH_BEHAVIOR_CHECK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "expected_results": {"type": "array", "items": _behavior_result_schema("present")},
+        "unexpected_results": {"type": "array", "items": _behavior_result_schema("detected")},
+        "overall_assessment": {"type": "string"},
+    },
+    "required": ["expected_results", "unexpected_results", "overall_assessment"],
+    "additionalProperties": False,
+}
+
+BEHAVIOR_CHECK_SCHEMA = {
+    "type": "object",
+    "properties": {"behavior_present": {"type": "boolean"}, **_BEHAVIOR_FIELDS},
+    "required": ["behavior_present", *_BEHAVIOR_FIELDS],
+    "additionalProperties": False,
+}
@@ -1,12 +1,17 @@
 """Fast rule-based evaluation checks."""
 
+import functools
 import json
-import re
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Optional
 
-from detra.config.schema import NodeConfig
+from detra.config.schema import FormatRules, NodeConfig
+from detra.utils import codec
+from detra.utils.incremental import StreamHit, StreamWindow
+from detra.utils.patterns import PatternSet
 
 
 class RuleSeverity(str, Enum):
@@ -28,21 +33,113 @@ class RuleCheckResult:
     details: dict[str, Any] = field(default_factory=dict)
 
 
+class _PassedChecks:
+    """The ``passed_checks`` field: a plain list, built on first access.
+
+    The checker leaves it unset and records which checks ran instead; a
+    list passed to the constructor or assigned is stored as is.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._attr = f"_{name}"
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        if obj is None:
+            return None  # the dataclass default: build on demand
+        checks = obj.__dict__.get(self._attr)
+        if checks is None:
+            checks = obj.__dict__[self._attr] = obj._build_passed_checks()
+        return checks
+
+    def __set__(self, obj: Any, value: Optional[list[RuleCheckResult]]) -> None:
+        obj.__dict__[self._attr] = value
+
+
 @dataclass
 class RuleEvaluationResult:
-    """Result of all rule-based checks."""
+    """Result of all rule-based checks.
+
+    Only failures get a ``RuleCheckResult`` up front; passing checks are
+    counted in ``checks_run``, so the common all-clear path allocates
+    nothing, and ``passed_checks`` builds their results when first read.
+    """
     score: float
     critical_failure: bool
-    passed_checks: list[RuleCheckResult] = field(default_factory=list)
+    passed_checks: list[RuleCheckResult] = _PassedChecks()  # type: ignore[assignment]
     failed_checks: list[RuleCheckResult] = field(default_factory=list)
     failure_reason: Optional[str] = None
     failure_category: Optional[str] = None
+    checks_run: int = 0
+    # (check name, severity) of every check that ran, listed on demand
+    _ran: Optional[Callable[[], list[tuple[str, RuleSeverity]]]] = field(
+        default=None, repr=False, compare=False,
+    )
+
+    @property
+    def passed_count(self) -> int:
+        """Number of checks that ran and passed."""
+        checks = self.__dict__.get("_passed_checks")
+        if checks is not None:
+            return len(checks)
+        return self.checks_run - len(self.failed_checks)
 
     @property
     def all_checks(self) -> list[RuleCheckResult]:
         """Get all checks."""
         return self.passed_checks + self.failed_checks
 
+    def _build_passed_checks(self) -> list[RuleCheckResult]:
+        """A passing result for each check that ran and didn't fail."""
+        if self._ran is None:
+            return []
+        failed = {check.check_name for check in self.failed_checks}
+        return [
+            RuleCheckResult(check_name=name, passed=True, severity=severity)
+            for name, severity in self._ran()
+            if name not in failed
+        ]
+
+
+class CompiledErrorRules:
+    """A list of ``(pattern, severity)`` rules scanned in a single pass.
+
+    The patterns are merged into one ``PatternSet`` alternation, and the
+    check name and message for each rule are rendered once here rather than
+    on every ``check``.
+    """
+
+    def __init__(self, patterns: tuple[tuple[str, RuleSeverity], ...]):
+        self.patterns = PatternSet([pattern for pattern, _ in patterns])
+        self.rules = [
+            (f"error_pattern_{pattern[:20]}", severity, f"Error pattern detected: {pattern}")
+            for pattern, severity in patterns
+        ]
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def scan(self, text: str) -> list[RuleCheckResult]:
+        """Return one failed check per rule that matches ``text``."""
+        failures = []
+        for index, hit in self.patterns.first_hits(text).items():
+            check_name, severity, message = self.rules[index]
+            failures.append(RuleCheckResult(
+                check_name=check_name,
+                passed=False,
+                severity=severity,
+                message=message,
+                details={"matched_text": hit.text},
+            ))
+        return failures
+
+
+@lru_cache(maxsize=32)
+def compile_error_rules(
+    patterns: tuple[tuple[str, RuleSeverity], ...],
+) -> CompiledErrorRules:
+    """Compile (and memoize) an error-pattern table."""
+    return CompiledErrorRules(patterns)
+
 
 class RuleBasedChecker:
     """
@@ -63,6 +160,10 @@ class RuleBasedChecker:
         (r"(?i)i apologize", RuleSeverity.LOW),
     ]
 
+    def __init__(self) -> None:
+        # Subclasses may override ERROR_PATTERNS; compile whatever is in effect.
+        self._error_rules = compile_error_rules(tuple(self.ERROR_PATTERNS))
+
     def check(
         self,
         input_data: Any,
@@ -75,54 +176,65 @@ class RuleBasedChecker:
         Args:
             input_data: Input to the LLM.
             output_data: Output from the LLM.
-            node_config: Node-specific configuration.
+            node_config: Node-specific configuration; its ``format_rules``
+                are applied after the built-in checks.
 
         Returns:
-            RuleEvaluationResult with all check results.
+            RuleEvaluationResult with the failed checks.
         """
         output_str = str(output_data) if output_data else ""
 
         result = RuleEvaluationResult(
             score=1.0,
             critical_failure=False,
+            checks_run=1,
         )
 
         # Check for empty output (critical failure)
-        empty_check = self._check_empty_output(output_str)
-        if not empty_check.passed:
+        if not output_str or output_str.isspace():
             result.critical_failure = True
             result.score = 0.0
-            result.failure_reason = empty_check.message
+            result.failure_reason = "Empty output"
             result.failure_category = "missing_content"
-            result.failed_checks.append(empty_check)
+            result.failed_checks.append(RuleCheckResult(
+                check_name="empty_output",
+                passed=False,
+                severity=RuleSeverity.CRITICAL,
+                message="Empty output",
+            ))
             return result
 
-        result.passed_checks.append(empty_check)
-
-        # Check for error patterns
-        for pattern, severity in self.ERROR_PATTERNS:
-            check_result = self._check_error_pattern(output_str, pattern, severity)
-            if not check_result.passed:
-                result.failed_checks.append(check_result)
-            else:
-                result.passed_checks.append(check_result)
+        # Check for error patterns -- one pass over the output for all of them
+        result.checks_run += len(self._error_rules)
+        result.failed_checks.extend(self._error_rules.scan(output_str))
 
         # Check JSON validity if output looks like JSON
-        json_check = self._check_json_validity(output_str)
-        if json_check:
-            if json_check.passed:
-                result.passed_checks.append(json_check)
-            else:
-                result.failed_checks.append(json_check)
+        parsed: Any = _UNPARSED
+        ran_json = False
+        stripped = output_str.strip()
+        if stripped.startswith(("{", "[")):
+            result.checks_run += 1
+            ran_json = True
+            parsed, json_failure = self._parse_json(stripped)
+            if json_failure:
+                result.failed_checks.append(json_failure)
                 result.score -= 0.2
 
         # Check output length
-        length_check = self._check_output_length(output_str)
-        if not length_check.passed:
-            result.failed_checks.append(length_check)
-            if length_check.severity == RuleSeverity.MEDIUM:
+        result.checks_run += 1
+        length_failure = self._check_output_length(output_str)
+        if length_failure:
+            result.failed_checks.append(length_failure)
+            if length_failure.severity == RuleSeverity.MEDIUM:
                 result.score -= 0.1
 
+        # Node-declared format rules
+        rules = node_config.format_rules if node_config is not None else None
+        if rules is not None:
+            result.checks_run += _count_format_checks(rules)
+            result.failed_checks.extend(self._check_format_rules(output_str, rules, parsed))
+        result._ran = functools.partial(_ran_checks, self._error_rules, ran_json, rules)
+
         # Calculate final score based on failures
         failure_count = len(result.failed_checks)
         if failure_count > 0:
@@ -131,70 +243,21 @@ class RuleBasedChecker:
 
         return result
 
-    def _check_empty_output(self, output_str: str) -> RuleCheckResult:
-        """Check for empty or whitespace-only output."""
-        if not output_str or output_str.strip() == "":
-            return RuleCheckResult(
-                check_name="empty_output",
-                passed=False,
-                severity=RuleSeverity.CRITICAL,
-                message="Empty output",
-            )
-        return RuleCheckResult(
-            check_name="empty_output",
-            passed=True,
-            severity=RuleSeverity.CRITICAL,
-        )
-
-    def _check_error_pattern(
-        self, output_str: str, pattern: str, severity: RuleSeverity
-    ) -> RuleCheckResult:
-        """Check for error patterns in output."""
-        match = re.search(pattern, output_str)
-        check_name = f"error_pattern_{pattern[:20]}"
-
-        if match:
-            return RuleCheckResult(
-                check_name=check_name,
-                passed=False,
-                severity=severity,
-                message=f"Error pattern detected: {pattern}",
-                details={"matched_text": match.group()},
-            )
-        return RuleCheckResult(
-            check_name=check_name,
-            passed=True,
-            severity=severity,
-        )
-
-    def _check_json_validity(self, output_str: str) -> Optional[RuleCheckResult]:
-        """Check JSON validity if output appears to be JSON."""
-        stripped = output_str.strip()
-
-        # Only check if it looks like JSON
-        if not (stripped.startswith("{") or stripped.startswith("[")):
-            return None
-
+    def _parse_json(self, stripped: str) -> tuple[Any, Optional[RuleCheckResult]]:
+        """Parse JSON-looking output; returns ``(data, failure)``."""
         # Handle markdown code blocks
-        if "```json" in stripped or "```" in stripped:
+        if "```" in stripped:
             # Extract JSON from code block
-            if "```json" in stripped:
-                start = stripped.find("```json") + 7
-            else:
-                start = stripped.find("```") + 3
+            fence = stripped.find("```json")
+            start = fence + 7 if fence != -1 else stripped.find("```") + 3
             end = stripped.rfind("```")
             if end > start:
                 stripped = stripped[start:end].strip()
 
         try:
-            json.loads(stripped)
-            return RuleCheckResult(
-                check_name="json_valid",
-                passed=True,
-                severity=RuleSeverity.HIGH,
-            )
+            return codec.loads(stripped), None
         except json.JSONDecodeError as e:
-            return RuleCheckResult(
+            return _UNPARSED, RuleCheckResult(
                 check_name="json_valid",
                 passed=False,
                 severity=RuleSeverity.HIGH,
@@ -202,8 +265,8 @@ class RuleBasedChecker:
                 details={"error": str(e)},
             )
 
-    def _check_output_length(self, output_str: str) -> RuleCheckResult:
-        """Check output length for anomalies."""
+    def _check_output_length(self, output_str: str) -> Optional[RuleCheckResult]:
+        """Check output length for anomalies; ``None`` when it looks normal."""
         length = len(output_str)
 
         if length < 10:
@@ -224,12 +287,7 @@ class RuleBasedChecker:
                 details={"length": length},
             )
 
-        return RuleCheckResult(
-            check_name="output_length",
-            passed=True,
-            severity=RuleSeverity.LOW,
-            details={"length": length},
-        )
+        return None
 
     def check_format_requirements(
         self,
@@ -239,31 +297,46 @@ class RuleBasedChecker:
         """
         Check output against format requirements.
 
+        Prefer declaring ``format_rules`` on the node so they are compiled
+        once at config load; this entry point compiles them per call.
+
         Args:
             output_str: Output to check.
             requirements: Format requirements (e.g., max_length, required_keys).
 
         Returns:
-            List of check results.
+            List of failed check results.
         """
+        rules = FormatRules.model_validate(requirements)
+        return self._check_format_rules(output_str, rules, _UNPARSED)
+
+    def _check_format_rules(
+        self,
+        output_str: str,
+        rules: FormatRules,
+        parsed: Any,
+    ) -> list[RuleCheckResult]:
         results = []
 
-        if "max_length" in requirements:
-            max_len = requirements["max_length"]
-            if len(output_str) > max_len:
-                results.append(
-                    RuleCheckResult(
-                        check_name="max_length",
-                        passed=False,
-                        severity=RuleSeverity.MEDIUM,
-                        message=f"Output exceeds max length: {len(output_str)} > {max_len}",
-                    )
+        if rules.max_length is not None and len(output_str) > rules.max_length:
+            results.append(
+                RuleCheckResult(
+                    check_name="max_length",
+                    passed=False,
+                    severity=RuleSeverity.MEDIUM,
+                    message=f"Output exceeds max length: {len(output_str)} > {rules.max_length}",
                 )
+            )
 
-        if "required_keys" in requirements:
-            try:
-                data = json.loads(output_str)
-                for key in requirements["required_keys"]:
+        if rules.required_keys:
+            data = parsed
+            if data is _UNPARSED:
+                try:
+                    data = codec.loads(output_str)
+                except json.JSONDecodeError:
+                    data = _UNPARSED  # Already handled by JSON validity check
+            if isinstance(data, (dict, list)):
+                for key in rules.required_keys:
                     if key not in data:
                         results.append(
                             RuleCheckResult(
@@ -273,12 +346,13 @@ class RuleBasedChecker:
                                 message=f"Missing required key: {key}",
                             )
                         )
-            except json.JSONDecodeError:
-                pass  # Already handled by JSON validity check
 
-        if "must_contain" in requirements:
-            for phrase in requirements["must_contain"]:
-                if phrase.lower() not in output_str.lower():
+        # first_hits matches each phrase on its own, so nested and
+        # overlapping phrases are all found.
+        if rules.must_contain_set is not None:
+            found = rules.must_contain_set.first_hits(output_str)
+            for index, phrase in enumerate(rules.must_contain):
+                if index not in found:
                     results.append(
                         RuleCheckResult(
                             check_name=f"must_contain_{phrase[:20]}",
@@ -288,9 +362,10 @@ class RuleBasedChecker:
                         )
                     )
 
-        if "must_not_contain" in requirements:
-            for phrase in requirements["must_not_contain"]:
-                if phrase.lower() in output_str.lower():
+        if rules.must_not_contain_set is not None:
+            found = rules.must_not_contain_set.first_hits(output_str)
+            for index, phrase in enumerate(rules.must_not_contain):
+                if index in found:
                     results.append(
                         RuleCheckResult(
                             check_name=f"must_not_contain_{phrase[:20]}",
@@ -300,4 +375,175 @@ class RuleBasedChecker:
                         )
                     )
 
+        if rules.forbidden_set is not None:
+            for index, hit in rules.forbidden_set.first_hits(output_str).items():
+                pattern = rules.forbidden_patterns[index]
+                results.append(
+                    RuleCheckResult(
+                        check_name=f"forbidden_pattern_{pattern[:20]}",
+                        passed=False,
+                        severity=RuleSeverity.HIGH,
+                        message=f"Forbidden pattern matched: {pattern}",
+                        details={"matched_text": hit.text},
+                    )
+                )
+
         return results
+
+
+class IncrementalRuleChecker:
+    """The pattern and length rules of ``RuleBasedChecker``, over a stream.
+
+    Error patterns, ``must_not_contain``, ``forbidden_patterns`` and
+    ``max_length`` fail as soon as the chunk completing them is fed;
+    ``must_contain`` and empty output are decided by ``finish``.  JSON
+    validity and ``required_keys`` need the whole output and are left to
+    the full check of the assembled stream.  Each check fails at most once.
+    """
+
+    name = "rules"
+
+    def __init__(
+        self,
+        node_config: Optional[NodeConfig] = None,
+        *,
+        checker: Optional[RuleBasedChecker] = None,
+        **window: Any,
+    ):
+        checker = checker or RuleBasedChecker()
+        self._error_rules = checker._error_rules
+        self.rules = node_config.format_rules if node_config is not None else None
+        # Each pattern is matched on its own, as the full check's first_hits
+        # does, and drops out once it has been reported.
+        self._reported: dict[str, set[int]] = {}
+        self._windows: list[tuple[str, StreamWindow]] = []
+        kinds = [("error", self._error_rules.patterns)]
+        rules = self.rules
+        if rules is not None:
+            kinds += [
+                ("must_contain", rules.must_contain_set),
+                ("must_not_contain", rules.must_not_contain_set),
+                ("forbidden", rules.forbidden_set),
+            ]
+        for kind, patterns in kinds:
+            if patterns is not None:
+                reported = self._reported[kind] = set()
+                finditer = functools.partial(patterns.each_match, skip=reported)
+                self._windows.append(
+                    (kind, StreamWindow(finditer, overlapping=True, **window)),
+                )
+        self.failures: list[RuleCheckResult] = []
+        self._failed: set[str] = set()
+        self._contained: set[str] = set()
+        self._length = 0
+        self._blank = True
+
+    @property
+    def settled(self) -> int:
+        """Stream offset before which no future failure can start."""
+        return min(window.settled for _, window in self._windows)
+
+    def feed(self, chunk: str) -> list[RuleCheckResult]:
+        """Check the next chunk; returns the new failures."""
+        new: list[RuleCheckResult] = []
+        self._length += len(chunk)
+        if self._blank and chunk and not chunk.isspace():
+            self._blank = False
+        for kind, window in self._windows:
+            self._on_hits(kind, window.feed(chunk), new)
+        max_length = self.rules.max_length if self.rules is not None else None
+        if max_length is not None and self._length > max_length:
+            self._fail(new, "max_length", RuleSeverity.MEDIUM,
+                       f"Output exceeds max length: {self._length} > {max_length}")
+        return new
+
+    def finish(self) -> list[RuleCheckResult]:
+        """End of stream; returns the failures only the whole output decides."""
+        new: list[RuleCheckResult] = []
+        for kind, window in self._windows:
+            self._on_hits(kind, window.flush(), new)
+        if self._blank:
+            self._fail(new, "empty_output", RuleSeverity.CRITICAL, "Empty output")
+        if self.rules is not None:
+            for phrase in self.rules.must_contain:
+                if phrase.lower() not in self._contained:
+                    self._fail(new, f"must_contain_{phrase[:20]}", RuleSeverity.MEDIUM,
+                               f"Missing required content: {phrase}")
+        return new
+
+    def _on_hits(self, kind: str, hits: list[StreamHit], new: list[RuleCheckResult]) -> None:
+        reported = self._reported[kind]
+        for hit in hits:
+            index = hit.hit.index
+            reported.add(index)
+            details = {"matched_text": hit.hit.text, "start": hit.start, "end": hit.end}
+            if kind == "error":
+                check_name, severity, message = self._error_rules.rules[index]
+                self._fail(new, check_name, severity, message, details)
+            elif kind == "forbidden":
+                pattern = self.rules.forbidden_patterns[index]
+                self._fail(new, f"forbidden_pattern_{pattern[:20]}", RuleSeverity.HIGH,
+                           f"Forbidden pattern matched: {pattern}", details)
+            elif kind == "must_contain":
+                self._contained.add(self.rules.must_contain[index].lower())
+            else:
+                phrase = self.rules.must_not_contain[index]
+                self._fail(new, f"must_not_contain_{phrase[:20]}", RuleSeverity.HIGH,
+                           f"Contains forbidden content: {phrase}", details)
+
+    def _fail(
+        self,
+        new: list[RuleCheckResult],
+        check_name: str,
+        severity: RuleSeverity,
+        message: str,
+        details: Optional[dict[str, Any]] = None,
+    ) -> None:
+        if check_name in self._failed:
+            return
+        self._failed.add(check_name)
+        failure = RuleCheckResult(
+            check_name=check_name,
+            passed=False,
+            severity=severity,
+            message=message,
+            details=details or {},
+        )
+        self.failures.append(failure)
+        new.append(failure)
+
+
+_UNPARSED = object()
+
+
+def _ran_checks(
+    error_rules: CompiledErrorRules, ran_json: bool, rules: Optional[FormatRules],
+) -> list[tuple[str, RuleSeverity]]:
+    """Name and severity of each check ``RuleBasedChecker.check`` ran."""
+    ran = [("empty_output", RuleSeverity.CRITICAL)]
+    ran.extend((name, severity) for name, severity, _ in error_rules.rules)
+    if ran_json:
+        ran.append(("json_valid", RuleSeverity.HIGH))
+    ran.append(("output_length", RuleSeverity.MEDIUM))
+    if rules is not None:
+        if rules.max_length is not None:
+            ran.append(("max_length", RuleSeverity.MEDIUM))
+        ran.extend((f"required_key_{key}", RuleSeverity.HIGH) for key in rules.required_keys)
+        ran.extend((f"must_contain_{p[:20]}", RuleSeverity.MEDIUM) for p in rules.must_contain)
+        ran.extend(
+            (f"must_not_contain_{p[:20]}", RuleSeverity.HIGH) for p in rules.must_not_contain
+        )
+        ran.extend(
+            (f"forbidden_pattern_{p[:20]}", RuleSeverity.HIGH) for p in rules.forbidden_patterns
+        )
+    return ran
+
+
+def _count_format_checks(rules: FormatRules) -> int:
+    return (
+        (rules.max_length is not None)
+        + len(rules.required_keys)
+        + len(rules.must_contain)
+        + len(rules.must_not_contain)
+        + len(rules.forbidden_patterns)
+    )
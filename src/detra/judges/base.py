@@ -33,6 +33,8 @@ class EvaluationResult:
     checks_passed: list[BehaviorCheckResult] = field(default_factory=list)
     checks_failed: list[BehaviorCheckResult] = field(default_factory=list)
     security_issues: list[dict[str, Any]] = field(default_factory=list)
+    # security check name -> "local" or "judge", whichever path decided it
+    security_decided_by: dict[str, str] = field(default_factory=dict)
     raw_evaluation: Optional[dict[str, Any]] = None
     latency_ms: float = 0.0
     eval_tokens_used: int = 0
@@ -0,0 +1,227 @@
+"""Judge-side micro-batching: many traces, one LLM request.
+
+``MicroBatchJudge`` wraps any judge that exposes ``complete(prompt)``.
+Concurrent ``evaluate_behaviors`` calls for the same behavior spec (i.e.
+the same node) are collected for a short window or until a batch is full,
+sent as one multi-item prompt with indexed results, and the parsed
+``EvaluationResult`` for each item is handed back to its caller.  Items the
+judge didn't answer cleanly fall back to individual calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import structlog
+
+from detra.evaluation.prompts import MULTI_ITEM_BEHAVIOR_CHECK_PROMPT, MULTI_ITEM_ENTRY_TEMPLATE
+from detra.judges.base import EvaluationResult, Judge
+from detra.judges.parsing import parse_behavior_results
+from detra.utils.serialization import extract_json_from_text, safe_json_dumps, truncate_string
+
+logger = structlog.get_logger()
+
+_BatchKey = tuple[asyncio.AbstractEventLoop, tuple[str, ...], tuple[str, ...]]
+
+
+@dataclass
+class _PendingItem:
+    input_data: Any
+    output_data: Any
+    context: dict[str, Any] | None
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class _Batch:
+    expected: list[str]
+    unexpected: list[str]
+    items: list[_PendingItem] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class MicroBatchJudge:
+    """Judge wrapper that coalesces same-node evaluations into one request.
+
+    ``window_ms`` bounds how long the first item of a batch waits for
+    company; ``max_batch_size`` flushes early.  Security checks pass
+    straight through to the wrapped judge.
+    """
+
+    def __init__(
+        self,
+        judge: Judge,
+        *,
+        window_ms: float = 50.0,
+        max_batch_size: int = 8,
+        max_item_chars: int = 2000,
+    ):
+        if not callable(getattr(judge, "complete", None)):
+            raise TypeError(f"{type(judge).__name__} has no complete(prompt) method to batch over")
+        self.judge = judge
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.max_item_chars = max_item_chars
+        self._batches: dict[_BatchKey, _Batch] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+        self.requests_sent = 0
+        self.items_batched = 0
+        self.fallbacks = 0
+
+    # -- Judge protocol ----------------------------------------------------
+
+    async def evaluate_behaviors(
+        self,
+        input_data: Any,
+        output_data: Any,
+        expected_behaviors: list[str],
+        unexpected_behaviors: list[str],
+        context: dict[str, Any] | None = None,
+    ) -> EvaluationResult:
+        if not expected_behaviors and not unexpected_behaviors:
+            return EvaluationResult(score=1.0, flagged=False)
+
+        loop = asyncio.get_running_loop()
+        key = (loop, tuple(expected_behaviors), tuple(unexpected_behaviors))
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = _Batch(expected=list(expected_behaviors), unexpected=list(unexpected_behaviors))
+            self._batches[key] = batch
+            batch.timer = loop.call_later(self.window_ms / 1000, self._dispatch, key)
+
+        item = _PendingItem(input_data, output_data, context, loop.create_future())
+        batch.items.append(item)
+        if len(batch.items) >= self.max_batch_size:
+            self._dispatch(key)
+        return await item.future
+
+    async def check_security(
+        self,
+        input_data: Any,
+        output_data: Any,
+        checks: list[str],
+    ) -> list[dict[str, Any]]:
+        return await self.judge.check_security(input_data, output_data, checks)
+
+    async def complete(self, prompt: str) -> str:
+        return await self.judge.complete(prompt)
+
+    # -- batching ----------------------------------------------------------
+
+    def _dispatch(self, key: _BatchKey) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = key[0].create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: _Batch) -> None:
+        try:
+            if len(batch.items) == 1:
+                await self._run_single(batch, batch.items[0])
+                return
+            await self._run_multi(batch)
+        except Exception as e:
+            for item in batch.items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+
+    async def _run_multi(self, batch: _Batch) -> None:
+        prompt = self._build_prompt(batch)
+        self.requests_sent += 1
+        self.items_batched += len(batch.items)
+        try:
+            text = await self.judge.complete(prompt)
+        except Exception as e:
+            logger.warning(
+                "Batched judge call failed -- falling back",
+                items=len(batch.items),
+                error=str(e),
+            )
+            await self._fallback(batch, batch.items)
+            return
+
+        parsed = self._index_results(extract_json_from_text(text))
+        token_share = (len(prompt) + len(text)) // 4 // len(batch.items)
+        missing: list[_PendingItem] = []
+        for index, item in enumerate(batch.items):
+            data = parsed.get(index)
+            if data is None:
+                missing.append(item)
+                continue
+            result = parse_behavior_results(data, batch.expected, batch.unexpected)
+            result.latency_ms = (time.time() - item.enqueued_at) * 1000
+            result.eval_tokens_used = token_share
+            if not item.future.done():
+                item.future.set_result(result)
+
+        if missing:
+            logger.warning(
+                "Batched judge response incomplete -- falling back",
+                missing=len(missing),
+                items=len(batch.items),
+            )
+            await self._fallback(batch, missing)
+
+    async def _run_single(self, batch: _Batch, item: _PendingItem) -> None:
+        self.requests_sent += 1
+        result = await self.judge.evaluate_behaviors(
+            item.input_data, item.output_data, batch.expected, batch.unexpected, item.context,
+        )
+        if not item.future.done():
+            item.future.set_result(result)
+
+    async def _fallback(self, batch: _Batch, items: list[_PendingItem]) -> None:
+        self.fallbacks += len(items)
+        await asyncio.gather(
+            *(self._run_single_safe(batch, item) for item in items),
+        )
+
+    async def _run_single_safe(self, batch: _Batch, item: _PendingItem) -> None:
+        try:
+            await self._run_single(batch, item)
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+
+    def _build_prompt(self, batch: _Batch) -> str:
+        entries = "\n".join(
+            MULTI_ITEM_ENTRY_TEMPLATE.format(
+                index=index,
+                input_data=truncate_string(str(item.input_data), self.max_item_chars),
+                output_data=truncate_string(str(item.output_data), self.max_item_chars),
+                context=truncate_string(safe_json_dumps(item.context or {}), 500),
+            )
+            for index, item in enumerate(batch.items)
+        )
+        return MULTI_ITEM_BEHAVIOR_CHECK_PROMPT.format(
+            expected_behaviors="\n".join(f"- {b}" for b in batch.expected),
+            unexpected_behaviors="\n".join(f"- {b}" for b in batch.unexpected),
+            items=entries,
+        )
+
+    @staticmethod
+    def _index_results(data: Any) -> dict[int, dict[str, Any]]:
+        if isinstance(data, dict):
+            data = data.get("items")
+        if not isinstance(data, list):
+            return {}
+        indexed: dict[int, dict[str, Any]] = {}
+        for entry in data:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.get("index"))
+            except (TypeError, ValueError):
+                continue
+            if "expected_results" in entry or "unexpected_results" in entry:
+                indexed.setdefault(index, entry)
+        return indexed
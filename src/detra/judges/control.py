@@ -0,0 +1,309 @@
+"""Provider-level flow control for judge calls.
+
+``ProviderController`` sits between a judge and its LLM provider:
+
+* **Adaptive concurrency (AIMD).**  Calls past the current limit wait for
+  a slot.  Each fast success raises the limit by ``1/limit`` (about one
+  per round of calls); a 429, 5xx or timeout halves it.
+* **Circuit breaker.**  ``failure_threshold`` consecutive overload
+  failures open the circuit and calls fail fast with
+  ``CircuitOpenError``.  After ``open_seconds`` a single probe is let
+  through (half-open); its outcome closes or re-opens the circuit.
+* **Adaptive timeouts.**  Each call is bounded by the recent p99 latency
+  times ``timeout_multiplier``, clamped to the configured range.
+
+Other errors (bad requests, parse failures) pass through without
+counting against the provider.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from enum import Enum
+from typing import Any, Optional, TypeVar
+
+import structlog
+
+from detra.config.schema import ProviderControlConfig
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Latencies kept for the p50/p99 estimates
+LATENCY_WINDOW = 256
+# Latencies needed before the timeout adapts
+LATENCY_WARMUP = 20
+# Minimum spacing of multiplicative decreases, so one burst of failures
+# halves the limit once rather than once per failed call
+DECREASE_COOLDOWN_SECONDS = 1.0
+# A success slower than this multiple of the median doesn't grow the limit
+SLOW_FACTOR = 2.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+_STATE_GAUGE = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+def is_overload(error: BaseException) -> bool:
+    """True for timeouts, HTTP 429 and 5xx errors from any provider SDK."""
+    if isinstance(error, TimeoutError):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(error, "code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return type(error).__name__ in ("RateLimitError", "ServiceUnavailableError")
+    return status == 429 or 500 <= status < 600
+
+
+class ProviderController:
+    """Shared flow control for one judge provider.
+
+    Safe to share between judges and event loops.  When ``backend`` is
+    set, the controller's state is emitted as ``detra.judge.*`` metrics
+    tagged with ``provider``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[ProviderControlConfig] = None,
+        *,
+        name: str = "judge",
+        backend: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or ProviderControlConfig()
+        self.name = name
+        self.backend = backend
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._limit = float(self.config.initial_concurrency)
+        self._in_flight = 0
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._observed = 0
+        self._p50: Optional[float] = None
+        self._p99: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    # -- state ---------------------------------------------------------------
+
+    @property
+    def limit(self) -> int:
+        return max(self.config.min_concurrency, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def circuit_state(self) -> CircuitState:
+        return self._state
+
+    @property
+    def timeout_seconds(self) -> float:
+        cfg = self.config
+        if self._p99 is None:
+            return cfg.max_timeout_seconds
+        return min(cfg.max_timeout_seconds,
+                   max(cfg.min_timeout_seconds, self._p99 * cfg.timeout_multiplier))
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "circuit": self._state.value,
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "timeout_seconds": self.timeout_seconds,
+            "p99_seconds": self._p99,
+        }
+
+    # -- calls -----------------------------------------------------------------
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn()`` under the controller's limits."""
+        if not self.config.enabled:
+            return await fn()
+        try:
+            result = await self._call(fn)
+        except CircuitOpenError:
+            await self._emit_count("detra.judge.rejected")
+            raise
+        except Exception as e:
+            if is_overload(e):
+                await self._emit_count("detra.judge.overloaded")
+            await self._emit_state()
+            raise
+        await self._emit_state()
+        return result
+
+    async def _call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        probe = self._admit()
+        try:
+            await self._acquire()
+        except BaseException:
+            self._end_probe(probe)
+            raise
+        start = self._clock()
+        outcome = None
+        try:
+            try:
+                async with asyncio.timeout(self.timeout_seconds):
+                    result = await fn()
+            except Exception as e:
+                outcome = "overload" if is_overload(e) else "error"
+                raise
+            outcome = "success"
+            return result
+        finally:
+            self._release()
+            if outcome is None:
+                self._end_probe(probe)  # cancelled
+            else:
+                self._record(outcome, self._clock() - start, probe)
+
+    def _admit(self) -> bool:
+        """Check the circuit; returns True if this call is the half-open probe."""
+        with self._lock:
+            if self._state is CircuitState.OPEN:
+                if self._clock() < self._open_until:
+                    raise CircuitOpenError(f"{self.name}: circuit open")
+                self._transition(CircuitState.HALF_OPEN)
+            if self._state is CircuitState.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(f"{self.name}: circuit half-open, probe in flight")
+                self._probing = True
+                return True
+            return False
+
+    def _end_probe(self, probe: bool) -> None:
+        if probe:
+            with self._lock:
+                self._probing = False
+
+    async def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future  # the releasing call hands its slot over
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, future))
+                except ValueError:
+                    # Already handed a slot -- pass it on.
+                    self._in_flight -= 1
+                    self._wake_waiters()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            loop, future = self._waiters.popleft()
+            self._in_flight += 1
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def _record(self, outcome: str, latency: float, probe: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+            if outcome == "overload":
+                self._failures += 1
+                now = self._clock()
+                if now - self._last_decrease >= DECREASE_COOLDOWN_SECONDS:
+                    self._limit = max(float(self.config.min_concurrency), self._limit / 2)
+                    self._last_decrease = now
+                if probe or self._failures >= self.config.failure_threshold:
+                    self._open_until = now + self.config.open_seconds
+                    self._transition(CircuitState.OPEN)
+                return
+
+            # A response, even an error one, shows the provider is up.
+            self._failures = 0
+            if probe:
+                self._transition(CircuitState.CLOSED)
+            if outcome != "success":
+                return
+            self._observe_latency(latency)
+            if self._p50 is None or latency <= self._p50 * SLOW_FACTOR:
+                self._limit = min(
+                    float(self.config.max_concurrency), self._limit + 1 / self._limit,
+                )
+                self._wake_waiters()
+
+    def _observe_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._observed += 1
+        n = len(self._latencies)
+        # Re-sort every few samples rather than on every call
+        if n >= LATENCY_WARMUP and (n == LATENCY_WARMUP or self._observed % 8 == 0):
+            ordered = sorted(self._latencies)
+            self._p50 = ordered[n // 2]
+            self._p99 = ordered[min(n - 1, int(n * 0.99))]
+
+    def _transition(self, state: CircuitState) -> None:
+        if state is not self._state:
+            logger.info("Judge circuit state changed", provider=self.name,
+                        old=self._state.value, new=state.value)
+            self._state = state
+
+    # -- telemetry ---------------------------------------------------------------
+
+    async def _emit_state(self) -> None:
+        if not self.backend:
+            return
+        tags = {"provider": self.name}
+        try:
+            await self.backend.emit_gauge("detra.judge.concurrency_limit", self.limit, tags)
+            await self.backend.emit_gauge("detra.judge.in_flight", self._in_flight, tags)
+            await self.backend.emit_gauge(
+                "detra.judge.timeout_ms", self.timeout_seconds * 1000, tags,
+            )
+            await self.backend.emit_gauge(
+                "detra.judge.circuit_state", _STATE_GAUGE[self._state], tags,
+            )
+        except Exception as e:
+            logger.warning("Telemetry emission failed", provider=self.name, error=str(e))
+
+    async def _emit_count(self, name: str) -> None:
+        if not self.backend:
+            return
+        try:
+            await self.backend.emit_count(name, 1, {"provider": self.name})
+        except Exception as e:
+            logger.warning("Telemetry emission failed", metric=name, error=str(e))
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,189 @@
+"""Hedged judge requests.
+
+``Hedger.run`` starts a judge call and, if it hasn't answered by the
+recent ``quantile`` latency of the provider, sends a second request
+(optionally to a fallback model).  The first successful answer wins and
+the other request is cancelled.
+
+Hedges are paid for out of a credit balance: each call earns
+``max_extra_ratio`` credits and each hedge spends one, so hedges never
+exceed that fraction of calls.  ``detra.judge.hedge.*`` metrics report
+hedges sent and won, the hedge rate, and an estimate of the latency saved.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional, TypeVar
+
+import structlog
+
+from detra.config.schema import HedgeConfig
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Latencies kept for the hedge-delay quantile
+LATENCY_WINDOW = 256
+# Latencies needed before any call is hedged
+LATENCY_WARMUP = 20
+# Most hedge credits that can be saved up for a burst of slow calls
+MAX_CREDITS = 10.0
+
+
+class Hedger:
+    """Hedging policy for one judge provider; safe to share across loops."""
+
+    def __init__(
+        self,
+        config: Optional[HedgeConfig] = None,
+        *,
+        name: str = "judge",
+        backend: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or HedgeConfig(enabled=True)
+        self.name = name
+        self.backend = backend
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._observed = 0
+        self._delay: Optional[float] = None
+        self._tail: Optional[float] = None
+        self._credits = 0.0
+        self._calls = 0
+        self._hedges = 0
+
+    @property
+    def delay_seconds(self) -> Optional[float]:
+        """How long a call may run before it is hedged (None while warming up)."""
+        return self._delay
+
+    @property
+    def hedge_rate(self) -> float:
+        return self._hedges / self._calls if self._calls else 0.0
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Optional[Callable[[], Awaitable[T]]] = None,
+    ) -> T:
+        """Run ``primary()``, racing ``hedge()`` (default: ``primary``) if it is slow."""
+        if not self.config.enabled:
+            return await primary()
+        start = self._clock()
+        with self._lock:
+            self._calls += 1
+            self._credits = min(MAX_CREDITS, self._credits + self.config.max_extra_ratio)
+            delay = self._delay
+
+        first = asyncio.ensure_future(primary())
+        try:
+            if delay is not None:
+                done, _ = await _wait_first([first], delay)
+                if not done and self._take_credit():
+                    return await self._race(first, hedge or primary, start)
+            result = await first
+            self._observe(self._clock() - start)
+            return result
+        finally:
+            await self._emit_gauge("detra.judge.hedge.rate", self.hedge_rate)
+
+    async def _race(
+        self,
+        first: asyncio.Future,
+        hedge: Callable[[], Awaitable[T]],
+        start: float,
+    ) -> T:
+        second = asyncio.ensure_future(hedge())
+        await self._emit_count("detra.judge.hedge.sent")
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        winner: Optional[asyncio.Future] = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (first, second):  # the primary wins ties
+                    if task in done:
+                        if task.exception() is None:
+                            winner = winner or task
+                        elif task is first or error is None:
+                            error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        elapsed = self._clock() - start
+        # A cancelled primary ran at least this long; recording the lower
+        # bound keeps the quantile from drifting down as slow calls are hedged.
+        self._observe(elapsed)
+        if winner is None:
+            raise error  # type: ignore[misc]
+        if winner is second:
+            await self._emit_count("detra.judge.hedge.won")
+            tail = self._tail
+            if tail is not None and tail > elapsed:
+                await self._emit_distribution(
+                    "detra.judge.hedge.latency_saved_ms", (tail - elapsed) * 1000,
+                )
+        return winner.result()
+
+    def _take_credit(self) -> bool:
+        with self._lock:
+            if self._credits < 1.0:
+                return False
+            self._credits -= 1.0
+            self._hedges += 1
+            return True
+
+    def _observe(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._observed += 1
+            n = len(self._latencies)
+            if n >= LATENCY_WARMUP and (n == LATENCY_WARMUP or self._observed % 8 == 0):
+                ordered = sorted(self._latencies)
+                self._delay = ordered[min(n - 1, int(n * self.config.quantile))]
+                self._tail = ordered[min(n - 1, int(n * 0.99))]
+
+    # -- telemetry ---------------------------------------------------------------
+
+    async def _emit_count(self, name: str) -> None:
+        if not self.backend:
+            return
+        try:
+            await self.backend.emit_count(name, 1, {"provider": self.name})
+        except Exception as e:
+            logger.warning("Telemetry emission failed", metric=name, error=str(e))
+
+    async def _emit_gauge(self, name: str, value: float) -> None:
+        if not self.backend:
+            return
+        try:
+            await self.backend.emit_gauge(name, value, {"provider": self.name})
+        except Exception as e:
+            logger.warning("Telemetry emission failed", metric=name, error=str(e))
+
+    async def _emit_distribution(self, name: str, value: float) -> None:
+        if not self.backend:
+            return
+        try:
+            await self.backend.emit_distribution(name, value, {"provider": self.name})
+        except Exception as e:
+            logger.warning("Telemetry emission failed", metric=name, error=str(e))
+
+
+async def _wait_first(tasks: list[asyncio.Future], timeout: float):
+    """``asyncio.wait`` that cancels the tasks if the caller is cancelled."""
+    try:
+        return await asyncio.wait(tasks, timeout=timeout)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -13,8 +13,24 @@ from typing import Any
 
 import structlog
 
-from detra.evaluation.prompts import BATCH_BEHAVIOR_CHECK_PROMPT, SECURITY_CHECK_PROMPT
-from detra.judges.base import BehaviorCheckResult, EvaluationResult
+from detra.evaluation.prompts import (
+    BATCH_BEHAVIOR_CHECK_PROMPT,
+    BATCH_BEHAVIOR_CHECK_SCHEMA,
+    BEHAVIOR_CHECK_PROMPT,
+    BEHAVIOR_CHECK_SCHEMA,
+    SECURITY_CHECK_PROMPT,
+)
+from detra.judges.base import EvaluationResult
+from detra.judges.control import ProviderController
+from detra.judges.hedging import Hedger
+from detra.judges.parsing import parse_behavior_results
+from detra.judges.structured import (
+    DEFAULT_FALLBACK_CONCURRENCY,
+    BehaviorAnswers,
+    fill_missing,
+    normalize_entry,
+    validate_behavior_results,
+)
 from detra.utils.serialization import extract_json_from_text, safe_json_dumps, truncate_string
 
 logger = structlog.get_logger()
@@ -32,6 +48,8 @@ class LiteLLMJudge:
 
     Pass *any* model string litellm understands (``gpt-4o-mini``,
     ``claude-sonnet-4-20250514``, ``gemini/gemini-2.5-flash``, ``ollama/llama3``, ...).
+    Models litellm reports as supporting response schemas are asked for
+    JSON matching the result schema; others rely on the prompt alone.
     """
 
     def __init__(
@@ -40,6 +58,10 @@ class LiteLLMJudge:
         api_key: str | None = None,
         temperature: float = 0.1,
         max_tokens: int = 1024,
+        controller: ProviderController | None = None,
+        hedger: Hedger | None = None,
+        structured_output: bool = True,
+        fallback_concurrency: int = DEFAULT_FALLBACK_CONCURRENCY,
     ):
         if not _LITELLM_AVAILABLE:
             raise ImportError(
@@ -49,6 +71,11 @@ class LiteLLMJudge:
         self.api_key = api_key
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.controller = controller or ProviderController(name="litellm")
+        self.hedger = hedger
+        self.structured_output = structured_output
+        self.fallback_concurrency = fallback_concurrency
+        self._schema_support: dict[str, bool] = {}
 
     # -- Judge protocol ----------------------------------------------------
 
@@ -76,17 +103,19 @@ class LiteLLMJudge:
         )
 
         try:
-            text = await self._complete(prompt)
-            data = extract_json_from_text(text)
-            if not data:
-                return EvaluationResult(
-                    score=0.5,
-                    flagged=True,
-                    flag_reason="Judge returned unparseable response",
-                    flag_category="error",
-                    latency_ms=(time.time() - start) * 1000,
+            text = await self._complete(prompt, schema=BATCH_BEHAVIOR_CHECK_SCHEMA)
+            answers = validate_behavior_results(
+                extract_json_from_text(text), expected_behaviors, unexpected_behaviors,
+            )
+            if answers.missing:
+                logger.warning(
+                    "litellm_judge batch response incomplete -- checking the rest individually",
+                    missing=answers.missing,
                 )
-            return self._parse_batch(data, expected_behaviors, unexpected_behaviors, start)
+                await self._fill_missing(answers, input_data, output_data, context)
+            return self._parse_batch(
+                answers.to_data(), expected_behaviors, unexpected_behaviors, start,
+            )
         except Exception as e:
             logger.error("litellm_judge.evaluate_behaviors failed", error=str(e))
             return EvaluationResult(
@@ -122,9 +151,64 @@ class LiteLLMJudge:
             logger.error("litellm_judge.check_security failed", error=str(e))
             return []
 
+    async def complete(self, prompt: str) -> str:
+        """Send a raw prompt to the judge model and return its text."""
+        return await self._complete(prompt)
+
     # -- internals ---------------------------------------------------------
 
-    async def _complete(self, prompt: str) -> str:
+    async def _fill_missing(
+        self,
+        answers: BehaviorAnswers,
+        input_data: Any,
+        output_data: Any,
+        context: dict[str, Any] | None,
+    ) -> None:
+        input_str = truncate_string(str(input_data), 2000)
+        output_str = truncate_string(str(output_data), 2000)
+        context_str = safe_json_dumps(context) if context else "None"
+
+        async def check(behavior: str, expected: bool) -> dict[str, Any]:
+            flag = "present" if expected else "detected"
+            prompt = BEHAVIOR_CHECK_PROMPT.format(
+                input_data=input_str,
+                output_data=output_str,
+                behavior=behavior,
+                context=context_str,
+                check_type="present",
+            )
+            # Judge errors propagate and fail the whole evaluation, as a
+            # failed batch request does, rather than counting as a verdict.
+            data = extract_json_from_text(
+                await self._complete(prompt, schema=BEHAVIOR_CHECK_SCHEMA)
+            )
+            if isinstance(data, dict) and isinstance(data.get("behavior_present"), bool):
+                return normalize_entry({**data, flag: data["behavior_present"]}, behavior, flag)
+            return {
+                "behavior": behavior, flag: False, "confidence": 0.0,
+                "reasoning": "Judge returned unparseable response",
+            }
+
+        await fill_missing(answers, check, self.fallback_concurrency)
+
+    def _response_format(self, model: str, schema: dict[str, Any]) -> dict[str, Any] | None:
+        if not self.structured_output:
+            return None
+        supported = self._schema_support.get(model)
+        if supported is None:
+            try:
+                supported = bool(litellm.supports_response_schema(model=model))
+            except Exception:
+                supported = False
+            self._schema_support[model] = supported
+        if not supported:
+            return None
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "judge_result", "schema": schema, "strict": True},
+        }
+
+    async def _complete(self, prompt: str, schema: dict[str, Any] | None = None) -> str:
         kwargs: dict[str, Any] = {
             "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
@@ -134,7 +218,18 @@ class LiteLLMJudge:
         if self.api_key:
             kwargs["api_key"] = self.api_key
 
-        response = await litellm.acompletion(**kwargs)
+        def send(model: str):
+            request = {**kwargs, "model": model}
+            response_format = self._response_format(model, schema) if schema else None
+            if response_format is not None:
+                request["response_format"] = response_format
+            return lambda: self.controller.call(lambda: litellm.acompletion(**request))
+
+        if self.hedger is None:
+            response = await send(self.model)()
+        else:
+            fallback = self.hedger.config.fallback_model or self.model
+            response = await self.hedger.run(send(self.model), send(fallback))
         return response.choices[0].message.content or ""
 
     def _parse_batch(
@@ -144,44 +239,6 @@ class LiteLLMJudge:
         unexpected: list[str],
         start_time: float,
     ) -> EvaluationResult:
-        passed: list[BehaviorCheckResult] = []
-        failed: list[BehaviorCheckResult] = []
-
-        for i, r in enumerate(data.get("expected_results", [])):
-            behavior = r.get("behavior", expected[i] if i < len(expected) else "?")
-            check = BehaviorCheckResult(
-                behavior=behavior,
-                passed=r.get("present", False),
-                confidence=r.get("confidence", 0.5),
-                reasoning=r.get("reasoning", ""),
-                evidence=r.get("evidence"),
-            )
-            (passed if check.passed else failed).append(check)
-
-        for i, r in enumerate(data.get("unexpected_results", [])):
-            behavior = r.get("behavior", unexpected[i] if i < len(unexpected) else "?")
-            if r.get("detected", False):
-                failed.append(BehaviorCheckResult(
-                    behavior=f"UNEXPECTED: {behavior}",
-                    passed=False,
-                    confidence=r.get("confidence", 0.5),
-                    reasoning=r.get("reasoning", ""),
-                    evidence=r.get("evidence"),
-                ))
-
-        total = len(expected) + len(unexpected)
-        unexpected_fails = sum(1 for c in failed if c.behavior.startswith("UNEXPECTED:"))
-        passed_count = len(passed) + (len(unexpected) - unexpected_fails)
-        score = passed_count / total if total > 0 else 1.0
-
-        is_flagged = len(failed) > 0 or score < 0.5
-        return EvaluationResult(
-            score=score,
-            flagged=is_flagged,
-            flag_reason=data.get("overall_assessment") if is_flagged else None,
-            flag_category="low_score" if is_flagged and not failed else None,
-            checks_passed=passed,
-            checks_failed=failed,
-            raw_evaluation=data,
-            latency_ms=(time.time() - start_time) * 1000,
-        )
+        result = parse_behavior_results(data, expected, unexpected)
+        result.latency_ms = (time.time() - start_time) * 1000
+        return result
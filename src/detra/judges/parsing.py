@@ -0,0 +1,67 @@
+"""Shared parsing of judge responses into ``EvaluationResult``.
+
+Every judge asks for the ``BATCH_BEHAVIOR_CHECK_PROMPT`` result shape
+(``expected_results`` / ``unexpected_results`` / ``overall_assessment``),
+so turning that JSON into a scored result lives here once.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from detra.judges.base import BehaviorCheckResult, EvaluationResult
+
+
+def parse_behavior_results(
+    data: dict[str, Any],
+    expected_behaviors: list[str],
+    unexpected_behaviors: list[str],
+) -> EvaluationResult:
+    """Score a parsed batch-behavior response.
+
+    Latency and token accounting are left to the caller.
+    """
+    checks_passed: list[BehaviorCheckResult] = []
+    checks_failed: list[BehaviorCheckResult] = []
+
+    for i, r in enumerate(data.get("expected_results", [])):
+        behavior = r.get(
+            "behavior", expected_behaviors[i] if i < len(expected_behaviors) else "unknown"
+        )
+        check = BehaviorCheckResult(
+            behavior=behavior,
+            passed=r.get("present", False),
+            confidence=r.get("confidence", 0.5),
+            reasoning=r.get("reasoning", ""),
+            evidence=r.get("evidence"),
+        )
+        (checks_passed if check.passed else checks_failed).append(check)
+
+    for i, r in enumerate(data.get("unexpected_results", [])):
+        behavior = r.get(
+            "behavior", unexpected_behaviors[i] if i < len(unexpected_behaviors) else "unknown"
+        )
+        if r.get("detected", False):
+            checks_failed.append(BehaviorCheckResult(
+                behavior=f"UNEXPECTED: {behavior}",
+                passed=False,
+                confidence=r.get("confidence", 0.5),
+                reasoning=r.get("reasoning", ""),
+                evidence=r.get("evidence"),
+            ))
+
+    total = len(expected_behaviors) + len(unexpected_behaviors)
+    unexpected_fails = sum(1 for c in checks_failed if c.behavior.startswith("UNEXPECTED:"))
+    passed_count = len(checks_passed) + (len(unexpected_behaviors) - unexpected_fails)
+    score = passed_count / total if total > 0 else 1.0
+
+    is_flagged = len(checks_failed) > 0 or score < 0.5
+    return EvaluationResult(
+        score=score,
+        flagged=is_flagged,
+        flag_reason=data.get("overall_assessment") if is_flagged else None,
+        flag_category="low_score" if is_flagged and not checks_failed else None,
+        checks_passed=checks_passed,
+        checks_failed=checks_failed,
+        raw_evaluation=data,
+    )
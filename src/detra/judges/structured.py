@@ -0,0 +1,130 @@
+"""Validation of batch judge responses and per-behavior fallback.
+
+Judges ask for ``BATCH_BEHAVIOR_CHECK_SCHEMA`` natively where the provider
+supports it, but a response can still be cut short or answer only some
+behaviors.  ``validate_behavior_results`` matches a response's entries to
+the requested behaviors and keeps the ones that are well formed;
+``fill_missing`` then checks only the behaviors left unanswered, a bounded
+number at a time, instead of re-judging the whole node one call per
+behavior.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Behaviors checked at once when a batch response leaves some unanswered
+DEFAULT_FALLBACK_CONCURRENCY = 4
+
+# check(behavior, expected) -> an entry in the batch result shape
+BehaviorCheck = Callable[[str, bool], Awaitable[dict[str, Any]]]
+
+
+@dataclass
+class BehaviorAnswers:
+    """A batch response's valid entry per behavior (None where missing)."""
+
+    expected_behaviors: list[str]
+    unexpected_behaviors: list[str]
+    expected: list[Optional[dict[str, Any]]]
+    unexpected: list[Optional[dict[str, Any]]]
+    assessment: Optional[str] = None
+
+    @property
+    def answered(self) -> int:
+        return sum(e is not None for e in self.expected + self.unexpected)
+
+    @property
+    def missing(self) -> int:
+        return len(self.expected) + len(self.unexpected) - self.answered
+
+    def to_data(self) -> dict[str, Any]:
+        """The answers in the ``BATCH_BEHAVIOR_CHECK_PROMPT`` result shape."""
+        return {
+            "expected_results": [e for e in self.expected if e is not None],
+            "unexpected_results": [e for e in self.unexpected if e is not None],
+            "overall_assessment": self.assessment,
+        }
+
+
+def validate_behavior_results(
+    data: Any,
+    expected_behaviors: list[str],
+    unexpected_behaviors: list[str],
+) -> BehaviorAnswers:
+    """Match a parsed batch response to the behaviors it should answer.
+
+    An entry answers the behavior whose text it repeats, else the one at
+    its position.  Entries without a boolean verdict (``present`` /
+    ``detected``) are dropped; confidence is clamped to [0, 1] and the
+    behavior text is normalized to the requested one.
+    """
+    if not isinstance(data, dict):
+        data = {}
+    assessment = data.get("overall_assessment")
+    return BehaviorAnswers(
+        expected_behaviors=list(expected_behaviors),
+        unexpected_behaviors=list(unexpected_behaviors),
+        expected=_match(data.get("expected_results"), expected_behaviors, "present"),
+        unexpected=_match(data.get("unexpected_results"), unexpected_behaviors, "detected"),
+        assessment=assessment if isinstance(assessment, str) else None,
+    )
+
+
+def _match(entries: Any, behaviors: list[str], flag: str) -> list[Optional[dict[str, Any]]]:
+    slots: list[Optional[dict[str, Any]]] = [None] * len(behaviors)
+    if not isinstance(entries, list):
+        return slots
+    positions = {b: i for i, b in reversed(list(enumerate(behaviors)))}
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get(flag), bool):
+            continue
+        slot = positions.get(entry.get("behavior"))
+        if slot is None or slots[slot] is not None:
+            slot = i
+        if slot >= len(behaviors) or slots[slot] is not None:
+            continue
+        slots[slot] = normalize_entry(entry, behaviors[slot], flag)
+    return slots
+
+
+def normalize_entry(entry: dict[str, Any], behavior: str, flag: str) -> dict[str, Any]:
+    """An entry with well-typed fields, for ``behavior``."""
+    confidence = entry.get("confidence")
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)):
+        confidence = 0.5
+    reasoning = entry.get("reasoning")
+    evidence = entry.get("evidence")
+    return {
+        "behavior": behavior,
+        flag: entry[flag],
+        "confidence": min(1.0, max(0.0, float(confidence))),
+        "reasoning": reasoning if isinstance(reasoning, str) else "",
+        "evidence": evidence if isinstance(evidence, str) else None,
+    }
+
+
+async def fill_missing(
+    answers: BehaviorAnswers,
+    check: BehaviorCheck,
+    concurrency: int = DEFAULT_FALLBACK_CONCURRENCY,
+) -> None:
+    """Answer the behaviors ``answers`` is missing with ``check``, concurrently."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(slots: list, index: int, behavior: str, expected: bool) -> None:
+        async with semaphore:
+            slots[index] = await check(behavior, expected)
+
+    await asyncio.gather(*(
+        run(slots, i, behavior, expected)
+        for slots, behaviors, expected in (
+            (answers.expected, answers.expected_behaviors, True),
+            (answers.unexpected, answers.unexpected_behaviors, False),
+        )
+        for i, behavior in enumerate(behaviors)
+        if slots[i] is None
+    ))
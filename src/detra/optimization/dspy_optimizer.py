@@ -7,6 +7,8 @@ from typing import Any, Optional
 
 import structlog
 
+from detra.utils import codec
+
 try:
     import dspy
     DSPY_AVAILABLE = True
@@ -431,7 +433,7 @@ class DSpyOptimizer:
 
             # Try to parse as JSON
             try:
-                examples = json.loads(examples_str)
+                examples = codec.loads(examples_str)
                 if isinstance(examples, list):
                     # Validate structure
                     validated = []
@@ -445,7 +447,7 @@ class DSpyOptimizer:
                 json_match = re.search(r"```(?:json)?\s*(\[.*?\])\s*```", examples_str, re.DOTALL)
                 if json_match:
                     try:
-                        examples = json.loads(json_match.group(1))
+                        examples = codec.loads(json_match.group(1))
                         return examples if isinstance(examples, list) else []
                     except json.JSONDecodeError:
                         pass
@@ -494,7 +496,7 @@ class DSpyOptimizer:
             # Run in executor to avoid blocking
             result = await self._run_dspy_module_async(
                 "pattern_analysis",
-                patterns=json.dumps(patterns, indent=2),
+                patterns=codec.dumps(patterns, indent=2),
                 num_failures=len(failures),
             )
 
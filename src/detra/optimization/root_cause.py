@@ -6,6 +6,8 @@ from typing import Any, Optional
 
 import structlog
 
+from detra.utils import codec
+
 try:
     import google.genai as genai
 except ImportError:
@@ -232,7 +234,7 @@ class RootCauseAnalyzer:
 
         # Add additional context
         if context:
-            parts.append(f"## Additional Context:\n```json\n{json.dumps(context, indent=2, default=str)}\n```\n")
+            parts.append(f"## Additional Context:\n```json\n{codec.dumps(context, indent=2, default=str)}\n```\n")
 
         return "\n".join(parts)
 
@@ -283,7 +285,7 @@ class RootCauseAnalyzer:
                 if k in nc:
                     config_summary[k] = nc[k]
             if config_summary:
-                parts.append(f"## Node Config:\n{json.dumps(config_summary, indent=2, default=str)}\n")
+                parts.append(f"## Node Config:\n{codec.dumps(config_summary, indent=2, default=str)}\n")
 
         return "\n".join(parts)
 
@@ -373,7 +375,7 @@ Return JSON:
         text = text.strip()
 
         try:
-            analysis = json.loads(text)
+            analysis = codec.loads(text)
         except json.JSONDecodeError:
             # Fallback parsing
             analysis = {
@@ -471,7 +473,7 @@ Return JSON:
         text = text.strip()
 
         try:
-            analysis = json.loads(text)
+            analysis = codec.loads(text)
         except json.JSONDecodeError:
             analysis = {
                 "root_cause": "Unable to parse analysis",
@@ -6,6 +6,14 @@ from detra.security.scanners import (
     PromptInjectionScanner,
     ScanResult,
 )
+from detra.security.incremental import (
+    GuardDecision,
+    IncrementalContentScanner,
+    IncrementalInjectionScanner,
+    IncrementalPIIScanner,
+    StreamAbortedError,
+    StreamGuard,
+)
 from detra.security.signals import (
     SecuritySignal,
     SignalSeverity,
@@ -17,6 +25,12 @@ __all__ = [
     "PIIScanner",
     "PromptInjectionScanner",
     "ScanResult",
+    "GuardDecision",
+    "IncrementalContentScanner",
+    "IncrementalInjectionScanner",
+    "IncrementalPIIScanner",
+    "StreamAbortedError",
+    "StreamGuard",
     "SecuritySignal",
     "SignalSeverity",
     "SecuritySignalManager",
@@ -0,0 +1,359 @@
+"""Chunk-by-chunk security scanning for streamed outputs.
+
+The incremental scanners find what ``PIIScanner``, ``PromptInjectionScanner``
+and ``ContentScanner`` find on the assembled text, but consume the stream
+one chunk at a time (see ``detra.utils.incremental`` for how matches that
+straddle chunk boundaries are handled).  Each finding carries ``start``
+and ``end`` offsets into the stream.
+
+``StreamGuard`` runs a set of incremental checkers over a stream and
+decides, per chunk, what text may be released: with ``redact`` findings
+are masked, and with ``abort_severity`` the stream is stopped at the first
+finding that severe.  Either mode holds back the unsettled tail of the
+stream (at most ``max_match + holdback`` characters) until it is scanned.
+Each ``feed`` scans for at most ``budget_ms``; text it had no time for is
+carried to the next chunk and held back until scanned.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Optional, Union
+
+from detra.evaluation.rules import IncrementalRuleChecker, RuleCheckResult
+from detra.security.scanners import (
+    ContentScanner,
+    PIIScanner,
+    PromptInjectionScanner,
+    ScanResult,
+    ScanSeverity,
+    severity_from_rank,
+    severity_rank,
+)
+from detra.utils.incremental import StreamHit, StreamWindow
+from detra.utils.patterns import PatternSet
+
+# Text scanned between budget checks
+SCAN_SLICE_CHARS = 2048
+REDACTION = "[REDACTED]"
+
+
+class IncrementalScanner:
+    """Base for scanners that consume a stream chunk by chunk."""
+
+    name: str = ""
+
+    def __init__(self, window: StreamWindow):
+        self._window = window
+        self.findings: list[dict[str, Any]] = []
+        self._max_rank = 0
+
+    @property
+    def settled(self) -> int:
+        """Stream offset before which no future finding can start."""
+        return self._window.settled
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """Scan the next chunk; returns the new findings."""
+        return self._collect(self._window.feed(chunk))
+
+    def finish(self) -> list[dict[str, Any]]:
+        """End of stream; returns the findings the tail completed."""
+        return self._collect(self._window.flush())
+
+    def result(self) -> ScanResult:
+        """Everything found so far, as the whole-text scanner reports it."""
+        if not self.findings:
+            return ScanResult(scanner_name=self.name, detected=False, severity=ScanSeverity.INFO)
+        return ScanResult(
+            scanner_name=self.name,
+            detected=True,
+            severity=severity_from_rank(self._max_rank),
+            findings=list(self.findings),
+            summary=f"Found {len(self.findings)} issues",
+        )
+
+    def _collect(self, hits: list[StreamHit]) -> list[dict[str, Any]]:
+        new = []
+        for hit in hits:
+            finding = self._finding(hit)
+            if finding is None:
+                continue
+            finding["start"], finding["end"] = hit.start, hit.end
+            rank = severity_rank(finding["severity"])
+            self._max_rank = max(self._max_rank, rank)
+            new.append(finding)
+        self.findings.extend(new)
+        return new
+
+    def _finding(self, hit: StreamHit) -> Optional[dict[str, Any]]:
+        raise NotImplementedError
+
+
+class IncrementalPIIScanner(IncrementalScanner):
+    """``PIIScanner`` over a stream."""
+
+    name = "pii_detection"
+
+    def __init__(self, scanner: Optional[PIIScanner] = None, **window: Any):
+        self.scanner = scanner or PIIScanner(include_values=False)
+        matcher = self.scanner._matcher
+        super().__init__(StreamWindow(
+            matcher.finditer if matcher is not None else _no_hits, **window,
+        ))
+
+    def _finding(self, hit: StreamHit) -> dict[str, Any]:
+        return self.scanner._make_finding(self.scanner._names[hit.hit.index], hit.hit.text)
+
+
+class IncrementalInjectionScanner(IncrementalScanner):
+    """``PromptInjectionScanner`` over a stream."""
+
+    name = "prompt_injection"
+
+    def __init__(self, scanner: Optional[PromptInjectionScanner] = None, **window: Any):
+        self.scanner = scanner or PromptInjectionScanner()
+        self._patterns = tuple(self.scanner.INJECTION_PATTERNS)
+        super().__init__(StreamWindow(_injection_set(self._patterns).finditer, **window))
+
+    def _finding(self, hit: StreamHit) -> dict[str, Any]:
+        pattern, severity = self._patterns[hit.hit.index]
+        return {
+            "type": "prompt_injection",
+            "pattern": pattern[:50],
+            "severity": severity.value,
+            "evidence": hit.hit.text,
+        }
+
+
+class IncrementalContentScanner(IncrementalScanner):
+    """``ContentScanner`` over a stream (first occurrence of each keyword)."""
+
+    name = "harmful_content"
+
+    def __init__(self, scanner: Optional[ContentScanner] = None, **window: Any):
+        self.scanner = scanner or ContentScanner()
+        window.setdefault("context_chars", 20)
+        super().__init__(StreamWindow(self.scanner._finditer, overlapping=True, **window))
+        self._seen_keywords: set[str] = set()
+
+    def _collect(self, hits: list[StreamHit]) -> list[dict[str, Any]]:
+        new = []
+        for hit in hits:
+            keyword = hit.hit.keyword
+            if keyword in self._seen_keywords:
+                continue
+            self._seen_keywords.add(keyword)
+            for category, severity in self.scanner._keyword_categories[keyword]:
+                new.append({
+                    "type": category,
+                    "keyword": keyword,
+                    "severity": severity.value,
+                    "context": f"...{hit.context}...",
+                    "start": hit.start,
+                    "end": hit.end,
+                })
+                self._max_rank = max(self._max_rank, severity_rank(severity))
+        self.findings.extend(new)
+        return new
+
+
+@lru_cache(maxsize=8)
+def _injection_set(patterns: tuple[tuple[str, ScanSeverity], ...]) -> PatternSet:
+    return PatternSet([pattern for pattern, _ in patterns], ignore_case=True)
+
+
+def _no_hits(text: str, pos: int = 0):
+    return iter(())
+
+
+Checker = Union[IncrementalScanner, IncrementalRuleChecker]
+
+
+@dataclass
+class GuardDecision:
+    """What to do after a chunk."""
+
+    text: str  # text that may be released now (redacted when redacting)
+    findings: list[dict[str, Any]] = field(default_factory=list)
+    abort: bool = False
+    over_budget: bool = False  # some of the chunk is still waiting to be scanned
+
+
+class StreamAbortedError(RuntimeError):
+    """Raised to the consumer of a stream that a ``StreamGuard`` stopped."""
+
+    def __init__(self, findings: list[dict[str, Any]]):
+        kinds = ", ".join(sorted({str(f.get("type")) for f in findings}))
+        super().__init__(f"Stream aborted by guard: {kinds}")
+        self.findings = findings
+
+
+class StreamGuard:
+    """Incremental checks over one stream, with abort and redaction.
+
+    Args:
+        checkers: Incremental scanners and/or an ``IncrementalRuleChecker``.
+        redact: Mask findings of the ``redact_checks`` checkers in released text.
+        redact_checks: Checker names whose findings are masked.
+        abort_severity: Stop the stream at the first finding at least this
+            severe (None never aborts).
+        budget_ms: Scan time allowed per ``feed`` (None for no limit).
+    """
+
+    def __init__(
+        self,
+        checkers: Optional[Sequence[Checker]] = None,
+        *,
+        redact: bool = False,
+        redact_checks: Sequence[str] = ("pii_detection",),
+        abort_severity: Optional[Union[ScanSeverity, str]] = None,
+        budget_ms: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.checkers = list(checkers) if checkers is not None else [
+            IncrementalPIIScanner(), IncrementalInjectionScanner(), IncrementalContentScanner(),
+        ]
+        self.redact = redact
+        self.redact_checks = set(redact_checks)
+        self.abort_rank = (
+            severity_rank(abort_severity) if abort_severity is not None else None
+        )
+        self.budget_ms = budget_ms
+        self._clock = clock
+        self._hold = redact or abort_severity is not None
+
+        self._backlog: list[str] = []  # received but not yet scanned
+        self._pending = ""  # scanned but not yet released
+        self._pending_origin = 0
+        self._spans: list[tuple[int, int]] = []
+        self.findings: list[dict[str, Any]] = []
+        self.aborted = False
+        self.redactions = 0
+        self.over_budget_chunks = 0
+
+    def feed(self, chunk: str) -> GuardDecision:
+        if self.aborted:
+            return GuardDecision(text="", abort=True)
+        self._backlog.append(chunk)
+        deadline = None
+        if self.budget_ms is not None:
+            deadline = self._clock() + self.budget_ms / 1000
+        new = self._scan_backlog(deadline)
+        over_budget = bool(self._backlog)
+        if over_budget:
+            self.over_budget_chunks += 1
+        if self._should_abort(new):
+            return GuardDecision(text="", findings=new, abort=True, over_budget=over_budget)
+        if not self._hold:
+            return GuardDecision(text=chunk, findings=new, over_budget=over_budget)
+        release_to = min(checker.settled for checker in self.checkers) if self.checkers else None
+        return GuardDecision(
+            text=self._release(release_to), findings=new, over_budget=over_budget,
+        )
+
+    def finish(self) -> GuardDecision:
+        """End of stream: scan what is left and release the rest of the text."""
+        if self.aborted:
+            return GuardDecision(text="", abort=True)
+        new = self._scan_backlog(None)
+        tail = [
+            self._normalize(checker, finding)
+            for checker in self.checkers for finding in checker.finish()
+        ]
+        self._record(tail)
+        new.extend(tail)
+        if self._should_abort(new):
+            return GuardDecision(text="", findings=new, abort=True)
+        text = self._release(None) if self._hold else ""
+        return GuardDecision(text=text, findings=new)
+
+    # -- internals -------------------------------------------------------------
+
+    def _scan_backlog(self, deadline: Optional[float]) -> list[dict[str, Any]]:
+        new: list[dict[str, Any]] = []
+        while self._backlog:
+            text = self._backlog[0]
+            piece, rest = text[:SCAN_SLICE_CHARS], text[SCAN_SLICE_CHARS:]
+            if rest:
+                self._backlog[0] = rest
+            else:
+                self._backlog.pop(0)
+            if self._hold:
+                self._pending += piece
+            for checker in self.checkers:
+                new.extend(self._normalize(checker, f) for f in checker.feed(piece))
+            if deadline is not None and self._clock() >= deadline:
+                break
+        self._record(new)
+        return new
+
+    def _record(self, new: list[dict[str, Any]]) -> None:
+        self.findings.extend(new)
+        if self.redact:
+            for finding in new:
+                if finding.get("check") in self.redact_checks and "start" in finding:
+                    self._spans.append((finding["start"], finding["end"]))
+
+    def _should_abort(self, new: list[dict[str, Any]]) -> bool:
+        if self.abort_rank is None:
+            return False
+        for finding in new:
+            if _rank(finding.get("severity")) >= self.abort_rank:
+                self.aborted = True
+                return True
+        return False
+
+    def _release(self, upto: Optional[int]) -> str:
+        """Release pending text up to stream offset ``upto`` (all of it for None)."""
+        origin = self._pending_origin
+        end = len(self._pending) if upto is None else max(0, min(len(self._pending), upto - origin))
+        # Never cut through a span that is being redacted.
+        for start, stop in sorted(self._spans, reverse=True):
+            if start - origin < end < stop - origin:
+                end = max(0, start - origin)
+        text = self._pending[:end]
+        self._pending = self._pending[end:]
+        self._pending_origin = origin + end
+
+        if not self._spans:
+            return text
+        out, cursor = [], 0
+        remaining = []
+        for start, stop in sorted(self._spans):
+            rel_start, rel_stop = start - origin, stop - origin
+            if rel_start >= end:
+                remaining.append((start, stop))
+                continue
+            rel_start = max(rel_start, cursor)
+            if rel_stop <= rel_start:
+                continue
+            out.append(text[cursor:rel_start])
+            out.append(REDACTION)
+            self.redactions += 1
+            cursor = rel_stop
+        out.append(text[cursor:])
+        self._spans = remaining
+        return "".join(out)
+
+    @staticmethod
+    def _normalize(checker: Checker, finding: Any) -> dict[str, Any]:
+        if isinstance(finding, RuleCheckResult):
+            return {
+                "check": "rules",
+                "type": finding.check_name,
+                "severity": finding.severity.value,
+                "message": finding.message,
+                **finding.details,
+            }
+        return {"check": checker.name, **finding}
+
+
+def _rank(severity: Any) -> int:
+    try:
+        return severity_rank(severity)
+    except ValueError:
+        return 0  # e.g. a rule's "warning"
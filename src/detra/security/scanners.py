@@ -1,10 +1,16 @@
 """Security scanning utilities for detecting sensitive content."""
 
+import heapq
 import re
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Optional, Union
+
+from detra.utils.keywords import KeywordHit, KeywordIndex
+from detra.utils.patterns import PatternHit, PatternSet
 
 
 class ScanSeverity(str, Enum):
@@ -24,6 +30,7 @@ class ScanResult:
     severity: ScanSeverity
     findings: list[dict[str, Any]] = field(default_factory=list)
     summary: Optional[str] = None
+    truncated: bool = False
 
     @property
     def finding_count(self) -> int:
@@ -70,7 +77,13 @@ class SecurityScanner(ABC):
 
 
 class PIIScanner(SecurityScanner):
-    """Scanner for detecting personally identifiable information."""
+    """Scanner for detecting personally identifiable information.
+
+    The enabled patterns are compiled once per ``enabled_patterns`` set
+    into a single ``PatternSet`` and the text is scanned in one pass.
+    Each span of text is reported once, as the most severe type that
+    matches there.
+    """
 
     # PII patterns with severity
     PII_PATTERNS = {
@@ -111,69 +124,96 @@ class PIIScanner(SecurityScanner):
         },
     }
 
-    def __init__(self, enabled_patterns: Optional[list[str]] = None):
+    def __init__(
+        self,
+        enabled_patterns: Optional[list[str]] = None,
+        max_findings: Optional[int] = 100,
+        include_values: bool = True,
+    ):
         """
         Initialize the PII scanner.
 
         Args:
             enabled_patterns: List of pattern names to enable. If None, all are enabled.
                              If empty list [], no patterns are enabled.
+            max_findings: Keep at most this many findings per scan (None for no cap).
+                          Matches past the cap still count toward the summary and severity.
+            include_values: Keep the unredacted match in each finding's ``value``.
         """
         if enabled_patterns is None:
             self.enabled_patterns = list(self.PII_PATTERNS.keys())
         else:
             self.enabled_patterns = enabled_patterns
+        self.max_findings = max_findings
+        self.include_values = include_values
+        self._matcher, self._names = _compile_pii_patterns(
+            tuple(self.enabled_patterns),
+            tuple(
+                (name, info["pattern"], _SEVERITY_RANK[info["severity"]])
+                for name, info in self.PII_PATTERNS.items()
+            ),
+        )
 
     @property
     def name(self) -> str:
         return "pii_detection"
 
+    def iter_findings(self, text: str) -> Iterator[dict[str, Any]]:
+        """Yield findings in text order as the single scan reaches them."""
+        for pattern_name, value in self._matches(text):
+            yield self._make_finding(pattern_name, value)
+
     def scan(self, text: str) -> ScanResult:
         """Scan text for PII."""
-        findings = []
-        max_severity = ScanSeverity.INFO
-
-        # If no patterns enabled, return empty result
-        if not self.enabled_patterns:
+        findings: list[dict[str, Any]] = []
+        max_rank = 0
+        total = 0
+        cap = self.max_findings
+
+        for pattern_name, value in self._matches(text):
+            total += 1
+            max_rank = max(max_rank, _SEVERITY_RANK[self.PII_PATTERNS[pattern_name]["severity"]])
+            if cap is None or len(findings) < cap:
+                findings.append(self._make_finding(pattern_name, value))
+
+        if not total:
             return ScanResult(
                 scanner_name=self.name,
                 detected=False,
                 severity=ScanSeverity.INFO,
-                findings=[],
-                summary=None,
             )
 
-        for pattern_name in self.enabled_patterns:
-            if pattern_name not in self.PII_PATTERNS:
-                continue
-
-            pattern_info = self.PII_PATTERNS[pattern_name]
-            matches = re.findall(pattern_info["pattern"], text, re.IGNORECASE)
-
-            for match in matches:
-                # Store original value for testing/debugging, redact for evidence
-                original_value = match if isinstance(match, str) else str(match)
-                redacted = self._redact(original_value)
-
-                findings.append({
-                    "type": pattern_name,
-                    "description": pattern_info["description"],
-                    "severity": pattern_info["severity"].value,
-                    "evidence": redacted,
-                    "value": original_value,  # Store original for testing
-                })
-
-                if self._severity_order(pattern_info["severity"]) > self._severity_order(max_severity):
-                    max_severity = pattern_info["severity"]
-
+        truncated = total > len(findings)
+        summary = f"Found {total} PII instances"
+        if truncated:
+            summary += f" ({len(findings)} kept)"
         return ScanResult(
             scanner_name=self.name,
-            detected=len(findings) > 0,
-            severity=max_severity if findings else ScanSeverity.INFO,
+            detected=True,
+            severity=_SEVERITY_BY_RANK[max_rank],
             findings=findings,
-            summary=f"Found {len(findings)} PII instances" if findings else None,
+            summary=summary,
+            truncated=truncated,
         )
 
+    def _matches(self, text: str) -> Iterator[tuple[str, str]]:
+        if self._matcher is None or not text:
+            return
+        for hit in self._matcher.finditer(text):
+            yield self._names[hit.index], hit.text
+
+    def _make_finding(self, pattern_name: str, value: str) -> dict[str, Any]:
+        pattern_info = self.PII_PATTERNS[pattern_name]
+        finding = {
+            "type": pattern_name,
+            "description": pattern_info["description"],
+            "severity": pattern_info["severity"].value,
+            "evidence": self._redact(value),
+        }
+        if self.include_values:
+            finding["value"] = value  # Original kept for testing/debugging
+        return finding
+
     def _redact(self, text: str, visible_chars: int = 4) -> str:
         """Redact sensitive text, keeping only some visible characters."""
         if len(text) <= visible_chars * 2:
@@ -192,6 +232,111 @@ class PIIScanner(SecurityScanner):
         return order.get(severity, 0)
 
 
+class _PIIMatcher:
+    """Single-pass PII matching that doesn't let a milder match hide a severe one.
+
+    The combined ``PatternSet`` is leftmost-first and non-overlapping, so
+    a phone number starting one token before an SSN would swallow it.
+    Whenever a hit isn't of the top rank, the more severe patterns are
+    searched for a match starting inside it, which is reported in its
+    place.  Each rank keeps its last search result and only searches again
+    once the hits have moved past it, so each rank below the top adds
+    about one pass over the text, and only once it has a hit.
+
+    Every hit is the one a fresh scan from the previous hit's end would
+    report, so resuming at a hit's end (as ``StreamWindow`` does) gives
+    the same hits as scanning on.
+    """
+
+    def __init__(self, patterns: list[str], ranks: list[int]):
+        # patterns are sorted most severe first
+        self.patterns = PatternSet(patterns, ignore_case=True)
+        self._ranks = ranks
+        # rank -> the patterns ranked above it (a prefix, so indices agree)
+        self._above: dict[int, PatternSet] = {}
+        for rank in set(ranks):
+            count = sum(1 for r in ranks if r > rank)
+            if count:
+                self._above[rank] = PatternSet(patterns[:count], ignore_case=True)
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator[PatternHit]:
+        """Hits in text order; each span is reported once, as its most severe type."""
+        lowered = text.lower()
+        ahead: dict[int, tuple[int, Optional[PatternHit]]] = {}
+        hits = self.patterns.finditer(text, pos, lowered=lowered)
+        while (hit := next(hits, None)) is not None:
+            reported = self._most_severe(text, lowered, hit, ahead)
+            yield reported
+            if reported is not hit:
+                # Go on after the severe match, as a fresh scan would.
+                hits = self.patterns.finditer(text, reported.end, lowered=lowered)
+
+    def _most_severe(
+        self,
+        text: str,
+        lowered: str,
+        hit: PatternHit,
+        ahead: dict[int, tuple[int, Optional[PatternHit]]],
+    ) -> PatternHit:
+        rank = self._ranks[hit.index]
+        if rank not in self._above:
+            return hit
+        # The leftmost severe match from ``searched_from`` is still the
+        # leftmost from ``start`` unless it begins before ``start``.
+        start = hit.start + 1
+        searched_from, severe = ahead.get(rank, (None, None))
+        if (
+            searched_from is None
+            or searched_from > start
+            or (severe is not None and severe.start < start)
+        ):
+            severe_hits = self._above[rank].finditer(text, start, lowered=lowered)
+            severe = next(iter(severe_hits), None)
+            ahead[rank] = (start, severe)
+        if severe is None or severe.start >= hit.end:
+            return hit
+        return self._most_severe(text, lowered, severe, ahead)
+
+
+@lru_cache(maxsize=64)
+def _compile_pii_patterns(
+    enabled: tuple[str, ...],
+    table: tuple[tuple[str, str, int], ...],
+) -> tuple[Optional[_PIIMatcher], list[str]]:
+    """Build the combined matcher for one ``enabled_patterns`` set.
+
+    More severe types are tried first, so where two types could match at
+    the same position the finding is reported as the more severe one.
+    """
+    known = {name: (pattern, rank) for name, pattern, rank in table}
+    names = [name for name in dict.fromkeys(enabled) if name in known]
+    if not names:
+        return None, []
+    names.sort(key=lambda name: -known[name][1])
+    matcher = _PIIMatcher([known[name][0] for name in names], [known[name][1] for name in names])
+    return matcher, names
+
+
+_SEVERITY_RANK = {
+    ScanSeverity.INFO: 0,
+    ScanSeverity.LOW: 1,
+    ScanSeverity.MEDIUM: 2,
+    ScanSeverity.HIGH: 3,
+    ScanSeverity.CRITICAL: 4,
+}
+_SEVERITY_BY_RANK = {rank: severity for severity, rank in _SEVERITY_RANK.items()}
+
+
+def severity_rank(severity: Union[ScanSeverity, str]) -> int:
+    """Numeric order of a severity, from 0 (info) to 4 (critical)."""
+    return _SEVERITY_RANK[ScanSeverity(severity)]
+
+
+def severity_from_rank(rank: int) -> ScanSeverity:
+    """The severity whose ``severity_rank`` is ``rank``."""
+    return _SEVERITY_BY_RANK[rank]
+
+
 class PromptInjectionScanner(SecurityScanner):
     """Scanner for detecting prompt injection attempts."""
 
@@ -302,25 +447,57 @@ class ContentScanner(SecurityScanner):
         },
     }
 
+    # Severity for sensitive_topics entries that are terms rather than topic names
+    CUSTOM_TOPIC_SEVERITY = ScanSeverity.MEDIUM
+
     def __init__(self, sensitive_topics: Optional[list[str]] = None):
         """
         Initialize the content scanner.
 
         Args:
-            sensitive_topics: List of sensitive topic names to scan for.
+            sensitive_topics: Sensitive topic names (keys of TOPIC_PATTERNS) to scan for.
+                             Any other entry is treated as a term of its own and
+                             reported under the ``sensitive_topic`` category, so
+                             large custom term lists can be configured directly.
                              If None or empty, uses default patterns only.
         """
         self.sensitive_topics = sensitive_topics or []
         self._build_patterns()
 
     def _build_patterns(self):
-        """Build the content patterns based on sensitive topics."""
+        """Build the content patterns and keyword index based on sensitive topics."""
         self.CONTENT_PATTERNS = self.DEFAULT_PATTERNS.copy()
-        
+
         # Add topic-specific patterns if requested
+        custom_terms = []
         for topic in self.sensitive_topics:
             if topic in self.TOPIC_PATTERNS:
                 self.CONTENT_PATTERNS[topic] = self.TOPIC_PATTERNS[topic]
+            else:
+                custom_terms.append(topic)
+        if custom_terms:
+            self.CONTENT_PATTERNS["sensitive_topic"] = {
+                "keywords": custom_terms,
+                "severity": self.CUSTOM_TOPIC_SEVERITY,
+            }
+
+        # keyword -> [(category, severity)], in CONTENT_PATTERNS order
+        self._keyword_categories: dict[str, list[tuple[str, ScanSeverity]]] = {}
+        for category, config in self.CONTENT_PATTERNS.items():
+            for keyword in config["keywords"]:
+                self._keyword_categories.setdefault(keyword.lower(), []).append(
+                    (category, config["severity"])
+                )
+        # Built-in keywords are stems and also match inflected forms
+        # ("hack" -> "hacking", not "lifehack"); custom terms match whole words.
+        builtin = [
+            keyword.lower()
+            for category, config in self.CONTENT_PATTERNS.items() if category != "sensitive_topic"
+            for keyword in config["keywords"]
+        ]
+        self._index = KeywordIndex(builtin, prefixes=True)
+        terms = [term.lower() for term in custom_terms if term.lower() not in self._index.keywords]
+        self._term_index = KeywordIndex(terms) if terms else None
 
     @property
     def name(self) -> str:
@@ -329,57 +506,47 @@ class ContentScanner(SecurityScanner):
     def scan(self, text: str) -> ScanResult:
         """Scan text for harmful content."""
         findings = []
-        text_lower = text.lower()
-
-        # Only scan if we have patterns configured
-        if not self.CONTENT_PATTERNS:
-            return ScanResult(
-                scanner_name=self.name,
-                detected=False,
-                severity=ScanSeverity.INFO,
-                findings=[],
-                summary=None,
-            )
-
-        for category, config in self.CONTENT_PATTERNS.items():
-            for keyword in config["keywords"]:
-                if keyword in text_lower:
-                    # Find context around keyword
-                    idx = text_lower.find(keyword)
-                    context_start = max(0, idx - 20)
-                    context_end = min(len(text), idx + len(keyword) + 20)
-                    context = text[context_start:context_end]
-
-                    findings.append({
-                        "type": category,
-                        "keyword": keyword,
-                        "severity": config["severity"].value,
-                        "context": f"...{context}...",
-                    })
-
-        max_severity = ScanSeverity.INFO
-        if findings:
-            severities = [ScanSeverity(f["severity"]) for f in findings]
-            max_severity = max(severities, key=lambda s: self._severity_order(s))
+        max_rank = 0
+
+        # One pass over the text for every keyword of every category
+        hits = self._index.first_hits(text)
+        if self._term_index is not None:
+            hits.update(self._term_index.first_hits(text))
+            hits = dict(sorted(hits.items(), key=lambda item: (item[1].start, item[1].end)))
+        for keyword, hit in hits.items():
+            context_start = max(0, hit.start - 20)
+            context_end = min(len(text), hit.end + 20)
+            context = text[context_start:context_end]
+
+            for category, severity in self._keyword_categories[keyword]:
+                findings.append({
+                    "type": category,
+                    "keyword": keyword,
+                    "severity": severity.value,
+                    "context": f"...{context}...",
+                })
+                max_rank = max(max_rank, _SEVERITY_RANK[severity])
 
         return ScanResult(
             scanner_name=self.name,
             detected=len(findings) > 0,
-            severity=max_severity,
+            severity=_SEVERITY_BY_RANK[max_rank],
             findings=findings,
             summary=f"Found {len(findings)} content concerns" if findings else None,
         )
 
+    def _finditer(self, text: str, pos: int = 0) -> Iterator[KeywordHit]:
+        """Every keyword occurrence in start order, across both indexes."""
+        if self._term_index is None:
+            return self._index.finditer(text, pos)
+        return heapq.merge(
+            self._index.finditer(text, pos), self._term_index.finditer(text, pos),
+            key=lambda hit: (hit.start, hit.end),
+        )
+
     def _severity_order(self, severity: ScanSeverity) -> int:
         """Get numeric order for severity comparison."""
-        order = {
-            ScanSeverity.INFO: 0,
-            ScanSeverity.LOW: 1,
-            ScanSeverity.MEDIUM: 2,
-            ScanSeverity.HIGH: 3,
-            ScanSeverity.CRITICAL: 4,
-        }
-        return order.get(severity, 0)
+        return _SEVERITY_RANK.get(severity, 0)
 
 
 class CompositeScan:
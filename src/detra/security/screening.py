@@ -0,0 +1,131 @@
+"""Local pre-judge security screening.
+
+``LocalSecurityScreen`` runs the regex/keyword scanners configured by
+``SecurityConfig`` over a call's input and output and decides as many of
+a node's ``security_checks`` as it can without an LLM.  A local hit is
+enough to decide a check; a clean scan is only enough for checks listed
+in ``final_when_clean``, since the regex and keyword scanners miss what
+they have no pattern for.  Everything else -- checks with no local
+scanner, clean scans of other checks, and hits on checks listed in
+``confirm_with_judge`` -- is returned for escalation to the judge.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from detra.config.schema import SecurityConfig
+from detra.security.scanners import (
+    CompositeScan,
+    ContentScanner,
+    PIIScanner,
+    PromptInjectionScanner,
+    ScanResult,
+    SecurityScanner,
+    severity_rank,
+)
+
+# Judge security check name -> name of the local scanner that can decide it.
+CHECK_SCANNERS: dict[str, str] = {
+    "pii_detection": "pii_detection",
+    "prompt_injection": "prompt_injection",
+    "harmful_content": "harmful_content",
+}
+
+LOCAL = "local"
+JUDGE = "judge"
+
+
+@dataclass
+class ScreenOutcome:
+    """What the local phase decided and what it left for the judge."""
+
+    issues: list[dict[str, Any]] = field(default_factory=list)
+    decided: dict[str, str] = field(default_factory=dict)
+    escalate: list[str] = field(default_factory=list)
+
+
+def scanners_from_config(config: SecurityConfig) -> list[SecurityScanner]:
+    """Build the scanners enabled by a ``SecurityConfig``."""
+    scanners: list[SecurityScanner] = []
+    if config.pii_detection_enabled:
+        scanners.append(PIIScanner(
+            enabled_patterns=config.pii_patterns,
+            max_findings=config.max_pii_findings,
+            include_values=False,
+        ))
+    if config.prompt_injection_detection:
+        scanners.append(PromptInjectionScanner())
+    scanners.append(ContentScanner(sensitive_topics=config.sensitive_topics))
+    return scanners
+
+
+class LocalSecurityScreen:
+    """Decides security checks locally where a scanner covers them.
+
+    A local hit is final unless the check is in ``confirm_with_judge``, in
+    which case the judge gets the last word.  A clean local scan is final
+    only for checks in ``final_when_clean``; otherwise the judge decides.
+    Checks without a local scanner always escalate.
+    """
+
+    def __init__(self, config: SecurityConfig):
+        self.composite = CompositeScan(scanners_from_config(config))
+        self.confirm_with_judge = set(config.confirm_with_judge)
+        self.final_when_clean = set(config.final_when_clean)
+        self._scanners = {s.name: s for s in self.composite.scanners}
+
+    def may_escalate(self, checks: list[str]) -> bool:
+        """Whether screening ``checks`` could end up needing the judge."""
+        return any(
+            CHECK_SCANNERS.get(check) not in self._scanners
+            or check in self.confirm_with_judge
+            or check not in self.final_when_clean
+            for check in checks
+        )
+
+    def screen(self, input_data: Any, output_data: Any, checks: list[str]) -> ScreenOutcome:
+        outcome = ScreenOutcome()
+        texts: tuple[str, str] | None = None
+        for check in checks:
+            scanner = self._scanners.get(CHECK_SCANNERS.get(check, ""))
+            if scanner is None:
+                outcome.escalate.append(check)
+                continue
+            if texts is None:
+                texts = (_as_text(input_data), _as_text(output_data))
+            results = [r for r in scanner.scan_input_output(*texts) if r.detected]
+            if results:
+                final = check not in self.confirm_with_judge
+            else:
+                final = check in self.final_when_clean
+            if not final:
+                outcome.escalate.append(check)
+                continue
+            outcome.decided[check] = LOCAL
+            if results:
+                outcome.issues.append(_to_issue(check, results))
+        return outcome
+
+
+def _as_text(data: Any) -> str:
+    return "" if data is None else str(data)
+
+
+def _to_issue(check: str, results: list[ScanResult]) -> dict[str, Any]:
+    """Shape local findings like a judge security issue."""
+    worst = max(results, key=lambda r: severity_rank(r.severity))
+    findings = [f for r in results for f in r.findings]
+    first = findings[0] if findings else {}
+    return {
+        "check": check,
+        "detected": True,
+        "severity": worst.severity.value,
+        "details": "; ".join(r.summary for r in results if r.summary),
+        "evidence": first.get("evidence") or first.get("context") or "",
+        "recommendation": "",
+        "source": LOCAL,
+        "findings": findings,
+    }
+
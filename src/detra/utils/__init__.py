@@ -1,5 +1,10 @@
 """Utility functions and helpers for detra."""
 
+from detra.utils.codec import (
+    JSONCodec,
+    get_codec,
+    set_codec,
+)
 from detra.utils.retry import (
     async_retry,
     RetryConfig,
@@ -10,9 +15,13 @@ from detra.utils.serialization import (
     safe_json_dumps,
     safe_json_loads,
     extract_json_from_text,
+    iter_json_spans,
 )
 
 __all__ = [
+    "JSONCodec",
+    "get_codec",
+    "set_codec",
     "async_retry",
     "RetryConfig",
     "RetryError",
@@ -20,4 +29,5 @@ __all__ = [
     "safe_json_dumps",
     "safe_json_loads",
     "extract_json_from_text",
+    "iter_json_spans",
 ]
@@ -0,0 +1,192 @@
+"""Pluggable JSON codec.
+
+detra encodes and decodes JSON through one codec: ``orjson`` when it is
+installed, else ``msgspec``, else the standard library.  All three keep
+the same contract:
+
+* ``dumps`` returns ``str`` without escaping non-ASCII characters, and
+  hands anything it can't encode to ``default``.  The orjson codec also
+  leaves datetimes and dataclasses to ``default``, as ``json.dumps``
+  does; msgspec encodes those itself.
+* ``loads`` raises ``json.JSONDecodeError`` (a ``ValueError``) on bad input.
+
+The fast codecs write compact JSON (``{"a":1}``), support ``indent=2``
+only, and encode NaN/infinity as ``null``; options they don't support
+fall back to the standard library per call.  ``set_codec`` pins a codec,
+e.g. ``set_codec("json")`` for byte-identical stdlib output.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+
+    _MSGSPEC_AVAILABLE = True
+except ImportError:
+    _MSGSPEC_AVAILABLE = False
+
+Default = Optional[Callable[[Any], Any]]
+
+
+class JSONCodec:
+    """Standard-library codec; the base for the fast ones."""
+
+    name = "json"
+
+    def dumps(
+        self,
+        obj: Any,
+        *,
+        default: Default = None,
+        sort_keys: bool = False,
+        indent: Optional[int] = None,
+        **options: Any,
+    ) -> str:
+        options.setdefault("ensure_ascii", False)
+        return json.dumps(obj, default=default, sort_keys=sort_keys, indent=indent, **options)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+_STDLIB = JSONCodec()
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        if not _ORJSON_AVAILABLE:
+            raise ImportError("orjson is not installed.  Install with: pip install orjson")
+        # Leave datetimes and dataclasses to ``default``, as json.dumps does.
+        self._base = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def dumps(
+        self,
+        obj: Any,
+        *,
+        default: Default = None,
+        sort_keys: bool = False,
+        indent: Optional[int] = None,
+        **options: Any,
+    ) -> str:
+        if options.pop("ensure_ascii", False) or options or indent not in (None, 2):
+            return _STDLIB.dumps(obj, default=default, sort_keys=sort_keys, indent=indent,
+                                 **options)
+        option = self._base
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode()
+        except orjson.JSONEncodeError:
+            # e.g. integers over 64 bits, which json.dumps handles
+            return _STDLIB.dumps(obj, default=default, sort_keys=sort_keys, indent=indent)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        if not _MSGSPEC_AVAILABLE:
+            raise ImportError("msgspec is not installed.  Install with: pip install msgspec")
+        self._decoder = msgspec.json.Decoder()
+        self._encoders: dict[tuple[Default, bool], Any] = {}
+
+    def dumps(
+        self,
+        obj: Any,
+        *,
+        default: Default = None,
+        sort_keys: bool = False,
+        indent: Optional[int] = None,
+        **options: Any,
+    ) -> str:
+        # msgspec encodes datetimes and dataclasses itself and has no
+        # indent option, so only the plain case takes the fast path.
+        if options.pop("ensure_ascii", False) or options or indent is not None:
+            return _STDLIB.dumps(obj, default=default, sort_keys=sort_keys, indent=indent,
+                                 **options)
+        encoder = self._encoders.get((default, sort_keys))
+        if encoder is None:
+            encoder = msgspec.json.Encoder(enc_hook=default, order="sorted" if sort_keys else None)
+            self._encoders[(default, sort_keys)] = encoder
+        try:
+            return encoder.encode(obj).decode()
+        except (msgspec.EncodeError, TypeError, OverflowError):
+            return _STDLIB.dumps(obj, default=default, sort_keys=sort_keys)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            text = data if isinstance(data, str) else data.decode("utf-8", errors="replace")
+            raise json.JSONDecodeError(str(e), text, 0) from e
+
+
+_CODECS: dict[str, Callable[[], JSONCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JSONCodec,
+}
+
+
+def _detect() -> JSONCodec:
+    if _ORJSON_AVAILABLE:
+        return OrjsonCodec()
+    if _MSGSPEC_AVAILABLE:
+        return MsgspecCodec()
+    return _STDLIB
+
+
+_codec: JSONCodec = _detect()
+
+
+def get_codec() -> JSONCodec:
+    return _codec
+
+
+def set_codec(codec: Union[str, JSONCodec, None]) -> JSONCodec:
+    """Use ``codec`` ("orjson", "msgspec", "json" or an instance); None re-detects."""
+    global _codec
+    if codec is None:
+        _codec = _detect()
+    elif isinstance(codec, str):
+        try:
+            _codec = _CODECS[codec]()
+        except KeyError:
+            raise ValueError(
+                f"Unknown JSON codec {codec!r}; choose from {sorted(_CODECS)}"
+            ) from None
+    else:
+        _codec = codec
+    return _codec
+
+
+def dumps(obj: Any, **kwargs: Any) -> str:
+    """Encode with the active codec."""
+    return _codec.dumps(obj, **kwargs)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode with the active codec; raises ``json.JSONDecodeError``."""
+    return _codec.loads(data)
@@ -0,0 +1,122 @@
+"""Run a whole-string matcher over text that arrives in chunks.
+
+``StreamWindow`` feeds each chunk, plus a bounded carry-over from the
+previous one, to a ``finditer(text, pos)`` matcher (``PatternSet`` or
+``KeywordIndex``).  Scanning resumes where the last chunk's decisions
+ended, so earlier text is never rescanned; only the carry -- at most
+``max_match + holdback`` characters -- is looked at twice.
+
+* A hit ending in the last ``holdback`` characters of the window is held
+  back until more text arrives: with more text the regex might extend it,
+  prefer a different alternative, or match from an earlier position (a
+  ``(`` before a number still too short to be a phone number).  The next
+  scan resumes where this one did, not at the held hit, so it finds the
+  same leftmost match a whole-text scan would.  A match longer than
+  ``holdback`` that starts before a hit and ends after it can still be
+  reported as just that hit.
+* Text more than ``max_match`` characters before the end of the window is
+  settled -- no future hit can start there.  Matches longer than
+  ``max_match`` that straddle a chunk boundary can be missed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import Any, NamedTuple
+
+# Characters kept before the resume point so \b and lookbehinds still see them
+LOOKBEHIND = 1
+
+
+class StreamHit(NamedTuple):
+    """A matcher hit with offsets into the whole stream."""
+
+    hit: Any  # the matcher's own hit; its first field identifies the pattern
+    start: int
+    end: int
+    context: str
+
+
+class StreamWindow:
+    """Incremental driver for one matcher over one stream.
+
+    With ``overlapping`` (``KeywordIndex``) hits may overlap and are
+    de-duplicated; otherwise hits are leftmost-first and non-overlapping
+    (``PatternSet``).
+    """
+
+    def __init__(
+        self,
+        finditer: Callable[[str, int], Iterable[Any]],
+        *,
+        max_match: int = 128,
+        holdback: int = 16,
+        overlapping: bool = False,
+        context_chars: int = 0,
+    ):
+        self._finditer = finditer
+        self.max_match = max_match
+        self.holdback = holdback
+        self.overlapping = overlapping
+        self.context_chars = context_chars
+        self._carry = ""
+        self._origin = 0  # stream offset of _carry[0]
+        self._resume = 0  # stream offset scanning resumes from
+        self._seen: set[tuple[int, int, Any]] = set()
+        self.length = 0  # characters fed so far
+
+    @property
+    def settled(self) -> int:
+        """Stream offset before which no future hit can start."""
+        return self._resume
+
+    def feed(self, chunk: str) -> list[StreamHit]:
+        """Scan a new chunk; returns the hits it completed."""
+        self.length += len(chunk)
+        return self._scan(self._carry + chunk, final=False)
+
+    def flush(self) -> list[StreamHit]:
+        """End of stream: report every remaining hit."""
+        hits = self._scan(self._carry, final=True)
+        self._carry = ""
+        self._origin = self._resume = self.length
+        self._seen.clear()
+        return hits
+
+    def _scan(self, window: str, *, final: bool) -> list[StreamHit]:
+        origin = self._origin
+        limit = len(window) if final else len(window) - self.holdback
+        resume = self._resume - origin
+        hits = []
+        for hit in self._finditer(window, resume):
+            if hit.end > limit:
+                break
+            start, end = origin + hit.start, origin + hit.end
+            if self.overlapping:
+                key = (start, end, hit[0])
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+            else:
+                resume = hit.end
+            hits.append(StreamHit(hit, start, end, self._context(window, hit)))
+
+        horizon = len(window) - self.holdback - self.max_match
+        if final:
+            resume = len(window)
+        else:
+            resume = max(resume, horizon)
+        resume = max(resume, self._resume - origin)
+
+        keep_from = max(0, resume - LOOKBEHIND)
+        self._carry = window[keep_from:]
+        self._origin = origin + keep_from
+        self._resume = origin + resume
+        if self.overlapping and self._seen:
+            self._seen = {key for key in self._seen if key[0] >= self._resume}
+        return hits
+
+    def _context(self, window: str, hit: Any) -> str:
+        if not self.context_chars:
+            return ""
+        return window[max(0, hit.start - self.context_chars):hit.end + self.context_chars]
@@ -0,0 +1,172 @@
+"""Match many keywords in one pass over a text.
+
+``KeywordIndex`` stores its keywords in a trie and compiles the trie into
+a single regex (``kill|killer|kit`` becomes ``ki(?:ll(?:er)?|t)``), so
+``re`` walks the trie in C: the work per text position depends on how
+deep the trie is, not on how many keywords it holds.  The regex is a
+zero-width lookahead anchored at word starts, which reports every
+occurrence -- including overlapping ones -- rather than only
+leftmost-longest matches; keywords that are prefixes of a longer hit are
+recovered from the trie.
+
+Below ``LINEAR_MAX`` keywords, a ``str.find`` per keyword (C fast-search)
+beats any single regex pass, so small indexes use that instead; results
+are the same either way.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+_WORD = re.compile(r"\w")
+
+LINEAR_MAX = 32
+
+
+class KeywordHit(NamedTuple):
+    """One keyword occurrence.
+
+    Offsets index ``text.lower()``, which lines up with ``text`` except for
+    the rare characters whose lowercase form has a different length.
+    """
+
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordIndex:
+    """Case-insensitive index over a fixed keyword list.
+
+    With ``whole_words`` (the default) a keyword only matches when it is
+    not part of a longer word: ``harm`` matches "do no harm" but not
+    "pharmacy".  With ``prefixes`` as well, a keyword may also begin a
+    longer word, so ``hack`` matches "hacking" -- inflected forms count --
+    but still not "lifehack".  Keywords are matched in lowercase.
+    """
+
+    def __init__(
+        self, keywords: Iterable[str], *, whole_words: bool = True, prefixes: bool = False,
+    ):
+        self.whole_words = whole_words
+        self.prefixes = prefixes
+        # Whether a hit must also end at a word boundary
+        self._word_ends = whole_words and not prefixes
+        self.keywords = list(dict.fromkeys(k.lower() for k in keywords if k))
+        # For each keyword, the shorter keywords that are prefixes of it.
+        self._prefixes: dict[str, list[str]] = {}
+        self._linear = len(self.keywords) <= LINEAR_MAX
+        self._regex = self._compile() if self.keywords and not self._linear else None
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator[KeywordHit]:
+        """Yield every occurrence of every keyword, in order of start offset.
+
+        Only occurrences starting at or after ``pos`` are reported; the text
+        before it still decides word boundaries.
+        """
+        if not self.keywords or not text:
+            return
+        lowered = text.lower()
+        if self._linear:
+            hits = [hit for kw in self.keywords for hit in self._find_all(lowered, kw, pos)]
+            hits.sort(key=lambda hit: (hit.start, hit.end))
+            yield from hits
+            return
+        word_ends = self._word_ends
+        for match in self._regex.finditer(lowered, pos):
+            start = match.start()
+            longest = match.group(1)
+            for prefix in self._prefixes[longest]:
+                end = start + len(prefix)
+                if not word_ends or not _is_word_at(lowered, end):
+                    yield KeywordHit(prefix, start, end)
+            yield KeywordHit(longest, start, start + len(longest))
+
+    def first_hits(self, text: str) -> dict[str, KeywordHit]:
+        """First occurrence of each keyword found, keyed by keyword."""
+        if self._linear and self.keywords and text:
+            lowered = text.lower()
+            found = [
+                hit for kw in self.keywords
+                if (hit := next(self._find_all(lowered, kw), None)) is not None
+            ]
+            found.sort(key=lambda hit: (hit.start, hit.end))
+            return {hit.keyword: hit for hit in found}
+
+        hits: dict[str, KeywordHit] = {}
+        for hit in self.finditer(text):
+            if hit.keyword not in hits:
+                hits[hit.keyword] = hit
+                if len(hits) == len(self.keywords):
+                    break
+        return hits
+
+    def search(self, text: str) -> KeywordHit | None:
+        return next(self.finditer(text), None)
+
+    def _find_all(self, lowered: str, keyword: str, start: int = 0) -> Iterator[KeywordHit]:
+        pos = lowered.find(keyword, start)
+        while pos != -1:
+            end = pos + len(keyword)
+            if not self.whole_words or (
+                not (pos and _WORD.match(lowered, pos - 1))
+                and not (self._word_ends and _is_word_at(lowered, end))
+            ):
+                yield KeywordHit(keyword, pos, end)
+            pos = lowered.find(keyword, pos + 1)
+
+    # -- build ---------------------------------------------------------------
+
+    def _compile(self) -> re.Pattern[str]:
+        trie: dict = {}
+        for keyword in self.keywords:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[""] = keyword
+        self._collect_prefixes(trie, [])
+
+        body = _emit(trie)
+        if not self.whole_words:
+            return re.compile(f"(?=({body}))")
+        starts_word = all(_WORD.match(k[0]) for k in self.keywords)
+        ends_word = all(_WORD.match(k[-1]) for k in self.keywords)
+        lead = r"\b" if starts_word else r"(?<!\w)"
+        tail = "" if self.prefixes else r"\b" if ends_word else r"(?!\w)"
+        return re.compile(f"{lead}(?=({body}){tail})")
+
+    def _collect_prefixes(self, node: dict, above: list[str]) -> None:
+        stack = [(node, above)]
+        while stack:
+            node, above = stack.pop()
+            keyword = node.get("")
+            if keyword is not None:
+                self._prefixes[keyword] = above
+                above = above + [keyword]
+            for ch, child in node.items():
+                if ch:
+                    stack.append((child, above))
+
+
+def _is_word_at(text: str, pos: int) -> bool:
+    return pos < len(text) and _WORD.match(text, pos) is not None
+
+
+def _emit(node: dict) -> str:
+    """Render a trie node as a regex (greedy, so longer keywords win)."""
+    branches = [re.escape(ch) + _emit(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    if "" in node:
+        return "(?:" + "|".join(branches) + ")?"
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
@@ -0,0 +1,382 @@
+r"""Scan text for many regexes in one pass.
+
+``PatternSet`` joins a list of patterns into a single alternation so a
+string is walked once regardless of how many patterns there are.  Two
+details keep that pass fast in CPython's ``re``:
+
+* Case-insensitive patterns are lowercased and matched against a
+  lowercased copy of the text.  ``re.IGNORECASE`` disables the engine's
+  literal-prefix scan and costs 5-10x on plain phrase lists.
+* The combined regex carries no capture groups (a named group per
+  alternative has the same effect).  When it hits, the member patterns are
+  tried at that position only to find out which one matched -- the same
+  answer ``Match.lastgroup`` would give, paid once per hit instead of once
+  per character.
+* Patterns are grouped by the characters they can start with, and each
+  group sits behind a one-character lookahead (``(?=[\d(+])(?:...)``).
+  At a position no group can start at, the engine rejects the whole
+  alternation in one step instead of trying every branch.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from collections.abc import Container, Iterator, Sequence
+from typing import NamedTuple
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+_LEADING_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+
+class PatternHit(NamedTuple):
+    """One match: which pattern, where, and the matched text."""
+
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+class _Pass:
+    """Patterns scanned together against one rendering of the text."""
+
+    def __init__(self, members: list[tuple[int, str]]):
+        if all(_leads_with_char(body) for _, body in members):
+            # re already builds a first-character prefilter for this shape.
+            groups: list[tuple[str | None, list[tuple[int, str]]]] = [(None, members)]
+        else:
+            groups = _group_by_first_chars(members)
+        ordered = [member for _, group in groups for member in group]
+        self.indices = [index for index, _ in ordered]
+        self.members = [re.compile(body) for _, body in ordered]
+        branches = []
+        for guard, group in groups:
+            alternation = "|".join(body for _, body in group)
+            branches.append(f"(?={guard})(?:{alternation})" if guard else alternation)
+        self.combined = re.compile("|".join(branches))
+
+    def finditer(self, text: str, original: str, pos: int = 0) -> Iterator[PatternHit]:
+        same_length = len(text) == len(original)
+        for match in self.combined.finditer(text, pos):
+            pos = match.start()
+            for index, member in zip(self.indices, self.members):
+                hit = member.match(text, pos)
+                if hit is not None:
+                    end = hit.end()
+                    matched = original[pos:end] if same_length else hit.group()
+                    yield PatternHit(index, pos, end, matched)
+                    break
+
+    def each_match(
+        self, text: str, original: str, pos: int, skip: Container[int],
+    ) -> Iterator[PatternHit]:
+        """Yield every member matching at each position, overlaps included.
+
+        The combined regex finds the next position where *some* member
+        matches; every member not in ``skip`` (which may grow while
+        iterating) is tried there, and the search resumes one character
+        later.
+        """
+        same_length = len(text) == len(original)
+        members = list(zip(self.indices, self.members))
+        search = self.combined.search
+        while members:
+            match = search(text, pos)
+            if match is None:
+                return
+            pos = match.start()
+            for index, member in members:
+                if index in skip:
+                    continue
+                hit = member.match(text, pos)
+                if hit is not None:
+                    end = hit.end()
+                    matched = original[pos:end] if same_length else hit.group()
+                    yield PatternHit(index, pos, end, matched)
+            members = [(index, member) for index, member in members if index not in skip]
+            pos += 1
+
+
+class PatternSet:
+    """A fixed list of regexes matched in a single scan.
+
+    A pattern is case-insensitive when ``ignore_case`` is set or when it
+    starts with ``(?i)``.  ``PatternHit.index`` refers to the position in
+    the list passed in.  Matches are leftmost-first and non-overlapping, as
+    with ``re.finditer`` on the equivalent alternation.
+    """
+
+    def __init__(self, patterns: Sequence[str], *, ignore_case: bool = False):
+        self.patterns = list(patterns)
+        folded: list[tuple[int, str]] = []
+        exact: list[tuple[int, str]] = []
+        for index, pattern in enumerate(self.patterns):
+            body, insensitive = _split_flags(pattern)
+            if insensitive or ignore_case:
+                lowered = _fold(body)
+                try:
+                    re.compile(lowered)
+                except re.error:
+                    # Folding broke it (e.g. an upper-case flag letter) --
+                    # fall back to a scoped IGNORECASE on the original text.
+                    exact.append((index, f"(?i:{body})"))
+                else:
+                    folded.append((index, f"(?:{lowered})"))
+            else:
+                exact.append((index, f"(?:{body})"))
+        self._folded = _Pass(folded) if folded else None
+        self._exact = _Pass(exact) if exact else None
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def finditer(
+        self, text: str, pos: int = 0, *, lowered: str | None = None,
+    ) -> Iterator[PatternHit]:
+        """Yield hits in text order (lazily -- stop consuming to stop scanning).
+
+        Scanning starts at ``pos``; as with ``re``, the text before it still
+        counts for lookbehinds and ``\b``.  Callers scanning the same text
+        many times can pass ``lowered`` (``text.lower()``) to save redoing it.
+        """
+        streams = []
+        if self._folded is not None:
+            if lowered is None:
+                lowered = text.lower()
+            streams.append(self._folded.finditer(lowered, text, pos))
+        if self._exact is not None:
+            streams.append(self._exact.finditer(text, text, pos))
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, key=lambda hit: hit.start)
+
+    def each_match(
+        self, text: str, pos: int = 0, skip: Container[int] = (),
+    ) -> Iterator[PatternHit]:
+        """Yield each pattern's matches on its own, in text order.
+
+        Unlike ``finditer``, a pattern overlapping another's match is still
+        found; at a given position every pattern that matches there is
+        yielded (as with ``re.match`` per pattern).  Patterns whose index is
+        in ``skip`` -- which the caller may add to while iterating -- are
+        not tried.
+        """
+        streams = []
+        if self._folded is not None:
+            streams.append(self._folded.each_match(text.lower(), text, pos, skip))
+        if self._exact is not None:
+            streams.append(self._exact.each_match(text, text, pos, skip))
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, key=lambda hit: hit.start)
+
+    def first_hits(self, text: str) -> dict[int, PatternHit]:
+        """First hit for each pattern that matches, keyed by pattern index.
+
+        Each pattern is matched on its own, as ``re.search`` would: a
+        pattern overlapping another's match is still found.  Ordered by
+        position.
+        """
+        hits: dict[int, PatternHit] = {}
+        for hit in self.each_match(text, skip=hits):
+            hits.setdefault(hit.index, hit)
+        return dict(sorted(hits.items(), key=lambda item: (item[1].start, item[0])))
+
+    def search(self, text: str) -> PatternHit | None:
+        return next(iter(self.finditer(text)), None)
+
+
+def _split_flags(pattern: str) -> tuple[str, bool]:
+    """Turn a leading global ``(?flags)`` into a scoped group.
+
+    Global flags are only legal at the start of a regex, so they can't
+    survive being joined into an alternation.  ``i`` is reported separately
+    because it selects the lowercased pass.
+    """
+    match = _LEADING_FLAGS.match(pattern)
+    if not match:
+        return pattern, False
+    flags = match.group(1)
+    body = pattern[match.end():]
+    insensitive = "i" in flags
+    rest = flags.replace("i", "")
+    if rest:
+        body = f"(?{rest}:{body})"
+    return body, insensitive
+
+
+def _fold(pattern: str) -> str:
+    """Lowercase a pattern's literals without touching escape sequences.
+
+    ``\\S`` and ``\\s`` mean different things, so the character after a
+    backslash keeps its case.
+    """
+    out = []
+    escaped = False
+    for ch in pattern:
+        if escaped:
+            out.append(ch)
+            escaped = False
+        elif ch == "\\":
+            out.append(ch)
+            escaped = True
+        else:
+            out.append(ch.lower())
+    return "".join(out)
+
+
+# ---------------------------------------------------------------------------
+# First-character analysis
+# ---------------------------------------------------------------------------
+
+_CATEGORY_CLASSES = {
+    "CATEGORY_DIGIT": "\\d",
+    "CATEGORY_WORD": "\\w",
+    "CATEGORY_SPACE": "\\s",
+}
+_MAX_RANGE = 256
+
+# An atom is ("c", codepoint), ("cat", name) or ("range", lo, hi).
+_Atom = tuple
+
+
+def _group_by_first_chars(
+    members: list[tuple[int, str]],
+) -> list[tuple[str | None, list[tuple[int, str]]]]:
+    """Group patterns whose possible first characters nest.
+
+    A pattern joins an earlier group when one group's start set contains
+    the other's; patterns whose start can't be determined share one
+    unguarded group.  Returns ``(guard, members)`` pairs in order.
+    """
+    groups: list[tuple[frozenset[_Atom] | None, list[tuple[int, str]]]] = []
+    for member in members:
+        first = _first_chars(member[1])
+        for i, (group_set, group) in enumerate(groups):
+            if first is None or group_set is None:
+                if first is None and group_set is None:
+                    group.append(member)
+                    break
+                continue
+            if _covers(group_set, first):
+                group.append(member)
+                break
+            if _covers(first, group_set):
+                group.append(member)
+                groups[i] = (first, group)
+                break
+        else:
+            groups.append((first, [member]))
+    return [(_render_class(first) if first else None, group) for first, group in groups]
+
+
+def _leads_with_char(pattern: str) -> bool:
+    try:
+        parsed = list(_sre_parse.parse(pattern))
+    except re.error:
+        return False
+    return bool(parsed) and str(parsed[0][0]) in ("LITERAL", "IN")
+
+
+def _first_chars(pattern: str) -> frozenset[_Atom] | None:
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except re.error:
+        return None
+    atoms, nullable = _seq_first(list(parsed))
+    if atoms is None or nullable:
+        return None
+    return frozenset(atoms)
+
+
+def _seq_first(items: list) -> tuple[set[_Atom] | None, bool]:
+    """First-character atoms of a parsed sequence, and whether it can match empty."""
+    atoms: set[_Atom] = set()
+    for op, av in items:
+        name = str(op)
+        if name in ("AT", "ASSERT", "ASSERT_NOT"):
+            continue  # zero-width
+        if name == "LITERAL":
+            atoms.add(("c", av))
+            return atoms, False
+        if name == "IN":
+            for item_op, item_av in av:
+                item = str(item_op)
+                if item == "LITERAL":
+                    atoms.add(("c", item_av))
+                elif item == "RANGE":
+                    lo, hi = item_av
+                    if hi - lo <= _MAX_RANGE:
+                        atoms.update(("c", c) for c in range(lo, hi + 1))
+                    else:
+                        atoms.add(("range", lo, hi))
+                elif item == "CATEGORY" and str(item_av) in _CATEGORY_CLASSES:
+                    atoms.add(("cat", str(item_av)))
+                else:
+                    return None, False  # negated or exotic class
+            return atoms, False
+        if name == "SUBPATTERN":
+            _, add_flags, _, sub = av
+            if add_flags & re.IGNORECASE:
+                return None, False
+            inner, nullable = _seq_first(list(sub))
+        elif name == "ATOMIC_GROUP":
+            inner, nullable = _seq_first(list(av))
+        elif name == "BRANCH":
+            inner, nullable = set(), False
+            for branch in av[1]:
+                branch_atoms, branch_nullable = _seq_first(list(branch))
+                if branch_atoms is None:
+                    return None, False
+                inner |= branch_atoms
+                nullable = nullable or branch_nullable
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            low, _, sub = av
+            inner, nullable = _seq_first(list(sub))
+            nullable = nullable or low == 0
+        else:
+            return None, False  # ANY, NOT_LITERAL, backreferences, ...
+        if inner is None:
+            return None, False
+        atoms |= inner
+        if not nullable:
+            return atoms, False
+    return atoms, True
+
+
+def _covers(outer: frozenset[_Atom], inner: frozenset[_Atom]) -> bool:
+    for atom in inner:
+        if atom in outer:
+            continue
+        if atom[0] == "c":
+            ch = chr(atom[1])
+            if ch.isdigit() and ("cat", "CATEGORY_DIGIT") in outer:
+                continue
+            if (ch.isalnum() or ch == "_") and ("cat", "CATEGORY_WORD") in outer:
+                continue
+            if ch.isspace() and ("cat", "CATEGORY_SPACE") in outer:
+                continue
+        if atom == ("cat", "CATEGORY_DIGIT") and ("cat", "CATEGORY_WORD") in outer:
+            continue
+        return False
+    return True
+
+
+def _render_class(atoms: frozenset[_Atom]) -> str:
+    parts = []
+    for atom in sorted(atoms, key=str):
+        if atom[0] == "c":
+            parts.append(re.escape(chr(atom[1])))
+        elif atom[0] == "cat":
+            parts.append(_CATEGORY_CLASSES[atom[1]])
+        else:
+            parts.append(f"{re.escape(chr(atom[1]))}-{re.escape(chr(atom[2]))}")
+    return "[" + "".join(parts) + "]"
@@ -40,6 +40,8 @@ class RetryConfig:
     retryable_exceptions: tuple[Type[Exception], ...] = field(
         default_factory=lambda: (Exception,)
     )
+    # Raised immediately even if also retryable (e.g. an open circuit breaker)
+    give_up_on: tuple[Type[Exception], ...] = ()
 
     def __post_init__(self):
         """Initialize - ensure backward compatibility with old field names."""
@@ -109,6 +111,8 @@ async def async_retry(
                 return await func(*args, **kwargs)
             else:
                 return func(*args, **kwargs)
+        except config.give_up_on:
+            raise
         except config.retryable_exceptions as e:
             last_exception = e
 
@@ -1,10 +1,34 @@
-"""Serialization utilities for JSON and YAML handling."""
+"""Serialization utilities for JSON and YAML handling.
+
+JSON goes through the active codec (``detra.utils.codec``): orjson or
+msgspec when installed, the standard library otherwise.
+"""
 
 import json
 import re
+from collections.abc import Iterator
 from datetime import datetime
 from typing import Any, Optional
 
+from detra.utils import codec
+
+# One match runs from one bracket to the next that matters (group 1), to
+# the quote opening an unterminated string, or to the end of the text.
+# Plain text, whole strings and innermost containers (no brackets inside)
+# are skipped in the regex engine, possessively so that it never
+# backtracks.  Every match starts where the previous one ended.
+_JSON_STRING = r'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+_JSON_FLAT = r'(?:[^"\[\]{}]++|' + _JSON_STRING + r')*+'
+_JSON_TOKEN = re.compile(
+    r'(?:[^"\[\]{}]++|' + _JSON_STRING
+    + r'|\{' + _JSON_FLAT + r'\}|\[' + _JSON_FLAT + r'\])*+(?:([\[\]{}])|"|\Z)',
+    re.DOTALL,
+)
+_JSON_OPENER = re.compile(r"[\[{]")
+_CLOSER = {"[": "]", "{": "}"}
+# Rescans allowed for structures that never close (bounds the cost on junk)
+MAX_JSON_RESCANS = 8
+
 
 def truncate_string(text: str, max_length: int, suffix: str = "...") -> str:
     """
@@ -31,37 +55,38 @@ def safe_json_dumps(obj: Any, **kwargs: Any) -> str:
 
     Args:
         obj: Object to serialize.
-        **kwargs: Additional arguments passed to json.dumps.
+        **kwargs: Additional arguments passed to the codec's ``dumps``
+            (``sort_keys``, ``indent``; anything else uses ``json.dumps``).
 
     Returns:
         JSON string representation.
     """
 
-    def default_serializer(o: Any) -> Any:
-        if isinstance(o, datetime):
-            return o.isoformat()
-        # Try to get string representation for custom objects
-        if hasattr(o, "__str__") and type(o).__str__ is not object.__str__:
-            # Use __str__ if it's been overridden (not the default object.__str__)
-            return str(o)
-        if hasattr(o, "__repr__") and type(o).__repr__ is not object.__repr__:
-            # Use __repr__ if it's been overridden
-            return repr(o)
-        if hasattr(o, "__dict__"):
-            # Try to serialize as dict
-            try:
-                return {k: default_serializer(v) for k, v in o.__dict__.items()}
-            except (TypeError, ValueError):
-                return str(o)
-        return str(o)
-
-    kwargs.setdefault("default", default_serializer)
-    kwargs.setdefault("ensure_ascii", False)
+    kwargs.setdefault("default", _default_serializer)
 
     try:
-        return json.dumps(obj, **kwargs)
+        return codec.dumps(obj, **kwargs)
     except (TypeError, ValueError) as e:
-        return json.dumps({"error": f"Serialization failed: {str(e)}", "type": str(type(obj))})
+        return codec.dumps({"error": f"Serialization failed: {str(e)}", "type": str(type(obj))})
+
+
+def _default_serializer(o: Any) -> Any:
+    if isinstance(o, datetime):
+        return o.isoformat()
+    # Try to get string representation for custom objects
+    if hasattr(o, "__str__") and type(o).__str__ is not object.__str__:
+        # Use __str__ if it's been overridden (not the default object.__str__)
+        return str(o)
+    if hasattr(o, "__repr__") and type(o).__repr__ is not object.__repr__:
+        # Use __repr__ if it's been overridden
+        return repr(o)
+    if hasattr(o, "__dict__"):
+        # Try to serialize as dict
+        try:
+            return {k: _default_serializer(v) for k, v in o.__dict__.items()}
+        except (TypeError, ValueError):
+            return str(o)
+    return str(o)
 
 
 def safe_json_loads(text: str, default: Optional[Any] = None) -> Optional[Any]:
@@ -79,11 +104,55 @@ def safe_json_loads(text: str, default: Optional[Any] = None) -> Optional[Any]:
         return default
 
     try:
-        return json.loads(text)
-    except (json.JSONDecodeError, TypeError):
+        return codec.loads(text)
+    except (ValueError, TypeError):
         return default
 
 
+def iter_json_spans(text: str, start: int = 0) -> Iterator[tuple[int, int]]:
+    """Yield ``(start, end)`` of each complete JSON object or array in ``text``.
+
+    One scan: a regex skips plain text, whole strings (with their
+    escapes) and innermost containers, and the remaining brackets are
+    matched on a stack.  Brackets inside strings are ignored; a stray closer is
+    skipped, and one that matches an outer opener closes it.  A structure
+    that never closes (a truncated response, or a bracket in prose
+    followed by a stray quote) is rescanned from just after its opener,
+    at most ``MAX_JSON_RESCANS`` times.
+    """
+    pos = start
+    rescans = 0
+    while True:
+        match = _JSON_OPENER.search(text, pos)
+        if match is None:
+            return
+        stack = [(match.start(), _CLOSER[match.group()])]
+        for token in _JSON_TOKEN.finditer(text, match.end()):
+            char = token.group(1)
+            if char is None:
+                break  # end of text, or an unterminated string running to it
+            closer = _CLOSER.get(char)
+            if closer is not None:
+                stack.append((token.end() - 1, closer))
+                continue
+            depth = len(stack) - 1
+            while depth >= 0 and stack[depth][1] != char:
+                depth -= 1
+            if depth < 0:
+                continue  # stray closer
+            opened = stack[depth][0]
+            del stack[depth:]
+            if not stack:
+                pos = token.end()
+                yield opened, pos
+                break
+        if stack:
+            rescans += 1
+            if rescans > MAX_JSON_RESCANS:
+                return
+            pos = stack[0][0] + 1
+
+
 def extract_json_from_text(text: str) -> Optional[Any]:
     """
     Extract JSON object or array from text that may contain markdown or other content.
@@ -93,6 +162,13 @@ def extract_json_from_text(text: str) -> Optional[Any]:
     - JSON wrapped in markdown code blocks
     - JSON embedded in other text
 
+    The whole text, a code block's body, and the text from the first
+    bracket to the last are each tried with one parse; otherwise the first
+    complete object or array that parses is returned, found with a single
+    scan (``iter_json_spans``).  A span that fails to parse but holds
+    brackets of its own is rescanned from just after its opener, at most
+    ``MAX_JSON_RESCANS`` times.
+
     Args:
         text: Text potentially containing JSON.
 
@@ -106,61 +182,37 @@ def extract_json_from_text(text: str) -> Optional[Any]:
     if result is not None:
         return result
 
-    # Remove markdown code blocks
-    if text.startswith("```json"):
-        text = text[7:]
-    elif text.startswith("```"):
-        text = text[3:]
-    if text.endswith("```"):
-        text = text[:-3]
-    text = text.strip()
-
-    # Try again after removing markdown
-    result = safe_json_loads(text)
-    if result is not None:
-        return result
-
-    # Try to find JSON array first (simpler pattern)
-    bracket_start = text.find("[")
-    if bracket_start != -1:
-        bracket_count = 0
-        for i, char in enumerate(text[bracket_start:], bracket_start):
-            if char == "[":
-                bracket_count += 1
-            elif char == "]":
-                bracket_count -= 1
-                if bracket_count == 0:
-                    candidate = text[bracket_start : i + 1]
-                    result = safe_json_loads(candidate)
-                    if result is not None:
-                        return result
-                    break
-
-    # Try to find JSON object in text
-    json_pattern = r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}"
-    matches = re.findall(json_pattern, text, re.DOTALL)
-
-    for match in matches:
-        result = safe_json_loads(match)
+    # The body of a code block, wherever it is
+    fence = text.find("```")
+    if fence != -1:
+        body_start = text.find("\n", fence)
+        body_end = text.find("```", fence + 3)
+        if 0 <= body_start < body_end:
+            result = safe_json_loads(text[body_start:body_end])
+            if result is not None:
+                return result
+
+    # JSON after a preamble: first opener to the last matching closer
+    opener = _JSON_OPENER.search(text)
+    if opener is None:
+        return None
+    last = text.rfind(_CLOSER[opener.group()])
+    if last > opener.start():
+        result = safe_json_loads(text[opener.start():last + 1])
         if result is not None:
             return result
 
-    # Try to find nested JSON object with a more permissive pattern
-    brace_start = text.find("{")
-    if brace_start != -1:
-        brace_count = 0
-        for i, char in enumerate(text[brace_start:], brace_start):
-            if char == "{":
-                brace_count += 1
-            elif char == "}":
-                brace_count -= 1
-                if brace_count == 0:
-                    candidate = text[brace_start : i + 1]
-                    result = safe_json_loads(candidate)
-                    if result is not None:
-                        return result
-                    break
-
+    spans = iter_json_spans(text)
+    rescans = 0
+    while (span := next(spans, None)) is not None:
+        start, end = span
+        result = safe_json_loads(text[start:end])
+        if result is not None:
+            return result
+        # Valid JSON may still sit inside a span that doesn't parse
+        if rescans < MAX_JSON_RESCANS and _JSON_OPENER.search(text, start + 1, end - 1):
+            rescans += 1
+            spans = iter_json_spans(text, start + 1)
     return None
 
 
@@ -232,7 +284,7 @@ def serialize_for_logging(
     try:
         # Try to serialize as JSON first
         json_str = safe_json_dumps(obj)
-        parsed = json.loads(json_str)
+        parsed = codec.loads(json_str)
         
         # If it's a dict with error key, it means serialization partially failed
         # Try to preserve the string representation
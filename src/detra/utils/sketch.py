@@ -0,0 +1,255 @@
+"""Mergeable quantile sketches for latency metrics.
+
+``DDSketch`` keeps values in logarithmically sized buckets, so any
+quantile it reports is within ``relative_accuracy`` of the true value
+(1% by default) however many values were added, and two sketches built
+with the same accuracy merge by adding bucket counts.  A latency series
+costs a few hundred buckets instead of a list of every sample, and
+per-interval or per-process sketches can be combined freely.
+
+``SketchSet`` holds one sketch per (metric, tag-set) and answers
+percentile queries over any subset of them.  ``summarize`` turns a
+sketch into the compact per-interval series detra ships in place of
+one point per call.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Sequence
+from typing import Any, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Buckets kept per sign before the lowest are collapsed together; at 1%
+# accuracy 2048 buckets span values over 17 orders of magnitude.
+DEFAULT_MAX_BUCKETS = 2048
+DEFAULT_QUANTILES: tuple[float, ...] = (0.5, 0.95, 0.99)
+
+# Values this close to zero share the zero bucket
+_MIN_INDEXABLE = 1e-9
+
+_SeriesKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+class DDSketch:
+    """Quantile sketch with relative-error guarantees (Masson et al., 2019)."""
+
+    __slots__ = (
+        "relative_accuracy", "max_buckets", "_gamma", "_multiplier",
+        "_positive", "_negative", "zero_count", "count", "sum", "min", "max",
+    )
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+    ):
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self._gamma)
+        self._positive: dict[int, int] = {}
+        self._negative: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        if value > _MIN_INDEXABLE:
+            buckets = self._positive
+            key = math.ceil(math.log(value) * self._multiplier)
+        elif value < -_MIN_INDEXABLE:
+            buckets = self._negative
+            key = math.ceil(math.log(-value) * self._multiplier)
+        else:
+            self.zero_count += 1
+            buckets = None
+        if buckets is not None:
+            buckets[key] = buckets.get(key, 0) + 1
+            if len(buckets) > self.max_buckets:
+                self._collapse(buckets)
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: DDSketch) -> None:
+        """Add ``other``'s values to this sketch; both must share an accuracy."""
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for mine, theirs in ((self._positive, other._positive), (self._negative, other._negative)):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+            if len(mine) > self.max_buckets:
+                self._collapse(mine)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> DDSketch:
+        sketch = DDSketch(self.relative_accuracy, self.max_buckets)
+        sketch.merge(self)
+        return sketch
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def buckets(self) -> int:
+        return len(self._positive) + len(self._negative) + (1 if self.zero_count else 0)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The value at quantile ``q`` (0-1), or None if the sketch is empty."""
+        if not self.count or not 0.0 <= q <= 1.0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Most negative first: the largest magnitudes sit at the highest keys.
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return self._clamp(-self._value(key))
+        seen += self.zero_count
+        if seen > rank:
+            return self._clamp(0.0)
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._clamp(self._value(key))
+        return self.max
+
+    def quantiles(self, qs: Iterable[float]) -> list[Optional[float]]:
+        return [self.quantile(q) for q in qs]
+
+    def _value(self, key: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(key-1), gamma^key]
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def _clamp(self, value: float) -> float:
+        return min(self.max, max(self.min, value))
+
+    def _collapse(self, buckets: dict[int, int]) -> None:
+        # Fold the smallest magnitudes into one bucket, keeping the tail exact.
+        keys = sorted(buckets)
+        excess = keys[:len(keys) - self.max_buckets]
+        floor = keys[len(excess)]
+        buckets[floor] += sum(buckets.pop(key) for key in excess)
+
+
+def quantile_label(q: float) -> str:
+    """``0.5`` -> ``"p50"``, ``0.999`` -> ``"p999"``."""
+    return "p" + f"{q * 100:g}".replace(".", "")
+
+
+def summarize(
+    name: str, sketch: DDSketch, quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> list[tuple[str, str, float]]:
+    """The (metric, type, value) series that stand in for a sketch's interval.
+
+    The metric's own name carries the average, so queries on it keep
+    working; ``.count``, ``.max`` and one ``.pNN`` per quantile come
+    alongside it.
+    """
+    if not sketch.count:
+        return []
+    series = [
+        (name, "gauge", sketch.avg),
+        (f"{name}.count", "count", sketch.count),
+        (f"{name}.max", "gauge", sketch.max),
+    ]
+    for q, value in zip(quantiles, sketch.quantiles(quantiles)):
+        series.append((f"{name}.{quantile_label(q)}", "gauge", value))
+    return series
+
+
+class SketchSet:
+    """One ``DDSketch`` per (metric, tag-set), queryable across tag-sets."""
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_series: Optional[int] = None,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.max_series = max_series
+        self._sketches: dict[_SeriesKey, DDSketch] = {}
+
+    def __len__(self) -> int:
+        return len(self._sketches)
+
+    def new_sketch(self) -> DDSketch:
+        return DDSketch(self.relative_accuracy)
+
+    def add(self, name: str, value: float, tags: dict[str, str] | None = None) -> bool:
+        """Record ``value``; False if this is a new series and the set is full."""
+        sketch = self._series(name, tags)
+        if sketch is None:
+            return False
+        sketch.add(value)
+        return True
+
+    def merge(self, name: str, sketch: DDSketch, tags: dict[str, str] | None = None) -> bool:
+        """Merge a sketch into its series; False if the set is full."""
+        mine = self._series(name, tags)
+        if mine is None:
+            return False
+        mine.merge(sketch)
+        return True
+
+    def query(
+        self, name: str, tags: dict[str, str] | None = None,
+    ) -> Optional[DDSketch]:
+        """All of ``name``'s series whose tags include ``tags``, merged."""
+        wanted = set((tags or {}).items())
+        merged = None
+        for (series_name, series_tags), sketch in self._sketches.items():
+            if series_name != name or not wanted.issubset(series_tags):
+                continue
+            if merged is None:
+                merged = sketch.copy()
+            else:
+                merged.merge(sketch)
+        return merged
+
+    def percentiles(
+        self,
+        name: str,
+        tags: dict[str, str] | None = None,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> dict[str, Any]:
+        """``{"p50": ..., "p95": ..., "p99": ...}`` for ``query(name, tags)``."""
+        return percentiles(self.query(name, tags), quantiles)
+
+    def clear(self) -> None:
+        self._sketches.clear()
+
+    def _series(self, name: str, tags: dict[str, str] | None) -> Optional[DDSketch]:
+        key = (name, tuple(sorted(tags.items())) if tags else ())
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            if self.max_series is not None and len(self._sketches) >= self.max_series:
+                return None
+            sketch = self._sketches[key] = self.new_sketch()
+        return sketch
+
+
+def percentiles(
+    sketch: Optional[DDSketch], quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> dict[str, Any]:
+    """A sketch's quantiles by label, with its count; values are None if empty."""
+    if sketch is None:
+        return {quantile_label(q): None for q in quantiles} | {"count": 0}
+    result: dict[str, Any] = {
+        quantile_label(q): value for q, value in zip(quantiles, sketch.quantiles(quantiles))
+    }
+    result["count"] = sketch.count
+    return result
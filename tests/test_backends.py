@@ -0,0 +1,533 @@
+"""Tests for telemetry backends."""
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from detra.backends.buffered import BufferedBackend
+from detra.backends.dogstatsd import DogStatsDBackend
+from detra.backends.tags import TagPipeline, TagSet, set_tag_pipeline
+from detra.config.schema import OverflowPolicy
+
+
+class RecordingBackend:
+    """Backend that records every protocol call."""
+
+    def __init__(self):
+        self.calls = []
+        self.flushed = 0
+        self.closed = False
+
+    async def emit_gauge(self, name, value, tags=None):
+        self.calls.append(("gauge", name, value, tags))
+
+    async def emit_count(self, name, value, tags=None):
+        self.calls.append(("count", name, value, tags))
+
+    async def emit_distribution(self, name, value, tags=None):
+        self.calls.append(("distribution", name, value, tags))
+
+    async def emit_event(self, title, text, level="info", tags=None):
+        self.calls.append(("event", title, level, tags))
+
+    async def flush(self):
+        self.flushed += 1
+
+    async def close(self):
+        self.closed = True
+
+
+class BatchRecordingBackend(RecordingBackend):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    async def emit_batch(self, metrics):
+        self.batches.append(list(metrics))
+
+
+class TestBufferedBackend:
+    """Tests for BufferedBackend."""
+
+    @pytest.mark.asyncio
+    async def test_counts_are_merged_per_series(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60)
+
+        for _ in range(5):
+            await backend.emit_count("detra.node.calls", 1, {"node": "a"})
+        await backend.emit_count("detra.node.calls", 1, {"node": "b"})
+        assert inner.calls == []
+
+        await backend.flush()
+
+        assert sorted(inner.calls, key=lambda c: c[3]["node"]) == [
+            ("count", "detra.node.calls", 5, {"node": "a"}),
+            ("count", "detra.node.calls", 1, {"node": "b"}),
+        ]
+        assert inner.flushed == 1
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_tag_order_does_not_split_series(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60)
+
+        await backend.emit_count("m", 1, {"a": "1", "b": "2"})
+        await backend.emit_count("m", 1, {"b": "2", "a": "1"})
+
+        assert backend.buffered_series == 1
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_gauge_keeps_last_value_and_distribution_keeps_samples(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60)
+
+        await backend.emit_gauge("g", 1.0)
+        await backend.emit_gauge("g", 3.0)
+        await backend.emit_distribution("d", 10.0)
+        await backend.emit_distribution("d", 20.0)
+        await backend.flush()
+
+        assert ("gauge", "g", 3.0, None) in inner.calls
+        assert [c[2] for c in inner.calls if c[0] == "distribution"] == [10.0, 20.0]
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_emit_batch_gets_one_call_per_flush(self):
+        inner = BatchRecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60)
+
+        await backend.emit_count("c", 1)
+        await backend.emit_distribution("d", 1.0)
+        await backend.emit_distribution("d", 2.0)
+        await backend.flush()
+
+        assert len(inner.batches) == 1
+        by_name = {m.name: m for m in inner.batches[0]}
+        assert by_name["c"].value == 1
+        assert by_name["d"].samples == [1.0, 2.0]
+        assert inner.calls == []
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_distributions_are_sketched_and_queryable(self):
+        inner = BatchRecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60, max_samples_per_series=10)
+
+        for v in range(1, 101):
+            await backend.emit_distribution("lat", float(v), {"node": "a"})
+        await backend.flush()
+        await backend.emit_distribution("lat", 5000.0, {"node": "b"})
+
+        metric = inner.batches[0][0]
+        assert len(metric.samples) == 10
+        assert metric.sketch.count == 100  # batching backends get every value
+        assert backend.dropped_total == 0
+
+        a = backend.percentiles("lat", {"node": "a"})
+        assert a["count"] == 100
+        assert a["p50"] == pytest.approx(50, rel=0.02)
+        assert a["p99"] == pytest.approx(99, rel=0.02)
+        # Pending (unflushed) values count, and tag-sets merge
+        assert backend.percentiles("lat")["count"] == 101
+        assert backend.percentiles("lat")["p99"] == pytest.approx(100, rel=0.02)
+
+        backend.reset_percentiles()
+        assert backend.percentiles("lat", {"node": "a"})["count"] == 0
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_drop_policy_bounds_series_and_reports_drops(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60, max_series=2)
+
+        await backend.emit_count("a", 1)
+        await backend.emit_count("b", 1)
+        await backend.emit_count("c", 1)
+        await backend.emit_count("a", 1)  # existing series still merges
+
+        assert backend.buffered_series == 2
+        assert backend.dropped_total == 1
+
+        await backend.flush()
+        assert ("count", "detra.telemetry.dropped", 1, None) in inner.calls
+        assert ("count", "a", 2, None) in inner.calls
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_flush_policy_ships_inline_when_full(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(
+            inner, flush_interval=60, max_series=1, overflow_policy=OverflowPolicy.FLUSH,
+        )
+
+        await backend.emit_count("a", 1)
+        await backend.emit_count("b", 1)
+
+        assert ("count", "a", 1, None) in inner.calls
+        assert backend.buffered_series == 1
+        assert backend.dropped_total == 0
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_background_flusher_ships_each_interval(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=0.01)
+
+        await backend.emit_count("c", 1)
+        await asyncio.sleep(0.05)
+
+        assert ("count", "c", 1, None) in inner.calls
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_events_are_buffered_and_bounded(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60, max_events=1)
+
+        await backend.emit_event("first", "text", level="error")
+        await backend.emit_event("second", "text")
+        await backend.flush()
+
+        events = [c for c in inner.calls if c[0] == "event"]
+        assert events == [("event", "first", "error", None)]
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_and_closes_inner(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60)
+
+        await backend.emit_count("c", 1)
+        await backend.close()
+
+        assert ("count", "c", 1, None) in inner.calls
+        assert inner.closed
+
+    @pytest.mark.asyncio
+    async def test_records_after_close_are_dropped(self):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60)
+        await backend.close()
+        calls = list(inner.calls)
+
+        await backend.emit_count("late", 1)
+        await backend.emit_event("late", "text")
+        await backend.flush()
+
+        assert inner.calls == calls
+        assert backend.buffered_series == 0 and backend.buffered_events == 0
+        assert backend.dropped_total == 2
+
+    def test_delegates_backend_specific_attributes(self):
+        inner = RecordingBackend()
+        inner.client = object()
+        backend = BufferedBackend(inner)
+
+        assert backend.client is inner.client
+        assert backend.inner is inner
+
+
+class TestDatadogSummaries:
+    """Buffered distributions reach Datadog as sketch summaries."""
+
+    @pytest.mark.asyncio
+    async def test_client_adapter_ships_summary_series(self, mock_datadog_client):
+        from detra.decorators.trace import _DatadogClientBackend
+
+        backend = BufferedBackend(_DatadogClientBackend(mock_datadog_client), flush_interval=60)
+        for v in range(1, 1001):
+            await backend.emit_distribution("detra.node.latency_ms", float(v), {"node": "a"})
+        await backend.flush()
+
+        series = mock_datadog_client.submit_metrics.await_args.args[0]
+        by_name = {s["metric"]: s for s in series}
+        assert sorted(by_name) == [
+            "detra.node.latency_ms",
+            "detra.node.latency_ms.count",
+            "detra.node.latency_ms.max",
+            "detra.node.latency_ms.p50",
+            "detra.node.latency_ms.p95",
+            "detra.node.latency_ms.p99",
+        ]
+        assert all(len(s["points"]) == 1 for s in series)
+        assert by_name["detra.node.latency_ms.count"]["type"] == "count"
+        assert by_name["detra.node.latency_ms.count"]["points"][0][1] == 1000
+        assert by_name["detra.node.latency_ms.p95"]["points"][0][1] == pytest.approx(950, rel=0.02)
+        assert by_name["detra.node.latency_ms"]["tags"] == ["node:a"]
+        await backend.close()
+
+    def test_unsketched_distributions_ship_their_samples(self):
+        from detra.backends.buffered import BufferedMetric
+        from detra.backends.datadog import datadog_series
+
+        metric = BufferedMetric("distribution", "lat", None, samples=[1.0, 2.0], timestamp=5.0)
+        assert datadog_series(metric, ["env:test"]) == [{
+            "metric": "lat",
+            "type": "gauge",
+            "points": [[5.0, 1.0], [5.0, 2.0]],
+            "tags": ["env:test"],
+        }]
+
+
+@pytest.fixture
+def udp_listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1.0)
+    yield sock
+    sock.close()
+
+
+def receive(sock) -> list[bytes]:
+    """Every datagram waiting on ``sock``."""
+    packets = [sock.recv(65536)]
+    sock.settimeout(0.05)
+    try:
+        while True:
+            packets.append(sock.recv(65536))
+    except TimeoutError:
+        return packets
+
+
+class TestDogStatsDBackend:
+    """DogStatsD line protocol over a local datagram socket."""
+
+    @pytest.mark.asyncio
+    async def test_metrics_and_event_lines(self, udp_listener):
+        backend = DogStatsDBackend(
+            *udp_listener.getsockname(), namespace="app", constant_tags=["env:test"],
+        )
+
+        await backend.emit_gauge("detra.eval.score", 0.5, {"node": "a"})
+        await backend.emit_count("detra.node.calls", 1, {"node": "a", "status": "ok|x"})
+        await backend.emit_distribution("detra.node.latency_ms", 12.25)
+        await backend.emit_event("Flagged: a", "score 0.2\nreason", level="critical")
+        await backend.flush()
+
+        assert receive(udp_listener) == [b"\n".join([
+            b"app.detra.eval.score:0.5|g|#env:test,node:a",
+            b"app.detra.node.calls:1|c|#env:test,node:a,status:ok_x",
+            b"app.detra.node.latency_ms:12.25|d|#env:test",
+            b"_e{10,17}:Flagged: a|score 0.2\\nreason|t:error|#env:test",
+        ])]
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_packs_datagrams_up_to_max_size_once_per_loop_turn(self, udp_listener):
+        backend = DogStatsDBackend(*udp_listener.getsockname(), max_packet_bytes=512)
+
+        for i in range(200):
+            await backend.emit_distribution("latency", float(i), {"node": "a"})
+        assert backend.packets_sent < 200  # full datagrams went out as they filled
+        await asyncio.sleep(0)  # the rest goes at the end of the loop iteration
+
+        packets = receive(udp_listener)
+        lines = [line for packet in packets for line in packet.split(b"\n")]
+        assert len(lines) == 200
+        assert all(len(p) <= 512 for p in packets)
+        assert len(packets) == backend.packets_sent < 20
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_unix_socket(self, tmp_path):
+        path = str(tmp_path / "dsd.socket")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        server.bind(path)
+        server.settimeout(1.0)
+        backend = DogStatsDBackend(socket_path=path)
+
+        await backend.emit_count("c", 3)
+        await backend.flush()
+
+        assert server.recv(8192) == b"c:3|c"
+        assert backend.max_packet_bytes == 8192
+        await backend.close()
+        server.close()
+
+    @pytest.mark.asyncio
+    async def test_send_failures_never_raise(self, tmp_path):
+        backend = DogStatsDBackend(socket_path=str(tmp_path / "missing.socket"))
+
+        await backend.emit_gauge("g", 1.0)
+        await backend.emit_gauge("g", float("nan"))  # not encodable, skipped
+        await backend.flush()
+
+        assert backend.dropped_packets == 1
+        await backend.close()
+
+
+@pytest.fixture
+def otel_metrics():
+    """An OTelBackend on its own meter provider, and a reader for what it exports."""
+    sdk_metrics = pytest.importorskip("opentelemetry.sdk.metrics")
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+    from detra.backends.otel import OTelBackend
+
+    reader = InMemoryMetricReader()
+    provider = sdk_metrics.MeterProvider(metric_readers=[reader])
+    backend = OTelBackend("app", max_series_per_metric=2, meter_provider=provider)
+
+    def collect() -> dict[str, list]:
+        data = reader.get_metrics_data()
+        return {
+            metric.name: list(metric.data.data_points)
+            for resource in data.resource_metrics
+            for scope in resource.scope_metrics
+            for metric in scope.metrics
+        }
+
+    yield backend, collect
+    provider.shutdown()
+
+
+class TestOTelBackend:
+    """Gauges, cardinality limits and drop accounting in the OpenTelemetry backend."""
+
+    @pytest.mark.asyncio
+    async def test_gauge_reports_last_value_per_series(self, otel_metrics):
+        backend, collect = otel_metrics
+
+        await backend.emit_gauge("detra.eval.score", 0.2, {"node": "a", "env": "x"})
+        await backend.emit_gauge("detra.eval.score", 0.9, {"env": "x", "node": "a"})
+        await backend.emit_gauge("detra.eval.score", 0.5, {"node": "b"})
+
+        points = collect()["detra.eval.score"]
+        assert sorted((dict(p.attributes).get("node"), p.value) for p in points) == [
+            ("a", 0.9), ("b", 0.5),
+        ]
+        assert backend.series_count("detra.eval.score") == 2
+
+    @pytest.mark.asyncio
+    async def test_overflow_folds_into_other_series(self, otel_metrics):
+        backend, collect = otel_metrics
+
+        for user in ("u1", "u2", "u3", "u4"):
+            await backend.emit_count("requests", 1, {"user": user})
+            await backend.emit_distribution("latency", 10.0, {"user": user})
+
+        data = collect()
+        counts = {p.attributes["user"]: p.value for p in data["requests"]}
+        assert counts == {"u1": 1, "u2": 1, "__other__": 2}
+        assert backend.series_count("requests") == 2
+        overflow = {p.attributes["metric"]: p.value
+                    for p in data["detra.telemetry.cardinality_overflow"]}
+        assert overflow == {"requests": 2, "latency": 2}
+        assert backend.overflow_total == 4
+
+    @pytest.mark.asyncio
+    async def test_unrecordable_measurements_are_counted_not_raised(self, otel_metrics):
+        backend, collect = otel_metrics
+
+        await backend.emit_count("not a valid name!", 1)
+        await backend.emit_gauge("g", float("nan"))
+
+        dropped = {(p.attributes["metric"], p.attributes["reason"]): p.value
+                   for p in collect()["detra.telemetry.dropped"]}
+        assert dropped == {("not a valid name!", "instrument"): 1, ("g", "value"): 1}
+        assert backend.dropped_total == 2
+
+
+@pytest.fixture
+def pipeline():
+    """A small TagPipeline installed for every backend, restored afterwards."""
+    pipeline = set_tag_pipeline(TagPipeline(
+        max_tag_values=2,
+        allowlist={"detra.node.calls": ["node", "status"]},
+        node_tags={"extract": ["team:search", "beta"]},
+    ))
+    yield pipeline
+    set_tag_pipeline(None)
+
+
+class TestTagPipeline:
+    """Interning, allow-lists and value limits shared by all backends."""
+
+    def test_interned_sets_are_shared_and_immutable(self, pipeline):
+        tags = pipeline.intern({"b": "2", "a": "1"})
+        assert tags is pipeline.intern({"a": "1", "b": "2"})
+        assert tags == {"a": "1", "b": "2"}
+        assert tags.pairs == ("a:1", "b:2")
+        with pytest.raises(TypeError):
+            tags["c"] = "3"
+        assert pipeline.with_tags(tags, c="3") == {"a": "1", "b": "2", "c": "3"}
+
+    def test_node_tags_include_configured_tags(self, pipeline):
+        tags = pipeline.node_tags("extract", "llm", "error")
+        assert tags is pipeline.node_tags("extract", "llm", "error")
+        assert tags.pairs == (
+            "beta", "node:extract", "span_kind:llm", "status:error", "team:search",
+        )
+
+    def test_values_past_the_limit_fold_into_other(self, pipeline):
+        guarded = [pipeline.guard("m", {"user": f"u{i}", "node": "a"}) for i in range(4)]
+        assert [t["user"] for t in guarded] == ["u0", "u1", "__other__", "__other__"]
+        assert guarded[0] is pipeline.guard("m", {"node": "a", "user": "u0"})
+        assert pipeline.guard("other_metric", {"user": "u3"})["user"] == "u3"
+        assert pipeline.take_folded() == {"m": 2}
+        assert pipeline.take_folded() == {}
+        assert pipeline.stats()["m"] == {
+            "tags": {"node": 1, "user": 2}, "folded": 2, "dropped_tags": 0,
+        }
+
+    def test_allowlist_drops_other_keys(self, pipeline):
+        tags = pipeline.guard("detra.node.calls", {"node": "a", "request_id": "r1"})
+        assert tags == {"node": "a"}
+        assert pipeline.guard("detra.node.calls", {"request_id": "r2"}) is None
+        assert pipeline.stats()["detra.node.calls"]["dropped_tags"] == 2
+
+    def test_guarding_is_idempotent(self, pipeline):
+        guarded = [pipeline.guard("m", {"user": f"u{i}"}) for i in range(3)]
+        pipeline.take_folded()
+        assert [pipeline.guard("m", tags) for tags in guarded] == guarded
+        assert pipeline.take_folded() == {}
+
+    def test_concurrent_guards_keep_the_value_limit(self):
+        pipeline = TagPipeline(max_tag_values=100)
+
+        def emit(worker):
+            for i in range(1_000):
+                pipeline.guard("m", {"user": f"{worker}-{i}"})
+
+        threads = [threading.Thread(target=emit, args=(w,)) for w in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert pipeline.stats()["m"] == {"tags": {"user": 100}, "folded": 7_900, "dropped_tags": 0}
+
+    @pytest.mark.asyncio
+    async def test_datadog_batches_are_folded_once(self, pipeline, mock_datadog_client):
+        from detra.decorators.trace import _DatadogClientBackend
+
+        backend = BufferedBackend(_DatadogClientBackend(mock_datadog_client), flush_interval=60)
+        for i in range(5):
+            await backend.emit_count("requests", 1, {"request_id": f"r{i}"})
+        await backend.flush()
+
+        series = mock_datadog_client.submit_metrics.await_args.args[0]
+        folded = [s for s in series if s["metric"] == "detra.telemetry.tags.folded"]
+        assert [s["points"][0][1] for s in folded] == [3]
+        assert pipeline.stats()["requests"]["folded"] == 3
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_backends_share_the_guard(self, pipeline):
+        inner = RecordingBackend()
+        backend = BufferedBackend(inner, flush_interval=60)
+
+        for i in range(5):
+            await backend.emit_count("requests", 1, {"request_id": f"r{i}"})
+        await backend.flush()
+
+        counts = {c[3]["request_id"]: c[2] for c in inner.calls if c[1] == "requests"}
+        assert counts == {"r0": 1, "r1": 1, "__other__": 3}
+        assert all(type(c[3]) is TagSet for c in inner.calls)
+        assert ("count", "detra.telemetry.tags.folded", 3, {"metric": "requests"}) in inner.calls
+        await backend.close()
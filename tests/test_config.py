@@ -12,6 +12,7 @@ from detra.config.schema import (
     AlertConfig,
     BackendType,
     DatadogConfig,
+    DogStatsDConfig,
     Environment,
     GeminiConfig,
     NodeConfig,
@@ -118,6 +119,25 @@ class TestDatadogConfig:
         assert config.site == "datadoghq.com"
 
 
+class TestDogStatsDConfig:
+    """Tests for DogStatsDConfig schema."""
+
+    def test_agent_address_from_environment(self):
+        """Test the standard DD_* variables fill in the agent address."""
+        env = {"DD_AGENT_HOST": "10.0.0.7", "DD_DOGSTATSD_SOCKET": "/var/run/dsd.socket"}
+        with patch.dict(os.environ, env):
+            config = DogStatsDConfig()
+            explicit = DogStatsDConfig(host="statsd", socket_path="/tmp/s")
+        assert (config.host, config.socket_path) == ("10.0.0.7", "/var/run/dsd.socket")
+        assert (explicit.host, explicit.socket_path) == ("statsd", "/tmp/s")
+
+    def test_dogstatsd_backend_type(self):
+        """Test the dogstatsd backend can be selected."""
+        config = detraConfig(app_name="app", backend="dogstatsd")
+        assert config.backend == BackendType.DOGSTATSD
+        assert config.dogstatsd.port == 8125
+
+
 class TestGeminiConfig:
     """Tests for GeminiConfig schema."""
 
@@ -1,12 +1,30 @@
 """Tests for trace decorator behavior."""
 
 import asyncio
+import threading
+import time
 
 import pytest
 
 from detra.config.loader import set_config
 from detra.config.schema import DetraConfig, NodeConfig, SamplingConfig
-from detra.decorators.trace import set_backend, set_evaluation_engine, set_sampling_config, trace
+from detra.decorators.context import (
+    get_trace_id,
+    parse_traceparent,
+    sampling_value,
+    trace_context,
+    trace_id_from_headers,
+)
+from detra.decorators.loop import get_background_loop
+from detra.decorators.postprocess import PostProcessor
+from detra.decorators.sampling import AdaptiveSampler
+from detra.decorators.trace import (
+    set_backend,
+    set_evaluation_engine,
+    set_post_processor,
+    set_sampling_config,
+    trace,
+)
 from detra.judges.base import EvaluationResult
 
 
@@ -104,5 +122,610 @@ async def test_sync_function_in_running_loop_still_runs_guardrails():
         return "sync-output"
 
     assert fn() == "sync-output"
-    await asyncio.sleep(0)
+    await get_background_loop().drain()
     assert engine.outputs == ["sync-output"]
+
+
+class ThreadRecordingEngine(RecordingEngine):
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    async def evaluate(self, node_config, input_data, output_data, context=None):
+        self.threads.append(threading.current_thread().name)
+        return await super().evaluate(node_config, input_data, output_data, context)
+
+
+@pytest.mark.asyncio
+async def test_node_name_is_passed_to_engines_that_accept_it():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    names = []
+
+    class NamedEngine(RecordingEngine):
+        async def evaluate(self, node_config, input_data, output_data, node_name=None):
+            names.append(node_name)
+            return await super().evaluate(node_config, input_data, output_data)
+
+    set_evaluation_engine(NamedEngine())
+    set_backend(FailingBackend())
+
+    @trace("n")
+    async def fn():
+        return "out"
+
+    await fn()
+    assert names == ["n"]
+
+
+def test_sync_function_without_loop_evaluates_on_background_loop():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = ThreadRecordingEngine()
+    set_evaluation_engine(engine)
+    set_backend(FailingBackend())
+
+    @trace("n")
+    def fn(x):
+        return x * 2
+
+    assert fn(1) == 2
+    assert fn(2) == 4
+    # Evaluated before returning, on one shared loop rather than a loop per call.
+    assert engine.outputs == ["2", "4"]
+    assert engine.threads == ["detra-loop", "detra-loop"]
+
+
+@pytest.mark.asyncio
+async def test_sync_function_evaluates_while_caller_loop_is_blocked():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = RecordingEngine()
+    set_evaluation_engine(engine)
+    set_backend(FailingBackend())
+
+    @trace("n")
+    def fn():
+        return "sync-output"
+
+    assert fn() == "sync-output"
+    deadline = time.monotonic() + 2
+    while not engine.outputs and time.monotonic() < deadline:
+        time.sleep(0.005)  # keep the caller's loop blocked
+    assert engine.outputs == ["sync-output"]
+
+
+class BlockingEngine:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.outputs = []
+
+    async def evaluate(self, node_config, input_data, output_data, context=None):
+        await self.release.wait()
+        self.outputs.append(output_data)
+        return EvaluationResult(score=1.0, flagged=False)
+
+
+class CountingBackend(FailingBackend):
+    def __init__(self):
+        self.counts = []
+
+    async def emit_distribution(self, name, value, tags=None):
+        return None
+
+    async def emit_count(self, name, value, tags=None):
+        self.counts.append(name)
+
+    async def emit_gauge(self, name, value, tags=None):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_async_post_processing_returns_before_evaluation():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = BlockingEngine()
+    processor = PostProcessor(workers=1, max_queue_depth=10)
+    set_evaluation_engine(engine)
+    set_backend(CountingBackend())
+    set_post_processor(processor)
+    try:
+        @trace("n")
+        async def fn():
+            return "out"
+
+        assert await asyncio.wait_for(fn(), timeout=1) == "out"
+        assert engine.outputs == []
+
+        engine.release.set()
+        await processor.drain()
+        assert engine.outputs == ["out"]
+    finally:
+        set_post_processor(None)
+        await processor.close()
+
+
+@pytest.mark.asyncio
+async def test_async_post_processing_sheds_when_queue_is_full():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = BlockingEngine()
+    backend = CountingBackend()
+    processor = PostProcessor(workers=1, max_queue_depth=1)
+    set_evaluation_engine(engine)
+    set_backend(backend)
+    set_post_processor(processor)
+    try:
+        @trace("n")
+        async def fn():
+            return "out"
+
+        for _ in range(4):
+            await fn()
+            await asyncio.sleep(0)
+
+        assert processor.shed >= 2
+        assert "detra.postprocess.shed" in backend.counts
+        # Shed calls still count towards traffic metrics.
+        assert backend.counts.count("detra.node.calls") == processor.shed
+
+        engine.release.set()
+        await processor.drain()
+        assert len(engine.outputs) == processor.submitted
+    finally:
+        set_post_processor(None)
+        await processor.close()
+
+
+@pytest.mark.asyncio
+async def test_shedding_is_reported_to_callers_on_other_loops():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    backend = CountingBackend()
+    processor = PostProcessor(workers=1, max_queue_depth=1)
+    set_evaluation_engine(RecordingEngine())
+    set_backend(backend)
+    set_post_processor(processor)
+    gate = threading.Event()
+
+    async def occupy_worker():
+        # Binds the pool to the background loop, as a sync caller would.
+        assert processor.submit(asyncio.to_thread(gate.wait, 5))
+
+    try:
+        get_background_loop().submit(occupy_worker()).result(timeout=1)
+        deadline = time.monotonic() + 1
+        while processor.queue_depth and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+        @trace("n")
+        async def fn():
+            return "out"
+
+        for _ in range(3):
+            await fn()
+
+        assert processor.shed == 2
+        assert backend.counts.count("detra.postprocess.shed") == 2
+        assert backend.counts.count("detra.node.calls") == 2
+    finally:
+        gate.set()
+        set_post_processor(None)
+        await processor.close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sampler_uses_per_node_rate_over_global_rate():
+    sampler = AdaptiveSampler(SamplingConfig(rate=0.7), rng=lambda: 0.5)
+    assert sampler.decide("global", NodeConfig(), 10.0).sampled
+    decision = sampler.decide("quiet", NodeConfig(sample_rate=0.3), 10.0)
+    assert not decision.sampled
+    assert decision.rate == 0.3
+
+
+def test_sampler_tracks_target_evals_per_second():
+    clock = FakeClock()
+    sampler = AdaptiveSampler(SamplingConfig(rate=0.1), clock=clock, rng=lambda: 0.5)
+    busy = NodeConfig(target_evals_per_second=2.0)
+    for _ in range(2_000):
+        clock.now += 0.01  # 100 calls/sec
+        decision = sampler.decide("busy", busy, 10.0)
+    assert decision.reason == "target"
+    assert 0.015 < decision.rate < 0.025
+
+    clock.now += 60
+    quiet = sampler.decide("quiet", NodeConfig(target_evals_per_second=2.0), 10.0)
+    assert quiet.rate == 1.0 and quiet.sampled
+
+
+def test_sampler_boosts_latency_outliers_and_recent_signals():
+    clock = FakeClock()
+    sampler = AdaptiveSampler(
+        SamplingConfig(rate=0.0, boost_seconds=30), clock=clock, rng=lambda: 0.5,
+    )
+    node = NodeConfig()
+    for i in range(50):
+        assert not sampler.decide("n", node, 100.0 + i % 5).sampled
+    outlier = sampler.decide("n", node, 2_000.0)
+    assert outlier.sampled and outlier.reason == "outlier"
+
+    sampler.record_signal("n")
+    assert sampler.decide("n", node, 100.0).reason == "boost"
+    clock.now += 31
+    assert not sampler.decide("n", node, 100.0).sampled
+
+
+class QuickCheckEngine(RecordingEngine):
+    async def quick_check(self, output_data, node_config=None):
+        failed = not output_data
+        return {"passed": not failed, "critical_failure": failed}
+
+
+class GaugeBackend(CountingBackend):
+    def __init__(self):
+        super().__init__()
+        self.gauges = []
+
+    async def emit_gauge(self, name, value, tags=None):
+        self.gauges.append((name, value, tags))
+
+
+@pytest.mark.asyncio
+async def test_unsampled_errors_are_still_evaluated_and_rate_is_reported():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig(sample_rate=0.0)}))
+    engine = QuickCheckEngine()
+    backend = GaugeBackend()
+    set_evaluation_engine(engine)
+    set_backend(backend)
+
+    @trace("n")
+    async def fn(out):
+        return out
+
+    await fn("fine")
+    await fn("")
+
+    assert engine.outputs == [""]
+    rates = [(v, t["reason"]) for n, v, t in backend.gauges if n == "detra.eval.sample_rate"]
+    assert rates == [(1.0, "forced")]
+
+
+@pytest.mark.asyncio
+async def test_unsampled_none_and_empty_containers_are_not_forced():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig(sample_rate=0.0)}))
+    engine = QuickCheckEngine()
+    set_evaluation_engine(engine)
+    set_backend(FailingBackend())
+
+    @trace("n")
+    async def fn(out):
+        return out
+
+    for out in (None, None, [], {}):
+        await fn(out)
+    assert engine.outputs == []
+
+
+class ErrorTextEngine(RecordingEngine):
+    def __init__(self):
+        super().__init__()
+        self.prechecked = []
+
+    async def quick_check(self, output_data, node_config=None):
+        self.prechecked.append(output_data)
+        failed = output_data.startswith("Error")
+        return {"passed": not failed, "critical_failure": failed}
+
+
+@pytest.mark.asyncio
+async def test_unsampled_outputs_are_rule_checked_only_when_opted_in():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig(sample_rate=0.0)}))
+    engine = ErrorTextEngine()
+    set_evaluation_engine(engine)
+    set_backend(FailingBackend())
+    captured = []
+
+    def extract(output):
+        captured.append(output)
+        return output
+
+    @trace("n", output_extractor=extract)
+    async def fn(out):
+        return out
+
+    try:
+        await fn("Error: upstream failed")
+        assert engine.prechecked == [] and captured == []
+
+        set_sampling_config(SamplingConfig(precheck_rules=True))
+        await fn("fine")
+        await fn("Error: upstream failed")
+        assert engine.prechecked == ["fine", "Error: upstream failed"]
+        assert engine.outputs == ["Error: upstream failed"]
+    finally:
+        set_sampling_config(SamplingConfig())
+
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def test_trace_id_from_w3c_headers():
+    assert trace_id_from_headers({"Traceparent": TRACEPARENT}) == (
+        "4bf92f3577b34da6a3ce929d0e0e4736"
+    )
+    headers = {"traceparent": TRACEPARENT, "tracestate": "congo=t61rcWkgMzE, detra=req-42"}
+    assert trace_id_from_headers(headers) == "req-42"
+    assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert parse_traceparent("garbage") is None
+
+
+def test_trace_id_sampling_agrees_across_samplers():
+    config = SamplingConfig(rate=0.3)
+    services = [AdaptiveSampler(config), AdaptiveSampler(config)]
+    keys = [f"req-{i}" for i in range(500)]
+    decisions = [
+        [s.decide("n", NodeConfig(), 10.0, key=k).sampled for k in keys] for s in services
+    ]
+    assert decisions[0] == decisions[1]
+    assert 100 < sum(decisions[0]) < 200
+    # A lower-rate node evaluates a subset of what a higher-rate node does.
+    low = AdaptiveSampler(SamplingConfig(rate=0.1))
+    for key, sampled in zip(keys, decisions[0]):
+        if low.decide("m", NodeConfig(), 10.0, key=key).sampled:
+            assert sampled
+    assert sampling_value("req-1") == sampling_value("req-1")
+
+
+@pytest.mark.asyncio
+async def test_trace_key_extractor_scopes_nested_calls():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    set_evaluation_engine(None)
+    set_backend(FailingBackend())
+    seen = []
+
+    @trace("inner")
+    async def inner():
+        seen.append(get_trace_id())
+
+    @trace("outer", trace_key_extractor=lambda args, kwargs: kwargs.get("request_id"))
+    async def outer(request_id):
+        await inner()
+
+    await outer(request_id="req-7")
+    with trace_context(headers={"traceparent": TRACEPARENT}):
+        await outer(request_id="req-8")  # an existing trace ID wins
+    assert seen == ["req-7", "4bf92f3577b34da6a3ce929d0e0e4736"]
+    assert get_trace_id() is None
+
+
+class DistributionBackend(CountingBackend):
+    def __init__(self):
+        super().__init__()
+        self.distributions = {}
+
+    async def emit_distribution(self, name, value, tags=None):
+        self.distributions[name] = value
+
+
+@pytest.mark.asyncio
+async def test_async_generator_is_evaluated_once_stream_completes():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = RecordingEngine()
+    backend = DistributionBackend()
+    set_evaluation_engine(engine)
+    set_backend(backend)
+
+    @trace("n")
+    async def fn():
+        for part in ("Hel", "lo ", "world"):
+            await asyncio.sleep(0.001)
+            yield part
+
+    chunks = []
+    async for chunk in fn():
+        assert engine.outputs == []
+        chunks.append(chunk)
+
+    assert chunks == ["Hel", "lo ", "world"]
+    assert engine.outputs == ["Hello world"]
+    assert backend.counts.count("detra.node.calls") == 1
+    assert {
+        "detra.node.latency_ms", "detra.stream.ttfc_ms",
+        "detra.stream.inter_chunk_ms", "detra.stream.tokens_per_second",
+    } <= set(backend.distributions)
+    assert backend.distributions["detra.node.latency_ms"] >= 3
+
+
+@pytest.mark.asyncio
+async def test_returned_stream_is_proxied_and_early_close_skips_evaluation():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = RecordingEngine()
+    backend = CountingBackend()
+    set_evaluation_engine(engine)
+    set_backend(backend)
+
+    class Delta:
+        def __init__(self, content):
+            self.choices = [type("Choice", (), {"delta": type("D", (), {"content": content})})]
+
+    async def provider_stream():
+        for word in ("a", "b", "c"):
+            yield Delta(word)
+
+    @trace("n")
+    async def fn():
+        return provider_stream()
+
+    stream = await fn()
+    assert [c.choices[0].delta.content async for c in stream] == ["a", "b", "c"]
+    assert engine.outputs == ["abc"]
+
+    stream = await fn()
+    await stream.__anext__()
+    await stream.aclose()
+    assert engine.outputs == ["abc"]
+    assert backend.counts.count("detra.node.calls") == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_generator_streams_and_records_errors():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = RecordingEngine()
+    set_evaluation_engine(engine)
+    set_backend(CountingBackend())
+
+    @trace("n")
+    def fn(fail=False):
+        yield "x"
+        if fail:
+            raise ValueError("stream broke")
+        yield "y"
+
+    assert list(fn()) == ["x", "y"]
+    with pytest.raises(ValueError):
+        list(fn(fail=True))
+    await get_background_loop().drain()
+    assert engine.outputs == ["xy"]
+
+
+@pytest.mark.asyncio
+async def test_stream_guard_redacts_and_aborts_streams():
+    from detra.security.incremental import IncrementalPIIScanner, StreamAbortedError, StreamGuard
+
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = RecordingEngine()
+    backend = CountingBackend()
+    set_evaluation_engine(engine)
+    set_backend(backend)
+
+    @trace("n", stream_guard=lambda: StreamGuard([IncrementalPIIScanner()], redact=True))
+    async def redacted():
+        for part in ("mail al", "ice@exam", "ple.com ", "now"):
+            yield part
+
+    assert "".join([c async for c in redacted()]) == "mail [REDACTED] now"
+    assert engine.outputs == ["mail alice@example.com now"]
+    assert backend.counts.count("detra.stream.redactions") == 1
+
+    produced = []
+
+    @trace("n", stream_guard=lambda: StreamGuard(abort_severity="critical"))
+    def aborted():
+        for part in ("SSN 123-", "45-6789 ", "x" * 200, "never"):
+            produced.append(part)
+            yield part
+
+    with pytest.raises(StreamAbortedError) as info:
+        list(aborted())
+    assert info.value.findings[0]["type"] == "ssn"
+    assert "never" not in produced
+    await get_background_loop().drain()
+    assert engine.outputs == ["mail alice@example.com now"]
+    assert backend.counts.count("detra.stream.aborted") == 1
+
+
+def test_only_generators_and_provider_streams_are_proxied_by_default(tmp_path):
+    from detra.decorators.streaming import SyncStreamProxy
+
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    set_evaluation_engine(RecordingEngine())
+    set_backend(CountingBackend())
+    path = tmp_path / "rows.txt"
+    path.write_text("a\nb\n")
+
+    @trace("n")
+    def open_rows():
+        return open(path)
+
+    with open_rows() as rows:
+        assert list(rows) == ["a\n", "b\n"]
+
+    class Rows:
+        def __init__(self):
+            self.items = iter(["a", "b"])
+            self.closed = False
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            return next(self.items)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            self.closed = True
+
+    @trace("n", stream=True)
+    def streamed_rows():
+        return Rows()
+
+    proxy = streamed_rows()
+    assert isinstance(proxy, SyncStreamProxy)
+    with proxy as rows:
+        assert rows is proxy
+        assert list(rows) == ["a", "b"]
+    assert proxy._source.closed
+
+
+@pytest.mark.asyncio
+async def test_input_capture_is_deferred_until_the_call_is_evaluated():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    engine = RecordingEngine()
+    set_evaluation_engine(engine)
+    set_backend(CountingBackend())
+    extracted = []
+
+    def extractor(args, kwargs):
+        extracted.append(args)
+        return "input"
+
+    @trace("n", input_extractor=extractor)
+    async def fn(doc):
+        return "ok"
+
+    set_sampling_config(SamplingConfig(
+        rate=0.0, always_sample_errors=False, always_sample_flagged=False,
+    ))
+    try:
+        assert await fn("doc") == "ok"
+        assert extracted == [] and engine.outputs == []
+    finally:
+        set_sampling_config(SamplingConfig(rate=1.0))
+    assert await fn("doc") == "ok"
+    assert extracted == [("doc",)] and engine.outputs == ["ok"]
+
+
+@pytest.mark.asyncio
+async def test_input_capture_is_bounded_and_can_name_parameters():
+    set_config(DetraConfig(app_name="test", nodes={"n": NodeConfig()}))
+    inputs = []
+
+    class InputEngine(RecordingEngine):
+        async def evaluate(self, node_config, input_data, output_data):
+            inputs.append(input_data)
+            return await super().evaluate(node_config, input_data, output_data)
+
+    set_evaluation_engine(InputEngine())
+    set_backend(CountingBackend())
+
+    @trace("n", max_input_chars=100)
+    async def summarize(document, style="short"):
+        return "summary"
+
+    @trace("n", capture_params=["query", "top_k"])
+    def search(index, query, *, top_k=5):
+        return "results"
+
+    await summarize("x" * 500_000, style="long")
+    assert len(inputs[0]) <= 100 + len("...[truncated]")
+    assert inputs[0].startswith("('xxx") and inputs[0].endswith("...[truncated]")
+
+    assert search(object(), "llm guardrails") == "results"
+    await get_background_loop().drain()
+    assert inputs[1] == "{'query': 'llm guardrails', 'top_k': 5}"
+
+    with pytest.raises(ValueError):
+        trace("n", capture_params=["missing"])(summarize)
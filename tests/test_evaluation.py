@@ -1,12 +1,21 @@
 """Tests for the evaluation module."""
 
+import asyncio
 import json
+import random
+import threading
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from detra.config.schema import NodeConfig, SecurityConfig
+from detra.config.schema import (
+    HedgeConfig,
+    JudgeBudgetConfig,
+    NodeConfig,
+    ProviderControlConfig,
+    SecurityConfig,
+)
 from detra.evaluation.prompts import (
     BEHAVIOR_CHECK_PROMPT,
     BATCH_BEHAVIOR_CHECK_PROMPT,
@@ -14,6 +23,7 @@ from detra.evaluation.prompts import (
     SECURITY_CHECK_PROMPT,
 )
 from detra.evaluation.rules import (
+    IncrementalRuleChecker,
     RuleBasedChecker,
     RuleEvaluationResult,
     RuleCheckResult,
@@ -29,6 +39,19 @@ from detra.evaluation.gemini_judge import (
     BehaviorCheckResult,
 )
 from detra.evaluation.engine import EvaluationEngine
+from detra.judges.batching import MicroBatchJudge
+from detra.evaluation.budget import JudgeBudget, JudgeBudgets
+from detra.judges.control import CircuitOpenError, CircuitState, ProviderController
+from detra.judges.hedging import Hedger
+from detra.evaluation.cache import (
+    LRUEvaluationCache,
+    SQLiteEvaluationCache,
+    TieredEvaluationCache,
+    cache_get,
+    cache_set,
+    judge_identity,
+    make_cache_key,
+)
 
 
 class TestPrompts:
@@ -100,8 +123,8 @@ class TestRuleEvaluator:
         )
         # JSON should be valid
         json_checks = [c for c in result.all_checks if c.check_name == "json_valid"]
-        if json_checks:
-            assert json_checks[0].passed
+        assert len(json_checks) == 1
+        assert json_checks[0].passed
 
     def test_check_length_constraints(self, evaluator):
         """Test length constraint checking."""
@@ -112,9 +135,9 @@ class TestRuleEvaluator:
         )
         # Length check should apply for suspiciously short outputs
         length_checks = [c for c in result.all_checks if c.check_name == "output_length"]
-        if length_checks:
-            # "Too short" is 9 chars, which is < 10, so should fail
-            assert not length_checks[0].passed
+        # "Too short" is 9 chars, which is < 10, so should fail
+        assert len(length_checks) == 1
+        assert not length_checks[0].passed
 
     def test_all_rules_pass(self, evaluator):
         """Test when all rules pass."""
@@ -136,6 +159,116 @@ class TestRuleEvaluator:
         assert isinstance(result.critical_failure, bool)
         assert isinstance(result.score, float)
 
+    def test_error_patterns_reported_once_each(self, evaluator):
+        result = evaluator.check(
+            input_data="q",
+            output_data="I apologize. Error: failed. I apologize again. Error: twice.",
+        )
+        names = [c.check_name for c in result.failed_checks]
+        assert names.count("error_pattern_(?i)error:") == 1
+        assert names.count("error_pattern_(?i)i apologize") == 1
+        assert len(names) == 2
+
+    def test_passing_checks_are_listed_on_demand(self, evaluator):
+        result = evaluator.check(input_data="q", output_data='{"entities": ["A", "B"]}')
+        assert result.failed_checks == []
+        assert result.passed_count == result.checks_run > 1
+        passed = result.passed_checks
+        assert len(passed) == result.checks_run
+        assert all(check.passed for check in passed)
+        assert {"empty_output", "json_valid", "output_length"} <= {c.check_name for c in passed}
+
+    def test_passed_checks_can_be_given_and_assigned(self, evaluator):
+        check = RuleCheckResult(check_name="custom", passed=True, severity="low")
+        result = RuleEvaluationResult(1.0, False, [check])
+        assert result.passed_checks == [check]
+        assert result.all_checks == [check]
+
+        result = evaluator.check(input_data="q", output_data='{"entities": ["A", "B"]}')
+        result.passed_checks = [check]
+        assert result.passed_checks == [check]
+        assert result.passed_count == 1
+
+    def test_overlapping_forbidden_patterns_all_fire(self, evaluator):
+        node = NodeConfig(format_rules={"forbidden_patterns": ["foo bar", r"bar \d+"]})
+        result = evaluator.check("q", "output foo bar 123", node)
+        names = {c.check_name for c in result.failed_checks}
+        assert {"forbidden_pattern_foo bar", "forbidden_pattern_bar \\d+"} <= names
+        assert "forbidden_pattern_foo bar" not in {c.check_name for c in result.passed_checks}
+
+    def test_node_format_rules_applied(self, evaluator):
+        node = NodeConfig(format_rules={
+            "required_keys": ["parties", "dates"],
+            "must_contain": ["party", "party a"],
+            "must_not_contain": ["Confidential"],
+            "forbidden_patterns": [r"(?i)\bssn\b"],
+        })
+        result = evaluator.check(
+            input_data="q",
+            output_data='{"parties": ["Party A"], "note": "CONFIDENTIAL ssn"}',
+            node_config=node,
+        )
+        names = {c.check_name for c in result.failed_checks}
+        assert names == {
+            "required_key_dates",
+            "must_not_contain_Confidential",
+            "forbidden_pattern_(?i)\\bssn\\b",
+        }
+
+    def test_format_rules_precompiled_and_validated(self):
+        from pydantic import ValidationError
+
+        node = NodeConfig(format_rules={"must_not_contain": ["a", "b"]})
+        assert node.format_rules.must_not_contain_set is not None
+        with pytest.raises(ValidationError):
+            NodeConfig(format_rules={"forbidden_patterns": ["(unclosed"]})
+
+    def test_check_format_requirements_dict_api(self, evaluator):
+        failures = evaluator.check_format_requirements("short text", {"max_length": 5})
+        assert [f.check_name for f in failures] == ["max_length"]
+
+    def test_incremental_checker_fails_early_and_matches_full_check(self, evaluator):
+        node = NodeConfig(format_rules={
+            "must_contain": ["summary"],
+            "must_not_contain": ["confidential"],
+            "max_length": 40,
+        })
+        text = "The confid" + "ential part. Error: boom" + " and then some more text"
+        checker = IncrementalRuleChecker(node)
+        early = checker.feed(text[:10]) + checker.feed(text[10:34])
+        assert "must_not_contain_confidential" in {f.check_name for f in early}
+        rest = checker.feed(text[34:]) + checker.finish()
+        names = {f.check_name for f in early + rest}
+        full = {f.check_name for f in evaluator.check("", text, node).failed_checks}
+        assert names == full
+        assert {"max_length", "must_contain_summary", "must_not_contain_confidential"} <= names
+
+    def test_incremental_checker_matches_full_check_under_any_chunking(self, evaluator):
+        node = NodeConfig(format_rules={
+            "must_contain": ["def ghi", "ghi foo"],
+            "must_not_contain": ["foo bar", "bar baz", "baz"],
+            "forbidden_patterns": [r"bar \d+", r"\d+ end"],
+        })
+        rng = random.Random(3)
+        words = ["abc", "def", "ghi", "foo", "bar", "baz", "123", "end", "Error:", "I apologize"]
+        for _ in range(200):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+            full = {
+                f.check_name for f in evaluator.check("", text, node).failed_checks
+                if f.check_name.startswith(_INCREMENTAL_CHECKS)
+            }
+            checker = IncrementalRuleChecker(node, max_match=16, holdback=4)
+            pos = 0
+            while pos < len(text):
+                step = rng.choice([1, 2, 3, 7])
+                checker.feed(text[pos:pos + step])
+                pos += step
+            checker.finish()
+            assert {f.check_name for f in checker.failures} == full, text
+
+
+_INCREMENTAL_CHECKS = ("error_pattern_", "must_contain_", "must_not_contain_", "forbidden_pattern_")
+
 
 class TestFailureClassifier:
     """Tests for FailureClassifier."""
@@ -279,6 +412,104 @@ class TestGeminiJudge:
         assert result.score < 0.5
 
 
+    @pytest.mark.asyncio
+    async def test_requests_structured_output(self, judge):
+        response = MagicMock()
+        response.text = json.dumps({
+            "expected_results": [{
+                "behavior": "Must return JSON", "present": True, "confidence": 0.9,
+                "reasoning": "ok", "evidence": None,
+            }],
+            "unexpected_results": [],
+            "overall_assessment": "fine",
+        })
+        judge._client.models.generate_content.return_value = response
+
+        result = await judge.evaluate("in", "out", ["Must return JSON"], [])
+
+        config = judge._client.models.generate_content.call_args.kwargs["config"]
+        assert config["response_mime_type"] == "application/json"
+        schema = config["response_schema"]
+        assert "additionalProperties" not in schema
+        evidence = schema["properties"]["expected_results"]["items"]["properties"]["evidence"]
+        assert evidence == {"type": "string", "nullable": True}
+        assert judge._client.models.generate_content.call_count == 1
+        assert not result.flagged and result.score == 1.0
+
+    @pytest.mark.asyncio
+    async def test_checks_only_unanswered_behaviors_concurrently(self, judge):
+        expected = [f"expected {i}" for i in range(6)]
+        batch = json.dumps({
+            "expected_results": [
+                {"behavior": "expected 1", "present": True, "confidence": 0.9, "reasoning": ""},
+                {"behavior": "expected 0", "present": "yes"},  # not a boolean verdict
+            ],
+            "unexpected_results": [],
+            "overall_assessment": "partial",
+        })
+        judge.fallback_concurrency = 2
+        prompts = []
+        running = peak = 0
+
+        async def generate(prompt, schema=None):
+            nonlocal running, peak
+            if "Evaluate multiple behaviors" in prompt:
+                return batch
+            prompts.append(prompt)
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            present = "expected 2" not in prompt
+            return json.dumps({"behavior_present": present, "confidence": 0.8, "reasoning": "r"})
+
+        judge._generate_async = generate
+        result = await judge.evaluate("in", "out", expected, ["leaks secrets"])
+
+        assert len(prompts) == 6  # expected 0, 2-5 and the unexpected behavior
+        assert peak == 2
+        assert [c.behavior for c in result.checks_failed] == [
+            "expected 2", "UNEXPECTED: leaks secrets",
+        ]
+        assert result.score == pytest.approx(5 / 7)
+
+    @pytest.mark.asyncio
+    async def test_timed_out_calls_are_not_retried(self, judge):
+        judge.controller = ProviderController(ProviderControlConfig(
+            min_timeout_seconds=0.01, max_timeout_seconds=0.01,
+        ))
+        release = threading.Event()
+
+        def slow_generate(**kwargs):
+            release.wait(1)
+            return MagicMock(text="{}")
+
+        judge._client.models.generate_content.side_effect = slow_generate
+        try:
+            with pytest.raises(TimeoutError):
+                await judge._generate_async("prompt")
+        finally:
+            release.set()
+
+        assert judge._client.models.generate_content.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_fallback_judge_errors_are_not_verdicts(self, judge):
+        batch = json.dumps({"expected_results": [], "unexpected_results": []})
+
+        async def generate(prompt, schema=None):
+            if "Evaluate multiple behaviors" in prompt:
+                return batch
+            raise RuntimeError("quota exceeded")
+
+        judge._generate_async = generate
+        result = await judge.evaluate("in", "out", [], ["leaks secrets"])
+
+        assert result.flagged
+        assert result.flag_category == "error"
+        assert "quota exceeded" in result.flag_reason
+
+
 class TestEvaluationEngine:
     """Tests for EvaluationEngine."""
 
@@ -336,6 +567,145 @@ class TestEvaluationEngine:
         # Should have security issues due to PII in output
         assert len(result.security_issues) > 0 or result.score > 0
 
+    @pytest.mark.asyncio
+    async def test_local_hits_decide_and_clean_scans_escalate(
+        self, engine, mock_judge, sample_node_config
+    ):
+        result = await engine.evaluate(
+            node_config=sample_node_config,
+            input_data="Extract entities",
+            output_data="Contact john.doe@example.com for details",
+        )
+        mock_judge.check_security.assert_awaited_once_with(
+            "Extract entities", "Contact john.doe@example.com for details", ["prompt_injection"],
+        )
+        assert result.security_decided_by == {
+            "pii_detection": "local", "prompt_injection": "judge",
+        }
+        assert [i["check"] for i in result.security_issues] == ["pii_detection"]
+        issue = result.security_issues[0]
+        assert issue["source"] == "local"
+        assert "john.doe@example.com" not in issue["evidence"]
+
+    @pytest.mark.asyncio
+    async def test_clean_scans_are_final_when_configured(
+        self, mock_judge, sample_node_config, sample_security_config
+    ):
+        config = sample_security_config.model_copy(
+            update={"final_when_clean": ["pii_detection", "prompt_injection"]},
+        )
+        engine = EvaluationEngine(mock_judge, config)
+        result = await engine.evaluate(sample_node_config, "Extract entities", "All clear")
+
+        mock_judge.check_security.assert_not_awaited()
+        assert result.security_decided_by == {
+            "pii_detection": "local", "prompt_injection": "local",
+        }
+        assert result.security_issues == []
+
+    @pytest.mark.asyncio
+    async def test_uncovered_and_confirmed_checks_escalate_to_judge(
+        self, engine, mock_judge, sample_node_config
+    ):
+        mock_judge.check_security = AsyncMock(return_value=[
+            {"check": "sensitive_data_leak", "detected": True, "severity": "high"},
+        ])
+        node = sample_node_config.model_copy(update={
+            "security_checks": ["pii_detection", "sensitive_data_leak", "harmful_content"],
+        })
+        result = await engine.evaluate(node, "Extract entities", "How to hack a bank account")
+
+        # harmful_content hit locally, but the default config confirms it with
+        # the judge; the clean PII scan isn't final by default either.
+        mock_judge.check_security.assert_awaited_once_with(
+            "Extract entities", "How to hack a bank account",
+            ["pii_detection", "sensitive_data_leak", "harmful_content"],
+        )
+        assert result.security_decided_by == {
+            "pii_detection": "judge",
+            "sensitive_data_leak": "judge",
+            "harmful_content": "judge",
+        }
+        assert result.security_issues == [{
+            "check": "sensitive_data_leak", "detected": True, "severity": "high",
+            "source": "judge",
+        }]
+
+    @pytest.mark.asyncio
+    async def test_security_and_behavior_phases_run_concurrently(
+        self, mock_judge, sample_node_config, sample_security_config
+    ):
+        config = sample_security_config.model_copy(update={"local_scanning": False})
+        running = []
+
+        behaviors = mock_judge.evaluate_behaviors.return_value
+
+        async def slow(*args, **kwargs):
+            running.append(1)
+            await asyncio.sleep(0.05)
+            assert len(running) == 2  # the other phase started meanwhile
+            return [] if args else behaviors
+
+        mock_judge.check_security = AsyncMock(side_effect=slow)
+        mock_judge.evaluate_behaviors = AsyncMock(side_effect=slow)
+        backend = MagicMock()
+        backend.emit_count = AsyncMock()
+        backend.emit_distribution = AsyncMock()
+        engine = EvaluationEngine(mock_judge, config, backend=backend)
+
+        result = await engine.evaluate(sample_node_config, "in", "some output text")
+
+        assert result.score == 0.9
+        assert result.latency_ms < 90
+        phases = [
+            c.args[2]["phase"] for c in backend.emit_distribution.await_args_list
+            if c.args[0] == "detra.eval.phase.latency_ms"
+        ]
+        assert sorted(phases) == ["behaviors", "rules", "security"]
+
+    @pytest.mark.asyncio
+    async def test_critical_rule_failure_cancels_judge_phases(
+        self, engine, mock_judge, sample_node_config
+    ):
+        result = await engine.evaluate(sample_node_config, "in", "")
+        assert result.flagged
+        mock_judge.evaluate_behaviors.assert_not_awaited()
+        mock_judge.check_security.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_judge_errors_keep_their_type(self, engine, mock_judge, sample_node_config):
+        mock_judge.evaluate_behaviors = AsyncMock(side_effect=RuntimeError("judge down"))
+        with pytest.raises(RuntimeError, match="judge down"):
+            await engine.evaluate(sample_node_config, "in", "some output text")
+
+    @pytest.mark.asyncio
+    async def test_phase_timeouts(self, mock_judge, sample_node_config, sample_security_config):
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        mock_judge.evaluate_behaviors = AsyncMock(side_effect=hang)
+        mock_judge.check_security = AsyncMock(side_effect=hang)
+        config = sample_security_config.model_copy(update={"local_scanning": False})
+        engine = EvaluationEngine(
+            mock_judge, config, security_timeout=0.01, behavior_timeout=0.01,
+        )
+
+        result = await engine.evaluate(sample_node_config, "in", "some output text")
+
+        assert result.flag_category == "error"
+        assert "timed out" in result.flag_reason
+        assert result.security_decided_by == {}
+
+    @pytest.mark.asyncio
+    async def test_local_scanning_disabled_sends_all_checks_to_judge(
+        self, mock_judge, sample_node_config, sample_security_config
+    ):
+        config = sample_security_config.model_copy(update={"local_scanning": False})
+        engine = EvaluationEngine(mock_judge, config)
+        result = await engine.evaluate(sample_node_config, "in", "some output text")
+        mock_judge.check_security.assert_awaited_once()
+        assert set(result.security_decided_by.values()) == {"judge"}
+
     @pytest.mark.asyncio
     async def test_evaluate_skips_llm_on_critical_rule_failure(self, engine, sample_node_config):
         """Test that LLM evaluation is skipped on critical rule failures."""
@@ -361,6 +731,562 @@ class TestEvaluationEngine:
         assert isinstance(result, EvaluationResult)
 
 
+class TestEvaluationCache:
+    """Tests for the judge result cache."""
+
+    @pytest.fixture
+    def result(self):
+        return EvaluationResult(
+            score=0.5,
+            flagged=True,
+            checks_failed=[BehaviorCheckResult(behavior="b", passed=False, reasoning="r")],
+            eval_tokens_used=300,
+        )
+
+    @pytest.fixture
+    def backend(self):
+        backend = MagicMock()
+        backend.emit_count = AsyncMock()
+        return backend
+
+    def test_key_ignores_whitespace_and_dict_order(self, sample_node_config):
+        a = make_cache_key(sample_node_config, "extract  this\n", {"x": 1, "y": 2})
+        b = make_cache_key(sample_node_config, "extract this", {"y": 2, "x": 1})
+        assert a == b
+
+    def test_key_changes_with_behaviors(self, sample_node_config):
+        other = sample_node_config.model_copy(update={"expected_behaviors": ["Other"]})
+        assert make_cache_key(sample_node_config, "in", "out") != make_cache_key(other, "in", "out")
+
+    def test_key_changes_with_judge_model(self, sample_node_config):
+        class Judge:
+            def __init__(self, model):
+                self.model = model
+
+        keys = {
+            make_cache_key(sample_node_config, "in", "out", judge=judge_identity(Judge(model)))
+            for model in ("gpt-4o-mini", "anthropic/claude-3-haiku")
+        }
+        assert len(keys) == 2
+
+    def test_lru_evicts_least_recently_used(self, result):
+        cache = LRUEvaluationCache(max_entries=2)
+        cache.set("a", result)
+        cache.set("b", result)
+        cache.get("a")
+        cache.set("c", result)
+        assert cache.get("a")[0] is not None
+        assert cache.get("b") == (None, None)
+        assert len(cache) == 2
+
+    def test_lru_expires_entries(self, result):
+        cache = LRUEvaluationCache(ttl_seconds=0.0)
+        cache.set("a", result)
+        assert cache.get("a") == (None, None)
+
+    def test_lru_returns_copies(self, result):
+        cache = LRUEvaluationCache()
+        cache.set("a", result)
+        cache.get("a")[0].checks_failed.clear()
+        assert len(cache.get("a")[0].checks_failed) == 1
+
+    def test_sqlite_round_trip_and_tiering(self, result, tmp_path):
+        disk = SQLiteEvaluationCache(str(tmp_path / "cache.db"))
+        disk.set("a", result)
+        restored, tier = SQLiteEvaluationCache(str(tmp_path / "cache.db")).get("a")
+        assert tier == "sqlite"
+        assert restored.score == 0.5
+        assert restored.checks_failed[0].behavior == "b"
+
+        tiered = TieredEvaluationCache(LRUEvaluationCache(), disk)
+        assert tiered.get("a")[1] == "sqlite"
+        assert tiered.get("a")[1] == "memory"
+
+    @pytest.mark.asyncio
+    async def test_async_access_runs_disk_tier_off_the_loop(self, result, tmp_path):
+        disk = SQLiteEvaluationCache(str(tmp_path / "cache.db"))
+        tiered = TieredEvaluationCache(LRUEvaluationCache(), disk)
+        threads = []
+        original = disk.get
+
+        def get(key):
+            threads.append(threading.current_thread())
+            return original(key)
+
+        disk.get = get
+        await cache_set(tiered, "a", result)
+        tiered.memory = LRUEvaluationCache()
+
+        assert (await cache_get(tiered, "a"))[1] == "sqlite"
+        assert (await cache_get(tiered, "a"))[1] == "memory"
+        assert threads and threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_engine_serves_repeated_evaluations_from_cache(
+        self, sample_node_config, sample_security_config, result, backend
+    ):
+        judge = MagicMock()
+        judge.evaluate_behaviors = AsyncMock(return_value=result)
+        judge.check_security = AsyncMock(return_value=[])
+        engine = EvaluationEngine(
+            judge, sample_security_config, cache=LRUEvaluationCache(), backend=backend,
+        )
+
+        first = await engine.evaluate(sample_node_config, "in", "some output text")
+        second = await engine.evaluate(sample_node_config, "in", "some output text")
+
+        assert judge.evaluate_behaviors.await_count == 1
+        assert second.score == first.score
+        assert second.eval_tokens_used == 0
+        emitted = [
+            c.args[0] for c in backend.emit_count.await_args_list
+            if c.args[0].startswith("detra.eval.cache")
+        ]
+        assert emitted == ["detra.eval.cache.miss", "detra.eval.cache.hit"]
+
+    @pytest.mark.asyncio
+    async def test_engine_does_not_cache_judge_errors(
+        self, sample_node_config, sample_security_config
+    ):
+        judge = MagicMock()
+        judge.evaluate_behaviors = AsyncMock(return_value=EvaluationResult(
+            score=0.5, flagged=True, flag_category="error", flag_reason="Judge error",
+        ))
+        judge.check_security = AsyncMock(return_value=[])
+        engine = EvaluationEngine(judge, sample_security_config, cache=LRUEvaluationCache())
+
+        await engine.evaluate(sample_node_config, "in", "some output text")
+        await engine.evaluate(sample_node_config, "in", "some output text")
+
+        assert judge.evaluate_behaviors.await_count == 2
+
+
+class TestMicroBatchJudge:
+    """Tests for cross-trace judge micro-batching."""
+
+    @staticmethod
+    def _judge(response: str):
+        judge = MagicMock()
+        judge.complete = AsyncMock(return_value=response)
+        judge.evaluate_behaviors = AsyncMock(return_value=EvaluationResult(score=0.25, flagged=True))
+        judge.check_security = AsyncMock(return_value=[])
+        return judge
+
+    @staticmethod
+    def _item(index: int, present: bool) -> dict:
+        return {
+            "index": index,
+            "expected_results": [{"behavior": "Accurate", "present": present}],
+            "unexpected_results": [],
+        }
+
+    @pytest.mark.asyncio
+    async def test_concurrent_items_share_one_request(self):
+        payload = {"items": [self._item(1, False), self._item(0, True), self._item(2, True)]}
+        judge = self._judge(json.dumps(payload))
+        batcher = MicroBatchJudge(judge, window_ms=20, max_batch_size=8)
+
+        results = await asyncio.gather(*(
+            batcher.evaluate_behaviors(f"in {i}", f"out {i}", ["Accurate"], [])
+            for i in range(3)
+        ))
+
+        assert judge.complete.await_count == 1
+        assert judge.evaluate_behaviors.await_count == 0
+        assert [r.score for r in results] == [1.0, 0.0, 1.0]
+        assert results[1].flagged
+        prompt = judge.complete.await_args.args[0]
+        assert "### Item 2" in prompt and "out 2" in prompt
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_without_waiting_for_window(self):
+        payload = {"items": [self._item(0, True), self._item(1, True)]}
+        judge = self._judge(json.dumps(payload))
+        batcher = MicroBatchJudge(judge, window_ms=60_000, max_batch_size=2)
+
+        results = await asyncio.wait_for(asyncio.gather(
+            batcher.evaluate_behaviors("a", "a", ["Accurate"], []),
+            batcher.evaluate_behaviors("b", "b", ["Accurate"], []),
+        ), timeout=1)
+
+        assert len(results) == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_items_fall_back_to_single_calls(self):
+        judge = self._judge(json.dumps({"items": [self._item(0, True)]}))
+        batcher = MicroBatchJudge(judge, window_ms=10)
+
+        first, second = await asyncio.gather(
+            batcher.evaluate_behaviors("a", "a", ["Accurate"], []),
+            batcher.evaluate_behaviors("b", "b", ["Accurate"], []),
+        )
+
+        assert first.score == 1.0
+        assert second.score == 0.25
+        assert judge.evaluate_behaviors.await_count == 1
+        assert batcher.fallbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_different_behavior_specs_are_not_mixed(self):
+        judge = self._judge("not json")
+        batcher = MicroBatchJudge(judge, window_ms=10)
+
+        await asyncio.gather(
+            batcher.evaluate_behaviors("a", "a", ["Accurate"], []),
+            batcher.evaluate_behaviors("b", "b", ["Concise"], []),
+        )
+
+        assert judge.complete.await_count == 0
+        assert judge.evaluate_behaviors.await_count == 2
+
+    def test_requires_complete(self):
+        with pytest.raises(TypeError):
+            MicroBatchJudge(object())
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestJudgeBudget:
+    """Tests for per-node judge budgets."""
+
+    def test_evals_per_minute_refills_over_time(self):
+        clock = FakeClock()
+        budget = JudgeBudget(JudgeBudgetConfig(evals_per_minute=2), clock=clock)
+        assert budget.try_acquire() is None
+        assert budget.try_acquire() is None
+        assert budget.try_acquire() == "evals"
+        clock.now += 30
+        assert budget.try_acquire() is None
+
+    def test_tokens_per_day_charged_after_the_call(self):
+        clock = FakeClock()
+        budget = JudgeBudget(JudgeBudgetConfig(tokens_per_day=1_000), clock=clock)
+        assert budget.try_acquire() is None
+        budget.release(tokens_used=1_500)
+        assert budget.try_acquire() == "tokens"
+        clock.now += 86_400 * 0.6  # the 500-token debt is repaid after half a day
+        assert budget.try_acquire() is None
+
+    def test_max_concurrent(self):
+        budget = JudgeBudget(JudgeBudgetConfig(max_concurrent=1))
+        assert budget.try_acquire() is None
+        assert budget.try_acquire() == "concurrency"
+        budget.release()
+        assert budget.try_acquire() is None
+
+    def test_node_limits_override_defaults_field_by_field(self):
+        budgets = JudgeBudgets(JudgeBudgetConfig(evals_per_minute=60, max_concurrent=4))
+        budget = budgets.for_node("n", JudgeBudgetConfig(max_concurrent=1))
+        assert budget.config.evals_per_minute == 60
+        assert budget.config.max_concurrent == 1
+        assert budgets.for_node("n", None) is budget
+        assert JudgeBudgets().for_node("free", None) is None
+
+    @pytest.mark.asyncio
+    async def test_engine_degrades_to_rules_when_exhausted(
+        self, sample_node_config, sample_security_config
+    ):
+        judge = MagicMock()
+        judge.evaluate_behaviors = AsyncMock(return_value=EvaluationResult(
+            score=0.9, flagged=False, eval_tokens_used=100,
+        ))
+        judge.check_security = AsyncMock(return_value=[])
+        backend = MagicMock()
+        backend.emit_count = AsyncMock()
+        backend.emit_distribution = AsyncMock()
+        node = sample_node_config.model_copy(update={
+            "judge_budget": JudgeBudgetConfig(evals_per_minute=1),
+        })
+        config = sample_security_config.model_copy(
+            update={"final_when_clean": ["pii_detection", "prompt_injection"]},
+        )
+        engine = EvaluationEngine(judge, config, backend=backend)
+
+        first = await engine.evaluate(node, "in", "some output text", node_name="n")
+        second = await engine.evaluate(node, "in", "some output text", node_name="n")
+
+        assert judge.evaluate_behaviors.await_count == 1
+        assert first.score == 0.9
+        assert second.raw_evaluation == {"budget_exhausted": "evals"}
+        assert second.security_decided_by == {
+            "pii_detection": "local", "prompt_injection": "local",
+        }
+        backend.emit_count.assert_any_await(
+            "detra.eval.budget_exhausted", 1, {"budget": "evals", "node": "n"},
+        )
+        assert engine.budgets.for_node("n", None).in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_critical_rule_failures_do_not_consume_budget(self, sample_node_config):
+        judge = MagicMock()
+        judge.evaluate_behaviors = AsyncMock(return_value=EvaluationResult(
+            score=0.9, flagged=False,
+        ))
+        judge.check_security = AsyncMock(return_value=[])
+        node = sample_node_config.model_copy(update={
+            "judge_budget": JudgeBudgetConfig(evals_per_minute=1),
+        })
+        engine = EvaluationEngine(judge, SecurityConfig(local_scanning=False))
+
+        for _ in range(3):
+            result = await engine.evaluate(node, "in", "", node_name="n")
+            assert result.raw_evaluation is None
+        result = await engine.evaluate(node, "in", "some output text", node_name="n")
+
+        assert result.raw_evaluation is None
+        judge.evaluate_behaviors.assert_awaited_once()
+        assert engine.budgets.for_node("n", None).in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_do_not_consume_budget(self, sample_node_config):
+        judge = MagicMock()
+        judge.evaluate_behaviors = AsyncMock(return_value=EvaluationResult(
+            score=0.9, flagged=False,
+        ))
+        judge.check_security = AsyncMock(return_value=[])
+        node = sample_node_config.model_copy(update={
+            "judge_budget": JudgeBudgetConfig(evals_per_minute=1), "security_checks": [],
+        })
+        engine = EvaluationEngine(
+            judge, SecurityConfig(local_scanning=False), cache=LRUEvaluationCache(),
+        )
+
+        for _ in range(3):
+            result = await engine.evaluate(node, "in", "out", node_name="n")
+            assert result.raw_evaluation is None
+
+        assert judge.evaluate_behaviors.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unnamed_nodes_get_separate_budgets(self, sample_node_config):
+        judge = MagicMock()
+        judge.evaluate_behaviors = AsyncMock(return_value=EvaluationResult(
+            score=0.9, flagged=False,
+        ))
+        judge.check_security = AsyncMock(return_value=[])
+        budget = {"judge_budget": JudgeBudgetConfig(evals_per_minute=1), "description": ""}
+        first = sample_node_config.model_copy(update=budget)
+        second = sample_node_config.model_copy(update=budget)
+        engine = EvaluationEngine(judge, SecurityConfig(local_scanning=False))
+
+        await engine.evaluate(first, "in", "out")
+        result = await engine.evaluate(second, "in", "out")
+
+        assert result.raw_evaluation is None
+        assert judge.evaluate_behaviors.await_count == 2
+
+
+class RateLimitedError(Exception):
+    status_code = 429
+
+
+class TestProviderController:
+    """Tests for judge concurrency control and circuit breaking."""
+
+    @staticmethod
+    def controller(clock, **overrides):
+        config = ProviderControlConfig(**{
+            "initial_concurrency": 8, "failure_threshold": 3, "open_seconds": 30,
+            **overrides,
+        })
+        return ProviderController(config, clock=clock)
+
+    @staticmethod
+    async def fail():
+        raise RateLimitedError("slow down")
+
+    @staticmethod
+    async def succeed():
+        return "ok"
+
+    @pytest.mark.asyncio
+    async def test_overload_halves_limit_and_success_grows_it(self):
+        clock = FakeClock()
+        controller = self.controller(clock)
+        with pytest.raises(RateLimitedError):
+            await controller.call(self.fail)
+        assert controller.limit == 4
+        with pytest.raises(RateLimitedError):
+            await controller.call(self.fail)  # within the cooldown: no second halving
+        assert controller.limit == 4
+        for _ in range(8):
+            await controller.call(self.succeed)
+        assert controller.limit == 5
+
+    @pytest.mark.asyncio
+    async def test_other_errors_do_not_count_against_provider(self):
+        controller = self.controller(FakeClock())
+
+        async def bad_request():
+            raise ValueError("bad prompt")
+
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                await controller.call(bad_request)
+        assert controller.limit == 8
+        assert controller.circuit_state is CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_then_probes(self):
+        clock = FakeClock()
+        controller = self.controller(clock)
+        backend = MagicMock()
+        backend.emit_count = AsyncMock()
+        backend.emit_gauge = AsyncMock()
+        controller.backend = backend
+        for _ in range(3):
+            with pytest.raises(RateLimitedError):
+                await controller.call(self.fail)
+        assert controller.circuit_state is CircuitState.OPEN
+
+        inner = AsyncMock()
+        with pytest.raises(CircuitOpenError):
+            await controller.call(inner)
+        inner.assert_not_awaited()
+        backend.emit_count.assert_any_await("detra.judge.rejected", 1, {"provider": "judge"})
+        backend.emit_gauge.assert_any_await("detra.judge.circuit_state", 2, {"provider": "judge"})
+
+        clock.now += 30
+        with pytest.raises(RateLimitedError):
+            await controller.call(self.fail)  # failed probe re-opens
+        assert controller.circuit_state is CircuitState.OPEN
+        clock.now += 30
+        assert await controller.call(self.succeed) == "ok"
+        assert controller.circuit_state is CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_limit_queues_excess_calls(self):
+        controller = self.controller(FakeClock(), initial_concurrency=1, max_concurrency=1)
+        release = asyncio.Event()
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            peak = max(peak, controller.in_flight)
+            await release.wait()
+            return "done"
+
+        tasks = [asyncio.create_task(controller.call(work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert controller.in_flight == 1
+        release.set()
+        assert await asyncio.gather(*tasks) == ["done"] * 3
+        assert peak == 1
+        assert controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_follows_recent_p99(self):
+        clock = FakeClock()
+        controller = self.controller(clock, min_timeout_seconds=1, max_timeout_seconds=60)
+        assert controller.timeout_seconds == 60
+
+        async def two_seconds():
+            clock.now += 2.0
+            return "ok"
+
+        for _ in range(20):
+            await controller.call(two_seconds)
+        assert controller.timeout_seconds == pytest.approx(4.0)
+
+    @pytest.mark.asyncio
+    async def test_gemini_does_not_retry_open_circuit(self, sample_gemini_config):
+        controller = ProviderController(ProviderControlConfig(failure_threshold=1))
+        controller._transition(CircuitState.OPEN)
+        controller._open_until = float("inf")
+        judge = GeminiJudge(sample_gemini_config, controller=controller)
+        judge._client = MagicMock()
+        with pytest.raises(CircuitOpenError):
+            await judge._generate_async("prompt")
+        judge._client.models.generate_content.assert_not_called()
+
+
+class TestHedger:
+    """Tests for hedged judge requests."""
+
+    @staticmethod
+    async def warm_up(hedger, clock, latency=0.01):
+        async def call():
+            clock.now += latency
+            return "fast"
+
+        for _ in range(20):
+            await hedger.run(call)
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_before_warmup(self):
+        hedger = Hedger(HedgeConfig(enabled=True, max_extra_ratio=1.0), clock=FakeClock())
+        hedge = AsyncMock()
+        assert await hedger.run(AsyncMock(return_value="a"), hedge) == "a"
+        assert hedger.delay_seconds is None
+        hedge.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        clock = FakeClock()
+        backend = MagicMock()
+        backend.emit_count = AsyncMock()
+        backend.emit_gauge = AsyncMock()
+        backend.emit_distribution = AsyncMock()
+        hedger = Hedger(
+            HedgeConfig(enabled=True, max_extra_ratio=1.0), clock=clock, backend=backend,
+        )
+        await self.warm_up(hedger, clock)
+        assert hedger.delay_seconds == pytest.approx(0.01)
+
+        cancelled = False
+
+        async def stuck():
+            nonlocal cancelled
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        async def fallback():
+            return "fallback"
+
+        assert await hedger.run(stuck, fallback) == "fallback"
+        await asyncio.sleep(0)
+        assert cancelled
+        backend.emit_count.assert_any_await("detra.judge.hedge.sent", 1, {"provider": "judge"})
+        backend.emit_count.assert_any_await("detra.judge.hedge.won", 1, {"provider": "judge"})
+        assert hedger.hedge_rate == pytest.approx(1 / 21)
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_extra_requests(self):
+        clock = FakeClock()
+        hedger = Hedger(HedgeConfig(enabled=True, max_extra_ratio=0.05), clock=clock)
+        await self.warm_up(hedger, clock)  # 20 calls earn one hedge
+        hedge = AsyncMock(return_value="hedge")
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        assert await hedger.run(slow, hedge) == "hedge"
+        assert await hedger.run(slow, hedge) == "primary"
+        assert hedge.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_hedge_falls_back_to_primary(self):
+        clock = FakeClock()
+        hedger = Hedger(HedgeConfig(enabled=True, max_extra_ratio=1.0), clock=clock)
+        await self.warm_up(hedger, clock)
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        assert await hedger.run(slow, AsyncMock(side_effect=RateLimitedError())) == "primary"
+
+
 class TestEvaluationResult:
     """Tests for EvaluationResult dataclass."""
 
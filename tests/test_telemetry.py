@@ -150,6 +150,79 @@ class TestDatadogClient:
         # Should handle gracefully
 
 
+    def test_api_objects_share_one_pooled_client(self, config):
+        from datadog_api_client.v2.api.incidents_api import IncidentsApi
+        from datadog_api_client.v2.api.metrics_api import MetricsApi
+
+        client = DatadogClient(config.model_copy(update={"max_connections": 7}))
+        metrics_api = client._api("_metrics_api", MetricsApi)
+        assert client._api("_metrics_api", MetricsApi) is metrics_api
+        incidents_api = client._api("_incidents_api", IncidentsApi)
+        assert incidents_api.api_client is metrics_api.api_client is client._api_client
+        pool = client._api_client.rest_client.pool_manager
+        assert pool.connection_pool_kw["maxsize"] == 7
+
+    @pytest.fixture
+    def http_requests(self):
+        """Route httpx clients to a handler; collect requests and queue statuses."""
+        import httpx
+
+        seen: list[httpx.Request] = []
+        statuses: list[int] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            status = statuses.pop(0) if statuses else 202
+            return httpx.Response(status, json={"event": {"id": 7, "url": "u"}})
+
+        real = httpx.AsyncClient
+        with patch(
+            "detra.telemetry.datadog_client.httpx.AsyncClient",
+            lambda **kw: real(transport=httpx.MockTransport(handler), **kw),
+        ):
+            yield seen, statuses
+
+    @pytest.mark.asyncio
+    async def test_httpx_transport_gzips_series_and_retries(self, config, http_requests):
+        import gzip
+        import json
+
+        seen, statuses = http_requests
+        statuses.append(503)
+        client = DatadogClient(config.model_copy(update={"transport": "httpx"}))
+        client._retry.initial_delay = 0
+
+        ok = await client.submit_metrics(
+            [{"metric": "detra.m", "type": "count", "points": [[100, 2]], "tags": ["a:b"]}]
+        )
+
+        assert ok is True
+        assert len(seen) == 2
+        request = seen[-1]
+        assert request.url == "https://api.datadoghq.com/api/v2/series"
+        assert request.headers["DD-API-KEY"] == "test_api_key"
+        assert request.headers["Content-Encoding"] == "gzip"
+        series = json.loads(gzip.decompress(request.content))["series"]
+        assert series == [{
+            "metric": "detra.m",
+            "type": 1,
+            "points": [{"timestamp": 100, "value": 2.0}],
+            "tags": ["service:test-service", "env:test", "version:1.0.0", "a:b"],
+        }]
+        assert (await client.submit_event("t", "x"))["id"] == 7
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_httpx_transport_does_not_retry_rejections(self, config, http_requests):
+        seen, statuses = http_requests
+        statuses.append(403)
+        client = DatadogClient(config.model_copy(update={"transport": "httpx"}))
+        assert await client.submit_metrics(
+            [{"metric": "detra.m", "points": [[100, 1]]}]
+        ) is False
+        assert len(seen) == 1
+        await client.close()
+
 class TestLLMObsBridge:
     """Tests for LLMObsBridge."""
 
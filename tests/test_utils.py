@@ -7,11 +7,16 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from detra.utils.codec import get_codec, set_codec
+from detra.utils.keywords import KeywordIndex
+from detra.utils.patterns import PatternSet
 from detra.utils.retry import RetryConfig, async_retry, RetryError
+from detra.utils.sketch import DDSketch, SketchSet, summarize
 from detra.utils.serialization import (
     safe_json_loads,
     safe_json_dumps,
     extract_json_from_text,
+    iter_json_spans,
     truncate_string,
     serialize_for_logging,
 )
@@ -277,6 +282,145 @@ class TestExtractJsonFromText:
         assert result is None
 
 
+class TestJsonSpans:
+    """Tests for the single-pass JSON span locator."""
+
+    def test_brackets_and_escapes_inside_strings_are_ignored(self):
+        text = 'x {"a": "b}]\\"c", "d": [1, {"e": 2}]} y'
+        assert list(iter_json_spans(text)) == [(2, len(text) - 2)]
+        assert extract_json_from_text(text) == {"a": 'b}]"c', "d": [1, {"e": 2}]}
+
+    def test_skips_unparseable_and_stray_brackets(self):
+        assert extract_json_from_text('See [1a] and {note] then {"score": 0.9}') == {"score": 0.9}
+
+    def test_object_is_not_preempted_by_inner_array(self):
+        assert extract_json_from_text('Result: {"items": [1, 2]}') == {"items": [1, 2]}
+
+    def test_truncated_response_falls_back_to_complete_parts(self):
+        text = '{"expected_results": [{"behavior": "a", "present": true}, {"behav'
+        assert extract_json_from_text(text) == {"behavior": "a", "present": True}
+
+    def test_quote_in_prose_does_not_hide_later_json(self):
+        assert extract_json_from_text('He said "hi [there" {"k": "v"}') == {"k": "v"}
+
+    def test_json_inside_an_unparseable_span_is_found(self):
+        text = 'A [ bracket then {"ok": true} and more ] text'
+        assert extract_json_from_text(text) == {"ok": True}
+
+    def test_junk_is_bounded(self):
+        assert extract_json_from_text("[" * 50_000) is None
+
+
+class TestJsonCodec:
+    """The fast codecs keep the stdlib contract."""
+
+    @pytest.fixture(params=["json", "orjson", "msgspec"])
+    def codec_name(self, request):
+        try:
+            set_codec(request.param)
+        except ImportError:
+            pytest.skip(f"{request.param} not installed")
+        yield request.param
+        set_codec(None)
+
+    def test_round_trip_and_defaults(self, codec_name):
+        from datetime import datetime
+
+        class Custom:
+            def __str__(self):
+                return "custom"
+
+        data = {"text": "héllo ✓", "n": [1, 2.5, None, True], 1: 2**70,
+                "when": datetime(2024, 1, 15, 10, 30), "obj": Custom()}
+        encoded = safe_json_dumps(data)
+        assert "héllo ✓" in encoded
+        assert json.loads(encoded) == {
+            "text": "héllo ✓", "n": [1, 2.5, None, True], "1": 2**70,
+            "when": "2024-01-15T10:30:00", "obj": "custom",
+        }
+        assert "\n" in safe_json_dumps({"a": 1}, indent=2)
+        assert json.loads(safe_json_dumps({"b": 1, "a": 2}, sort_keys=True)) == {"a": 2, "b": 1}
+        assert safe_json_dumps({"b": 1, "a": 2}, sort_keys=True).index('"a"') < 5
+        assert get_codec().name == codec_name
+
+    def test_decode_errors_are_json_decode_errors(self, codec_name):
+        with pytest.raises(json.JSONDecodeError):
+            get_codec().loads("{bad")
+        assert safe_json_loads("{bad", default="x") == "x"
+
+    def test_unknown_codec_rejected(self):
+        with pytest.raises(ValueError):
+            set_codec("yaml")
+
+
+class TestDDSketch:
+    """Quantiles stay within the relative accuracy and sketches merge."""
+
+    def test_quantiles_within_relative_accuracy(self):
+        import random
+
+        rng = random.Random(7)
+        values = [rng.lognormvariate(4, 1) for _ in range(20_000)]
+        sketch = DDSketch(0.01)
+        for v in values:
+            sketch.add(v)
+        values.sort()
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+        assert sketch.count == 20_000
+        assert sketch.max == values[-1]
+        assert sketch.buckets < 1_000
+
+    def test_merge_matches_single_sketch(self):
+        whole, left, right = DDSketch(), DDSketch(), DDSketch()
+        for i in range(1, 1001):
+            whole.add(i)
+            (left if i % 2 else right).add(i)
+        left.merge(right)
+        assert left.quantiles([0.5, 0.99]) == whole.quantiles([0.5, 0.99])
+        assert (left.count, left.sum, left.min, left.max) == (1000, 500500, 1, 1000)
+
+    def test_zero_negative_and_empty(self):
+        sketch = DDSketch()
+        assert sketch.quantile(0.5) is None
+        for v in (-10.0, 0.0, 10.0):
+            sketch.add(v)
+        assert sketch.quantile(0.0) == -10.0
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(1.0) == 10.0
+        with pytest.raises(ValueError):
+            sketch.merge(DDSketch(0.05))
+
+    def test_bucket_count_is_bounded(self):
+        sketch = DDSketch(0.01, max_buckets=64)
+        for i in range(10_000):
+            sketch.add(1.01 ** i)
+        assert sketch.buckets <= 64
+        assert abs(sketch.quantile(0.99) - 1.01 ** 9899) <= 0.01 * 1.01 ** 9899
+
+    def test_sketch_set_queries_across_tags(self):
+        sketches = SketchSet(max_series=2)
+        assert sketches.add("lat", 10.0, {"node": "a", "env": "prod"})
+        assert sketches.add("lat", 1000.0, {"node": "b"})
+        assert not sketches.add("lat", 1.0, {"node": "c"})
+        assert sketches.percentiles("lat", {"node": "a"})["p50"] == pytest.approx(10.0, rel=0.01)
+        assert sketches.percentiles("lat")["count"] == 2
+        assert sketches.percentiles("other") == {"p50": None, "p95": None, "p99": None, "count": 0}
+
+    def test_summarize(self):
+        sketch = DDSketch()
+        for v in (1.0, 2.0, 3.0):
+            sketch.add(v)
+        series = {name: (kind, value) for name, kind, value in summarize("m", sketch, (0.5, 0.999))}
+        assert series["m"] == ("gauge", 2.0)
+        assert series["m.count"] == ("count", 3)
+        assert series["m.max"] == ("gauge", 3.0)
+        assert series["m.p50"][1] == pytest.approx(2.0, rel=0.01)
+        assert "m.p999" in series
+        assert summarize("m", DDSketch()) == []
+
+
 class TestTruncateString:
     """Tests for truncate_string function."""
 
@@ -350,6 +494,74 @@ class TestSerializeForLogging:
         assert "CustomObject" in str(result["obj"])
 
 
+class TestPatternSet:
+    """Tests for the single-pass multi-pattern matcher."""
+
+    def test_reports_which_pattern_matched(self):
+        patterns = PatternSet([r"(?i)error:", r"\bSSN\b", r"(?i)as an ai"])
+        hits = patterns.first_hits("As an AI ... ERROR: no SSN, ssn")
+        assert {i: h.text for i, h in hits.items()} == {0: "ERROR:", 1: "SSN", 2: "As an AI"}
+
+    def test_hits_are_in_text_order_across_passes(self):
+        patterns = PatternSet([r"(?i)foo", r"Bar"])
+        assert [h.index for h in patterns.finditer("Bar FOO Bar foo")] == [1, 0, 1, 0]
+
+    def test_guarded_groups_match_plain_alternation(self):
+        import re
+
+        patterns = [
+            r"\b\d{3}-\d{2}-\d{4}\b", r"(\+?1 )?\d{3}-\d{4}", r"\b[a-z]\d{6}\b", r"\w+@\w+",
+        ]
+        text = "id a123456, call +1 555-1234, ssn 123-45-6789, mail x@y and 999-9999"
+        reference = re.compile("|".join(f"(?P<g{i}>{p})" for i, p in enumerate(patterns)))
+        expected = [(int(m.lastgroup[1:]), m.group()) for m in reference.finditer(text)]
+        assert [(h.index, h.text) for h in PatternSet(patterns).finditer(text)] == expected
+
+    def test_case_folding_keeps_escapes(self):
+        patterns = PatternSet([r"\S+@\S+"], ignore_case=True)
+        assert patterns.search("Mail Me@Example.com").text == "Me@Example.com"
+
+    def test_first_hits_include_overlapping_matches(self):
+        patterns = PatternSet(["foo bar", r"bar \d+", "(?i)OO", "zzz"])
+        hits = patterns.first_hits("a foo bar 123")
+        assert [(i, h.start, h.text) for i, h in hits.items()] == [
+            (0, 2, "foo bar"), (2, 3, "oo"), (1, 6, "bar 123"),
+        ]
+
+
+
+class TestKeywordIndex:
+    """Tests for the trie-backed keyword index."""
+
+    # Small indexes take the linear str.find path; padding forces the trie regex.
+    PADDING = [[], [f"pad{i}" for i in range(64)]]
+
+    @pytest.mark.parametrize("padding", PADDING)
+    def test_reports_overlapping_and_nested_keywords(self, padding):
+        index = KeywordIndex(["no dates", "no dates found", "dates found", *padding])
+        hits = [(h.keyword, h.start) for h in index.finditer("There were No dates found.")]
+        assert hits == [("no dates", 11), ("no dates found", 11), ("dates found", 14)]
+
+    @pytest.mark.parametrize("padding", PADDING)
+    def test_whole_words_only(self, padding):
+        index = KeywordIndex(["harm", "c++", *padding])
+        text = "pharmacy; do no harm in c++"
+        assert [h.keyword for h in index.finditer(text)] == ["harm", "c++"]
+        assert KeywordIndex(["harm", *padding], whole_words=False).search("pharmacy").start == 1
+
+    @pytest.mark.parametrize("padding", PADDING)
+    def test_prefixes_match_inflected_forms(self, padding):
+        index = KeywordIndex(["hack", "kill", *padding], prefixes=True)
+        text = "lifehack; hacking and killed"
+        assert [(h.keyword, h.start) for h in index.finditer(text)] == [("hack", 10), ("kill", 22)]
+
+    def test_first_hits_with_many_terms(self):
+        terms = [f"term{i:05d}" for i in range(5000)]
+        index = KeywordIndex(terms)
+        hits = index.first_hits("mentions TERM04999 twice: term04999, and term00001")
+        assert set(hits) == {"term04999", "term00001"}
+        assert hits["term04999"].start == 9
+
 class TestEdgeCases:
     """Edge case tests for utils module."""
 